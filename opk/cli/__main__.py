@@ -68,10 +68,25 @@ def cmd_validate(paths):
             print(f"[ OK ] {p}")
     return 0 if ok else 1
 
-def cmd_bundle(src_dir, out):
+def _load_pdl_arg(path: str):
+    """Load a PDL named on the command line, resolving extends/include."""
+    from ..pdl.loader import load_pdl, PdlResolveError
+    try:
+        return load_pdl(path)
+    except PdlResolveError as e:
+        print(f"[ERROR] {e}")
+        raise SystemExit(2)
+
+def cmd_bundle(src_dir, out, jobs=None, reproducible=False, update=False):
     out = Path(out)
     if not out.suffix: out = out.with_suffix(".orca_printer")
-    build_bundle(Path(src_dir), out)
+    if update:
+        from ..core.bundle import update_bundle
+        res = update_bundle(Path(src_dir), out, jobs=jobs, reproducible=reproducible)
+        print(f"[{'WROTE' if res['written'] else 'UNCHANGED'}] {out}")
+        print(f"[SUMMARY] members={res['members']} reused={res['reused']} deflated={res['deflated']}")
+        return 0
+    build_bundle(Path(src_dir), out, jobs=jobs, reproducible=reproducible)
     print(f"[WROTE] {out}")
     return 0
 
@@ -86,6 +101,19 @@ def main():
     b = sub.add_parser("bundle", help="Bundle profiles into an .orca_printer archive")
     b.add_argument("--in", dest="src", required=True, help="Source directory with printers/ filaments/ processes/")
     b.add_argument("--out", required=True, help="Output .orca_printer path")
+    b.add_argument("--jobs", type=int, help="Worker threads for validate+compress (default: CPU count + 4; 1 = sequential)")
+    b.add_argument("--reproducible", action="store_true", help="Fixed timestamps (SOURCE_DATE_EPOCH or 1980-01-01) and sorted JSON keys: identical inputs give identical archives")
+    b.add_argument("--update", action="store_true", help="Rewrite only changed members of an existing bundle (no-op if nothing changed)")
+
+    # bundle deltas
+    bd = sub.add_parser("bundle-diff", help="Write a delta holding only the members that changed between two bundles")
+    bd.add_argument("old", help="Bundle the fleet already has")
+    bd.add_argument("new", help="Updated bundle")
+    bd.add_argument("--out", required=True, help="Output delta path")
+    ba = sub.add_parser("bundle-apply", help="Apply a delta to a bundle (verified by hash, atomic)")
+    ba.add_argument("base", help="Bundle the delta was made from")
+    ba.add_argument("delta", help="Delta written by bundle-diff")
+    ba.add_argument("--out", help="Output bundle path (default: replace BASE)")
 
     # rules
     r = sub.add_parser("rules", help="Run rule-based checks across printer/filament/process")
@@ -105,16 +133,23 @@ def main():
 
     # install
     ins = sub.add_parser("install", help="Install profiles to Orca presets (with optional backup)")
-    ins.add_argument("--src", required=True, help="Source directory with printers/ filaments/ processes/")
+    ins.add_argument("--src", help="Source directory with printers/ filaments/ processes/")
+    ins.add_argument("--bundle", help="Install from a .orca_printer bundle instead of --src (no extraction)")
     ins.add_argument("--dest", required=True, help="Destination Orca presets directory")
     ins.add_argument("--backup", help="Path to backup ZIP of overwritten files")
     ins.add_argument("--dry-run", action="store_true", help="Compute and print plan without writing files")
+    ins.add_argument("--jobs", type=int, help="Threads for hashing changed files (default: CPU count + 4; 1 = sequential)")
+    ins.add_argument("--no-cache", action="store_true", help="Ignore the persistent hash cache (re-hash every file)")
+    ins.add_argument("--recover", choices=["rollback", "resume"], help="Undo or finish an interrupted install into --dest")
 
     # convert
     cv = sub.add_parser("convert", help="Convert from other formats")
-    cv.add_argument("--from", dest="from_fmt", required=True, choices=["cura","prusa","superslicer","ideamaker","kisslicer"], help="Source format")
+    cv.add_argument("--from", dest="from_fmt", default="auto", choices=["auto","cura","prusa","prusa-bundle","superslicer","ideamaker","kisslicer","archive"], help="Source format (default: sniff each file); prusa-bundle converts every preset of a vendor bundle INI; archive reads 3MF/.orca_printer/Bambu zips")
     cv.add_argument("--in", dest="src", required=True, help="Input file or directory to convert")
     cv.add_argument("--out", dest="out", required=True, help="Output directory (printers)")
+    cv.add_argument("-r", "--recursive", action="store_true", help="Walk subdirectories; outputs mirror the input tree")
+    cv.add_argument("--jobs", type=int, help="Worker processes for batch conversion (default: CPU count)")
+    cv.add_argument("--report", help="Write a JSON conversion report to this path")
 
     # (gcode + PDL + generators) subcommands defined below, after spool
 
@@ -123,15 +158,21 @@ def main():
     sp.add_argument("--source", required=True, choices=["spoolman","tigertag","openspool","opentag3d"], help="Remote database source")
     sp.add_argument("--base-url", required=True, help="Base URL for the API")
     sp.add_argument("--api-key", help="API key/token (if required)")
-    sp.add_argument("--action", required=True, choices=["create","read","update","delete","search"], help="Operation")
+    sp.add_argument("op", nargs="?", choices=["sync"], help="Same as --action sync")
+    sp.add_argument("--action", choices=["create","read","update","delete","search","sync"], help="Operation (sync mirrors the inventory into --db)")
     sp.add_argument("--id", dest="item_id", help="Item ID (read/update/delete)")
     sp.add_argument("--payload", help="JSON payload for create/update")
     sp.add_argument("--query", help="Search query string")
     sp.add_argument("--page", type=int, help="Search page number (1-based)")
     sp.add_argument("--page-size", type=int, help="Search page size (items per page)")
     sp.add_argument("--format", choices=["items","normalized"], default="items", help="Output format for search results")
+    sp.add_argument("--all", action="store_true", help="search: follow every page and stream the items as NDJSON (one per line)")
     sp.add_argument("--endpoints-json", help="Inline JSON to override API endpoints for this source")
     sp.add_argument("--endpoints-file", help="Path to JSON file with endpoint overrides for this source")
+    sp.add_argument("--db", help="SQLite inventory: target of sync; search reads it instead of the network")
+    sp.add_argument("--full", action="store_true", help="sync: ignore validators/cursor and re-download everything (syncs filtered by an updated_since cursor never remove spools deleted on the server; --full does)")
+    sp.add_argument("--jobs", type=int, default=4, help="sync: parallel page fetches (default: 4)")
+    sp.add_argument("--cache-stats", action="store_true", help="Print response cache counters to stderr afterwards")
 
     # gcode: list hooks and preview
     gh = sub.add_parser("gcode-hooks", help="List available gcode hooks in a PDL file (YAML/JSON)")
@@ -160,8 +201,17 @@ def main():
     gn = sub.add_parser("gen", help="Generate slicer profiles from PDL")
     gn.add_argument("--pdl", required=True, help="Path to PDL file (YAML/JSON)")
     gn.add_argument("--slicer", required=True, choices=["orca","cura","prusa","ideamaker","bambu","superslicer","kisslicer"], help="Target slicer")
-    gn.add_argument("--out", required=True, help="Output directory for profiles")
-    gn.add_argument("--bundle", help="Optional bundle output (for orca/cura/prusa/ideamaker)")
+    gn.add_argument("--out", help="Output directory for profiles (optional with --bundle)")
+    gn.add_argument("--bundle", help="Bundle output, written directly without intermediate files (.orca_printer for orca, .zip otherwise)")
+    gm = sub.add_parser("gen-matrix", help="Generate profiles for every nozzle x layer height x material combination")
+    gm.add_argument("--pdl", required=True, help="Base PDL file (YAML/JSON)")
+    gm.add_argument("--slicer", required=True, action="append", choices=["orca","cura","prusa","ideamaker","bambu","superslicer","kisslicer"], help="Target slicer (repeatable)")
+    gm.add_argument("--out", help="Output directory for profiles")
+    gm.add_argument("--matrix", help="Axes file (YAML/JSON) with nozzles, layer_heights and materials lists")
+    gm.add_argument("--nozzles", help="Comma-separated nozzle diameters (overrides --matrix)")
+    gm.add_argument("--layers", help="Comma-separated layer heights (overrides --matrix)")
+    gm.add_argument("--materials", help="Comma-separated materials: PDL material names/types or built-ins (PLA, PETG, ...)")
+    gm.add_argument("--dry-run", action="store_true", help="Only report how many combinations would be generated")
     # screenshot
     ss = sub.add_parser("gui-screenshot", help="Capture GUI screenshots (offscreen) to an output directory")
     ss.add_argument("--out", required=True, help="Output directory for PNGs")
@@ -181,53 +231,135 @@ def main():
     gn.add_argument("--acc-bottom", type=int, help="Override bottom solid acceleration (mm/s^2)")
     args = ap.parse_args()
     if args.cmd == "validate": raise SystemExit(cmd_validate(args.paths))
-    if args.cmd == "bundle":   raise SystemExit(cmd_bundle(args.src, args.out))
+    if args.cmd in ("bundle-diff", "bundle-apply"):
+        from ..core.delta import DeltaError, apply_delta, diff_bundles
+        try:
+            if args.cmd == "bundle-diff":
+                res = diff_bundles(Path(args.old), Path(args.new), Path(args.out))
+                print(f"[WROTE] {args.out}")
+                print(f"[SUMMARY] added={res['added']} changed={res['changed']} removed={res['removed']} unchanged={res['unchanged']} bytes={res['bytes']}")
+            else:
+                out = apply_delta(Path(args.base), Path(args.delta), Path(args.out) if args.out else None)
+                print(f"[WROTE] {out}")
+        except (DeltaError, OSError) as e:
+            print(f"[ERROR] {e}")
+            raise SystemExit(2)
+        raise SystemExit(0)
+    if args.cmd == "bundle":   raise SystemExit(cmd_bundle(args.src, args.out, args.jobs, args.reproducible, args.update))
     if args.cmd == "rules":    raise SystemExit(cmd_rules(args.printer, args.filament, args.process))
     if args.cmd == "workspace" and args.subcmd == "init":
         raise SystemExit(cmd_workspace_init(args.root, with_examples=args.with_examples))
     if args.cmd == "install":
-        src = Path(args.src); dest = Path(args.dest)
-        ops = plan_install(src, dest)
+        from ..core.install import InstallInterrupted, recover_install
+        dest = Path(args.dest)
+        if args.recover:
+            n = recover_install(dest, args.recover)
+            print(f"[RECOVER] action={args.recover} files={n or 0}" if n is not None else f"[RECOVER] nothing to recover in {dest}")
+            raise SystemExit(0)
+        if bool(args.src) == bool(args.bundle):
+            print("[ERROR] install requires exactly one of --src or --bundle")
+            raise SystemExit(2)
+        cache = False if args.no_cache else None
+        if args.bundle:
+            import zipfile as _zipfile
+            from ..core.install import plan_bundle_install
+            try:
+                ops = plan_bundle_install(Path(args.bundle), dest, cache=cache, jobs=args.jobs)
+            except (OSError, ValueError, _zipfile.BadZipFile) as e:
+                print(f"[ERROR] {args.bundle}: {e}")
+                raise SystemExit(2)
+        else:
+            ops = plan_install(Path(args.src), dest, cache=cache, jobs=args.jobs)
         if args.dry_run:
             for op in ops:
                 print(f"[{op.status.upper():6}] {op.category}/{op.name} -> {op.dest}")
             print(f"[SUMMARY] total={len(ops)} add={sum(1 for o in ops if o.status=='add')} update={sum(1 for o in ops if o.status=='update')} same={sum(1 for o in ops if o.status=='same')}")
             raise SystemExit(0)
-        res = perform_install(ops, backup_zip=Path(args.backup) if args.backup else None)
-        print(f"[INSTALL] written={res['written']} skipped={res['skipped']} total={res['total']}")
+        try:
+            res = perform_install(ops, backup_zip=Path(args.backup) if args.backup else None)
+        except (InstallInterrupted, ValueError) as e:
+            print(f"[ERROR] {e}")
+            raise SystemExit(2)
+        print(f"[INSTALL] written={res['written']} unchanged={res['unchanged']} skipped={res['skipped']} total={res['total']}")
         raise SystemExit(0)
     if args.cmd == "convert":
+        from ..core.sink import DirSink
+        if args.from_fmt == "prusa-bundle":
+            from ..plugins.converters.prusa import convert_prusa_bundle
+            sink = DirSink()
+            written = convert_prusa_bundle(Path(args.src), Path(args.out), sink)
+            kinds = {}
+            for w in written:
+                kinds[w.parent.name] = kinds.get(w.parent.name, 0) + 1
+            counts = " ".join(f"{k}={v}" for k, v in sorted(kinds.items()))
+            print(f"[SUMMARY] wrote={len(written)} changed={sink.written} unchanged={sink.unchanged}" + (f" {counts}" if counts else ""))
+            raise SystemExit(0)
+        if args.from_fmt == "archive":
+            import zipfile as _zipfile
+            from ..plugins.converters.archive import convert_archive_input
+            sink = DirSink()
+            try:
+                written = convert_archive_input(Path(args.src), Path(args.out), sink)
+            except (ValueError, KeyError, _zipfile.BadZipFile) as e:
+                print(f"[ERROR] {e}")
+                raise SystemExit(2)
+            kinds = {}
+            for w in written:
+                kinds[w.parent.name] = kinds.get(w.parent.name, 0) + 1
+            counts = " ".join(f"{k}={v}" for k, v in sorted(kinds.items()))
+            print(f"[SUMMARY] wrote={len(written)} changed={sink.written} unchanged={sink.unchanged}" + (f" {counts}" if counts else ""))
+            raise SystemExit(0)
+        batch = args.from_fmt in ("auto", "kisslicer") or args.recursive or args.jobs or args.report
+        if batch:
+            from ..plugins.converters.batch import convert_tree
+            import json as _json
+            sink = DirSink()
+            fmt = None if args.from_fmt == "auto" else args.from_fmt
+            rep = convert_tree(Path(args.src), Path(args.out), fmt=fmt, recursive=args.recursive, jobs=args.jobs, sink=sink)
+            for p, err in rep.failed:
+                print(f"[FAILED] {p}: {err}")
+            if args.report:
+                res = dict(rep.as_dict(), changed=sink.written, unchanged=sink.unchanged)
+                Path(args.report).write_text(_json.dumps(res, indent=2), encoding="utf-8")
+                print(f"[WROTE] {args.report}")
+            fmts = " ".join(f"{k}={v}" for k, v in sorted(rep.by_format.items()))
+            print(f"[SUMMARY] wrote={len(rep.outputs)} changed={sink.written} unchanged={sink.unchanged} skipped={len(rep.skipped)} failed={len(rep.failed)}" + (f" {fmts}" if fmts else ""))
+            raise SystemExit(1 if rep.failed else 0)
         if args.from_fmt == "cura":
             from ..plugins.converters.cura import convert_cura_input
             out_dir = Path(args.out)
-            written = convert_cura_input(Path(args.src), out_dir)
+            sink = DirSink()
+            written = convert_cura_input(Path(args.src), out_dir, sink)
             for w in written:
                 print(f"[WROTE] {w}")
-            print(f"[SUMMARY] wrote={len(written)}")
+            print(f"[SUMMARY] wrote={len(written)} changed={sink.written} unchanged={sink.unchanged}")
             raise SystemExit(0)
         if args.from_fmt == "prusa":
             from ..plugins.converters.prusa import convert_prusa_input
             out_dir = Path(args.out)
-            written = convert_prusa_input(Path(args.src), out_dir)
+            sink = DirSink()
+            written = convert_prusa_input(Path(args.src), out_dir, sink)
             for w in written:
                 print(f"[WROTE] {w}")
-            print(f"[SUMMARY] wrote={len(written)}")
+            print(f"[SUMMARY] wrote={len(written)} changed={sink.written} unchanged={sink.unchanged}")
             raise SystemExit(0)
         if args.from_fmt == "superslicer":
             from ..plugins.converters.prusa import convert_superslicer_input
             out_dir = Path(args.out)
-            written = convert_superslicer_input(Path(args.src), out_dir)
+            sink = DirSink()
+            written = convert_superslicer_input(Path(args.src), out_dir, sink)
             for w in written:
                 print(f"[WROTE] {w}")
-            print(f"[SUMMARY] wrote={len(written)}")
+            print(f"[SUMMARY] wrote={len(written)} changed={sink.written} unchanged={sink.unchanged}")
             raise SystemExit(0)
         if args.from_fmt == "ideamaker":
             from ..plugins.converters.ideamaker import convert_ideamaker_input
             out_dir = Path(args.out)
-            written = convert_ideamaker_input(Path(args.src), out_dir)
+            sink = DirSink()
+            written = convert_ideamaker_input(Path(args.src), out_dir, sink)
             for w in written:
                 print(f"[WROTE] {w}")
-            print(f"[SUMMARY] wrote={len(written)}")
+            print(f"[SUMMARY] wrote={len(written)} changed={sink.written} unchanged={sink.unchanged}")
             raise SystemExit(0)
     if args.cmd == "gui-screenshot":
         from pathlib import Path as _Path
@@ -264,9 +396,8 @@ def main():
             raise SystemExit(2)
     if args.cmd == "gcode-hooks":
         from pathlib import Path as _Path
-        import json as _json, yaml as _yaml
-        text = _Path(args.pdl).read_text(encoding="utf-8")
-        data = _json.loads(text) if args.pdl.endswith((".json", ".JSON")) else _yaml.safe_load(text)
+        import json as _json
+        data = _load_pdl_arg(args.pdl)
         # Merge machine_control and apply firmware mapping
         gcode = gc_render_fw(data or {})
         hooks = gc_list_hooks(gcode)
@@ -276,15 +407,12 @@ def main():
         raise SystemExit(0)
     if args.cmd == "gcode-preview":
         from pathlib import Path as _Path
-        import json as _json, yaml as _yaml
-        text = _Path(args.pdl).read_text(encoding="utf-8")
-        data = _json.loads(text) if args.pdl.endswith((".json", ".JSON")) else _yaml.safe_load(text)
+        import json as _json
+        data = _load_pdl_arg(args.pdl)
         # Merge project policies if present
         try:
-            from ..core.project import find_project_file, load_project_config, merge_policies
-            proj = find_project_file(_Path(args.pdl).parent)
-            if proj:
-                data = merge_policies(data or {}, load_project_config(proj))
+            from ..core.project import apply_project_policies
+            data = apply_project_policies(data, _Path(args.pdl).parent)
         except Exception:
             pass
         gcode = gc_render_fw(data or {})
@@ -306,14 +434,11 @@ def main():
         raise SystemExit(0)
     if args.cmd == "gcode-validate":
         from pathlib import Path as _Path
-        import json as _json, yaml as _yaml
-        text = _Path(args.pdl).read_text(encoding="utf-8")
-        data = _json.loads(text) if args.pdl.endswith((".json", ".JSON")) else _yaml.safe_load(text)
+        import json as _json
+        data = _load_pdl_arg(args.pdl)
         try:
-            from ..core.project import find_project_file, load_project_config, merge_policies
-            proj = find_project_file(_Path(args.pdl).parent)
-            if proj:
-                data = merge_policies(data or {}, load_project_config(proj))
+            from ..core.project import apply_project_policies
+            data = apply_project_policies(data, _Path(args.pdl).parent)
         except Exception:
             pass
         gcode = gc_render_fw(data or {})
@@ -336,9 +461,8 @@ def main():
         raise SystemExit(0)
     if args.cmd == "pdl-validate":
         from pathlib import Path as _Path
-        import json as _json, yaml as _yaml
-        text = _Path(args.pdl).read_text(encoding="utf-8")
-        data = _json.loads(text) if args.pdl.endswith((".json", ".JSON")) else _yaml.safe_load(text)
+        import json as _json
+        data = _load_pdl_arg(args.pdl)
         # Schema
         try:
             S.validate("pdl", data)
@@ -355,10 +479,9 @@ def main():
         raise SystemExit(0 if s['error'] == 0 else 2)
     if args.cmd == "tag-preview":
         from pathlib import Path as _Path
-        import json as _json, yaml as _yaml
+        import json as _json
         from ..core.gcode import render_hooks_with_firmware as _render
-        text = _Path(args.pdl).read_text(encoding="utf-8")
-        data = _json.loads(text) if args.pdl.endswith((".json", ".JSON")) else _yaml.safe_load(text)
+        data = _load_pdl_arg(args.pdl)
         hooks = _render(data or {})
         start = hooks.get("start") or []
         for line in start[:3]:
@@ -366,15 +489,12 @@ def main():
         raise SystemExit(0)
     if args.cmd == "gen-snippets":
         from pathlib import Path as _Path
-        import json as _json, yaml as _yaml
+        import json as _json
         from ..core.gcode import generate_snippets as _gen
-        text = _Path(args.pdl).read_text(encoding="utf-8")
-        data = _json.loads(text) if args.pdl.endswith((".json", ".JSON")) else _yaml.safe_load(text)
+        data = _load_pdl_arg(args.pdl)
         try:
-            from ..core.project import find_project_file, load_project_config, merge_policies
-            proj = find_project_file(_Path(args.pdl).parent)
-            if proj:
-                data = merge_policies(data or {}, load_project_config(proj))
+            from ..core.project import apply_project_policies
+            data = apply_project_policies(data, _Path(args.pdl).parent)
         except Exception:
             pass
         start, end = _gen(data or {}, firmware=args.firmware)
@@ -387,17 +507,17 @@ def main():
         raise SystemExit(0)
     if args.cmd == "gen":
         from pathlib import Path as _Path
-        import json as _json, yaml as _yaml
-        text = _Path(args.pdl).read_text(encoding="utf-8")
-        data = _json.loads(text) if args.pdl.endswith((".json", ".JSON")) else _yaml.safe_load(text)
+        import json as _json
+        data = _load_pdl_arg(args.pdl)
         try:
-            from ..core.project import find_project_file, load_project_config, merge_policies
-            proj = find_project_file(_Path(args.pdl).parent)
-            if proj:
-                data = merge_policies(data or {}, load_project_config(proj))
+            from ..core.project import apply_project_policies
+            data = apply_project_policies(data, _Path(args.pdl).parent)
         except Exception:
             pass
-        out_dir = _Path(args.out)
+        if not args.out and not args.bundle:
+            print("[ERROR] gen requires --out and/or --bundle")
+            raise SystemExit(2)
+        out_dir = _Path(args.out) if args.out else _Path(".")
         # Apply CLI acceleration overrides into process_defaults
         overrides = {k: v for k, v in {
             'perimeter': getattr(args, 'acc_perimeter', None),
@@ -413,79 +533,73 @@ def main():
             pd['accelerations_mms2'] = acc
             data = dict(data or {})
             data['process_defaults'] = pd
-        if args.slicer == 'orca':
-            from ..plugins.slicers.orca import generate_orca
-            generated = generate_orca(data or {}, out_dir)
-            for k, p in generated.items():
-                print(f"[WROTE] {p}")
-            if args.bundle:
-                from ..core.bundle import build_bundle
-                build_bundle(out_dir, _Path(args.bundle))
-                print(f"[BUNDLE] {args.bundle}")
-            raise SystemExit(0)
-        if args.slicer == 'superslicer':
-            from ..plugins.slicers.superslicer import generate_superslicer
-            generated = generate_superslicer(data or {}, out_dir)
-            for k, p in generated.items():
-                print(f"[WROTE] {p}")
-            if args.bundle:
-                from ..core.bundle import build_profile_bundle
-                build_profile_bundle(generated, _Path(args.bundle), 'superslicer')
-                print(f"[BUNDLE] {args.bundle}")
-            raise SystemExit(0)
-        if args.slicer == 'kisslicer':
-            from ..plugins.slicers.kisslicer import generate_kisslicer
-            generated = generate_kisslicer(data or {}, out_dir)
-            for k, p in generated.items():
-                print(f"[WROTE] {p}")
-            if args.bundle:
-                from ..core.bundle import build_profile_bundle
-                build_profile_bundle(generated, _Path(args.bundle), 'kisslicer')
-                print(f"[BUNDLE] {args.bundle}")
-            raise SystemExit(0)
-        if args.slicer == 'cura':
-            from ..plugins.slicers.cura import generate_cura
-            generated = generate_cura(data or {}, out_dir)
-            for k, p in generated.items():
-                print(f"[WROTE] {p}")
-            if args.bundle:
-                from ..core.bundle import build_profile_bundle
-                build_profile_bundle(generated, _Path(args.bundle), 'cura')
-                print(f"[BUNDLE] {args.bundle}")
-            raise SystemExit(0)
-        if args.slicer == 'prusa':
-            from ..plugins.slicers.prusa import generate_prusa
-            generated = generate_prusa(data or {}, out_dir)
-            for k, p in generated.items():
-                print(f"[WROTE] {p}")
-            if args.bundle:
-                from ..core.bundle import build_profile_bundle
-                build_profile_bundle(generated, _Path(args.bundle), 'prusa')
-                print(f"[BUNDLE] {args.bundle}")
-            raise SystemExit(0)
-        if args.slicer == 'ideamaker':
-            from ..plugins.slicers.ideamaker import generate_ideamaker
-            generated = generate_ideamaker(data or {}, out_dir)
-            for k, p in generated.items():
-                print(f"[WROTE] {p}")
-            if args.bundle:
-                from ..core.bundle import build_profile_bundle
-                build_profile_bundle(generated, _Path(args.bundle), 'ideamaker')
-                print(f"[BUNDLE] {args.bundle}")
-            raise SystemExit(0)
-        if args.slicer == 'superslicer':
-            from ..plugins.slicers.superslicer import generate_superslicer
-            generated = generate_superslicer(data or {}, out_dir)
+        # Parse once; every generator consumes the same typed model
+        from ..pdl.model import parse_pdl
+        model = parse_pdl(data or {})
+        import importlib
+        gen_fn = getattr(importlib.import_module(f"..plugins.slicers.{args.slicer}", __package__), f"generate_{args.slicer}")
+        if args.bundle:
+            # Stream straight into the archive; --out (if given) receives the same bytes
+            from ..core.bundle import BundleSink
+            from ..core.sink import DirSink, TeeSink
+            dsink = DirSink()
+            with BundleSink(_Path(args.bundle), out_dir, args.slicer) as bsink:
+                generated = gen_fn(model, out_dir, sink=TeeSink(dsink, bsink) if args.out else bsink)
+            if args.out:
+                for k, p in generated.items():
+                    print(f"[WROTE] {p}")
+                print(f"[SUMMARY] changed={dsink.written} unchanged={dsink.unchanged}")
+            print(f"[BUNDLE] {args.bundle}")
+        else:
+            from ..core.sink import DirSink
+            sink = DirSink()
+            generated = gen_fn(model, out_dir, sink=sink)
             for k, p in generated.items():
                 print(f"[WROTE] {p}")
-            if args.bundle:
-                from ..core.bundle import build_profile_bundle
-                build_profile_bundle(generated, _Path(args.bundle), 'superslicer')
-                print(f"[BUNDLE] {args.bundle}")
+            print(f"[SUMMARY] changed={sink.written} unchanged={sink.unchanged}")
+        raise SystemExit(0)
+    if args.cmd == "gen-matrix":
+        import importlib
+        from pathlib import Path as _Path
+        from ..core.matrix import expand_matrix, parse_axes
+        from ..core.sink import DirSink
+        from ..pdl.loader import read_pdl_text
+        from ..pdl.model import parse_pdl
+        data = _load_pdl_arg(args.pdl)
+        try:
+            from ..core.project import apply_project_policies
+            data = apply_project_policies(data, _Path(args.pdl).parent)
+        except Exception:
+            pass
+        spec = dict(read_pdl_text(_Path(args.matrix))) if args.matrix else {}
+        for key, val in (("nozzles", args.nozzles), ("layer_heights", args.layers), ("materials", args.materials)):
+            if val:
+                spec[key] = val
+        try:
+            axes = parse_axes(spec)
+            models = list(expand_matrix(parse_pdl(data or {}), axes))
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            raise SystemExit(2)
+        if args.dry_run:
+            print(f"[SUMMARY] combinations={axes.size} valid={len(models)} skipped={axes.size - len(models)}")
             raise SystemExit(0)
+        if not args.out:
+            print("[ERROR] gen-matrix requires --out (or --dry-run)")
+            raise SystemExit(2)
+        out_dir = _Path(args.out)
+        sink = DirSink()
+        gens = [getattr(importlib.import_module(f"..plugins.slicers.{s}", __package__), f"generate_{s}") for s in dict.fromkeys(args.slicer)]
+        files = 0
+        for model in models:
+            for gen_fn in gens:
+                files += len(gen_fn(model, out_dir, sink=sink))
+        print(f"[SUMMARY] combinations={axes.size} valid={len(models)} skipped={axes.size - len(models)} files={files} changed={sink.written} unchanged={sink.unchanged}")
+        raise SystemExit(0)
     if args.cmd == "spool":
         from ..integrations.spool_clients import get_client, SpoolClientError
         import json as _json
+        import sys as _sys
         # Load endpoint overrides (file then inline; inline takes precedence)
         eps_override = None
         if getattr(args, 'endpoints_file', None):
@@ -504,9 +618,34 @@ def main():
                     eps_override = inline
             except Exception:
                 pass
+        action = args.action or args.op
+        if not action:
+            print("[ERROR] spool requires --action (or `opk spool sync`)")
+            raise SystemExit(2)
+        if action == 'sync' and not args.db:
+            print("[ERROR] sync requires --db")
+            raise SystemExit(2)
         cli = get_client(args.source, args.base_url, api_key=args.api_key, endpoints=eps_override)
         try:
-            if args.action == 'create':
+            if action == 'sync':
+                from ..integrations import db as _db
+                from ..integrations.spool_sync import DEFAULT_PAGE_SIZE, sync_spools
+                con = _db.connect(Path(args.db))
+                try:
+                    st = sync_spools(cli, con, page_size=args.page_size or DEFAULT_PAGE_SIZE, jobs=args.jobs, full=args.full)
+                finally:
+                    con.close()
+                print("[SYNC] " + " ".join(f"{k}={v}" for k, v in st.items() if v is not None))
+                if st['deleted'] is None:
+                    print("[SYNC] deleted: skipped (incremental; run with --full to drop spools deleted on the server)")
+            elif action == 'search' and args.db:
+                from ..integrations import db as _db
+                con = _db.connect(Path(args.db))
+                try:
+                    print(_json.dumps(_db.search_spools(con, args.query or '', source=cli.SOURCE, base_url=cli.base_url), indent=2))
+                finally:
+                    con.close()
+            elif action == 'create':
                 payload = _json.loads(args.payload or '{}')
                 if args.format == 'normalized' and hasattr(cli, 'create_normalized'):
                     out = cli.create_normalized(payload)
@@ -514,14 +653,14 @@ def main():
                 else:
                     res = cli.create(payload)
                     print(_json.dumps(res, indent=2))
-            elif args.action == 'read':
+            elif action == 'read':
                 if args.format == 'normalized' and hasattr(cli, 'read_normalized'):
                     out = cli.read_normalized(args.item_id or '')
                     print(_json.dumps(out, indent=2))
                 else:
                     res = cli.read(args.item_id or '')
                     print(_json.dumps(res, indent=2))
-            elif args.action == 'update':
+            elif action == 'update':
                 payload = _json.loads(args.payload or '{}')
                 if args.format == 'normalized' and hasattr(cli, 'update_normalized'):
                     out = cli.update_normalized(args.item_id or '', payload)
@@ -529,14 +668,17 @@ def main():
                 else:
                     res = cli.update(args.item_id or '', payload)
                     print(_json.dumps(res, indent=2))
-            elif args.action == 'delete':
+            elif action == 'delete':
                 if args.format == 'normalized' and hasattr(cli, 'delete_normalized'):
                     out = cli.delete_normalized(args.item_id or '')
                     print(_json.dumps(out, indent=2))
                 else:
                     ok = cli.delete(args.item_id or '')
                     print(f"[OK] delete={ok}")
-            elif args.action == 'search':
+            elif action == 'search' and args.all:
+                for item in cli.iter_search(args.query or '', page_size=int(args.page_size) if args.page_size else 50):
+                    print(_json.dumps(item), flush=True)
+            elif action == 'search':
                 if args.format == 'normalized':
                     page = int(args.page) if args.page else 1
                     size = int(args.page_size) if args.page_size else 50
@@ -551,6 +693,9 @@ def main():
         except NotImplementedError:
             print("[STUB] This operation is not implemented yet for", args.source)
             raise SystemExit(2)
+        finally:
+            if args.cache_stats:
+                print("[CACHE] " + " ".join(f"{k}={v}" for k, v in cli.cache_stats().items()), file=_sys.stderr)
         raise SystemExit(0)
 
 if __name__ == "__main__":
@@ -1,41 +1,199 @@
 from __future__ import annotations
-import json, zipfile, time
+import calendar, contextlib, functools, hashlib, itertools, json, os, zipfile, zlib, time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Tuple
 from . import schema as S
+from .sink import OutputSink
+from .zipwriter import DateTime, Member, ZipStreamWriter, deflate_member, read_member
 
-def build_bundle(src_dir: Path, out_path: Path) -> Path:
-    printers  = sorted((src_dir / "printers").glob("*.json"), key=lambda p: p.name)
-    filaments = sorted((src_dir / "filaments").glob("*.json"), key=lambda p: p.name)
-    processes = sorted((src_dir / "processes").glob("*.json"), key=lambda p: p.name)
-    assert printers and filaments and processes, "Missing profiles in src_dir"
+BUNDLE_DIRS = ("printers", "filaments", "processes")
 
+
+def _orca_manifest(printers: int, filaments: int, processes: int,
+                   files: Dict[str, str] | None = None, created: float | None = None) -> Dict[str, Any]:
     manifest: Dict[str, Any] = {
         "generator": "opk.bundle",
-        "printer_count": len(printers),
-        "filament_count": len(filaments),
-        "process_count": len(processes),
-        "created_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "printer_count": printers,
+        "filament_count": filaments,
+        "process_count": processes,
+        "created_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() if created is None else created)),
     }
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    # before writing each file, validate against the correct schema
-    KIND_MAP = {
-      "printers": "printer",
-      "filaments": "filament",
-      "processes": "process",
+    if files is not None:
+        manifest["files"] = dict(sorted(files.items()))
+    return manifest
+
+
+def reproducible_epoch() -> float:
+    """Timestamp for reproducible bundles: ``SOURCE_DATE_EPOCH`` if set, else 1980-01-01 (the ZIP epoch)."""
+    try:
+        return float(os.environ["SOURCE_DATE_EPOCH"])
+    except (KeyError, ValueError):
+        return 315532800.0
+
+
+def _profile_manifest(names: List[str], slicer: str) -> Dict[str, Any]:
+    return {
+        'generator': 'opk.profile-bundle',
+        'slicer': slicer,
+        'files': sorted(names),
     }
 
-    with zipfile.ZipFile(out_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-      for rel, files in (("printers", printers), ("filaments", filaments), ("processes", processes)):
-        for p in files:
-          data = json.loads(p.read_text(encoding="utf-8"))
-          kind = KIND_MAP[rel]  # explicit mapping (avoids 'processe')
-          S.validate(kind, data)
-          zf.writestr(f"{rel}/{p.name}", json.dumps(data, indent=2))
-      zf.writestr("manifest.json", json.dumps(manifest, indent=2))
 
-    S.validate("bundle", manifest)
-    return out_path
+# Below this many profiles the worker pool costs more than it saves.
+MIN_PARALLEL_PROFILES = 64
+_KIND_MAP = {"printers": "printer", "filaments": "filament", "processes": "process"}
+_DONE = object()
+
+
+@dataclass(frozen=True, slots=True)
+class _Prepared:
+    name: str
+    sha256: str
+    member: Member | None  # None: reuse the previous bundle's bytes
+
+
+def _bundle_member(job: Tuple[str, Path], reproducible: bool = False, date_time: DateTime | None = None,
+                   previous: Dict[str, Tuple[str, int, int]] | None = None) -> _Prepared:
+    """Worker: read, parse, validate, re-serialize, hash and (if changed) deflate one profile."""
+    rel, p = job
+    data = json.loads(p.read_bytes())
+    S.validate(_KIND_MAP[rel], data)
+    name = f"{rel}/{p.name}"
+    raw = json.dumps(data, indent=2, sort_keys=reproducible).encode("utf-8")
+    digest = hashlib.sha256(raw).hexdigest()
+    old = (previous or {}).get(name)
+    if old is not None and old == (digest, zlib.crc32(raw), len(raw)):
+        return _Prepared(name, digest, None)
+    return _Prepared(name, digest, deflate_member(name, raw, date_time))
+
+
+def _ordered_map(ex: ThreadPoolExecutor, fn: Callable[[Any], Any], items: Iterable[Any], window: int) -> Iterator[Any]:
+    """Like ``ex.map`` but with at most ``window`` results in flight (bounded memory)."""
+    it = iter(items)
+    pending: Deque[Future] = deque(ex.submit(fn, x) for x in itertools.islice(it, window))
+    while pending:
+        fut = pending.popleft()
+        nxt = next(it, _DONE)
+        if nxt is not _DONE:
+            pending.append(ex.submit(fn, nxt))
+        yield fut.result()
+
+
+def _previous_bundle(path: Path) -> Tuple[Dict[str, Any], Dict[str, Tuple[str, int, int]], Dict[str, zipfile.ZipInfo]]:
+    """Manifest, {member: (sha256, crc, size)} and zip infos of an existing bundle (empty if unreadable)."""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            manifest = json.loads(zf.read("manifest.json"))
+            infos = {i.filename: i for i in zf.infolist()}
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        return {}, {}, {}
+    files = manifest.get("files") or {}
+    previous = {n: (h, infos[n].CRC, infos[n].file_size) for n, h in files.items()
+                if n in infos and infos[n].compress_type == zipfile.ZIP_DEFLATED}
+    return manifest, previous, infos
+
+
+def _pack(src_dir: Path, out_path: Path, jobs: int | None, reproducible: bool, update: bool) -> Dict[str, Any]:
+    src_dir = Path(src_dir); out_path = Path(out_path)
+    work = [(rel, p) for rel in BUNDLE_DIRS for p in sorted((src_dir / rel).glob("*.json"), key=lambda p: p.name)]
+    counts = {rel: sum(1 for r, _ in work if r == rel) for rel in BUNDLE_DIRS}
+    assert all(counts.values()), "Missing profiles in src_dir"
+
+    old_manifest, previous, old_infos = _previous_bundle(out_path) if update else ({}, {}, {})
+    epoch = reproducible_epoch() if reproducible else None
+    date_time = time.gmtime(epoch)[:6] if epoch is not None else None
+    worker = functools.partial(_bundle_member, reproducible=reproducible, date_time=date_time, previous=previous)
+    # file reads and zlib release the GIL, so a few more threads than cores pays off;
+    # on a single core the pool only adds contention
+    cpus = os.cpu_count() or 1
+    workers = jobs or (min(32, cpus + 4) if cpus > 1 else 1)
+    ex = ThreadPoolExecutor(max_workers=workers) if workers > 1 and len(work) >= MIN_PARALLEL_PROFILES else None
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(out_path.name + ".part")
+    stats = {"path": out_path, "members": len(work), "reused": 0, "deflated": 0, "written": True}
+    try:
+        files: Dict[str, str] = {}
+        names: List[str] = []
+        with open(out_path, "rb") if previous else contextlib.nullcontext() as old, open(tmp, "wb") as f:
+            zw = ZipStreamWriter(f)
+            for p in (_ordered_map(ex, worker, work, workers * 4) if ex else map(worker, work)):
+                files[p.name] = p.sha256
+                names.append(p.name)
+                if p.member is None:
+                    stats["reused"] += 1
+                    zw.add(read_member(old, old_infos[p.name]))
+                else:
+                    stats["deflated"] += 1
+                    zw.add(p.member)
+            created = epoch
+            if created is None and old_manifest.get("files") == dict(sorted(files.items())):
+                # same content: keep the old timestamp so the manifest is unchanged too
+                created = calendar.timegm(time.strptime(old_manifest["created_utc"], "%Y-%m-%dT%H:%M:%SZ"))
+            manifest = _orca_manifest(counts["printers"], counts["filaments"], counts["processes"], files, created)
+            S.validate("bundle", manifest)
+            zw.add(deflate_member("manifest.json", json.dumps(manifest, indent=2).encode("utf-8"), date_time))
+            zw.close()
+        if update and manifest == old_manifest and list(old_infos) == names + ["manifest.json"]:
+            tmp.unlink()
+            stats["written"] = False
+        else:
+            os.replace(tmp, out_path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    finally:
+        if ex is not None:
+            ex.shutdown(cancel_futures=True)
+    return stats
+
+
+def build_bundle(src_dir: Path, out_path: Path, jobs: int | None = None, reproducible: bool = False) -> Path:
+    """Validate every profile under ``src_dir`` and pack them into an ``.orca_printer`` bundle.
+
+    Profiles are read, validated, re-serialized and deflated on a thread pool
+    (``jobs`` workers; 1 = in-process) while a single writer appends members in
+    sorted order, so the archive layout does not depend on scheduling. The archive
+    is written to ``<out>.part`` and renamed into place on success.
+
+    ``manifest.json`` records the SHA-256 of every member (``files``). With
+    ``reproducible=True`` timestamps come from ``reproducible_epoch()`` and JSON
+    keys are sorted, so identical inputs give byte-identical archives.
+    """
+    return _pack(src_dir, out_path, jobs, reproducible, update=False)["path"]
+
+
+def update_bundle(src_dir: Path, out_path: Path, jobs: int | None = None, reproducible: bool = False) -> Dict[str, Any]:
+    """Rebuild ``out_path`` in place, reusing the compressed bytes of unchanged members.
+
+    Members whose hash matches the existing manifest are copied without
+    re-deflating; if nothing changed the archive is not rewritten at all.
+    Returns ``{path, members, reused, deflated, written}``.
+    """
+    return _pack(src_dir, out_path, jobs, reproducible, update=True)
+
+
+def verify_bundle(path: Path) -> List[str]:
+    """Check every member against the manifest's SHA-256 table; returns a list of problems (empty = OK)."""
+    problems: List[str] = []
+    with zipfile.ZipFile(path) as zf:
+        try:
+            files = json.loads(zf.read("manifest.json")).get("files")
+        except KeyError:
+            return ["manifest.json missing"]
+        if not files:
+            return ["manifest has no files table"]
+        names = set(zf.namelist()) - {"manifest.json"}
+        for name in sorted(names - set(files)):
+            problems.append(f"{name}: not in manifest")
+        for name, digest in sorted(files.items()):
+            if name not in names:
+                problems.append(f"{name}: missing")
+            elif hashlib.sha256(zf.read(name)).hexdigest() != digest:
+                problems.append(f"{name}: hash mismatch")
+    return problems
 
 
 def build_profile_bundle(files: Dict[str, Path], out_path: Path, slicer: str) -> Path:
@@ -46,15 +204,88 @@ def build_profile_bundle(files: Dict[str, Path], out_path: Path, slicer: str) ->
     """
     out_path = Path(out_path)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    manifest: Dict[str, Any] = {
-        'generator': 'opk.profile-bundle',
-        'slicer': slicer,
-        'files': sorted([p.name for p in files.values()])
-    }
-    import zipfile, json
+    manifest = _profile_manifest([Path(p).name for p in files.values()], slicer)
     with zipfile.ZipFile(out_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
         for key, p in files.items():
             if Path(p).exists():
                 zf.write(p, arcname=Path(p).name)
         zf.writestr('manifest.json', json.dumps(manifest, indent=2))
     return out_path
+
+
+class BundleSink(OutputSink):
+    """Stream generator output straight into a bundle archive.
+
+    ``slicer='orca'`` lays members out as ``printers/``, ``filaments/`` and
+    ``processes/`` (paths relative to ``root``) and writes an ``.orca_printer``
+    manifest; any other slicer stores files flat with a profile-bundle manifest,
+    matching ``build_bundle`` / ``build_profile_bundle``. Generators validate their
+    objects before serializing, so members are not re-parsed here.
+
+    The archive is written to a temporary file and moved into place by
+    ``close()``; leaving the ``with`` block on an exception discards it.
+    """
+
+    def __init__(self, out_path: Path, root: Path, slicer: str = 'orca') -> None:
+        self.out_path = Path(out_path)
+        self.root = Path(root)
+        self.slicer = slicer
+        self.members: List[str] = []
+        self.hashes: Dict[str, str] = {}
+        self.out_path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp = self.out_path.with_name(self.out_path.name + '.part')
+        self._zf: zipfile.ZipFile | None = zipfile.ZipFile(self._tmp, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def _arcname(self, path: Path) -> str:
+        if self.slicer != 'orca':
+            return path.name
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return path.name
+
+    def write_bytes(self, path: Path, data: bytes) -> Path:
+        if self._zf is None:
+            raise ValueError("bundle is closed")
+        arc = self._arcname(Path(path))
+        self._zf.writestr(arc, data)
+        self.members.append(arc)
+        self.hashes[arc] = hashlib.sha256(data).hexdigest()
+        return Path(path)
+
+    def _manifest(self) -> Dict[str, Any]:
+        if self.slicer != 'orca':
+            return _profile_manifest(self.members, self.slicer)
+        counts = {d: sum(1 for m in self.members if m.startswith(d + '/')) for d in BUNDLE_DIRS}
+        assert all(counts.values()), "Missing profiles in bundle"
+        manifest = _orca_manifest(counts["printers"], counts["filaments"], counts["processes"], self.hashes)
+        S.validate("bundle", manifest)
+        return manifest
+
+    def close(self) -> Path:
+        if self._zf is None:
+            return self.out_path
+        try:
+            self._zf.writestr("manifest.json", json.dumps(self._manifest(), indent=2))
+        except BaseException:
+            self.abort()
+            raise
+        self._zf.close()
+        self._zf = None
+        os.replace(self._tmp, self.out_path)
+        return self.out_path
+
+    def abort(self) -> None:
+        if self._zf is not None:
+            self._zf.close()
+            self._zf = None
+        self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> "BundleSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
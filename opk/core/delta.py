@@ -0,0 +1,158 @@
+"""Delta bundles: ship only what changed between two bundle archives.
+
+``diff_bundles(old, new, out)`` writes a small ZIP holding ``delta.json`` plus the
+members of ``new`` that are added or changed relative to ``old`` (their compressed
+bytes are copied as-is, never re-deflated). ``apply_delta(base, delta)`` checks
+that ``base`` is the exact archive the delta was made against, rebuilds the new
+archive from the unchanged members of ``base`` and the members in the delta,
+verifies the result's SHA-256 against the target, and only then renames it into
+place.
+
+Members are compared by CRC, size and SHA-256 of their compressed bytes, not by
+timestamp: bundles built without ``reproducible=True`` stamp every member with
+the build time, and a member that only got a new timestamp is not shipped again;
+its new time is listed under ``restamped`` in ``delta.json`` instead.
+
+Rebuilding is byte-exact for archives written by ``build_bundle``/
+``update_bundle``; ``diff_bundles`` refuses pairs it could not reproduce, so a
+delta that exists always applies cleanly.
+"""
+
+from __future__ import annotations
+import hashlib
+import io
+import json
+import dataclasses
+import os
+import zipfile
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List
+
+from .sink import file_sha256
+from .zipwriter import Member, ZipStreamWriter, deflate_member, read_member
+
+DELTA_FORMAT = 'opk.bundle-delta/1'
+DELTA_INDEX = 'delta.json'
+
+
+class DeltaError(ValueError):
+    """The delta does not match the base bundle or cannot be built/applied."""
+
+
+def _entry_key(m: Member) -> tuple:
+    return m.crc, m.size, hashlib.sha256(m.data).hexdigest()
+
+
+def _restamp(pick: Dict[str, Member], restamped: Dict[str, Any]) -> None:
+    for n, dt in restamped.items():
+        pick[n] = dataclasses.replace(pick[n], date_time=tuple(dt))
+
+
+def _members(path: Path, fp: BinaryIO) -> Dict[str, Member]:
+    try:
+        with zipfile.ZipFile(path) as zf:
+            infos = zf.infolist()
+    except zipfile.BadZipFile as e:
+        raise DeltaError(f"{path}: {e}") from None
+    try:
+        return {i.filename: read_member(fp, i) for i in infos}
+    except ValueError as e:
+        raise DeltaError(f"{path}: {e}") from None
+
+
+def _assemble(order: List[str], pick: Dict[str, Member], out: BinaryIO) -> None:
+    zw = ZipStreamWriter(out)
+    for name in order:
+        zw.add(pick[name])
+    zw.close()
+
+
+def diff_bundles(old: Path, new: Path, out: Path) -> Dict[str, Any]:
+    """Write a delta that turns ``old`` into ``new``; returns counts and the delta size."""
+    old, new, out = Path(old), Path(new), Path(out)
+    with open(old, 'rb') as fo, open(new, 'rb') as fn:
+        base = _members(old, fo)
+        target = _members(new, fn)
+    order = list(target)
+    unchanged = {n for n in order if n in base and _entry_key(base[n]) == _entry_key(target[n])}
+    added = [n for n in order if n not in base]
+    changed = [n for n in order if n in base and n not in unchanged]
+    removed = [n for n in base if n not in target]
+    # same bytes, new build time: only the timestamp travels
+    restamped = {n: list(target[n].date_time) for n in order if n in unchanged and base[n].date_time != target[n].date_time}
+    target_sha = file_sha256(new)
+    # make sure the rebuild is byte-exact before promising it
+    probe = io.BytesIO()
+    pick = {**{n: base[n] for n in unchanged}, **{n: target[n] for n in added + changed}}
+    _restamp(pick, restamped)
+    _assemble(order, pick, probe)
+    if hashlib.sha256(probe.getvalue()).hexdigest() != target_sha:
+        raise DeltaError(f"{new.name} cannot be rebuilt member-by-member (not written by build_bundle?); ship the full bundle")
+    index = {
+        'format': DELTA_FORMAT,
+        'base_sha256': file_sha256(old),
+        'target_sha256': target_sha,
+        'members': order,
+        'added': added,
+        'changed': changed,
+        'removed': removed,
+        'restamped': restamped,
+    }
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + '.part')
+    try:
+        with open(tmp, 'wb') as f:
+            zw = ZipStreamWriter(f)
+            zw.add(deflate_member(DELTA_INDEX, json.dumps(index, indent=2).encode('utf-8'), target[order[-1]].date_time))
+            for n in added + changed:
+                zw.add(target[n])
+            zw.close()
+        os.replace(tmp, out)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return {'added': len(added), 'changed': len(changed), 'removed': len(removed),
+            'unchanged': len(unchanged), 'restamped': len(restamped), 'bytes': out.stat().st_size}
+
+
+def read_delta_index(delta: Path) -> Dict[str, Any]:
+    try:
+        with zipfile.ZipFile(delta) as zf:
+            index = json.loads(zf.read(DELTA_INDEX))
+    except (KeyError, ValueError, zipfile.BadZipFile) as e:
+        raise DeltaError(f"{delta}: not a bundle delta ({e})") from None
+    if index.get('format') != DELTA_FORMAT:
+        raise DeltaError(f"{delta}: unsupported delta format {index.get('format')!r}")
+    return index
+
+
+def apply_delta(base: Path, delta: Path, out: Path | None = None) -> Path:
+    """Apply ``delta`` to ``base`` and write the verified result to ``out`` (default: replace ``base``)."""
+    base, delta = Path(base), Path(delta)
+    out = Path(out) if out is not None else base
+    index = read_delta_index(delta)
+    if file_sha256(base) != index['base_sha256']:
+        raise DeltaError(f"{base.name} is not the bundle this delta was made from (base hash mismatch)")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + '.part')
+    try:
+        with open(base, 'rb') as fb, open(delta, 'rb') as fd:
+            pick = _members(base, fb)
+            shipped = _members(delta, fd)
+            needed = index['added'] + index['changed']
+            missing = [n for n in needed if n not in shipped] + [n for n in index['members'] if n not in pick and n not in needed]
+            pick.update((n, shipped[n]) for n in needed if n in shipped)
+            if missing:
+                raise DeltaError(f"delta is missing members: {', '.join(missing[:5])}")
+            _restamp(pick, index.get('restamped') or {})
+            with open(tmp, 'wb') as f:
+                _assemble(index['members'], pick, f)
+                f.flush()
+                os.fsync(f.fileno())
+        if file_sha256(tmp) != index['target_sha256']:
+            raise DeltaError("result does not match the target bundle hash")
+        os.replace(tmp, out)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return out
@@ -0,0 +1,151 @@
+"""Persistent (path, size, mtime_ns) → content-hash cache.
+
+``plan_install`` compares normalized JSON hashes of every source and destination
+preset. Preset directories hold thousands of files that rarely change, so the
+hashes are kept in ``<cache dir>/install-hashes.json`` keyed by absolute path and
+validated by ``stat``: an unchanged tree costs one ``stat`` per file on the next
+plan. When the cache is saved, entries under the directories a plan scanned
+that the plan did not look up (files that disappeared) are dropped. Files modified within ``RACY_NS`` of the moment they are hashed are not
+cached, since a later same-size write in the same timestamp tick would otherwise
+go unnoticed.
+
+Installing from a bundle archive has no files to stat, so the cache also keeps a
+content-addressed table (``content``): SHA-256 of a member's bytes, as listed in
+the bundle manifest, → its normalized hash. Those entries never go stale, but
+one that was not used since loading and whose normalized hash no path entry
+carries any more is dropped on save, so the table does not grow without bound.
+
+The cache directory is ``$OPK_CACHE_DIR``, else ``$XDG_CACHE_HOME/opk``, else
+``~/.cache/opk`` (``%LOCALAPPDATA%\\opk\\cache`` on Windows).
+"""
+
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .sink import atomic_write_bytes
+
+CACHE_VERSION = 1
+RACY_NS = 2_000_000_000
+
+Entry = Tuple[int, int, str]  # size, mtime_ns, digest
+
+
+def cache_dir() -> Path:
+    env = os.environ.get('OPK_CACHE_DIR')
+    if env:
+        return Path(env)
+    if os.name == 'nt' and os.environ.get('LOCALAPPDATA'):
+        return Path(os.environ['LOCALAPPDATA']) / 'opk' / 'cache'
+    xdg = os.environ.get('XDG_CACHE_HOME')
+    return (Path(xdg) if xdg else Path.home() / '.cache') / 'opk'
+
+
+class HashCache:
+    """Thread-safe stat-keyed hash cache backed by a JSON file."""
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Entry] = {}
+        self._content: Dict[str, str] = {}
+        self._seen: set = set()
+        self._content_seen: set = set()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        if self.path is not None:
+            self._load()
+
+    @classmethod
+    def default(cls, name: str = 'install-hashes.json') -> 'HashCache':
+        return cls(cache_dir() / name)
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))  # type: ignore[union-attr]
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get('version') == CACHE_VERSION:
+            self._entries = {k: tuple(v) for k, v in (data.get('entries') or {}).items() if len(v) == 3}  # type: ignore[misc]
+            self._content = dict(data.get('content') or {})
+
+    def get(self, path: Path | str, st: os.stat_result) -> Optional[str]:
+        with self._lock:
+            self._seen.add(str(path))
+            e = self._entries.get(str(path))
+            if e is not None and e[0] == st.st_size and e[1] == st.st_mtime_ns:
+                self.hits += 1
+                return e[2]
+            self.misses += 1
+            return None
+
+    def put(self, path: Path | str, st: os.stat_result, digest: str) -> None:
+        if time.time_ns() - st.st_mtime_ns < RACY_NS:
+            return
+        with self._lock:
+            key = str(path)
+            self._seen.add(key)
+            entry = (st.st_size, st.st_mtime_ns, digest)
+            if self._entries.get(key) != entry:
+                self._entries[key] = entry
+                self._dirty = True
+
+    def get_content(self, digest: str) -> Optional[str]:
+        with self._lock:
+            self._content_seen.add(digest)
+            hit = self._content.get(digest)
+            if hit is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return hit
+
+    def put_content(self, digest: str, normalized: str) -> None:
+        with self._lock:
+            self._content_seen.add(digest)
+            if self._content.get(digest) != normalized:
+                self._content[digest] = normalized
+                self._dirty = True
+
+    def forget(self, paths: List[Path]) -> None:
+        with self._lock:
+            for p in paths:
+                if self._entries.pop(str(p), None) is not None:
+                    self._dirty = True
+
+    def save(self, prune_under: Iterable[Path] = ()) -> bool:
+        """Write the cache if it changed. Returns True if written; I/O errors are ignored.
+
+        Path entries inside a ``prune_under`` directory that were not looked up
+        or stored since the cache was loaded are dropped, whether or not the
+        file still exists; callers pass only directories they scanned in full,
+        where that means the file is gone. Content entries not used since
+        loading are dropped when no remaining path entry has their normalized
+        hash.
+        """
+        with self._lock:
+            prefixes = tuple(str(d) + os.sep for d in prune_under)
+            if prefixes:
+                gone = [k for k in self._entries if k.startswith(prefixes) and k not in self._seen]
+                for k in gone:
+                    del self._entries[k]
+                self._dirty = self._dirty or bool(gone)
+            live = {e[2] for e in self._entries.values()}
+            orphans = [d for d, n in self._content.items() if n not in live and d not in self._content_seen]
+            for d in orphans:
+                del self._content[d]
+            self._dirty = self._dirty or bool(orphans)
+            if self.path is None or not self._dirty:
+                return False
+            data = json.dumps({'version': CACHE_VERSION, 'entries': self._entries, 'content': self._content}, separators=(',', ':'))
+            try:
+                atomic_write_bytes(self.path, data.encode('utf-8'))
+            except OSError:
+                return False
+            self._dirty = False
+            return True
@@ -1,12 +1,20 @@
 from __future__ import annotations
 import json
+import contextlib
 import hashlib
+import os
+import shutil
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from pathlib import Path
-from typing import List, Literal
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, List, Literal, Tuple
+
+from .hashcache import HashCache
+from .sink import default_file_mode, same_content
 
 Category = Literal["printers", "filaments", "processes"]
+CATEGORIES = ("printers", "filaments", "processes")
 
 
 @dataclass
@@ -16,66 +24,465 @@ class InstallOp:
     src: Path
     dest: Path
     status: Literal["add", "update", "same"]
+    src_hash: str | None = None
+    dest_hash: str | None = None
+    member: str | None = None  # set when ``src`` is a bundle archive
 
 
-def _normalized_json_bytes(p: Path) -> bytes:
+def _normalize(raw: bytes) -> bytes:
     try:
-        obj = json.loads(p.read_text(encoding="utf-8"))
+        obj = json.loads(raw.decode("utf-8"))
     except Exception:
         # fallback to raw bytes to avoid crashing; still allow copy
-        return p.read_bytes()
+        return raw
     return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"), indent=2).encode(
         "utf-8"
     )
 
 
+def _normalized_json_bytes(p: Path) -> bytes:
+    return _normalize(p.read_bytes())
+
+
 def _hash_bytes(b: bytes) -> str:
     return hashlib.sha256(b).hexdigest()
 
 
-def plan_install(src_dir: Path, dest_dir: Path) -> List[InstallOp]:
+def _normalized_hash(p: Path) -> str:
+    return _hash_bytes(_normalized_json_bytes(p))
+
+
+# Below this many cache misses hashing in-process is faster than a pool.
+MIN_PARALLEL_HASHES = 32
+
+
+def _pool_map(fn, items: list, jobs: int | None) -> list:
+    cpus = os.cpu_count() or 1
+    workers = jobs or (min(32, cpus + 4) if cpus > 1 else 1)
+    if workers > 1 and len(items) >= MIN_PARALLEL_HASHES:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            return list(ex.map(fn, items))
+    return [fn(x) for x in items]
+
+
+def _open_cache(cache: HashCache | None | bool) -> HashCache:
+    return HashCache.default() if cache is None or cache is True else (cache or HashCache())
+
+
+def _file_hashes(keys: Dict[Path, str], hc: HashCache, jobs: int | None) -> Dict[Path, str]:
+    """Normalized hashes of the existing files in ``keys`` (path → cache key), via the stat-keyed cache."""
+    digests: Dict[Path, str] = {}
+    stats: Dict[Path, os.stat_result] = {}
+    misses: List[Path] = []
+    for p, key in keys.items():
+        try:
+            st = os.stat(p)
+        except OSError:
+            continue  # destination not installed yet
+        stats[p] = st
+        hit = hc.get(key, st)
+        if hit is None:
+            misses.append(p)
+        else:
+            digests[p] = hit
+    for p, h in zip(misses, _pool_map(_normalized_hash, misses, jobs)):
+        digests[p] = h
+        hc.put(keys[p], stats[p], h)
+    return digests
+
+
+def _cache_keys(root: Path, files: Dict[Path, Tuple[str, str]], out: Dict[Path, str]) -> List[Path]:
+    """Cache keys for ``files`` (path → (category, name)) under ``root``; returns the category dirs scanned.
+
+    The root is resolved once and names are joined onto it: resolving every file
+    would cost an lstat per path component.
+    """
+    base = root.resolve()
+    for p, (category, name) in files.items():
+        out[p] = str(base / category / name)
+    return [base / c for c in CATEGORIES]
+
+
+def _op(category: str, name: str, src: Path, dest: Path, sh: str, dh: str | None, member: str | None = None) -> InstallOp:
+    status = "add" if dh is None else ("same" if sh == dh else "update")
+    return InstallOp(category=category, name=name, src=src, dest=dest, status=status, src_hash=sh, dest_hash=dh, member=member)  # type: ignore[arg-type]
+
+
+def plan_install(src_dir: Path, dest_dir: Path, cache: HashCache | None | bool = None, jobs: int | None = None) -> List[InstallOp]:
+    """Compare ``src_dir`` presets with ``dest_dir`` and return one op per source file.
+
+    Normalized hashes come from a stat-keyed ``HashCache`` (the persistent
+    default when ``cache`` is None; pass ``False`` to disable, or your own
+    instance), so an unchanged tree costs only ``stat`` calls. Cache misses are
+    hashed on a thread pool (``jobs`` workers; 1 = in-process).
+    """
     src_dir = Path(src_dir)
     dest_dir = Path(dest_dir)
-    ops: List[InstallOp] = []
-    for category in ("printers", "filaments", "processes"):
+    hc = _open_cache(cache)
+    pairs: List[Tuple[str, Path, Path]] = []
+    for category in CATEGORIES:
         sdir = src_dir / category
         if not sdir.exists():
             # skip missing categories; GUI/CLI can handle empty plan as warning
             continue
         for sp in sorted(sdir.glob("*.json"), key=lambda p: p.name):
-            dp = dest_dir / category / sp.name
-            sb = _normalized_json_bytes(sp)
-            if not dp.exists():
-                status = "add"
+            pairs.append((category, sp, dest_dir / category / sp.name))
+
+    keys: Dict[Path, str] = {}
+    scanned = _cache_keys(src_dir, {sp: (c, sp.name) for c, sp, _dp in pairs}, keys)
+    scanned += _cache_keys(dest_dir, {dp: (c, dp.name) for c, _sp, dp in pairs}, keys)
+    digests = _file_hashes(keys, hc, jobs)
+    hc.save(prune_under=scanned)
+    return [_op(category, sp.name, sp, dp, digests[sp], digests.get(dp)) for category, sp, dp in pairs]
+
+
+def _bundle_members(zf: zipfile.ZipFile) -> List[Tuple[str, str]]:
+    """(category, member) for each preset in a bundle; anything else (or unsafe paths) is ignored."""
+    out = []
+    for name in zf.namelist():
+        parts = PurePosixPath(name).parts
+        if len(parts) == 2 and parts[0] in CATEGORIES and parts[1].endswith(".json") and not parts[1].startswith("."):
+            out.append((parts[0], name))
+    return sorted(out, key=lambda cm: (CATEGORIES.index(cm[0]), cm[1]))
+
+
+def _manifest_files(zf: zipfile.ZipFile) -> Dict[str, str]:
+    """member -> SHA-256 table of a bundle manifest (empty for bundles without one)."""
+    try:
+        return json.loads(zf.read("manifest.json")).get("files") or {}
+    except (KeyError, ValueError):
+        return {}
+
+
+def _read_member(zf: zipfile.ZipFile, name: str, digest: str | None) -> bytes:
+    raw = zf.read(name)
+    if digest is not None and _hash_bytes(raw) != digest:
+        raise ValueError(f"{name}: content does not match the bundle manifest")
+    return raw
+
+
+def plan_bundle_install(bundle: Path, dest_dir: Path, cache: HashCache | None | bool = None,
+                        jobs: int | None = None) -> List[InstallOp]:
+    """Like ``plan_install``, with the presets read from a bundle archive instead of a directory.
+
+    Members are matched to their normalized hash through the SHA-256 table in
+    the bundle manifest and the cache's content table, so planning a bundle seen
+    before reads only the manifest and stats the destination. Other members are
+    decompressed and hashed in memory; nothing is extracted.
+    """
+    bundle = Path(bundle)
+    dest_dir = Path(dest_dir)
+    hc = _open_cache(cache)
+    with zipfile.ZipFile(bundle) as zf:
+        files = _manifest_files(zf)
+        members = _bundle_members(zf)
+        src_hashes: Dict[str, str] = {}
+        misses: List[str] = []
+        for _category, name in members:
+            hit = hc.get_content(files[name]) if name in files else None
+            if hit is None:
+                misses.append(name)
             else:
-                db = _normalized_json_bytes(dp)
-                status = "same" if _hash_bytes(sb) == _hash_bytes(db) else "update"
-            ops.append(InstallOp(category=category, name=sp.name, src=sp, dest=dp, status=status))
-    return ops
+                src_hashes[name] = hit
+        for name, h in zip(misses, _pool_map(lambda n: _hash_bytes(_normalize(_read_member(zf, n, files.get(n)))), misses, jobs)):
+            src_hashes[name] = h
+            if name in files:
+                hc.put_content(files[name], h)
+    dests = {name: dest_dir / category / PurePosixPath(name).name for category, name in members}
+    keys: Dict[Path, str] = {}
+    scanned = _cache_keys(dest_dir, {dp: (dp.parent.name, dp.name) for dp in dests.values()}, keys)
+    dest_hashes = _file_hashes(keys, hc, jobs)
+    hc.save(prune_under=scanned)
+    return [_op(category, dests[name].name, bundle, dests[name], src_hashes[name], dest_hashes.get(dests[name]), member=name)
+            for category, name in members]
+
+
+class InstallInterrupted(RuntimeError):
+    """A previous install into this directory did not finish; see ``recover_install``."""
+
+
+# Staging area and journal live inside the preset directory so every rename
+# stays on one filesystem (and is therefore atomic).
+STAGING_DIR = ".opk-install"
+JOURNAL = "journal.json"
+
+
+def _fsync_dirs(dirs) -> None:
+    """fsync each directory once so renames into it are durable (no-op on Windows)."""
+    if os.name == "nt":
+        return
+    for d in sorted({str(d) for d in dirs}):
+        try:
+            fd = os.open(d, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def _fsync_file(path: Path) -> None:
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())
+
+
+def _write_durable(path: Path, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _write_journal(stage: Path, entries: List[dict], group: List[str] = (), committed: bool = False) -> None:
+    """Record the plan; ``group`` lists every destination of a multi-root install (one transaction)."""
+    tmp = stage / (JOURNAL + ".part")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "entries": entries, "group": list(group), "committed": committed}, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, stage / JOURNAL)
+    _fsync_dirs([stage])
+
+
+def _read_journal(stage: Path) -> dict | None:
+    try:
+        data = json.loads((stage / JOURNAL).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        raise InstallInterrupted(f"{stage / JOURNAL}: unreadable install journal ({e})") from None
+    return {"entries": list(data.get("entries") or []), "group": list(data.get("group") or []),
+            "committed": bool(data.get("committed"))}
+
+
+def _finish(root: Path, stage: Path, entries: List[dict]) -> None:
+    _fsync_dirs({(root / e["dest"]).parent for e in entries})
+    (stage / JOURNAL).unlink(missing_ok=True)
+    _fsync_dirs([stage])
+    shutil.rmtree(stage, ignore_errors=True)
+
+
+def _rollback(root: Path, stage: Path, entries: List[dict]) -> int:
+    restored = 0
+    for e in entries:
+        dest, new, old = root / e["dest"], stage / "new" / e["dest"], stage / "old" / e["dest"]
+        if e["existed"]:
+            if old.exists():
+                os.replace(old, dest)
+                restored += 1
+        elif not new.exists() and dest.exists():
+            dest.unlink()  # added by the interrupted install
+            restored += 1
+    _finish(root, stage, entries)
+    return restored
+
+
+def _roll_forward(root: Path, stage: Path, entries: List[dict]) -> int:
+    applied = 0
+    for e in entries:
+        new = stage / "new" / e["dest"]
+        if new.exists():
+            os.replace(new, root / e["dest"])
+            applied += 1
+    _finish(root, stage, entries)
+    return applied
+
+
+def recover_install(dest_dir: Path, action: Literal["rollback", "resume"] = "rollback") -> int | None:
+    """Finish or undo an interrupted install into ``dest_dir``.
+
+    ``rollback`` puts back every file the install replaced or added; ``resume``
+    moves the remaining staged files into place. An install into several
+    destinations is one transaction: recovering any of them recovers all, and
+    one that had already committed is always resumed. Returns the number of
+    files touched, or None if there was nothing to recover.
+    """
+    if action not in ("rollback", "resume"):
+        raise ValueError(f"unknown recovery action: {action}")
+    root = Path(dest_dir).absolute()
+    journal = _read_journal(root / STAGING_DIR)
+    if journal is None:
+        if (root / STAGING_DIR).exists():
+            shutil.rmtree(root / STAGING_DIR, ignore_errors=True)  # crashed while staging; nothing was swapped
+        return None
+    journals: Dict[Path, dict] = {}
+    for r in dict.fromkeys([Path(g) for g in journal["group"]] + [root]):
+        j = journal if r == root else _read_journal(r / STAGING_DIR)
+        if j is not None:
+            journals[r] = j
+        elif (r / STAGING_DIR).exists():
+            shutil.rmtree(r / STAGING_DIR, ignore_errors=True)
+    if any(j["committed"] for j in journals.values()):
+        action = "resume"
+    fn = _rollback if action == "rollback" else _roll_forward
+    return sum(fn(r, r / STAGING_DIR, j["entries"]) for r, j in journals.items())
+
+
+def _backup_prefix(root: Path, multi: bool) -> str:
+    if not multi:
+        return ""
+    # several destinations: keep them apart under their own (anchor-less) path
+    parts = Path(root).absolute().parts[1:]
+    return "/".join(parts) + "/"
+
+
+def _write_backup(backup_zip: Path, staged: List[Tuple[Path, List[dict]]]) -> None:
+    """One zip of every file the install replaces, across all destination roots.
+
+    A single root keeps the ``category/name`` layout; with several roots each
+    root's files sit under that root's path (without its anchor).
+    """
+    backup_zip = Path(backup_zip)
+    backup_zip.parent.mkdir(parents=True, exist_ok=True)
+    tmp = backup_zip.with_name(backup_zip.name + ".part")
+    try:
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for root, entries in staged:
+                prefix = _backup_prefix(root, len(staged) > 1)
+                for e in entries:
+                    if e["existed"]:
+                        # write with relative path under category/
+                        zf.write(root / e["dest"], prefix + e["dest"])
+        os.replace(tmp, backup_zip)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _stage_root(root: Path, ops: List[InstallOp], read: Callable[[InstallOp], bytes],
+                group: List[str] = ()) -> Tuple[List[dict], int]:
+    """Stage ``ops`` under ``root`` and journal them; returns (journal entries, unchanged count)."""
+    stage = root / STAGING_DIR
+    if _read_journal(stage) is not None:
+        raise InstallInterrupted(f"a previous install into {root} was interrupted; run `opk install --dest {root} --recover rollback|resume`")
+    shutil.rmtree(stage, ignore_errors=True)
+
+    # 1. stage: normalized outputs under new/, hard links to the files they replace under old/
+    entries: List[dict] = []
+    staged: List[Path] = []
+    unchanged = 0
+    try:
+        for op in ops:
+            data = read(op)
+            if same_content(op.dest, data):
+                unchanged += 1
+                continue
+            rel = f"{op.category}/{op.dest.name}"
+            new = stage / "new" / rel
+            new.parent.mkdir(parents=True, exist_ok=True)
+            _write_durable(new, data)
+            existed = op.dest.exists()
+            try:
+                mode = os.stat(op.dest).st_mode & 0o7777
+            except OSError:
+                mode = default_file_mode()
+            os.chmod(new, mode)
+            if existed:
+                old = stage / "old" / rel
+                old.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(op.dest, old)
+                except OSError:
+                    shutil.copy2(op.dest, old)
+                    _fsync_file(old)
+                    staged.append(old)
+            entries.append({"dest": rel, "existed": existed})
+            staged.append(new)
+        if not entries:
+            shutil.rmtree(stage, ignore_errors=True)
+            return [], unchanged
+        for category in {e["dest"].split("/", 1)[0] for e in entries}:
+            (root / category).mkdir(parents=True, exist_ok=True)
+        # 2. staged files were fsynced as they were written; make their directory
+        #    entries durable too (file → category dir → new/old → staging dir), then record the plan
+        _fsync_dirs({d for p in staged for d in (p.parent, p.parent.parent)} | {stage})
+        _write_journal(stage, entries, group)
+    except BaseException:
+        shutil.rmtree(stage, ignore_errors=True)
+        raise
+    return entries, unchanged
+
+
+def _swap_root(root: Path, entries: List[dict]) -> None:
+    stage = root / STAGING_DIR
+    for e in entries:
+        os.replace(stage / "new" / e["dest"], root / e["dest"])
 
 
 def perform_install(ops: List[InstallOp], backup_zip: Path | None = None) -> dict:
-    # Create backup of files that will be overwritten
-    if backup_zip:
-        backup_zip = Path(backup_zip)
-        backup_zip.parent.mkdir(parents=True, exist_ok=True)
-        with zipfile.ZipFile(backup_zip, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-            for op in ops:
-                if op.status == "update" and op.dest.exists():
-                    # write with relative path under category/
-                    arcname = f"{op.category}/{op.dest.name}"
-                    zf.write(op.dest, arcname)
-
-    # Apply operations
-    written = 0
+    """Apply ``add``/``update`` ops as one transaction, across every destination directory.
+
+    Outputs are staged in ``<dest>/.opk-install/`` and fsynced, recorded in a
+    journal and then renamed into place. Every destination is staged before any
+    file is swapped; if a swap fails, all destinations are restored. After a
+    crash ``recover_install`` rolls back or resumes from the journals, which
+    name every destination of the install, so recovering one recovers all.
+    Files whose bytes already match are left untouched. Ops planned by
+    ``plan_bundle_install`` are read straight from their archive and checked
+    against the manifest's SHA-256 table before they are staged (``ValueError``
+    on a mismatch; nothing is swapped). ``backup_zip`` receives one archive of
+    every replaced file across all destinations.
+    """
+    roots: Dict[Path, List[InstallOp]] = {}
     skipped = 0
     for op in ops:
         if op.status in ("add", "update"):
-            op.dest.parent.mkdir(parents=True, exist_ok=True)
-            op.dest.write_bytes(_normalized_json_bytes(op.src))
-            written += 1
+            roots.setdefault(Path(op.dest).parent.parent, []).append(op)
         else:
             skipped += 1
 
-    return {"written": written, "skipped": skipped, "total": len(ops)}
+    written = 0
+    unchanged = 0
+    with contextlib.ExitStack() as stack:
+        archives: Dict[Path, Tuple[zipfile.ZipFile, Dict[str, str]]] = {}
+
+        def read(op: InstallOp) -> bytes:
+            if op.member is None:
+                return _normalized_json_bytes(op.src)
+            if op.src not in archives:
+                zf = stack.enter_context(zipfile.ZipFile(op.src))
+                archives[op.src] = (zf, _manifest_files(zf))
+            zf, files = archives[op.src]
+            # the archive may have changed since it was planned: check against the manifest again
+            return _normalize(_read_member(zf, op.member, files.get(op.member)))
+
+        # every root is staged (and the backup written) before any file is swapped
+        group = [str(r.absolute()) for r in roots] if len(roots) > 1 else []
+        staged: List[Tuple[Path, List[dict]]] = []
+        try:
+            for root, root_ops in roots.items():
+                entries, u = _stage_root(root, root_ops, read, group)
+                unchanged += u
+                if entries:
+                    staged.append((root, entries))
+            if backup_zip and staged:
+                _write_backup(backup_zip, staged)
+        except BaseException:
+            for root, _entries in staged:
+                shutil.rmtree(root / STAGING_DIR, ignore_errors=True)
+            raise
+
+    # 3. swap every root; any failure rolls back all of them from their journals
+    swapped = 0
+    try:
+        for root, entries in staged:
+            swapped += 1
+            _swap_root(root, entries)
+    except BaseException:
+        for root, entries in staged[:swapped]:
+            _rollback(root, root / STAGING_DIR, entries)
+        for root, _entries in staged[swapped:]:
+            shutil.rmtree(root / STAGING_DIR, ignore_errors=True)
+        raise
+    if len(staged) > 1:
+        # commit point: from here on recovery completes the install in every root
+        for root, entries in staged:
+            _write_journal(root / STAGING_DIR, entries, group, committed=True)
+    for root, entries in staged:
+        _finish(root, root / STAGING_DIR, entries)
+        written += len(entries)
 
+    return {"written": written, "unchanged": unchanged, "skipped": skipped, "total": len(ops)}
@@ -3,11 +3,13 @@ import json
 from pathlib import Path
 from typing import Any, Dict
 
+from .sink import write_if_changed
+
 def load_json(path: str | Path) -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def dump_json(data: Dict[str, Any], path: str | Path) -> None:
-    Path(path).parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8", newline="\n") as f:
-        json.dump(data, f, ensure_ascii=False, sort_keys=True, separators=(",", ":"), indent=2)
+def dump_json(data: Dict[str, Any], path: str | Path) -> bool:
+    """Write ``data`` as stable JSON; returns False if the file already had this content."""
+    text = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"), indent=2)
+    return write_if_changed(Path(path), text.encode("utf-8"))
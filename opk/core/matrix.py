@@ -0,0 +1,229 @@
+"""Combinatorial process-profile expansion (``opk gen-matrix``).
+
+Given a base PDL and axes (nozzle diameters × layer heights × materials), derive
+line width, first-layer height, speeds and accelerations for every combination
+and yield one :class:`~opk.pdl.model.PdlModel` per valid combination, ready for
+the slicer generators. The base PDL is parsed once; variants are cheap
+``dataclasses.replace`` copies of it.
+
+Derivations:
+
+- layer height must lie within ``[LAYER_MIN_RATIO, LAYER_MAX_RATIO] × nozzle``;
+  other combinations are skipped
+- line width is ``LINE_WIDTH_RATIO × nozzle``
+- print speeds are capped by the material's volumetric flow
+  (``flow / (line_width × layer_height)``) and ``limits.print_speed_max``
+- accelerations reach each speed within ``RAMP_MM`` (``v² / 2d``), capped by
+  ``limits.acceleration_max``
+
+The same formulas run on whole columns at once with NumPy when it is installed,
+and per combination in plain Python otherwise.
+"""
+
+from __future__ import annotations
+import itertools
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from ..pdl.model import (
+    Accelerations, Extruder, Material, PdlModel, ProcessDefaults, Speeds, as_model,
+)
+
+try:  # optional: vectorized derivation
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - exercised when NumPy is missing
+    np = None
+
+LAYER_MIN_RATIO = 0.25
+LAYER_MAX_RATIO = 0.75
+LINE_WIDTH_RATIO = 1.125
+EXTERNAL_PERIMETER_RATIO = 0.75
+RAMP_MM = 1.0
+DEFAULT_FLOW_MM3S = 12.0
+DEFAULT_ACCELERATION = 3000
+
+# Conservative hotend-agnostic starting points, keyed by filament type.
+MATERIAL_DEFAULTS: Dict[str, Dict[str, float]] = {
+    'PLA':  {'max_volumetric_speed_mm3s': 15.0, 'nozzle_temperature': 210, 'bed_temperature': 60},
+    'PETG': {'max_volumetric_speed_mm3s': 10.0, 'nozzle_temperature': 240, 'bed_temperature': 80},
+    'ABS':  {'max_volumetric_speed_mm3s': 12.0, 'nozzle_temperature': 250, 'bed_temperature': 100},
+    'ASA':  {'max_volumetric_speed_mm3s': 12.0, 'nozzle_temperature': 255, 'bed_temperature': 100},
+    'TPU':  {'max_volumetric_speed_mm3s': 3.5,  'nozzle_temperature': 225, 'bed_temperature': 50},
+    'PA':   {'max_volumetric_speed_mm3s': 8.0,  'nozzle_temperature': 260, 'bed_temperature': 90},
+    'PC':   {'max_volumetric_speed_mm3s': 8.0,  'nozzle_temperature': 270, 'bed_temperature': 110},
+}
+
+
+@dataclass(frozen=True, slots=True)
+class MatrixAxes:
+    nozzles: Tuple[float, ...]
+    layer_heights: Tuple[float, ...]
+    materials: Tuple[str, ...]
+
+    @property
+    def size(self) -> int:
+        return len(self.nozzles) * len(self.layer_heights) * len(self.materials)
+
+
+@dataclass(frozen=True, slots=True)
+class Combination:
+    nozzle: float
+    layer_height: float
+    material: Material
+    line_width: float
+    first_layer: float
+    speeds: Speeds
+    accelerations: Accelerations
+
+
+def parse_axes(spec: Dict[str, Any]) -> MatrixAxes:
+    """Build axes from a mapping with ``nozzles``, ``layer_heights`` and ``materials`` lists."""
+    def _floats(key: str) -> Tuple[float, ...]:
+        vals = spec.get(key) or []
+        if isinstance(vals, str):
+            vals = [v for v in vals.split(',') if v.strip()]
+        return tuple(float(v) for v in vals)
+
+    mats = spec.get('materials') or []
+    if isinstance(mats, str):
+        mats = [m.strip() for m in mats.split(',') if m.strip()]
+    axes = MatrixAxes(_floats('nozzles'), _floats('layer_heights'), tuple(str(m) for m in mats))
+    if not (axes.nozzles and axes.layer_heights and axes.materials):
+        raise ValueError("matrix needs at least one nozzle, layer height and material")
+    return axes
+
+
+def resolve_material(name: str, model: PdlModel) -> Material:
+    """Look a material up in the PDL (by name, then filament type), then in ``MATERIAL_DEFAULTS``."""
+    key = name.strip().lower()
+    found = next((m for m in model.materials if (m.name or '').lower() == key), None)
+    if found is None:
+        found = next((m for m in model.materials if (m.filament_type or '').lower() == key), None)
+    ftype = (found.filament_type if found and found.filament_type else name).upper()
+    table = MATERIAL_DEFAULTS.get(ftype)
+    if found is None and table is None:
+        raise ValueError(f"unknown material '{name}' (not in PDL materials or built-in defaults)")
+    table = table or {}
+    base = found or Material(name=name, filament_type=ftype)
+    return replace(
+        base,
+        max_volumetric_speed_mm3s=base.max_volumetric_speed_mm3s or table.get('max_volumetric_speed_mm3s') or DEFAULT_FLOW_MM3S,
+        nozzle_temperature=base.nozzle_temperature or table.get('nozzle_temperature'),
+        bed_temperature=base.bed_temperature or table.get('bed_temperature'),
+    )
+
+
+class _PyOps:
+    minimum = staticmethod(min)
+    maximum = staticmethod(max)
+    round = staticmethod(round)
+
+
+def _derive(xp, n, h, q, base: Dict[str, float]) -> Dict[str, Any]:
+    """Derivation formulas; ``n``/``h``/``q`` are NumPy columns or plain floats."""
+    lw = xp.round(n * LINE_WIDTH_RATIO, 3)
+    cap = xp.minimum(q / (lw * h), base['vmax'])
+    per = xp.round(xp.minimum(base['perimeter'], cap), 1)
+    inf = xp.round(xp.minimum(base['infill'], cap), 1)
+    ext = xp.round(xp.minimum(base['external_perimeter'], cap), 1)
+    ramp = 2.0 * RAMP_MM
+    return {
+        'valid': (h >= n * LAYER_MIN_RATIO - 1e-9) & (h <= n * LAYER_MAX_RATIO + 1e-9),
+        'line_width': lw,
+        'first_layer': xp.round(xp.minimum(n * LAYER_MAX_RATIO, xp.maximum(h, n * 0.5)), 3),
+        'perimeter': per,
+        'infill': inf,
+        'external_perimeter': ext,
+        'acc_perimeter': xp.round(xp.minimum(per * per / ramp, base['amax'])),
+        'acc_infill': xp.round(xp.minimum(inf * inf / ramp, base['amax'])),
+        'acc_external': xp.round(xp.minimum(ext * ext / ramp, base['amax'])),
+    }
+
+
+def _base_values(model: PdlModel) -> Dict[str, float]:
+    spd = model.process_defaults.speeds
+    per = spd.perimeter or 40.0
+    return {
+        'perimeter': per,
+        'infill': spd.infill or 60.0,
+        'external_perimeter': spd.external_perimeter or per * EXTERNAL_PERIMETER_RATIO,
+        'vmax': model.limits.print_speed_max or float('inf'),
+        'amax': float(model.limits.acceleration_max or DEFAULT_ACCELERATION),
+    }
+
+
+def derive(model: PdlModel, axes: MatrixAxes, materials: Sequence[Material] | None = None) -> List[Combination]:
+    """Derive settings for every valid combination of ``axes`` (row order: nozzle, layer, material)."""
+    mats = list(materials) if materials is not None else [resolve_material(x, model) for x in axes.materials]
+    base = _base_values(model)
+    grid = list(itertools.product(range(len(axes.nozzles)), range(len(axes.layer_heights)), range(len(mats))))
+    flows = [m.max_volumetric_speed_mm3s or DEFAULT_FLOW_MM3S for m in mats]
+    if np is not None and grid:
+        idx = np.asarray(grid)
+        n = np.asarray(axes.nozzles, dtype=float)[idx[:, 0]]
+        h = np.asarray(axes.layer_heights, dtype=float)[idx[:, 1]]
+        q = np.asarray(flows, dtype=float)[idx[:, 2]]
+        cols = {k: v.tolist() for k, v in _derive(np, n, h, q, base).items()}
+        rows: Iterable[Dict[str, Any]] = (
+            {k: cols[k][i] for k in cols} for i in range(len(grid))
+        )
+    else:
+        rows = (
+            _derive(_PyOps, axes.nozzles[a], axes.layer_heights[b], flows[c], base)
+            for a, b, c in grid
+        )
+    travel = model.process_defaults.speeds.travel or 150.0
+    if model.limits.travel_speed_max:
+        travel = min(travel, model.limits.travel_speed_max)
+    amax = base['amax']
+    out: List[Combination] = []
+    for (a, b, c), r in zip(grid, rows):
+        if not r['valid']:
+            continue
+        out.append(Combination(
+            nozzle=axes.nozzles[a],
+            layer_height=axes.layer_heights[b],
+            material=mats[c],
+            line_width=float(r['line_width']),
+            first_layer=float(r['first_layer']),
+            speeds=replace(
+                model.process_defaults.speeds,
+                perimeter=float(r['perimeter']), infill=float(r['infill']),
+                external_perimeter=float(r['external_perimeter']), travel=float(travel),
+            ),
+            accelerations=replace(
+                model.process_defaults.accelerations,
+                perimeter=float(r['acc_perimeter']), infill=float(r['acc_infill']),
+                external_perimeter=float(r['acc_external']), travel=amax,
+            ),
+        ))
+    return out
+
+
+def combination_name(base: str, c: Combination) -> str:
+    return f"{base} N{c.nozzle:g} L{c.layer_height:g} {c.material.name or c.material.filament_type}"
+
+
+def expand_matrix(pdl: Dict[str, Any] | PdlModel, axes: MatrixAxes) -> Iterator[PdlModel]:
+    """Yield one model per valid combination, derived from the base PDL."""
+    model = as_model(pdl)
+    base_name = model.name or 'OPK'
+    ex0 = model.extruder0
+    for c in derive(model, axes):
+        proc: ProcessDefaults = replace(
+            model.process_defaults,
+            layer_height_mm=c.layer_height,
+            first_layer_mm=c.first_layer,
+            min_layer_height_mm=round(c.nozzle * LAYER_MIN_RATIO, 3),
+            line_width_mm=c.line_width,
+            speeds=c.speeds,
+            accelerations=c.accelerations,
+        )
+        yield replace(
+            model,
+            name=combination_name(base_name, c),
+            extruders=((replace(ex0, nozzle_diameter=c.nozzle),) + model.extruders[1:]
+                       if model.extruders else (Extruder(nozzle_diameter=c.nozzle),)),
+            materials=(c.material,),
+            process_defaults=proc,
+        )
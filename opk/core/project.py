@@ -1,20 +1,52 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+import copy
 import json
+import threading
+import time
+
+PROJECT_FILE_NAMES = ('.opk-project.yaml', '.opk-project.yml', '.opk-project.json')
+
+# Discovery results are shared by every directory on the walked path, so a batch run
+# over many PDLs in one tree stats each directory once. Entries expire after a short
+# TTL so long-lived processes (GUI) notice project files created or removed later.
+DISCOVERY_TTL_S = 5.0
+
+_lock = threading.Lock()
+_discovery: Dict[Path, Tuple[float, Path | None]] = {}
+_configs: Dict[Path, Tuple[int, int, Dict[str, Any]]] = {}
+
+
+def clear_project_cache() -> None:
+    """Forget cached project-file discovery and parsed configs."""
+    with _lock:
+        _discovery.clear()
+        _configs.clear()
 
 
 def find_project_file(start: Path) -> Path | None:
-    start = start.resolve()
-    for p in [start] + list(start.parents):
-        for name in ('.opk-project.yaml', '.opk-project.yml', '.opk-project.json'):
-            cand = p / name
-            if cand.exists():
-                return cand
-    return None
+    start = Path(start).resolve()
+    now = time.monotonic()
+    walked = []
+    found: Path | None = None
+    with _lock:
+        for p in [start] + list(start.parents):
+            ent = _discovery.get(p)
+            if ent is not None and now - ent[0] < DISCOVERY_TTL_S:
+                found = ent[1]
+                break
+            walked.append(p)
+            hit = next((p / n for n in PROJECT_FILE_NAMES if (p / n).exists()), None)
+            if hit is not None:
+                found = hit
+                break
+        for p in walked:
+            _discovery[p] = (now, found)
+    return found
 
 
-def load_project_config(p: Path) -> Dict[str, Any]:
+def _parse_project_config(p: Path) -> Dict[str, Any]:
     text = p.read_text(encoding='utf-8')
     if p.suffix.lower() == '.json':
         return json.loads(text)
@@ -23,6 +55,21 @@ def load_project_config(p: Path) -> Dict[str, Any]:
         return yaml.safe_load(text) or {}
 
 
+def load_project_config(p: Path) -> Dict[str, Any]:
+    """Parse a project file, reusing the previous parse while its mtime/size are unchanged."""
+    p = Path(p)
+    st = p.stat()
+    key = p.resolve()
+    with _lock:
+        ent = _configs.get(key)
+        if ent is not None and ent[0] == st.st_mtime_ns and ent[1] == st.st_size:
+            return copy.deepcopy(ent[2])
+    data = _parse_project_config(p)
+    with _lock:
+        _configs[key] = (st.st_mtime_ns, st.st_size, data)
+    return copy.deepcopy(data)
+
+
 def merge_policies(pdl: Dict[str, Any], proj: Dict[str, Any]) -> Dict[str, Any]:
     out = dict(pdl or {})
     pol = dict(out.get('policies') or {})
@@ -36,3 +83,10 @@ def merge_policies(pdl: Dict[str, Any], proj: Dict[str, Any]) -> Dict[str, Any]:
         out['policies'] = pol
     return out
 
+
+def apply_project_policies(pdl: Dict[str, Any], start: Path) -> Dict[str, Any]:
+    """Merge policies from the nearest project file at or above ``start`` into ``pdl``."""
+    proj = find_project_file(start)
+    if proj is None:
+        return pdl or {}
+    return merge_policies(pdl or {}, load_project_config(proj))
@@ -0,0 +1,167 @@
+"""Output sinks for generators.
+
+Generators hand finished file contents to a sink instead of writing files
+themselves. ``DirSink`` writes to disk (the default), ``MemorySink`` keeps the
+bytes in memory, and ``TeeSink`` fans out to several sinks. ``opk.core.bundle``
+provides ``BundleSink``, which streams output straight into a bundle archive.
+
+Disk writes go through ``write_if_changed``: a file whose size and SHA-256 already
+match is left alone (mtime preserved, so slicers, rsync and downstream builds see
+no change), and changed files are replaced atomically via temp file + rename.
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict
+
+_umask_lock = threading.Lock()
+_umask: int | None = None
+
+
+def _read_umask() -> int:
+    # Linux reports it without touching it; elsewhere os.umask is the only way to read it
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+def default_file_mode() -> int:
+    """Mode a newly created file gets under the process umask (mkstemp files are 0600).
+
+    Read once, on first use: swapping the umask to read it is process-wide, so it
+    is not done at import time and, where ``/proc`` exists, not at all.
+    """
+    global _umask
+    if _umask is None:
+        with _umask_lock:
+            if _umask is None:
+                _umask = _read_umask()
+    return 0o666 & ~_umask
+
+
+def file_sha256(p: Path) -> str:
+    """Hex SHA-256 of a file's bytes, read in 1 MiB chunks."""
+    h = hashlib.sha256()
+    with open(p, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def same_content(path: Path, data: bytes) -> bool:
+    """True if ``path`` exists and holds exactly ``data`` (size check first, then hash)."""
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        return file_sha256(Path(path)) == hashlib.sha256(data).hexdigest()
+    except OSError:
+        return False
+
+
+def atomic_write_bytes(path: Path, data: bytes, mode: int | None = None) -> None:
+    """Write ``data`` to a temp file next to ``path`` and rename it into place.
+
+    The file keeps the mode of the file it replaces (a new one gets the umask
+    default) unless ``mode`` is given.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if mode is None:
+            try:
+                mode = os.stat(path).st_mode & 0o7777
+            except OSError:
+                mode = default_file_mode()
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """Write ``data`` to ``path`` unless it already has that content. Returns True if written."""
+    if same_content(path, data):
+        return False
+    atomic_write_bytes(path, data)
+    return True
+
+
+class OutputSink:
+    """Destination for generated files. Subclasses implement ``write_bytes``."""
+
+    def write_bytes(self, path: Path, data: bytes) -> Path:
+        raise NotImplementedError
+
+    def write_text(self, path: Path, text: str) -> Path:
+        return self.write_bytes(Path(path), text.encode('utf-8'))
+
+
+class DirSink(OutputSink):
+    """Write files to disk, skipping unchanged content, and count the outcome."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.written = 0
+        self.unchanged = 0
+
+    def write_bytes(self, path: Path, data: bytes) -> Path:
+        path = Path(path)
+        changed = write_if_changed(path, data)
+        with self._lock:
+            if changed:
+                self.written += 1
+            else:
+                self.unchanged += 1
+        return path
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'written': self.written, 'unchanged': self.unchanged}
+
+
+class MemorySink(OutputSink):
+    """Collect generated files in memory, keyed by their target path."""
+
+    def __init__(self) -> None:
+        self.files: Dict[Path, bytes] = {}
+
+    def write_bytes(self, path: Path, data: bytes) -> Path:
+        path = Path(path)
+        self.files[path] = bytes(data)
+        return path
+
+    def read_text(self, path: Path) -> str:
+        return self.files[Path(path)].decode('utf-8')
+
+
+class TeeSink(OutputSink):
+    """Forward every write to each of ``sinks`` in order."""
+
+    def __init__(self, *sinks: OutputSink) -> None:
+        self.sinks = sinks
+
+    def write_bytes(self, path: Path, data: bytes) -> Path:
+        for s in self.sinks:
+            s.write_bytes(path, data)
+        return Path(path)
+
+
+DIR_SINK = DirSink()
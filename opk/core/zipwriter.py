@@ -0,0 +1,97 @@
+"""Minimal ZIP writer for members compressed ahead of time.
+
+``zipfile`` compresses inside ``writestr``, which serializes deflate onto the
+writing thread. ``deflate_member`` produces a ready-to-write member (raw deflate
+stream + CRC) that can run on any worker thread — zlib releases the GIL — and
+``ZipStreamWriter`` appends such members in the order it is given, so archives
+stay deterministic however the work was scheduled. Output is a plain ZIP (no
+ZIP64) readable by ``zipfile`` and every unzip tool.
+"""
+
+from __future__ import annotations
+import struct
+import time
+import zipfile
+import zlib
+from dataclasses import dataclass
+from typing import BinaryIO, List, Tuple
+
+DateTime = Tuple[int, int, int, int, int, int]
+
+_LOCAL = struct.Struct('<IHHHHHIIIHH')
+_CENTRAL = struct.Struct('<IHHHHHHIIIHHHHHII')
+_END = struct.Struct('<IHHHHIIH')
+_UTF8_FLAG = 0x800
+_DEFLATED = 8
+_VERSION = 20
+_MADE_BY = (3 << 8) | _VERSION  # unix, so external_attr carries the file mode
+_LIMIT = 0xFFFFFFFF
+
+
+@dataclass(frozen=True, slots=True)
+class Member:
+    name: str
+    crc: int
+    size: int
+    data: bytes  # raw deflate stream
+    date_time: DateTime
+
+
+def deflate_member(name: str, raw: bytes, date_time: DateTime | None = None, level: int = 6) -> Member:
+    """Compress ``raw`` for ``name``; safe to call from worker threads."""
+    co = zlib.compressobj(level, zlib.DEFLATED, -15)
+    data = co.compress(raw) + co.flush()
+    return Member(name, zlib.crc32(raw), len(raw), data, date_time or time.localtime(time.time())[:6])
+
+
+def _dos_time(dt: DateTime) -> Tuple[int, int]:
+    y, mo, d, h, mi, s = dt
+    y = max(1980, y)
+    return (h << 11) | (mi << 5) | (s // 2), ((y - 1980) << 9) | (mo << 5) | d
+
+
+class ZipStreamWriter:
+    """Append pre-deflated members to ``fp`` and write the central directory on ``close()``."""
+
+    def __init__(self, fp: BinaryIO) -> None:
+        self.fp = fp
+        self._entries: List[Tuple[Member, int, int]] = []  # member, header offset, flags
+        self._offset = 0
+
+    def add(self, m: Member) -> None:
+        name = m.name.encode('utf-8')
+        flags = 0 if name.isascii() else _UTF8_FLAG
+        if self._offset > _LIMIT or m.size > _LIMIT or len(m.data) > _LIMIT or len(self._entries) >= 0xFFFF:
+            raise ValueError("archive too large for a non-ZIP64 writer")
+        t, d = _dos_time(m.date_time)
+        header = _LOCAL.pack(0x04034B50, _VERSION, flags, _DEFLATED, t, d, m.crc, len(m.data), m.size, len(name), 0)
+        self.fp.write(header + name)
+        self.fp.write(m.data)
+        self._entries.append((m, self._offset, flags))
+        self._offset += len(header) + len(name) + len(m.data)
+
+    def close(self) -> None:
+        start = self._offset
+        size = 0
+        for m, offset, flags in self._entries:
+            name = m.name.encode('utf-8')
+            t, d = _dos_time(m.date_time)
+            rec = _CENTRAL.pack(0x02014B50, _MADE_BY, _VERSION, flags, _DEFLATED, t, d, m.crc, len(m.data), m.size,
+                                len(name), 0, 0, 0, 0, 0o100644 << 16, offset)
+            self.fp.write(rec + name)
+            size += len(rec) + len(name)
+        n = len(self._entries)
+        self.fp.write(_END.pack(0x06054B50, 0, 0, n, n, size, start, 0))
+
+
+def read_member(fp: BinaryIO, info: zipfile.ZipInfo) -> Member:
+    """Load a deflated member's raw stream from an existing archive (no decompression)."""
+    if info.compress_type != zipfile.ZIP_DEFLATED:
+        raise ValueError(f"{info.filename}: not deflated")
+    fp.seek(info.header_offset)
+    header = fp.read(_LOCAL.size)
+    fields = _LOCAL.unpack(header)
+    if fields[0] != 0x04034B50:
+        raise ValueError(f"{info.filename}: bad local header")
+    fp.seek(info.header_offset + _LOCAL.size + fields[9] + fields[10])
+    return Member(info.filename, info.CRC, info.file_size, fp.read(info.compress_size), info.date_time)
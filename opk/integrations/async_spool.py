@@ -0,0 +1,366 @@
+"""asyncio counterpart of the spool clients for bulk work.
+
+``AsyncSpoolClient`` wraps a regular client (``get_client``/``SpoolmanClient``…)
+and reuses its endpoint templates and overrides, headers, retry settings,
+per-host rate limit and circuit breaker and endpoint-discovery cache, but talks
+HTTP/1.1 itself over asyncio streams with keep-alive connections, so no
+third-party HTTP library is needed. At most
+``concurrency`` requests are in flight at once (one connection each).
+
+    async with get_async_client('spoolman', url, concurrency=16) as c:
+        spools = await c.read_many(ids)
+
+Proxies are not supported here; use the blocking clients behind a proxy.
+"""
+
+from __future__ import annotations
+import asyncio
+import json
+import random
+import ssl
+import urllib.parse
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .http_transport import MAX_REDIRECTS, Response, _IDEMPOTENT, _REDIRECTS
+from .spool_clients import SpoolClientBase, SpoolClientError, SpoolClientNetworkError, get_client
+from .throttle import MAX_RETRY_AFTER, retry_after
+
+_Key = Tuple[str, str, int]
+_Conn = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+_STALE = (ConnectionError, asyncio.IncompleteReadError)
+
+
+async def _read_body(reader: asyncio.StreamReader, method: str, status: int, hdrs: Dict[str, str]) -> Tuple[bytes, bool]:
+    """Response body and whether the connection can be reused."""
+    if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+        return b'', True
+    if 'chunked' in hdrs.get('transfer-encoding', '').lower():
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';', 1)[0].strip() or b'0', 16)
+            if size == 0:
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass  # trailers
+                return b''.join(chunks), True
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+    if 'content-length' in hdrs:
+        return await reader.readexactly(int(hdrs['content-length'])), True
+    return await reader.read(), False  # delimited by close
+
+
+class AsyncSpoolClient:
+    """Async ``read``/``search``/``create``/``update``/``delete`` plus bulk helpers over one client's settings."""
+
+    def __init__(self, client: SpoolClientBase, concurrency: int = 16, timeout: float = 10.0,
+                 ssl_context: Optional[ssl.SSLContext] = None) -> None:
+        self.client = client
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+        self._ssl_context = ssl_context
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._idle: Dict[_Key, List[_Conn]] = {}
+        self._label = type(client).__name__.replace('Client', '') or 'Spool'
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.connections_opened = 0
+        self.requests = 0
+        self.coalesced = 0
+
+    async def __aenter__(self) -> 'AsyncSpoolClient':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for _reader, writer in conns:
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except (OSError, ssl.SSLError):
+                    pass
+
+    # --- transport -------------------------------------------------------
+    async def _connect(self, key: _Key) -> Tuple[_Conn, bool]:
+        idle = self._idle.get(key)
+        if idle:
+            return idle.pop(), True
+        scheme, host, port = key
+        ctx = None
+        if scheme == 'https':
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            ctx = self._ssl_context
+        self.connections_opened += 1
+        conn = await asyncio.open_connection(host, port, ssl=ctx, server_hostname=host if ctx else None)
+        return conn, False
+
+    async def _send(self, key: _Key, method: str, target: str, headers: Dict[str, str], body: Optional[bytes]) -> Response:
+        host = key[1] if key[2] in (80, 443) else f"{key[1]}:{key[2]}"
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {host}"] + [f"{k}: {v}" for k, v in headers.items()]
+        if body is not None or method in ('POST', 'PUT', 'PATCH'):
+            lines.append(f"Content-Length: {len(body or b'')}")
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + (body or b'')
+        while True:
+            (reader, writer), reused = await self._connect(key)
+            try:
+                writer.write(request)
+                await writer.drain()
+                while True:
+                    status_line = await reader.readline()
+                    if not status_line:
+                        raise ConnectionResetError("server closed the connection")
+                    version, status_s, *_ = status_line.decode('latin-1').split(' ', 2)
+                    status = int(status_s)
+                    hdrs: Dict[str, str] = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b'\r\n', b'\n', b''):
+                            break
+                        k, _, v = line.decode('latin-1').partition(':')
+                        k = k.strip().lower()
+                        hdrs[k] = f"{hdrs[k]}, {v.strip()}" if k in hdrs else v.strip()
+                    if status != 100:
+                        break
+                data, reusable = await _read_body(reader, method, status, hdrs)
+            except _STALE:
+                writer.close()
+                if reused and method in _IDEMPOTENT:
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            self.requests += 1
+            if reusable and version == 'HTTP/1.1' and hdrs.get('connection', '').lower() != 'close':
+                self._idle.setdefault(key, []).append((reader, writer))
+            else:
+                writer.close()
+            return status, data, hdrs
+
+    async def _http(self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes]) -> Response:
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            scheme = parts.scheme.lower()
+            if scheme not in ('http', 'https') or not parts.hostname:
+                raise ValueError(f"unsupported URL: {url}")
+            key = (scheme, parts.hostname, parts.port or (443 if scheme == 'https' else 80))
+            target = urllib.parse.urlunsplit(('', '', parts.path or '/', parts.query, ''))
+            status, data, hdrs = await asyncio.wait_for(self._send(key, method, target, headers, body), self.timeout)
+            if status not in _REDIRECTS or 'location' not in hdrs:
+                return status, data, hdrs
+            if method == 'POST' and status in (301, 302, 303):
+                method, body = 'GET', None
+                headers = {k: v for k, v in headers.items() if k.lower() != 'content-type'}
+            elif method not in ('GET', 'HEAD'):
+                return status, data, hdrs
+            url = urllib.parse.urljoin(url, hdrs['location'])
+        return status, data, hdrs
+
+    async def _request(self, path: str, method: str = "GET", params: Optional[Dict[str, Any]] = None,
+                       payload: Optional[Dict[str, Any]] = None) -> Response:
+        """Same retry, rate-limit and circuit-breaker policy as ``SpoolClientBase._request``; the semaphore is held per attempt, not while sleeping."""
+        c = self.client
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        url = c._make_url(path, params)
+        headers = c._headers()
+        data = None
+        if payload is not None:
+            data = json.dumps(payload).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        wait = c._policy.breaker.allow()
+        if wait is not None:
+            raise SpoolClientNetworkError(f"{c.SOURCE} server unavailable after repeated failures (retry in {wait:.0f}s)", url=url, details={'retry_in': round(wait, 1)})
+        try:
+            status, body, hdrs = await self._request_with_retries(method, url, headers, data)
+        except asyncio.CancelledError:
+            # the caller gave up (e.g. wait_for timed out): says nothing about the server
+            raise
+        except BaseException:
+            c._policy.breaker.record(False)
+            raise
+        # 4xx means the server is up; only network errors and 5xx count as failures
+        c._policy.breaker.record(0 < status < 500)
+        c._invalidate_after_write(method, status)
+        return status, body, hdrs
+
+    async def _request_with_retries(self, method: str, url: str, headers: Dict[str, str], data: Optional[bytes]) -> Response:
+        c = self.client
+        attempts = max(0, int(c._retry_limit)) + 1
+        for i in range(attempts):
+            delay = c._policy.bucket.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                async with self._sem:
+                    status, body, hdrs = await self._http(method, url, headers, data)
+            except (OSError, asyncio.TimeoutError, ValueError, ssl.SSLError, asyncio.IncompleteReadError):
+                status, body, hdrs = 0, b"", {}
+            retry = status == 0 or c._is_retryable_status(status)
+            if status and status < 400 or not retry or i == attempts - 1:
+                return status, body, hdrs
+            delay = retry_after(hdrs) if status in (429, 503) else None
+            if delay is not None:
+                if delay > MAX_RETRY_AFTER:
+                    return status, body, hdrs
+                c._policy.bucket.pause(delay)
+                continue
+            sleep_s = (c._retry_backoff * (2 ** i)) + (random.uniform(0, c._retry_jitter) if c._retry_jitter > 0 else 0)
+            if sleep_s > 0:
+                await asyncio.sleep(sleep_s)
+        return 0, b"", {}
+
+    async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Response:
+        """GET that joins an identical request already in flight (e.g. duplicate ids in ``read_many``)."""
+        url = self.client._make_url(path, params)
+        fut = self._inflight.get(url)
+        if fut is None:
+            fut = self._inflight[url] = asyncio.ensure_future(self._request(path, params=params))
+            fut.add_done_callback(lambda _f: self._inflight.pop(url, None))
+        else:
+            self.coalesced += 1
+        # shielded: a cancelled caller must not cancel the request for the others
+        return await asyncio.shield(fut)
+
+    async def _get_json_first_ok_with_meta(self, candidates):
+        last_meta = None
+        for i, (path, params) in enumerate(candidates):
+            status, body, hdrs = await self._get(path, params)
+            meta = {"status": status, "headers": hdrs, "url": self.client._make_url(path, params)}
+            if status == 200 and body:
+                try:
+                    obj = json.loads(body.decode("utf-8"))
+                except Exception:
+                    pass
+                else:
+                    self.client._remember_endpoint(candidates, i)
+                    return True, obj, meta
+            last_meta = meta
+        return False, None, last_meta
+
+    async def _write(self, action: str, method: str, ok: Tuple[int, ...], item_id: Optional[str] = None,
+                     payload: Optional[Dict[str, Any]] = None) -> Tuple[bool, Any]:
+        for path, params in self.client._format_candidates(action, item_id=item_id):
+            status, body, _ = await self._request(path, method=method, params=params, payload=payload)
+            if status in ok:
+                if method == "DELETE":
+                    return True, None
+                if body:
+                    try:
+                        return True, json.loads(body.decode('utf-8'))
+                    except Exception:
+                        pass
+        return False, None
+
+    # --- single operations (same results as the blocking clients) ---------
+    async def read(self, item_id: str) -> Dict[str, Any]:
+        if not item_id:
+            raise ValueError("item_id is required")
+        ok, obj, _ = await self._get_json_first_ok_with_meta(self.client._format_candidates('read', item_id=item_id))
+        if not ok:
+            raise SpoolClientError(f"{self._label} read failed (no known endpoint responded)")
+        if isinstance(obj, list):
+            return obj[0] if obj else {}
+        return obj if isinstance(obj, dict) else {}
+
+    async def search_normalized(self, query: str, page: int = 1, page_size: int = 50) -> Dict[str, Any]:
+        q = (query or "").strip()
+        ok, obj, meta = await self._get_json_first_ok_with_meta(self.client._format_candidates('search', query=q, page=page, page_size=page_size))
+        if not ok:
+            raise SpoolClientError(f"{self._label} search failed (no known endpoint responded)", details=meta)
+        items = list(obj or []) if isinstance(obj, list) else [obj] if isinstance(obj, dict) else []
+        total = None
+        headers = (meta or {}).get('headers') or {}
+        for k in ('x-total-count', 'x-total', 'x_count'):
+            if k in headers:
+                try:
+                    total = int(headers[k])
+                except Exception:
+                    pass
+        if total is None and isinstance(obj, dict):
+            for k in ('total', 'count', 'total_count'):
+                if k in obj and isinstance(obj[k], int):
+                    total = obj[k]
+                    break
+        return {'source': self.client.SOURCE, 'query': q, 'page': page, 'page_size': page_size,
+                'items': items, 'count': len(items), 'total': total}
+
+    async def search(self, query: str, page: Optional[int] = None, page_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        q = (query or "").strip()
+        ok, obj, _ = await self._get_json_first_ok_with_meta(self.client._format_candidates('search', query=q, page=page, page_size=page_size))
+        if not ok:
+            raise SpoolClientError(f"{self._label} search failed (no known endpoint responded)")
+        return list(obj or []) if isinstance(obj, list) else [obj] if isinstance(obj, dict) else []
+
+    async def create(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        ok, obj = await self._write('create', "POST", (200, 201), payload=payload)
+        if not ok:
+            raise SpoolClientError(f"{self._label} create failed (no known endpoint responded)")
+        return obj
+
+    async def update(self, item_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        ok, obj = await self._write('update', "PUT", (200, 201), item_id=item_id, payload=payload)
+        if not ok:
+            raise SpoolClientError(f"{self._label} update failed (no known endpoint responded)")
+        return obj
+
+    async def delete(self, item_id: str) -> bool:
+        ok, _ = await self._write('delete', "DELETE", (200, 202, 204), item_id=item_id)
+        return ok
+
+    # --- bulk helpers ----------------------------------------------------
+    async def read_many(self, ids: Iterable[str], return_exceptions: bool = False) -> List[Any]:
+        """Read every id concurrently; results come back in input order.
+
+        With ``return_exceptions=True`` a failed read yields its exception in
+        place of the item instead of aborting the batch.
+        """
+        return await asyncio.gather(*(self.read(i) for i in ids), return_exceptions=return_exceptions)
+
+    async def update_many(self, updates: Iterable[Tuple[str, Dict[str, Any]]], return_exceptions: bool = False) -> List[Any]:
+        """Apply ``(item_id, payload)`` updates concurrently; results in input order."""
+        return await asyncio.gather(*(self.update(i, p) for i, p in updates), return_exceptions=return_exceptions)
+
+    async def search_all(self, query: str = "", page_size: int = 100, max_pages: int = 10000) -> List[Dict[str, Any]]:
+        """Every item matching ``query`` across all pages.
+
+        When the server reports a total the remaining pages are fetched
+        concurrently; otherwise pages are read in order until a short page. A
+        first page that already holds the total (or more than ``page_size``
+        items), or a page identical to the previous one, means the server
+        ignores paging and ends the listing.
+        """
+        first = await self.search_normalized(query, page=1, page_size=page_size)
+        items = list(first['items'])
+        total = first['total']
+        if len(items) > page_size:
+            return items
+        if total is not None:
+            pages = min(max_pages, -(-total // page_size)) if page_size > 0 and len(items) < total else 1
+            rest = await asyncio.gather(*(self.search_normalized(query, page=p, page_size=page_size) for p in range(2, pages + 1)))
+            prev = first['items']
+            for r in rest:
+                if r['items'] == prev:
+                    break
+                items.extend(r['items'])
+                prev = r['items']
+            return items
+        prev = first['items']
+        page = 1
+        while len(prev) >= page_size and page < max_pages:
+            page += 1
+            cur = (await self.search_normalized(query, page=page, page_size=page_size))['items']
+            if not cur or cur == prev:
+                break
+            items.extend(cur)
+            prev = cur
+        return items
+
+
+def get_async_client(source: str, base_url: str, api_key: Optional[str] = None, endpoints: Optional[Dict[str, Any]] = None,
+                     concurrency: int = 16) -> AsyncSpoolClient:
+    """``get_client`` (including ``OPK_SPOOL_ENDPOINTS`` overrides) wrapped in an ``AsyncSpoolClient``."""
+    return AsyncSpoolClient(get_client(source, base_url, api_key=api_key, endpoints=endpoints), concurrency=concurrency)
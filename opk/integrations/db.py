@@ -1,7 +1,8 @@
 from __future__ import annotations
 import sqlite3
 from pathlib import Path
-from typing import Dict, Any, Iterable
+from typing import Dict, Any, Iterable, List, Tuple
+import json
 
 
 SCHEMA = """
@@ -21,6 +22,31 @@ CREATE TABLE IF NOT EXISTS openprinttag_data (
   PRIMARY KEY (tag_id, key),
   FOREIGN KEY (tag_id) REFERENCES openprinttag(id) ON DELETE CASCADE
 );
+CREATE TABLE IF NOT EXISTS spools (
+  source TEXT NOT NULL,
+  base_url TEXT NOT NULL,
+  id TEXT NOT NULL,
+  data TEXT NOT NULL,
+  updated TEXT,
+  synced_at REAL,
+  PRIMARY KEY (source, base_url, id)
+);
+CREATE TABLE IF NOT EXISTS spool_sync_state (
+  source TEXT NOT NULL,
+  base_url TEXT NOT NULL,
+  updated_since TEXT,
+  synced_at REAL,
+  PRIMARY KEY (source, base_url)
+);
+CREATE TABLE IF NOT EXISTS spool_sync_pages (
+  source TEXT NOT NULL,
+  base_url TEXT NOT NULL,
+  url TEXT NOT NULL,
+  etag TEXT,
+  last_modified TEXT,
+  ids TEXT,
+  PRIMARY KEY (source, base_url, url)
+);
 """
 
 
@@ -64,3 +90,59 @@ def search_tags(con: sqlite3.Connection, query: str) -> Iterable[Dict[str, Any]]
                            (q, q, q, q)):
         yield {'id': row[0], 'manufacturer': row[1], 'model': row[2], 'serial': row[3]}
 
+
+
+# --- mirrored spool inventories (see opk.integrations.spool_sync) ------------
+
+def spool_rows(con: sqlite3.Connection, source: str, base_url: str) -> Dict[str, str]:
+    """id -> stored JSON text for one remote inventory."""
+    return dict(con.execute("SELECT id,data FROM spools WHERE source=? AND base_url=?", (source, base_url)))
+
+
+def upsert_spools(con: sqlite3.Connection, source: str, base_url: str, rows: Iterable[Tuple[str, str, str | None]], synced_at: float) -> None:
+    """Insert or replace ``(id, data_json, updated)`` rows; the caller owns the transaction."""
+    con.executemany("INSERT INTO spools(source,base_url,id,data,updated,synced_at) VALUES (?,?,?,?,?,?) "
+                    "ON CONFLICT(source,base_url,id) DO UPDATE SET data=excluded.data, updated=excluded.updated, synced_at=excluded.synced_at",
+                    ((source, base_url, i, d, u, synced_at) for i, d, u in rows))
+
+
+def delete_spools(con: sqlite3.Connection, source: str, base_url: str, ids: Iterable[str]) -> None:
+    con.executemany("DELETE FROM spools WHERE source=? AND base_url=? AND id=?", ((source, base_url, i) for i in ids))
+
+
+def load_spool(con: sqlite3.Connection, source: str, base_url: str, spool_id: str) -> Dict[str, Any] | None:
+    row = con.execute("SELECT data FROM spools WHERE source=? AND base_url=? AND id=?", (source, base_url, str(spool_id))).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def search_spools(con: sqlite3.Connection, query: str, source: str | None = None, base_url: str | None = None) -> List[Dict[str, Any]]:
+    """Mirrored spools whose JSON contains ``query`` (case-insensitive), ordered by id."""
+    sql = "SELECT data FROM spools WHERE data LIKE ?"
+    args: List[Any] = [f"%{query}%"]
+    if source:
+        sql += " AND source=?"
+        args.append(source)
+    if base_url:
+        sql += " AND base_url=?"
+        args.append(base_url)
+    sql += " ORDER BY source, base_url, CAST(id AS INTEGER), id"
+    return [json.loads(d) for (d,) in con.execute(sql, args)]
+
+
+def sync_state(con: sqlite3.Connection, source: str, base_url: str) -> Tuple[str | None, Dict[str, Tuple[str | None, str | None, List[str]]]]:
+    """``(updated_since cursor, {page url: (etag, last_modified, ids)})`` from the previous sync."""
+    row = con.execute("SELECT updated_since FROM spool_sync_state WHERE source=? AND base_url=?", (source, base_url)).fetchone()
+    pages = {url: (etag, lm, json.loads(ids or "[]")) for url, etag, lm, ids in
+             con.execute("SELECT url,etag,last_modified,ids FROM spool_sync_pages WHERE source=? AND base_url=?", (source, base_url))}
+    return (row[0] if row else None), pages
+
+
+def save_sync_state(con: sqlite3.Connection, source: str, base_url: str, updated_since: str | None, synced_at: float,
+                    pages: Dict[str, Tuple[str | None, str | None, List[str]]] | None) -> None:
+    """Record the cursor and, when ``pages`` is given, replace the per-page validators; the caller owns the transaction."""
+    con.execute("REPLACE INTO spool_sync_state(source,base_url,updated_since,synced_at) VALUES (?,?,?,?)",
+                (source, base_url, updated_since, synced_at))
+    if pages is not None:
+        con.execute("DELETE FROM spool_sync_pages WHERE source=? AND base_url=?", (source, base_url))
+        con.executemany("INSERT INTO spool_sync_pages(source,base_url,url,etag,last_modified,ids) VALUES (?,?,?,?,?,?)",
+                        ((source, base_url, u, e, lm, json.dumps(ids)) for u, (e, lm, ids) in pages.items()))
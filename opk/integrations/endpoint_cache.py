@@ -0,0 +1,107 @@
+"""Remember which endpoint variant each spool server answers on.
+
+Spool clients try several URL templates per action (``_default_endpoints``)
+until one responds. On a server where only the third variant works every read
+would cost three round trips, so the template that answered is remembered per
+(source, base URL, action) in ``<cache dir>/spool-endpoints.json`` and tried
+first next time. Entries expire after ``OPK_SPOOL_ENDPOINT_TTL`` seconds
+(default one day; 0 disables the cache). If the remembered template stops
+working the other candidates are probed as before and the winner replaces it.
+"""
+
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..core.hashcache import cache_dir
+from ..core.sink import atomic_write_bytes
+
+CACHE_VERSION = 1
+DEFAULT_TTL = 86400.0
+
+
+def _ttl_from_env() -> float:
+    try:
+        return max(0.0, float(os.environ['OPK_SPOOL_ENDPOINT_TTL']))
+    except (KeyError, ValueError):
+        return DEFAULT_TTL
+
+
+class EndpointCache:
+    """Thread-safe (source, base_url, action) → endpoint template map, optionally backed by a JSON file."""
+
+    def __init__(self, path: Path | None = None, ttl: float | None = None) -> None:
+        self.path = Path(path) if path is not None else None
+        self.ttl = _ttl_from_env() if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        if self.path is not None:
+            try:
+                data = json.loads(self.path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                data = None
+            if isinstance(data, dict) and data.get('version') == CACHE_VERSION:
+                self._entries = dict(data.get('entries') or {})
+
+    @staticmethod
+    def _key(source: str, base_url: str, action: str) -> str:
+        return f"{source} {base_url} {action}"
+
+    def lookup(self, source: str, base_url: str, action: str, templates: List[Any]) -> Optional[int]:
+        """Index in ``templates`` of the remembered endpoint, or None if unknown/expired/no longer offered."""
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            e = self._entries.get(self._key(source, base_url, action))
+        if e is None or time.time() - e.get('ts', 0) > self.ttl:
+            return None
+        for i, (path_t, params_t) in enumerate(templates):
+            if [path_t, params_t] == e.get('endpoint'):
+                return i
+        return None
+
+    def store(self, source: str, base_url: str, action: str, template: Any) -> None:
+        if self.ttl <= 0:
+            return
+        key = self._key(source, base_url, action)
+        endpoint = [template[0], template[1]]
+        now = time.time()
+        with self._lock:
+            e = self._entries.get(key)
+            # a confirmed entry is only rewritten once it is half-way to expiring
+            if e is not None and e.get('endpoint') == endpoint and now - e.get('ts', 0) < self.ttl / 2:
+                return
+            self._entries[key] = {'endpoint': endpoint, 'ts': now}
+            data = json.dumps({'version': CACHE_VERSION, 'entries': self._entries}, separators=(',', ':'))
+        if self.path is not None:
+            try:
+                atomic_write_bytes(self.path, data.encode('utf-8'))
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = {}
+        if self.path is not None:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+_default: Optional[EndpointCache] = None
+_default_lock = threading.Lock()
+
+
+def default_endpoint_cache() -> EndpointCache:
+    """Process-wide cache stored next to the other OPK caches (re-read if ``OPK_CACHE_DIR`` changes)."""
+    global _default
+    path = cache_dir() / 'spool-endpoints.json'
+    with _default_lock:
+        if _default is None or _default.path != path:
+            _default = EndpointCache(path)
+        return _default
@@ -0,0 +1,212 @@
+"""HTTP transports for the spool clients.
+
+``urllib.request.urlopen`` opens a new connection for every request (and every
+retry), and for https a new SSL context plus a full TLS handshake. ``PooledTransport``
+keeps idle ``http.client`` connections per (scheme, host, port), shares one SSL
+context between them and hands the last TLS session of a host to each new
+connection so the handshake can be resumed. Spool clients share
+``default_transport()`` unless given their own.
+
+Requests that have to go through a proxy (``*_proxy`` environment variables or
+the system proxy settings) are passed to ``UrllibTransport``, which keeps
+urllib's proxy handling.
+
+A transport's ``request`` returns ``(status, body, headers)`` for every HTTP
+response, error statuses included (header names lower-cased); connection
+failures and timeouts raise.
+"""
+
+from __future__ import annotations
+import http.client
+import ssl
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+Response = Tuple[int, bytes, Dict[str, str]]
+_Key = Tuple[str, str, int]
+
+DEFAULT_TIMEOUT = 10.0
+MAX_REDIRECTS = 5
+_REDIRECTS = (301, 302, 303, 307, 308)
+# a pooled connection the server already closed fails before any response;
+# these methods are safe to resend on a fresh connection
+_IDEMPOTENT = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS")
+_STALE = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError, ConnectionAbortedError)
+
+
+class UrllibTransport:
+    """One ``urlopen`` (new connection) per request; honours proxies."""
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, ssl_context: Optional[ssl.SSLContext] = None) -> None:
+        self.timeout = timeout
+        self._ssl_context = ssl_context
+
+    def request(self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes] = None,
+                timeout: Optional[float] = None) -> Response:
+        req = urllib.request.Request(url, headers=headers, method=method, data=body)
+        if self._ssl_context is None:
+            # loading the CA store costs tens of milliseconds; do it once
+            self._ssl_context = ssl.create_default_context()
+        try:
+            with urllib.request.urlopen(req, context=self._ssl_context, timeout=timeout or self.timeout) as resp:
+                return getattr(resp, 'status', 200), resp.read(), {k.lower(): v for k, v in resp.headers.items()}
+        except urllib.error.HTTPError as e:
+            data = e.read() if hasattr(e, 'read') else b''
+            hdrs = {k.lower(): v for k, v in e.headers.items()} if getattr(e, 'headers', None) else {}
+            return int(getattr(e, 'code', 0) or 0), data, hdrs
+
+    def close(self) -> None:
+        pass
+
+
+class _ResumingHTTPSConnection(http.client.HTTPSConnection):
+    """``HTTPSConnection`` that offers a previous TLS session during the handshake."""
+
+    def __init__(self, host: str, port: Optional[int], *, timeout: float, context: ssl.SSLContext,
+                 session: Optional[ssl.SSLSession] = None) -> None:
+        super().__init__(host, port, timeout=timeout, context=context)
+        self._tls_session = session
+
+    def connect(self) -> None:
+        http.client.HTTPConnection.connect(self)
+        server_hostname = self._tunnel_host or self.host
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=server_hostname, session=self._tls_session)
+
+
+class PooledTransport:
+    """Keep-alive connection pool; thread-safe, one request per connection at a time.
+
+    ``connections_opened``, ``requests`` and ``sessions_reused`` count what the
+    pool did, for benchmarks and tests.
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, max_idle_per_host: int = 8,
+                 ssl_context: Optional[ssl.SSLContext] = None) -> None:
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self._ssl_context = ssl_context
+        self._lock = threading.Lock()
+        self._idle: Dict[_Key, List[http.client.HTTPConnection]] = {}
+        self._sessions: Dict[_Key, ssl.SSLSession] = {}
+        self._direct: Dict[_Key, bool] = {}
+        self._fallback = UrllibTransport(timeout, ssl_context)
+        self.connections_opened = 0
+        self.requests = 0
+        self.sessions_reused = 0
+
+    @property
+    def ssl_context(self) -> ssl.SSLContext:
+        with self._lock:
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            return self._ssl_context
+
+    def _is_direct(self, key: _Key) -> bool:
+        direct = self._direct.get(key)
+        if direct is None:
+            proxies = urllib.request.getproxies()
+            direct = key[0] not in proxies or bool(urllib.request.proxy_bypass(key[1]))
+            self._direct[key] = direct
+        return direct
+
+    def _checkout(self, key: _Key) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+            self.connections_opened += 1
+            session = self._sessions.get(key)
+        scheme, host, port = key
+        if scheme == 'https':
+            return _ResumingHTTPSConnection(host, port, timeout=self.timeout, context=self.ssl_context, session=session), False
+        return http.client.HTTPConnection(host, port, timeout=self.timeout), False
+
+    def _checkin(self, key: _Key, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _send(self, key: _Key, method: str, target: str, headers: Dict[str, str], body: Optional[bytes],
+              timeout: Optional[float]) -> Response:
+        while True:
+            conn, reused = self._checkout(key)
+            try:
+                if timeout is not None:
+                    conn.timeout = timeout
+                    if conn.sock is not None:
+                        conn.sock.settimeout(timeout)
+                conn.request(method, target, body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+            except _STALE:
+                conn.close()
+                if reused and method in _IDEMPOTENT:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            with self._lock:
+                self.requests += 1
+                sock = conn.sock
+                if isinstance(sock, ssl.SSLSocket):
+                    if not reused and sock.session_reused:
+                        self.sessions_reused += 1
+                    if sock.session is not None:
+                        self._sessions[key] = sock.session
+            if resp.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+            return resp.status, data, {k.lower(): v for k, v in resp.getheaders()}
+
+    def request(self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes] = None,
+                timeout: Optional[float] = None) -> Response:
+        method = method.upper()
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            scheme = parts.scheme.lower()
+            if scheme not in ('http', 'https') or not parts.hostname:
+                raise ValueError(f"unsupported URL: {url}")
+            key = (scheme, parts.hostname, parts.port or (443 if scheme == 'https' else 80))
+            if not self._is_direct(key):
+                return self._fallback.request(method, url, headers, body, timeout)
+            target = urllib.parse.urlunsplit(('', '', parts.path or '/', parts.query, ''))
+            status, data, hdrs = self._send(key, method, target, headers, body, timeout)
+            if status not in _REDIRECTS or 'location' not in hdrs:
+                return status, data, hdrs
+            # follow redirects the way urllib does: GET/HEAD always, POST becomes GET on 301/302/303
+            if method == 'POST' and status in (301, 302, 303):
+                method, body = 'GET', None
+                headers = {k: v for k, v in headers.items() if k.lower() not in ('content-type', 'content-length')}
+            elif method not in ('GET', 'HEAD'):
+                return status, data, hdrs
+            url = urllib.parse.urljoin(url, hdrs['location'])
+        return status, data, hdrs
+
+    def close(self) -> None:
+        """Close all idle connections (in-flight ones close when they are returned)."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+_default: Optional[PooledTransport] = None
+_default_lock = threading.Lock()
+
+
+def default_transport() -> PooledTransport:
+    """Process-wide pool shared by all spool clients."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = PooledTransport()
+        return _default
@@ -0,0 +1,318 @@
+"""HTTP response cache for spool client GETs.
+
+The GUI and repeated ``opk spool --action read/search`` calls fetch the same
+resources over and over. ``ResponseCache`` keeps successful GET responses in an
+in-memory LRU and, optionally, in ``<cache dir>/spool-responses/`` so a later
+process can reuse them.
+
+Freshness follows the server's headers:
+
+- ``Cache-Control: no-store`` responses are never stored.
+- ``max-age``/``s-maxage`` or ``Expires`` set how long a response is served
+  without touching the network; ``no-cache`` (or ``max-age=0``) means every use
+  is revalidated.
+- Responses without any freshness information (Spoolman's usual case) are
+  revalidated on every use; ``OPK_SPOOL_CACHE_TTL`` opts into treating them as
+  fresh for that many seconds (default 0).
+
+A stale entry that carries an ``ETag`` or ``Last-Modified`` is revalidated with
+``If-None-Match``/``If-Modified-Since``; a ``304`` answer refreshes it and the
+cached body is returned. Responses may carry authenticated data, so the disk
+store is private to the user (directory 0700, entries 0600). Successful writes (POST/PUT/DELETE) through a client
+drop every cached response of that server. ``OPK_SPOOL_CACHE_SIZE`` sets the
+number of in-memory entries (default 256; 0 disables the cache).
+"""
+
+from __future__ import annotations
+import base64
+import email.utils
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Tuple
+
+from ..core.hashcache import cache_dir
+from ..core.sink import atomic_write_bytes
+
+CACHE_VERSION = 1
+DEFAULT_TTL = 0.0
+DEFAULT_SIZE = 256
+MAX_DISK_ENTRIES = 2048
+# request headers that change the response (or who may see it)
+_KEY_HEADERS = ('accept', 'authorization', 'x-api-key')
+_MARKS = 'invalidated.json'
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.environ[name]))
+    except (KeyError, ValueError):
+        return default
+
+
+def _origin(url: str) -> str:
+    u = urllib.parse.urlsplit(url)
+    return f"{u.scheme}://{u.netloc}".lower()
+
+
+def _cache_control(value: str) -> Dict[str, Optional[str]]:
+    out: Dict[str, Optional[str]] = {}
+    for part in value.split(','):
+        name, _, arg = part.strip().partition('=')
+        if name:
+            out[name.lower()] = arg.strip().strip('"') or None
+    return out
+
+
+@dataclass
+class _Entry:
+    url: str
+    body: bytes
+    headers: Dict[str, str]
+    stored: float
+    # seconds the response may be served without revalidation
+    ttl: float
+
+    def fresh(self, now: float) -> bool:
+        return now - self.stored < self.ttl
+
+    def validators(self) -> Dict[str, str]:
+        v = {}
+        if self.headers.get('etag'):
+            v['If-None-Match'] = self.headers['etag']
+        if self.headers.get('last-modified'):
+            v['If-Modified-Since'] = self.headers['last-modified']
+        return v
+
+
+class ResponseCache:
+    """Thread-safe LRU of GET responses keyed by URL and identity headers, optionally mirrored on disk."""
+
+    def __init__(self, path: Path | None = None, max_entries: int | None = None, default_ttl: float | None = None) -> None:
+        self.path = Path(path) if path is not None else None
+        self.max_entries = int(_env_number('OPK_SPOOL_CACHE_SIZE', DEFAULT_SIZE)) if max_entries is None else max_entries
+        self.default_ttl = _env_number('OPK_SPOOL_CACHE_TTL', DEFAULT_TTL) if default_ttl is None else default_ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stores': 0, 'evictions': 0, 'invalidations': 0}
+        self._disk_writes = 0
+        self._dir_ready = False
+        # server origin -> time of the last invalidation (disk entries stored before it are stale)
+        self._marks: Optional[Dict[str, float]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def key(url: str, headers: Mapping[str, str]) -> str:
+        ident = {k.lower(): v for k, v in headers.items() if k.lower() in _KEY_HEADERS}
+        raw = json.dumps([url, sorted(ident.items())], separators=(',', ':'))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _ttl(self, headers: Mapping[str, str]) -> Optional[float]:
+        """Freshness lifetime of a response, or None if it must not be stored."""
+        cc = _cache_control(headers.get('cache-control', ''))
+        if 'no-store' in cc:
+            return None
+        if 'no-cache' in cc:
+            return 0.0
+        for name in ('s-maxage', 'max-age'):
+            if name in cc:
+                try:
+                    return max(0.0, float(cc[name] or 0))
+                except ValueError:
+                    return 0.0
+        if 'expires' in headers:
+            try:
+                expires = email.utils.parsedate_to_datetime(headers['expires']).timestamp()
+            except (TypeError, ValueError):
+                return 0.0
+            return max(0.0, expires - time.time())
+        return self.default_ttl
+
+    def lookup(self, key: str) -> Tuple[Optional[_Entry], bool]:
+        """``(entry, fresh)`` for ``key``; entry is None on a miss."""
+        if not self.enabled:
+            return None, False
+        with self._lock:
+            e = self._entries.get(key)
+            if e is not None:
+                self._entries.move_to_end(key)
+        if e is None:
+            e = self._load(key)
+            if e is not None:
+                self._remember(key, e)
+        fresh = e is not None and e.fresh(time.time())
+        with self._lock:
+            self._stats['hits' if fresh else 'misses'] += 1
+        return e, fresh
+
+    def store(self, key: str, url: str, body: bytes, headers: Mapping[str, str]) -> None:
+        if not self.enabled:
+            return
+        ttl = self._ttl(headers)
+        if ttl is None:
+            self.discard(key)
+            return
+        e = _Entry(url, body, dict(headers), time.time(), ttl)
+        self._remember(key, e)
+        with self._lock:
+            self._stats['stores'] += 1
+        self._save(key, e)
+
+    def revalidated(self, key: str, entry: _Entry, headers: Mapping[str, str]) -> _Entry:
+        """Record a ``304`` for ``entry``: merge the new headers and restart its lifetime."""
+        merged = {**entry.headers, **{k: v for k, v in headers.items() if k not in ('content-length', 'transfer-encoding')}}
+        with self._lock:
+            self._stats['revalidated'] += 1
+        ttl = self._ttl(merged)
+        e = _Entry(entry.url, entry.body, merged, time.time(), ttl or 0.0)
+        if ttl is None:
+            self.discard(key)
+            return e
+        self._remember(key, e)
+        self._save(key, e)
+        return e
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.path is not None:
+            try:
+                (self.path / f"{key}.json").unlink()
+            except OSError:
+                pass
+
+    def invalidate(self, url: str) -> int:
+        """Drop every entry of ``url``'s server (scheme, host and port); returns how many memory entries went.
+
+        Disk entries are not scanned: the server's invalidation time is recorded
+        and older entries are ignored when loaded.
+        """
+        origin = _origin(url)
+        now = time.time()
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if _origin(e.url) == origin]
+            for k in keys:
+                del self._entries[k]
+            self._stats['invalidations'] += 1
+            marks = self._read_marks()
+            marks[origin] = now
+            data = json.dumps(marks, separators=(',', ':'))
+        if self.path is not None:
+            try:
+                self._write_private(self.path / _MARKS, data.encode('utf-8'))
+            except OSError:
+                pass
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.path is not None and self.path.is_dir():
+            for f in self.path.glob('*.json'):
+                try:
+                    f.unlink()
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, 'entries': len(self._entries)}
+
+    def _remember(self, key: str, e: _Entry) -> None:
+        with self._lock:
+            self._entries[key] = e
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    # on-disk store: one JSON file per entry
+    @staticmethod
+    def _read(f: Path) -> Optional[_Entry]:
+        try:
+            d = json.loads(f.read_text(encoding='utf-8'))
+            if d.get('version') != CACHE_VERSION:
+                return None
+            return _Entry(d['url'], base64.b64decode(d['body']), dict(d['headers']), float(d['stored']), float(d['ttl']))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _read_marks(self) -> Dict[str, float]:
+        if self._marks is None:
+            self._marks = {}
+            if self.path is not None:
+                try:
+                    self._marks = dict(json.loads((self.path / _MARKS).read_text(encoding='utf-8')))
+                except (OSError, ValueError, TypeError):
+                    pass
+        return self._marks
+
+    def _load(self, key: str) -> Optional[_Entry]:
+        if self.path is None:
+            return None
+        e = self._read(self.path / f"{key}.json")
+        if e is not None:
+            with self._lock:
+                mark = self._read_marks().get(_origin(e.url))
+            if mark is not None and e.stored <= mark:
+                return None
+        return e
+
+    def _write_private(self, f: Path, data: bytes) -> None:
+        if not self._dir_ready:
+            self.path.mkdir(mode=0o700, parents=True, exist_ok=True)
+            # also tighten a directory created before entries were private
+            os.chmod(self.path, 0o700)
+            self._dir_ready = True
+        atomic_write_bytes(f, data, mode=0o600)
+
+    def _save(self, key: str, e: _Entry) -> None:
+        if self.path is None:
+            return
+        data = json.dumps({'version': CACHE_VERSION, 'url': e.url, 'headers': e.headers, 'stored': e.stored,
+                           'ttl': e.ttl, 'body': base64.b64encode(e.body).decode('ascii')}, separators=(',', ':'))
+        try:
+            self._write_private(self.path / f"{key}.json", data.encode('utf-8'))
+        except OSError:
+            return
+        with self._lock:
+            self._disk_writes += 1
+            prune = self._disk_writes % 64 == 0
+        if prune:
+            self._prune()
+
+    def _prune(self) -> None:
+        """Keep the disk store at ``MAX_DISK_ENTRIES`` files, dropping the least recently written."""
+        try:
+            files = sorted(self.path.glob('*.json'), key=lambda f: f.stat().st_mtime)
+        except OSError:
+            return
+        for f in files[:max(0, len(files) - MAX_DISK_ENTRIES)]:
+            if f.name != _MARKS:
+                try:
+                    f.unlink()
+                except OSError:
+                    pass
+
+
+_default: Optional[ResponseCache] = None
+_default_lock = threading.Lock()
+
+
+def default_response_cache() -> ResponseCache:
+    """Process-wide cache stored next to the other OPK caches (re-created if ``OPK_CACHE_DIR`` changes)."""
+    global _default
+    path = cache_dir() / 'spool-responses'
+    with _default_lock:
+        if _default is None or _default.path != path:
+            _default = ResponseCache(path)
+        return _default
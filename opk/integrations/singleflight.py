@@ -0,0 +1,57 @@
+"""Coalesce identical concurrent calls into one.
+
+When the GUI and a background job ask for the same spool at the same time,
+``SingleFlight.do(key, fn)`` runs ``fn`` once: the first caller for ``key``
+makes the request, callers arriving while it is in flight wait for it and get
+the same result (or exception). Nothing is kept once the call finishes; that
+is the response cache's job.
+"""
+
+from __future__ import annotations
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Thread-safe map of in-flight calls keyed by string."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """``(result, shared)``; ``shared`` is True if another caller's call was joined."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
@@ -1,12 +1,21 @@
 from __future__ import annotations
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 import json
-import urllib.request
 import urllib.parse
-import ssl
 import os
 import time
 import random
+from concurrent.futures import ThreadPoolExecutor
+
+from .endpoint_cache import EndpointCache, default_endpoint_cache
+from .http_transport import default_transport
+from .response_cache import ResponseCache, default_response_cache
+from .singleflight import SingleFlight
+from .throttle import MAX_RETRY_AFTER, host_policy, retry_after
+
+
+# GETs in flight, shared by all clients of the process (see singleflight)
+_inflight = SingleFlight()
 
 
 class SpoolClientError(Exception):
@@ -29,11 +38,28 @@ class SpoolClientNotFound(SpoolClientHTTPError):
     pass
 
 
+class _Candidates(list):
+    """Formatted (path, params) candidates that remember their action and source templates."""
+
+    def __init__(self, items, action: str, templates: List[Any]):
+        super().__init__(items)
+        self.action = action
+        self.templates = templates
+
+
 class SpoolClientBase:
     SOURCE = "unknown"
 
-    def __init__(self, base_url: str, api_key: Optional[str] = None, endpoints: Optional[Dict[str, Any]] = None, retry_limit: Optional[int] = None):
+    def __init__(self, base_url: str, api_key: Optional[str] = None, endpoints: Optional[Dict[str, Any]] = None, retry_limit: Optional[int] = None, transport: Optional[Any] = None, endpoint_cache: Optional[EndpointCache] = None, response_cache: Optional[ResponseCache] = None):
         self.base_url = base_url.rstrip('/')
+        # Keep-alive connection pool shared by all clients unless one is given (see http_transport)
+        self._transport = transport if transport is not None else default_transport()
+        # Which endpoint variant answered last time, per action (see endpoint_cache)
+        self._endpoint_cache = endpoint_cache if endpoint_cache is not None else default_endpoint_cache()
+        # GET responses honouring Cache-Control/ETag (see response_cache)
+        self._response_cache = response_cache if response_cache is not None else default_response_cache()
+        # Rate limit and circuit breaker shared by every client of this server (see throttle)
+        self._policy = host_policy(self.base_url)
         self.api_key = api_key
         self._override_endpoints = endpoints or {}
         self._retry_limit = self._load_retry_limit(retry_limit)
@@ -55,6 +81,36 @@ class SpoolClientBase:
     def search(self, query: str) -> List[Dict[str, Any]]:
         raise NotImplementedError
 
+    def search_normalized(self, query: str, page: int = 1, page_size: int = 50) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def iter_search(self, query: str, page_size: int = 50) -> Iterator[Dict[str, Any]]:
+        """Yield every search result across all pages.
+
+        The next page is fetched on a background thread while the caller consumes
+        the current one. Iteration stops at the reported total (``X-Total-Count``
+        or a ``total`` field), on a short or empty page, or when the server repeats
+        a page (it ignores the paging parameters).
+        """
+        page_size = max(1, int(page_size))
+        ex = ThreadPoolExecutor(max_workers=1)
+        try:
+            pending = ex.submit(self.search_normalized, query, 1, page_size)
+            page, previous = 1, None
+            while pending is not None:
+                res = pending.result()
+                items = res.get('items') or []
+                if not items or items == previous:
+                    return
+                total = res.get('total')
+                more = len(items) >= page_size and (total is None or page * page_size < total)
+                pending = ex.submit(self.search_normalized, query, page + 1, page_size) if more else None
+                yield from items
+                page, previous = page + 1, items
+        finally:
+            # an abandoned iterator must not leave a request running for nobody
+            ex.shutdown(wait=False, cancel_futures=True)
+
     # --- helpers ---------------------------------------------------------
     def _headers(self) -> Dict[str, str]:
         h = {
@@ -134,41 +190,39 @@ class SpoolClientBase:
             pass
         return backoff, jitter
 
-    def _request(self, path: str, method: str = "GET", params: Optional[Dict[str, Any]] = None, payload: Optional[Dict[str, Any]] = None) -> Tuple[int, bytes, Dict[str, str]]:
+    def _request(self, path: str, method: str = "GET", params: Optional[Dict[str, Any]] = None, payload: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes, Dict[str, str]]:
         url = self._make_url(path, params)
         data = None
-        headers = self._headers()
+        headers = {**self._headers(), **(headers or {})}
         if payload is not None:
             data = json.dumps(payload).encode("utf-8")
             headers["Content-Type"] = "application/json"
-        # Be permissive with SSL in environments that lack certs
-        ctx = ssl.create_default_context()
+        # A server that kept failing is not contacted until its cool-down is over
+        wait = self._policy.breaker.allow()
+        if wait is not None:
+            raise SpoolClientNetworkError(f"{self.SOURCE} server unavailable after repeated failures (retry in {wait:.0f}s)", url=url, details={'retry_in': round(wait, 1)})
+        status = 0
+        try:
+            status, body, hdrs = self._request_with_retries(method, url, headers, data)
+        finally:
+            # 4xx means the server is up; only network errors and 5xx count as failures
+            self._policy.breaker.record(0 < status < 500)
+        self._invalidate_after_write(method, status)
+        return status, body, hdrs
+
+    def _invalidate_after_write(self, method: str, status: int) -> None:
+        """Drop this server's cached responses after a successful write (shared with the async client)."""
+        if method != "GET" and 0 < status < 400:
+            # a write may change any listing or record of this server
+            self._response_cache.invalidate(self.base_url)
+
+    def _request_with_retries(self, method: str, url: str, headers: Dict[str, str], data: Optional[bytes]) -> Tuple[int, bytes, Dict[str, str]]:
         attempts = max(0, int(self._retry_limit)) + 1
         last_status, last_body, last_hdrs = 0, b"", {}
         for i in range(attempts):
-            req = urllib.request.Request(url, headers=headers, method=method, data=data)
+            self._policy.bucket.acquire()
             try:
-                with urllib.request.urlopen(req, context=ctx, timeout=10) as resp:
-                    body = resp.read()
-                    status = getattr(resp, 'status', 200)
-                    hdrs = {k.lower(): v for k, v in resp.headers.items()}
-                    return status, body, hdrs
-            except urllib.error.HTTPError as e:
-                body = e.read() if hasattr(e, 'read') else b''
-                status = int(getattr(e, 'code', 0) or 0)
-                hdrs = {k.lower(): v for k, v in getattr(e, 'headers', {}).items()} if getattr(e, 'headers', None) else {}
-                # Retry only if status is retryable and we have more attempts left
-                last_status, last_body, last_hdrs = status, body, hdrs
-                if i < attempts - 1 and self._is_retryable_status(status):
-                    # backoff with jitter
-                    try:
-                        sleep_s = (self._retry_backoff * (2 ** i)) + (random.uniform(0, self._retry_jitter) if self._retry_jitter > 0 else 0)
-                        if sleep_s > 0:
-                            time.sleep(sleep_s)
-                    except Exception:
-                        pass
-                    continue
-                return status, body, hdrs
+                status, body, hdrs = self._transport.request(method, url, headers, data)
             except Exception:
                 # Network failure — retry if attempts remain, else return status 0
                 last_status, last_body, last_hdrs = 0, b"", {}
@@ -181,41 +235,95 @@ class SpoolClientBase:
                         pass
                     continue
                 return 0, b"", {}
+            if status < 400:
+                return status, body, hdrs
+            # Retry only if status is retryable and we have more attempts left
+            last_status, last_body, last_hdrs = status, body, hdrs
+            if i < attempts - 1 and self._is_retryable_status(status):
+                delay = retry_after(hdrs) if status in (429, 503) else None
+                if delay is not None:
+                    if delay > MAX_RETRY_AFTER:
+                        return status, body, hdrs
+                    # the server said when to come back: hold every request to this host until then
+                    self._policy.bucket.pause(delay)
+                    continue
+                # backoff with jitter
+                try:
+                    sleep_s = (self._retry_backoff * (2 ** i)) + (random.uniform(0, self._retry_jitter) if self._retry_jitter > 0 else 0)
+                    if sleep_s > 0:
+                        time.sleep(sleep_s)
+                except Exception:
+                    pass
+                continue
+            return status, body, hdrs
         # Should not reach here, return last captured info
         return last_status, last_body, last_hdrs
 
     def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Tuple[int, bytes, Dict[str, str]]:
-        return self._request(path, method="GET", params=params, payload=None)
+        cache = self._response_cache
+        url = self._make_url(path, params)
+        key = cache.key(url, self._headers())
+        entry = None
+        if cache.enabled:
+            entry, fresh = cache.lookup(key)
+            if fresh:
+                return 200, entry.body, dict(entry.headers)
+        # identical GETs already on the wire (from any client in this process) are joined, not repeated
+        (status, body, hdrs), _ = _inflight.do(key, lambda: self._fetch(path, params, url, key, entry))
+        return status, body, dict(hdrs)
+
+    def _fetch(self, path: str, params: Optional[Dict[str, Any]], url: str, key: str, entry: Any) -> Tuple[int, bytes, Dict[str, str]]:
+        cache = self._response_cache
+        status, body, hdrs = self._request(path, method="GET", params=params, headers=entry.validators() if entry else None)
+        if status == 304 and entry is not None:
+            entry = cache.revalidated(key, entry, hdrs)
+            return 200, entry.body, dict(entry.headers)
+        if status == 200:
+            cache.store(key, url, body, hdrs)
+        return status, body, hdrs
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Counters of the response cache used by this client (hits, misses, revalidated, ...) and of coalesced GETs."""
+        return {**self._response_cache.stats(), 'coalesced': _inflight.shared}
 
     def _get_json_first_ok(self, candidates: List[Tuple[str, Dict[str, Any] | None]]):
         """Try a list of (path, params) GETs, return first successful parsed JSON.
 
         Returns (ok, obj). ok=False if all attempts fail.
         """
-        for path, params in candidates:
+        for i, (path, params) in enumerate(candidates):
             status, body, _ = self._get(path, params)
             if status == 200 and body:
                 try:
-                    return True, json.loads(body.decode("utf-8"))
+                    obj = json.loads(body.decode("utf-8"))
                 except Exception:
                     # Not JSON, try next
-                    pass
+                    continue
+                self._remember_endpoint(candidates, i)
+                return True, obj
         return False, None
 
     def _get_json_first_ok_with_meta(self, candidates: List[Tuple[str, Dict[str, Any] | None]]):
         last_meta = None
-        for path, params in candidates:
+        for i, (path, params) in enumerate(candidates):
             url = self._make_url(path, params)
             status, body, hdrs = self._get(path, params)
             meta = {"status": status, "headers": hdrs, "url": url}
             if status == 200 and body:
                 try:
-                    return True, json.loads(body.decode("utf-8")), meta
+                    obj = json.loads(body.decode("utf-8"))
                 except Exception:
-                    pass
+                    obj = None
+                else:
+                    self._remember_endpoint(candidates, i)
+                    return True, obj, meta
             last_meta = meta
         return False, None, last_meta
 
+    def _remember_endpoint(self, candidates: List[Tuple[str, Dict[str, Any] | None]], index: int) -> None:
+        if isinstance(candidates, _Candidates):
+            self._endpoint_cache.store(self.SOURCE, self.base_url, candidates.action, candidates.templates[index])
+
     # endpoint management
     def _default_endpoints(self) -> Dict[str, List[Tuple[str, Optional[Dict[str, Any]]]]]:
         return {}
@@ -228,8 +336,12 @@ class SpoolClientBase:
                 eps[k] = list(v)
         return eps
 
-    def _format_candidates(self, action: str, item_id: Optional[str] = None, query: Optional[str] = None, page: Optional[int] = None, page_size: Optional[int] = None) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
-        eps = self._endpoints().get(action, [])
+    def _format_candidates(self, action: str, item_id: Optional[str] = None, query: Optional[str] = None, page: Optional[int] = None, page_size: Optional[int] = None, updated_since: Optional[str] = None) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+        eps = list(self._endpoints().get(action, []))
+        # try the variant that answered last time first; the rest follow in their usual order
+        hit = self._endpoint_cache.lookup(self.SOURCE, self.base_url, action, eps)
+        if hit:
+            eps.insert(0, eps.pop(hit))
         out: List[Tuple[str, Optional[Dict[str, Any]]]] = []
         iid = urllib.parse.quote(str(item_id)) if item_id is not None else None
         q = query if query is not None else None
@@ -245,6 +357,11 @@ class SpoolClientBase:
                 params = {}
                 for k, v in params_t.items():
                     if isinstance(v, str):
+                        if '{updated_since}' in v:
+                            # incremental filter: only sent once there is a cursor
+                            if updated_since is None:
+                                continue
+                            v = v.replace('{updated_since}', updated_since)
                         vv = v.replace('{id}', item_id or '').replace('{q}', q or '')
                         if '{page}' in vv and p is not None:
                             vv = vv.replace('{page}', str(p))
@@ -258,7 +375,7 @@ class SpoolClientBase:
                         vv = v
                     params[k] = vv
             out.append((path, params))
-        return out
+        return _Candidates(out, action, eps)
 
 
 class SpoolmanClient(SpoolClientBase):
@@ -617,7 +734,7 @@ class OpenSpoolClient(SpoolClientBase):
         return self._envelope("delete", item_id=item_id, ok=self.delete(item_id))
 
 
-def get_client(source: str, base_url: str, api_key: Optional[str] = None, endpoints: Optional[Dict[str, Any]] = None) -> SpoolClientBase:
+def get_client(source: str, base_url: str, api_key: Optional[str] = None, endpoints: Optional[Dict[str, Any]] = None, transport: Optional[Any] = None) -> SpoolClientBase:
     s = source.lower()
     # Optional endpoint overrides: parameter takes precedence, then env var OPK_SPOOL_ENDPOINTS (JSON)
     overrides = endpoints
@@ -632,9 +749,9 @@ def get_client(source: str, base_url: str, api_key: Optional[str] = None, endpoi
         if isinstance(eps_map, dict):
             overrides = eps_map.get(s)
     if s == 'spoolman':
-        return SpoolmanClient(base_url, api_key, endpoints=overrides)
+        return SpoolmanClient(base_url, api_key, endpoints=overrides, transport=transport)
     if s == 'tigertag':
-        return TigerTagClient(base_url, api_key, endpoints=overrides)
+        return TigerTagClient(base_url, api_key, endpoints=overrides, transport=transport)
     if s in ('openspool','opentag3d'):
-        return OpenSpoolClient(base_url, api_key, endpoints=overrides)
+        return OpenSpoolClient(base_url, api_key, endpoints=overrides, transport=transport)
     raise ValueError(f"Unknown source: {source}")
@@ -0,0 +1,201 @@
+"""Mirror a remote spool inventory into the local SQLite store.
+
+``sync_spools(client, con)`` pages through the source's listing endpoint
+(``sync`` endpoints if the client defines them, else ``search`` with an empty
+query) and upserts every spool into the ``spools`` table of
+``opk.integrations.db``. Afterwards searches can run on local data
+(``db.search_spools``, ``opk spool --action search --db ...``).
+
+Subsequent syncs transfer only what changed:
+
+- Every page is requested with the ``ETag``/``Last-Modified`` validators it
+  returned last time. A ``304 Not Modified`` page costs one empty response and
+  its spools are kept as they are.
+- If the endpoint template has an ``{updated_since}`` placeholder, it is filled
+  with the newest ``updated_at``/``updated``/``last_modified``/``modified`` value
+  seen so far, so the server only returns changed spools.
+- Spools whose JSON did not change are not rewritten.
+
+Once the first page reports a total (``X-Total-Count`` or a ``total`` field), the
+remaining pages are fetched in parallel, unless that first page already holds the
+total or more than ``page_size`` items (a server that ignores paging); otherwise pages are fetched ``jobs`` at
+a time until a short page. All writes of one sync go into a single transaction,
+so an interrupted sync leaves the previous mirror intact. Full (unfiltered)
+syncs also delete spools that disappeared from the server; a sync filtered by an
+``{updated_since}`` cursor cannot see deletions, reports ``deleted`` as None and
+needs ``full=True`` (``opk spool sync --full``) to drop them.
+"""
+
+from __future__ import annotations
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import db
+from .spool_clients import SpoolClientBase, SpoolClientError
+
+DEFAULT_PAGE_SIZE = 200
+UPDATED_FIELDS = ('updated_at', 'updated', 'last_modified', 'modified')
+_Validators = Dict[str, Tuple[Optional[str], Optional[str], List[str]]]
+
+
+@dataclass
+class _Page:
+    number: int
+    url: str
+    not_modified: bool
+    items: List[Any]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    total: Optional[int] = None
+
+
+def _page_items(obj: Any) -> Tuple[List[Any], Optional[int]]:
+    if isinstance(obj, list):
+        return obj, None
+    if isinstance(obj, dict):
+        total = next((obj[k] for k in ('total', 'count', 'total_count') if isinstance(obj.get(k), int)), None)
+        for k in ('items', 'results', 'data'):
+            if isinstance(obj.get(k), list):
+                return obj[k], total
+        return [obj], total
+    return [], None
+
+
+def _fetch_page(client: SpoolClientBase, action: str, number: int, page_size: int, validators: _Validators,
+                updated_since: Optional[str]) -> _Page:
+    cands = client._format_candidates(action, query='', page=number, page_size=page_size, updated_since=updated_since)
+    for i, (path, params) in enumerate(cands):
+        url = client._make_url(path, params)
+        prev = validators.get(url)
+        cond: Dict[str, str] = {}
+        if prev is not None:
+            if prev[0]:
+                cond['If-None-Match'] = prev[0]
+            if prev[1]:
+                cond['If-Modified-Since'] = prev[1]
+        status, body, hdrs = client._request(path, params=params, headers=cond)
+        if status == 304 and prev is not None:
+            client._remember_endpoint(cands, i)
+            return _Page(number, url, True, [], prev[0], prev[1])
+        if status == 200 and body:
+            try:
+                obj = json.loads(body.decode('utf-8'))
+            except Exception:
+                continue
+            client._remember_endpoint(cands, i)
+            items, total = _page_items(obj)
+            for k in ('x-total-count', 'x-total', 'x_count'):
+                try:
+                    total = int(hdrs[k])
+                    break
+                except (KeyError, ValueError):
+                    pass
+            return _Page(number, url, False, items, hdrs.get('etag'), hdrs.get('last-modified'), total)
+    raise SpoolClientError(f"{client.SOURCE} sync failed (no known endpoint responded)", details={'page': number})
+
+
+def sync_spools(client: SpoolClientBase, con: sqlite3.Connection, page_size: int = DEFAULT_PAGE_SIZE,
+                jobs: int = 4, full: bool = False) -> Dict[str, Any]:
+    """Bring the local mirror of ``client``'s inventory up to date; returns counters.
+
+    ``full=True`` ignores the stored validators and cursor and re-downloads
+    everything (still skipping unchanged rows). ``deleted`` is None when the
+    sync was incremental (cursor-filtered) and deletions were not checked.
+    """
+    source, base = client.SOURCE, client.base_url
+    endpoints = client._endpoints()
+    action = 'sync' if endpoints.get('sync') else 'search'
+    uses_cursor = '{updated_since}' in json.dumps(endpoints.get(action, []))
+    cursor, validators = db.sync_state(con, source, base)
+    if full:
+        cursor, validators = None, {}
+    since = cursor if uses_cursor else None
+    existing = db.spool_rows(con, source, base)
+    now = time.time()
+    stats = {'pages': 0, 'not_modified': 0, 'fetched': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+    seen: set = set()
+    pages: _Validators = {}
+    rows: List[Tuple[str, str, Optional[str]]] = []
+    newest = [cursor]
+
+    def consume(page: _Page) -> List[str]:
+        stats['pages'] += 1
+        if page.not_modified:
+            stats['not_modified'] += 1
+            ids = validators[page.url][2]
+            seen.update(ids)
+            pages[page.url] = validators[page.url]
+            return ids
+        ids = []
+        for it in page.items:
+            if not isinstance(it, dict) or it.get('id') is None:
+                continue
+            sid = str(it['id'])
+            ids.append(sid)
+            seen.add(sid)
+            stats['fetched'] += 1
+            data = json.dumps(it, sort_keys=True, separators=(',', ':'))
+            upd = next((str(it[k]) for k in UPDATED_FIELDS if it.get(k) is not None), None)
+            if upd is not None and (newest[0] is None or upd > newest[0]):
+                newest[0] = upd
+            old = existing.get(sid)
+            if old == data:
+                stats['unchanged'] += 1
+                continue
+            stats['inserted' if old is None else 'updated'] += 1
+            existing[sid] = data
+            rows.append((sid, data, upd))
+        pages[page.url] = (page.etag, page.last_modified, ids)
+        return ids
+
+    def fetch(n: int) -> _Page:
+        return _fetch_page(client, action, n, page_size, validators, since)
+
+    first = fetch(1)
+    last = consume(first)
+    ex = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    run = ex.map if ex is not None else map
+    try:
+        if first.total is not None and not first.not_modified:
+            # a first page holding everything (or more than asked for) means the server ignores paging
+            complete = len(first.items) >= first.total or len(first.items) > page_size
+            pages_left = range(2, -(-first.total // page_size) + 1) if not complete else range(0)
+            for page in run(fetch, pages_left):
+                if not page.not_modified and [str(i.get('id')) for i in page.items if isinstance(i, dict)] == last:
+                    break
+                last = consume(page)
+        else:
+            number, done = 1, len(last) < page_size
+            while not done:
+                batch = range(number + 1, number + 1 + max(1, jobs))
+                for page in run(fetch, batch):
+                    number = page.number
+                    ids = page.items if not page.not_modified else validators[page.url][2]
+                    # a page identical to the previous one: the server ignores paging
+                    if not ids or (not page.not_modified and [str(i.get('id')) for i in page.items if isinstance(i, dict)] == last):
+                        done = True
+                        break
+                    last = consume(page)
+                    if len(last) < page_size:
+                        done = True
+                        break
+    finally:
+        if ex is not None:
+            ex.shutdown(cancel_futures=True)
+
+    with con:
+        db.upsert_spools(con, source, base, rows, now)
+        incremental = since is not None
+        if not incremental:
+            gone = [i for i in existing if i not in seen]
+            db.delete_spools(con, source, base, gone)
+            stats['deleted'] = len(gone)
+        else:
+            stats['deleted'] = None
+        db.save_sync_state(con, source, base, newest[0], now, None if incremental else pages)
+    stats['total'] = con.execute("SELECT COUNT(*) FROM spools WHERE source=? AND base_url=?", (source, base)).fetchone()[0]
+    return stats
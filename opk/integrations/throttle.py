@@ -0,0 +1,159 @@
+"""Per-host request pacing and failure isolation for the spool clients.
+
+Every spool server (scheme, host and port) gets one ``HostPolicy``, shared by
+all clients in the process:
+
+- ``TokenBucket`` caps the request rate at ``OPK_NET_RATE_LIMIT`` requests per
+  second (QSettings ``net/rate_limit``; default 0 = unlimited) with bursts of
+  ``OPK_NET_RATE_BURST`` (default: one second's worth). A ``Retry-After`` from
+  the server pauses the whole bucket, so concurrent callers back off together.
+- ``CircuitBreaker`` opens after ``OPK_NET_BREAKER_THRESHOLD`` consecutive failed
+  calls (network errors or 5xx once retries are used up; default 3, 0 disables).
+  While open, calls fail at once instead of waiting through retries and
+  timeouts. After ``OPK_NET_BREAKER_COOLDOWN`` seconds (default 30) one trial
+  call is let through (half-open); its outcome closes or reopens the circuit.
+"""
+
+from __future__ import annotations
+import email.utils
+import os
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional
+
+DEFAULT_BREAKER_THRESHOLD = 3
+DEFAULT_BREAKER_COOLDOWN = 30.0
+# a Retry-After longer than this is not waited for; the error is returned instead
+MAX_RETRY_AFTER = 60.0
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+
+def _setting(env: str, qkey: str, default: float) -> float:
+    # Priority: env var > QSettings > default (same as the retry settings)
+    try:
+        v = os.environ.get(env)
+        if v is not None:
+            return max(0.0, float(v))
+    except ValueError:
+        pass
+    try:
+        from PySide6.QtCore import QSettings  # type: ignore
+        s = QSettings("OpenPrintKit", "OPKStudio")
+        return max(0.0, float(s.value(qkey, default)))
+    except Exception:
+        return default
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds requested by a ``Retry-After`` header (delta-seconds or HTTP date), or None."""
+    v = (headers.get('retry-after') or '').strip()
+    if not v:
+        return None
+    try:
+        return max(0.0, float(v))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(v).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Token bucket that hands out waits instead of refusing; ``rate <= 0`` only enforces pauses."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = burst if burst else max(1.0, rate)
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token; returns how many seconds the caller has to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            paused = max(0.0, self._paused_until - now)
+            if self.rate <= 0:
+                return paused
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1
+            return max(paused, -self._tokens / self.rate)
+
+    def acquire(self) -> float:
+        """Take one token, sleeping as needed; returns the seconds waited."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for ``seconds`` (e.g. the server sent ``Retry-After``)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed → open → (cool-down) → half-open → closed/open."""
+
+    def __init__(self, threshold: int = DEFAULT_BREAKER_THRESHOLD, cooldown: float = DEFAULT_BREAKER_COOLDOWN) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self._opened = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> Optional[float]:
+        """None if a call may proceed, else the seconds until the next trial call."""
+        if self.threshold <= 0:
+            return None
+        with self._lock:
+            if self.state == CLOSED:
+                return None
+            remaining = self._opened + self.cooldown - time.monotonic()
+            if self.state == OPEN and remaining <= 0:
+                # let exactly one trial call through
+                self.state = HALF_OPEN
+                return None
+            return max(0.0, remaining)
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                self.state, self.failures = CLOSED, 0
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.threshold > 0 and self.failures >= self.threshold):
+                self.state = OPEN
+                self._opened = time.monotonic()
+
+
+@dataclass
+class HostPolicy:
+    bucket: TokenBucket
+    breaker: CircuitBreaker
+
+
+_hosts: Dict[str, HostPolicy] = {}
+_hosts_lock = threading.Lock()
+
+
+def host_policy(url: str) -> HostPolicy:
+    """The shared policy for ``url``'s server; settings are read when a host is first seen."""
+    u = urllib.parse.urlsplit(url)
+    origin = f"{u.scheme}://{u.netloc}".lower()
+    with _hosts_lock:
+        p = _hosts.get(origin)
+        if p is None:
+            rate = _setting('OPK_NET_RATE_LIMIT', 'net/rate_limit', 0.0)
+            burst = _setting('OPK_NET_RATE_BURST', 'net/rate_burst', 0.0)
+            threshold = int(_setting('OPK_NET_BREAKER_THRESHOLD', 'net/breaker_threshold', DEFAULT_BREAKER_THRESHOLD))
+            cooldown = _setting('OPK_NET_BREAKER_COOLDOWN', 'net/breaker_cooldown', DEFAULT_BREAKER_COOLDOWN)
+            p = _hosts[origin] = HostPolicy(TokenBucket(rate, burst or None), CircuitBreaker(threshold, cooldown))
+        return p
@@ -0,0 +1,156 @@
+"""PDL file loading with ``extends:`` / ``include:`` inheritance.
+
+A PDL may name one or more base documents::
+
+    extends: ../bases/voron_24_base.yaml     # or a list of paths
+    include: [fragments/klipper_macros.yaml]
+
+Paths are relative to the referencing file. Bases are deep-merged in order
+(``extends`` first, then ``include``), and the document's own keys win. Dicts merge
+recursively; lists and scalars are replaced.
+
+Resolved documents are memoized per file. A cache entry stays valid while the file
+keeps the same (mtime_ns, size) and every base it was merged from is still the same
+merge (each entry carries a generation number, recorded by the documents built on
+it), so a base shared by hundreds of variants is read and merged once per run and
+re-read only when it, or one of its own bases, changes.
+"""
+
+from __future__ import annotations
+import copy
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+INHERIT_KEYS = ("extends", "include")
+
+
+class PdlResolveError(ValueError):
+    """Raised for missing base files or inheritance cycles."""
+
+
+def read_pdl_text(path: Path) -> Dict[str, Any]:
+    """Parse a single PDL file (YAML or JSON) without resolving inheritance."""
+    text = Path(path).read_text(encoding="utf-8")
+    if str(path).lower().endswith(".json"):
+        data = json.loads(text)
+    else:
+        import yaml  # type: ignore
+        data = yaml.safe_load(text)
+    return data or {}
+
+
+def deep_merge(base: Dict[str, Any], over: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a new dict with ``over`` merged on top of ``base`` (dicts recurse)."""
+    out = dict(base)
+    for k, v in over.items():
+        cur = out.get(k)
+        if isinstance(cur, dict) and isinstance(v, dict):
+            out[k] = deep_merge(cur, v)
+        else:
+            out[k] = v
+    return out
+
+
+def _refs(data: Dict[str, Any], key: str) -> List[str]:
+    v = data.get(key)
+    if not v:
+        return []
+    if isinstance(v, str):
+        return [v]
+    if isinstance(v, list) and all(isinstance(x, str) for x in v):
+        return list(v)
+    raise PdlResolveError(f"'{key}' must be a path or a list of paths")
+
+
+def _stamp(p: Path) -> Tuple[int, int]:
+    st = p.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+@dataclass
+class _Entry:
+    stamp: Tuple[int, int]
+    deps: Tuple[Path, ...]
+    data: Dict[str, Any]
+    gen: int
+    # generation of each dependency when this entry was merged
+    dep_gens: Tuple[int, ...]
+
+
+class PdlResolver:
+    """Memoizing resolver for PDL inheritance graphs."""
+
+    def __init__(self) -> None:
+        self._cache: Dict[Path, _Entry] = {}
+        self._lock = threading.RLock()
+        self.parses = 0  # number of files actually read (for diagnostics/tests)
+        self._gen = 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def resolve(self, path: str | Path) -> Dict[str, Any]:
+        """Return the fully merged PDL for ``path`` (a private copy callers may mutate)."""
+        with self._lock:
+            return copy.deepcopy(self._resolve(Path(path).resolve(), ()))
+
+    def dependencies(self, path: str | Path) -> Tuple[Path, ...]:
+        """Return the direct base files of ``path`` as resolved paths."""
+        with self._lock:
+            p = Path(path).resolve()
+            self._resolve(p, ())
+            return self._cache[p].deps
+
+    def _fresh(self, p: Path, seen: set) -> bool:
+        ent = self._cache.get(p)
+        if ent is None:
+            return False
+        try:
+            if _stamp(p) != ent.stamp:
+                return False
+        except OSError:
+            return False
+        seen.add(p)
+        return all((d in seen or self._fresh(d, seen)) and self._cache[d].gen == g
+                   for d, g in zip(ent.deps, ent.dep_gens))
+
+    def _resolve(self, p: Path, stack: Tuple[Path, ...]) -> Dict[str, Any]:
+        if p in stack:
+            chain = " -> ".join(str(x) for x in stack + (p,))
+            raise PdlResolveError(f"PDL inheritance cycle: {chain}")
+        if self._fresh(p, set()):
+            return self._cache[p].data
+        if not p.exists():
+            ref = f" (referenced by {stack[-1]})" if stack else ""
+            raise PdlResolveError(f"PDL base not found: {p}{ref}")
+        stamp = _stamp(p)
+        raw = read_pdl_text(p)
+        self.parses += 1
+        if not isinstance(raw, dict):
+            raise PdlResolveError(f"PDL must be a mapping: {p}")
+        deps = tuple((p.parent / r).resolve() for key in INHERIT_KEYS for r in _refs(raw, key))
+        merged: Dict[str, Any] = {}
+        for d in deps:
+            merged = deep_merge(merged, self._resolve(d, stack + (p,)))
+        own = {k: v for k, v in raw.items() if k not in INHERIT_KEYS}
+        merged = deep_merge(merged, own) if deps else own
+        self._gen += 1
+        self._cache[p] = _Entry(stamp=stamp, deps=deps, data=merged, gen=self._gen,
+                                dep_gens=tuple(self._cache[d].gen for d in deps))
+        return merged
+
+
+_DEFAULT = PdlResolver()
+
+
+def default_resolver() -> PdlResolver:
+    return _DEFAULT
+
+
+def load_pdl(path: str | Path, resolver: PdlResolver | None = None) -> Dict[str, Any]:
+    """Load a PDL file, resolving ``extends``/``include`` through the shared resolver."""
+    return (resolver or _DEFAULT).resolve(path)
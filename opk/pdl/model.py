@@ -0,0 +1,273 @@
+"""Typed, immutable view of a PDL document shared by the slicer generators.
+
+Generators used to re-walk the raw PDL dict (``pdl.get(...) or {}`` chains, number
+coercion, bed-shape min/max) on every call. ``parse_pdl`` does that work once and
+returns a compact, slotted model that can be passed to every generator.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, Tuple
+
+from ..core.gcode import render_hooks_with_firmware
+
+
+def _num(v: Any) -> float | None:
+    """Coerce a PDL value to float; missing, zero or invalid values become None."""
+    if not v:
+        return None
+    try:
+        return float(v)
+    except Exception:
+        return None
+
+
+def _int(v: Any) -> int:
+    try:
+        return int(float(v or 0))
+    except Exception:
+        return 0
+
+
+def _str(v: Any) -> str | None:
+    return str(v) if v else None
+
+
+def _dict(v: Any) -> Dict[str, Any]:
+    return v if isinstance(v, dict) else {}
+
+
+@dataclass(frozen=True, slots=True)
+class Geometry:
+    bed_shape: Tuple[Tuple[float, float], ...] = ()
+    z_height: float | None = None
+    width: float | None = None
+    depth: float | None = None
+
+    def size(self, default: Tuple[float, float]) -> Tuple[float, float]:
+        """Return (width, depth) of the bed bounding box, or ``default`` if no bed is defined."""
+        if self.width is None or self.depth is None:
+            return default
+        return self.width, self.depth
+
+
+@dataclass(frozen=True, slots=True)
+class Extruder:
+    id: str | None = None
+    nozzle_diameter: float | None = None
+    drive: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Material:
+    name: str | None = None
+    filament_type: str | None = None
+    filament_diameter: float | None = None
+    nozzle_temperature: float | None = None
+    bed_temperature: float | None = None
+    fan_speed: float | None = None
+    max_volumetric_speed_mm3s: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Speeds:
+    perimeter: float | None = None
+    infill: float | None = None
+    travel: float | None = None
+    external_perimeter: float | None = None
+    top: float | None = None
+    bottom: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Accelerations:
+    perimeter: float | None = None
+    infill: float | None = None
+    travel: float | None = None
+    external_perimeter: float | None = None
+    top: float | None = None
+    bottom: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Cooling:
+    min_layer_time_s: int = 0
+    fan_min_percent: int = 0
+    fan_max_percent: int | None = None
+    fan_always_on: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class ProcessDefaults:
+    layer_height_mm: float | None = None
+    first_layer_mm: float | None = None
+    min_layer_height_mm: float | None = None
+    speeds: Speeds = field(default_factory=Speeds)
+    accelerations: Accelerations = field(default_factory=Accelerations)
+    retract_mm: float | None = None
+    retract_speed_mms: float | None = None
+    adhesion: str = ''
+    extrusion_multiplier: float | None = None
+    cooling: Cooling = field(default_factory=Cooling)
+    infill_percent: float | None = None  # 0 is meaningful here; None means unset
+    infill_pattern: str | None = None
+    support: bool | str | None = None
+    walls: int | None = None
+    line_width_mm: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Limits:
+    acceleration_max: int = 0
+    jerk_max: int = 0
+    print_speed_max: float | None = None
+    travel_speed_max: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class MachineControl:
+    """Start/end G-code after merging ``gcode``, ``machine_control`` and firmware mapping."""
+    start: Tuple[str, ...] = ()
+    end: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class PdlModel:
+    name: str | None = None
+    firmware: str | None = None
+    kinematics: str | None = None
+    geometry: Geometry = field(default_factory=Geometry)
+    extruders: Tuple[Extruder, ...] = ()
+    materials: Tuple[Material, ...] = ()
+    process_defaults: ProcessDefaults = field(default_factory=ProcessDefaults)
+    limits: Limits = field(default_factory=Limits)
+    machine_control: MachineControl = field(default_factory=MachineControl)
+
+    @property
+    def extruder0(self) -> Extruder:
+        return self.extruders[0] if self.extruders else Extruder()
+
+    @property
+    def material0(self) -> Material:
+        return self.materials[0] if self.materials else Material()
+
+
+def _parse_geometry(geom: Dict[str, Any]) -> Geometry:
+    bed: Tuple[Tuple[float, float], ...] = ()
+    width = depth = None
+    try:
+        bed = tuple((float(p[0]), float(p[1])) for p in (geom.get('bed_shape') or []))
+        if bed:
+            xs = [p[0] for p in bed]; ys = [p[1] for p in bed]
+            width = max(xs) - min(xs); depth = max(ys) - min(ys)
+    except Exception:
+        bed = ()
+    return Geometry(bed_shape=bed, z_height=_num(geom.get('z_height')), width=width, depth=depth)
+
+
+def _parse_support(v: Any) -> bool | str | None:
+    if v is None or isinstance(v, (bool, str)):
+        return v
+    return bool(v)
+
+
+def _parse_process(proc: Dict[str, Any]) -> ProcessDefaults:
+    spd = _dict(proc.get('speeds_mms'))
+    acc = _dict(proc.get('accelerations_mms2'))
+    cool = _dict(proc.get('cooling'))
+    infill = proc.get('infill_percent')
+    try:
+        infill_pct = float(infill) if infill is not None else None
+    except Exception:
+        infill_pct = None
+    try:
+        walls = int(proc['walls']) if proc.get('walls') is not None else None
+    except Exception:
+        walls = None
+    pattern = proc.get('infill_pattern')
+    return ProcessDefaults(
+        layer_height_mm=_num(proc.get('layer_height_mm')),
+        first_layer_mm=_num(proc.get('first_layer_mm')),
+        min_layer_height_mm=_num(proc.get('min_layer_height_mm')),
+        speeds=Speeds(
+            perimeter=_num(spd.get('perimeter')),
+            infill=_num(spd.get('infill')),
+            travel=_num(spd.get('travel')),
+            external_perimeter=_num(spd.get('external_perimeter') or spd.get('wall_external')),
+            top=_num(spd.get('top') or spd.get('top_solid')),
+            bottom=_num(spd.get('bottom') or spd.get('bottom_solid')),
+        ),
+        accelerations=Accelerations(
+            perimeter=_num(acc.get('perimeter')),
+            infill=_num(acc.get('infill')),
+            travel=_num(acc.get('travel')),
+            external_perimeter=_num(acc.get('external_perimeter') or acc.get('wall_external')),
+            top=_num(acc.get('top') or acc.get('top_solid')),
+            bottom=_num(acc.get('bottom') or acc.get('bottom_solid')),
+        ),
+        retract_mm=_num(proc.get('retract_mm')),
+        retract_speed_mms=_num(proc.get('retract_speed_mms')),
+        adhesion=str(proc.get('adhesion') or '').lower(),
+        extrusion_multiplier=_num(proc.get('extrusion_multiplier')),
+        cooling=Cooling(
+            min_layer_time_s=_int(cool.get('min_layer_time_s')),
+            fan_min_percent=_int(cool.get('fan_min_percent')),
+            fan_max_percent=_int(cool['fan_max_percent']) if cool.get('fan_max_percent') else None,
+            fan_always_on=bool(cool.get('fan_always_on') or False),
+        ),
+        infill_percent=infill_pct,
+        infill_pattern=pattern if isinstance(pattern, str) and pattern else None,
+        support=_parse_support(proc.get('support')),
+        walls=walls,
+        line_width_mm=_num(proc.get('line_width_mm')),
+    )
+
+
+def _parse_limits(lim: Dict[str, Any]) -> Limits:
+    return Limits(
+        acceleration_max=_int(lim.get('acceleration_max')),
+        jerk_max=_int(lim.get('jerk_max')),
+        print_speed_max=_num(lim.get('print_speed_max')),
+        travel_speed_max=_num(lim.get('travel_speed_max')),
+    )
+
+
+def parse_pdl(pdl: Dict[str, Any] | None) -> PdlModel:
+    """Parse a raw PDL dict (YAML/JSON) into a :class:`PdlModel`."""
+    pdl = pdl or {}
+    hooks = render_hooks_with_firmware(pdl)
+    return PdlModel(
+        name=_str(pdl.get('name')),
+        firmware=_str(pdl.get('firmware')),
+        kinematics=_str(pdl.get('kinematics')),
+        geometry=_parse_geometry(_dict(pdl.get('geometry'))),
+        extruders=tuple(
+            Extruder(id=_str(e.get('id')), nozzle_diameter=_num(e.get('nozzle_diameter')), drive=_str(e.get('drive')))
+            for e in (pdl.get('extruders') or []) if isinstance(e, dict)
+        ),
+        materials=tuple(
+            Material(
+                name=_str(m.get('name')),
+                filament_type=_str(m.get('filament_type')),
+                filament_diameter=_num(m.get('filament_diameter')),
+                nozzle_temperature=_num(m.get('nozzle_temperature')),
+                bed_temperature=_num(m.get('bed_temperature')),
+                fan_speed=_num(m.get('fan_speed')),
+                max_volumetric_speed_mm3s=_num(m.get('max_volumetric_speed_mm3s')),
+            )
+            for m in (pdl.get('materials') or []) if isinstance(m, dict)
+        ),
+        process_defaults=_parse_process(_dict(pdl.get('process_defaults'))),
+        limits=_parse_limits(_dict(pdl.get('limits'))),
+        machine_control=MachineControl(
+            start=tuple(hooks.get('start') or ()),
+            end=tuple(hooks.get('end') or ()),
+        ),
+    )
+
+
+def as_model(pdl: Dict[str, Any] | PdlModel | None) -> PdlModel:
+    """Return ``pdl`` unchanged if it is already a model, otherwise parse it."""
+    if isinstance(pdl, PdlModel):
+        return pdl
+    return parse_pdl(pdl)
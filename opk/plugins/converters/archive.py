@@ -0,0 +1,245 @@
+"""Import profiles straight from slicer archives, without extracting them.
+
+Supported inputs (file path, bytes or a binary file object):
+
+- OPK ``.orca_printer`` bundles from ``build_bundle`` (members are OPK JSON already)
+- PrusaSlicer/SuperSlicer 3MF projects (``Metadata/Slic3r_PE.config``)
+- OrcaSlicer/Bambu Studio 3MF projects (``Metadata/project_settings.config``)
+- Bambu Studio preset bundles (``.bbscfg``/``.bbsflmt``: ``bundle_structure.json``
+  plus one JSON per preset)
+
+Only the zip central directory and the config members a format needs are read;
+each member is streamed from the archive and parsed directly.
+"""
+
+from __future__ import annotations
+import io
+import json
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from ...core.sink import DIR_SINK, OutputSink
+from .prusa import config_num, config_pct, norm_name, unescape_newlines, filament_from_config, printer_from_config, process_from_config
+from .prusa_bundle import parse_section
+
+ArchiveSource = Union[Path, str, bytes, IO[bytes]]
+
+ARCHIVE_SUFFIXES = ('.3mf', '.orca_printer', '.zip', '.bbscfg', '.bbsflmt')
+PRUSA_CONFIGS = ('Metadata/Slic3r_PE.config', 'Metadata/PrusaSlicer.config', 'Metadata/SuperSlicer.config')
+ORCA_CONFIG = 'Metadata/project_settings.config'
+BAMBU_STRUCTURE = 'bundle_structure.json'
+KIND_DIRS = {'printer': 'printers', 'filament': 'filaments', 'process': 'processes'}
+_OPK_KINDS = {v: k for k, v in KIND_DIRS.items()}
+_BAMBU_KINDS = {'machine': 'printer', 'printer': 'printer', 'filament': 'filament', 'process': 'process', 'print': 'process'}
+
+Profile = Tuple[str, str, Dict[str, Any]]  # (kind, output file stem, OPK object)
+
+
+def open_archive(source: ArchiveSource) -> zipfile.ZipFile:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(bytes(source))
+    return zipfile.ZipFile(source)  # type: ignore[arg-type]
+
+
+def sniff_archive(zf: zipfile.ZipFile) -> Optional[str]:
+    """Return ``opk-bundle``, ``prusa-3mf``, ``orca-3mf``, ``bambu-bundle`` or None."""
+    names = set(zf.namelist())
+    if BAMBU_STRUCTURE in names:
+        return 'bambu-bundle'
+    if ORCA_CONFIG in names:
+        return 'orca-3mf'
+    if any(n in names for n in PRUSA_CONFIGS):
+        return 'prusa-3mf'
+    if 'manifest.json' in names and any(n.split('/', 1)[0] in _OPK_KINDS for n in names):
+        return 'opk-bundle'
+    return None
+
+
+# --- Orca / Bambu JSON presets ----------------------------------------------
+def _first(v: Any) -> Any:
+    return v[0] if isinstance(v, list) and v else v
+
+
+def _str(v: Any) -> str:
+    v = _first(v)
+    return '' if v is None else str(v)
+
+
+def _gcode(v: Any) -> List[str]:
+    return unescape_newlines(_str(v)) if isinstance(_first(v), str) else []
+
+
+def orca_printer(name: str, cfg: Dict[str, Any]) -> Dict[str, Any]:
+    pts = []
+    for p in cfg.get('printable_area') or []:
+        try:
+            x, y = str(p).split('x', 1)
+            pts.append((float(x), float(y)))
+        except ValueError:
+            continue
+    xs = [p[0] for p in pts] or [0.0, 200.0]; ys = [p[1] for p in pts] or [0.0, 200.0]
+    start, end = _gcode(cfg.get('machine_start_gcode')), _gcode(cfg.get('machine_end_gcode'))
+    structure = _str(cfg.get('printer_structure')).lower()
+    return {
+        "type": "printer",
+        "name": name,
+        "kinematics": structure if structure in ('corexy', 'corexz', 'delta') else 'cartesian',
+        "firmware": _str(cfg.get('gcode_flavor')) or 'marlin',
+        "nozzle_diameter": config_num(_first(cfg.get('nozzle_diameter')), 0.4),
+        "filament_diameter": config_num(_first(cfg.get('filament_diameter')), 1.75),
+        "build_volume": [max(xs) - min(xs), max(ys) - min(ys), config_num(_first(cfg.get('printable_height')), 200.0)],
+        "gcode": {"start": start, "end": end} if (start or end) else {},
+        "comments": "Imported from an OrcaSlicer/Bambu archive via OPK converter (minimal mapping).",
+    }
+
+
+def orca_filament(name: str, cfg: Dict[str, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {
+        "type": "filament",
+        "name": name,
+        "filament_type": _str(cfg.get('filament_type')) or 'PLA',
+        "nozzle_temperature": config_num(_first(cfg.get('nozzle_temperature')), 210.0),
+        "bed_temperature": config_num(_first(cfg.get('hot_plate_temp') or cfg.get('bed_temperature')), 60.0),
+        "filament_diameter": config_num(_first(cfg.get('filament_diameter')), 1.75),
+    }
+    optional = {
+        "retraction_length": config_num(_first(cfg.get('filament_retraction_length'))),
+        "fan_speed": config_num(_first(cfg.get('fan_max_speed'))),
+    }
+    out.update({k: v for k, v in optional.items() if v is not None})
+    colour = _str(cfg.get('filament_colour') or cfg.get('default_filament_colour'))
+    if len(colour.lstrip('#')) == 6:
+        out["color_hex"] = colour
+    out["comments"] = "Imported from an OrcaSlicer/Bambu archive via OPK converter (minimal mapping)."
+    return out
+
+
+def orca_process(name: str, cfg: Dict[str, Any]) -> Dict[str, Any]:
+    layer = config_num(_first(cfg.get('layer_height')), 0.2)
+    brim = _str(cfg.get('brim_type'))
+    if (config_num(_first(cfg.get('raft_layers')), 0) or 0) > 0:
+        adhesion = 'raft'
+    elif brim and brim != 'no_brim':
+        adhesion = 'brim'
+    elif (config_num(_first(cfg.get('skirt_loops')), 0) or 0) > 0:
+        adhesion = 'skirt'
+    else:
+        adhesion = 'none'
+    density = config_pct(_str(cfg.get('sparse_infill_density')))
+    return {
+        "type": "process",
+        "name": name,
+        "layer_height": layer,
+        "first_layer_height": config_num(_first(cfg.get('initial_layer_print_height')), layer),
+        "print_speed": config_num(_first(cfg.get('outer_wall_speed') or cfg.get('inner_wall_speed')), 60.0),
+        "travel_speed": config_num(_first(cfg.get('travel_speed')), 150.0),
+        "wall_count": int(config_num(_first(cfg.get('wall_loops')), 2)),
+        "infill_density": 20.0 if density is None else density,
+        "adhesion_type": adhesion,
+        "comments": "Imported from an OrcaSlicer/Bambu archive via OPK converter (minimal mapping).",
+    }
+
+
+_ORCA = {'printer': orca_printer, 'filament': orca_filament, 'process': orca_process}
+
+
+# --- readers -------------------------------------------------------------------
+def _load_json(zf: zipfile.ZipFile, member: str) -> Any:
+    with zf.open(member) as f:
+        return json.load(f)
+
+
+def _settings_ids(cfg: Dict[str, Any], key: str, fallback: str) -> str:
+    v = cfg.get(key)
+    v = _first(v.split(';')) if isinstance(v, str) else _first(v)
+    return (str(v).strip().strip('"') if v else '') or fallback
+
+
+def _read_opk_bundle(zf: zipfile.ZipFile) -> Iterator[Profile]:
+    for member in sorted(zf.namelist()):
+        top, _, rest = member.partition('/')
+        if top in _OPK_KINDS and rest.endswith('.json') and '/' not in rest:
+            obj = _load_json(zf, member)
+            yield _OPK_KINDS[top], PurePosixPath(rest).stem, obj
+
+
+def _read_prusa_3mf(zf: zipfile.ZipFile, stem: str) -> Iterator[Profile]:
+    member = next(n for n in PRUSA_CONFIGS if n in zf.namelist())
+    with zf.open(member) as f:
+        text = io.TextIOWrapper(f, encoding='utf-8', errors='replace').read()
+    # 3MF configs are ``; key = value`` lines
+    cfg = parse_section('\n'.join(ln.lstrip('; ') for ln in text.splitlines()))
+    prn = _settings_ids(cfg, 'printer_settings_id', stem)
+    fil = _settings_ids(cfg, 'filament_settings_id', stem)
+    prt = _settings_ids(cfg, 'print_settings_id', stem)
+    yield 'printer', norm_name(prn), printer_from_config(prn, cfg, cfg)
+    yield 'filament', norm_name(fil), filament_from_config(fil, cfg)
+    yield 'process', norm_name(prt), process_from_config(prt, cfg)
+
+
+def _read_orca_3mf(zf: zipfile.ZipFile, stem: str) -> Iterator[Profile]:
+    cfg = _load_json(zf, ORCA_CONFIG)
+    for kind, key in (('printer', 'printer_settings_id'), ('filament', 'filament_settings_id'), ('process', 'print_settings_id')):
+        name = _settings_ids(cfg, key, stem)
+        yield kind, norm_name(name), _ORCA[kind](name, cfg)
+
+
+def _read_bambu_bundle(zf: zipfile.ZipFile) -> Iterator[Profile]:
+    for member in sorted(n for n in zf.namelist() if n.endswith('.json') and n != BAMBU_STRUCTURE):
+        cfg = _load_json(zf, member)
+        kind = _BAMBU_KINDS.get(str(cfg.get('type', '')).lower()) if isinstance(cfg, dict) else None
+        if kind is None:
+            continue
+        name = str(cfg.get('name') or PurePosixPath(member).stem)
+        yield kind, norm_name(name), _ORCA[kind](name, cfg)
+
+
+def iter_archive_profiles(source: ArchiveSource, name: str | None = None) -> Iterator[Profile]:
+    """Yield ``(kind, stem, profile)`` for every preset in a slicer archive.
+
+    name: fallback preset name for 3MF projects without settings ids
+    (defaults to the archive's file name).
+    """
+    if name is None:
+        name = Path(source).stem if isinstance(source, (str, Path)) else 'OPK_Import'
+    with open_archive(source) as zf:
+        fmt = sniff_archive(zf)
+        if fmt == 'opk-bundle':
+            yield from _read_opk_bundle(zf)
+        elif fmt == 'prusa-3mf':
+            yield from _read_prusa_3mf(zf, name)
+        elif fmt == 'orca-3mf':
+            yield from _read_orca_3mf(zf, name)
+        elif fmt == 'bambu-bundle':
+            yield from _read_bambu_bundle(zf)
+        else:
+            raise ValueError(f"unrecognized archive: {name}")
+
+
+def convert_archive_input(inp: ArchiveSource, out_dir: Path, sink: OutputSink | None = None) -> List[Path]:
+    """Convert one archive (or every archive in a directory) into ``printers/``, ``filaments/``, ``processes/``.
+
+    A single unrecognized archive raises ``ValueError``; in a directory such files are skipped.
+    """
+    out_dir = Path(out_dir)
+    sink = sink or DIR_SINK
+    many = isinstance(inp, (str, Path)) and Path(inp).is_dir()
+    if many:
+        sources: List[ArchiveSource] = sorted(p for p in Path(inp).iterdir() if p.suffix.lower() in ARCHIVE_SUFFIXES)
+    else:
+        sources = [inp]
+    written: List[Path] = []
+    for src in sources:
+        try:
+            profiles = list(iter_archive_profiles(src))
+        except (ValueError, KeyError, zipfile.BadZipFile):
+            if not many:
+                raise
+            # skip zips that aren't slicer archives
+            continue
+        for kind, stem, obj in profiles:
+            outp = out_dir / KIND_DIRS[kind] / f"{stem}.json"
+            sink.write_text(outp, json.dumps(obj, indent=2))
+            written.append(outp)
+    return written
@@ -0,0 +1,154 @@
+"""Recursive, parallel conversion with format sniffing.
+
+``convert_tree`` walks an input directory (or takes a single file), sniffs each
+candidate's format from its extension and first few KB, converts it with the
+matching single-file converter on a process pool, and writes the results through
+an output sink (skip-unchanged by default). Relative directories are mirrored
+under ``out_dir`` so same-named profiles from different vendors don't collide;
+two sources in one directory that still map to the same output file are
+reported as failed rather than overwriting each other. ``out_dir`` itself is
+never walked, so converting into a folder inside the source tree is safe.
+"""
+
+from __future__ import annotations
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ...core.sink import DIR_SINK, OutputSink
+from . import cura as _cura, ideamaker as _ideamaker, kisslicer as _kisslicer, prusa as _prusa
+
+FORMATS = ('cura', 'prusa', 'superslicer', 'ideamaker', 'kisslicer')
+EXTENSIONS = {'cura': ('.json',), 'prusa': ('.ini',), 'superslicer': ('.ini',), 'ideamaker': ('.cfg',), 'kisslicer': ('.ini',)}
+SNIFF_BYTES = 64 * 1024
+# Below this many files the pool start-up costs more than it saves.
+MIN_PARALLEL_FILES = 32
+# keys read by the KISSlicer converter; a flat .ini without any of them is not KISSlicer
+KISSLICER_KEYS = ('machine_width', 'machine_depth', 'machine_height')
+
+_CONVERTERS: Dict[str, Tuple[Callable[[Path], Dict[str, Any]], Callable[[str], str]]] = {
+    'cura': (_cura.convert_cura_definition, _cura.norm_name),
+    'prusa': (_prusa.convert_prusa_ini, _prusa.norm_name),
+    'superslicer': (_prusa.convert_prusa_ini, _prusa.norm_name),
+    'ideamaker': (_ideamaker.convert_ideamaker_cfg, _ideamaker.norm_name),
+    'kisslicer': (_kisslicer.convert_kisslicer_ini, _kisslicer.norm_name),
+}
+
+
+def sniff_format(path: Path) -> Optional[str]:
+    """Guess the source format of ``path``; None if it doesn't look convertible."""
+    ext = path.suffix.lower()
+    if ext not in ('.json', '.ini', '.cfg'):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            head = f.read(SNIFF_BYTES)
+    except OSError:
+        return None
+    if ext == '.json':
+        # Cura machine definitions carry metadata/overrides/inherits
+        return 'cura' if any(k in head for k in ('"overrides"', '"inherits"', '"metadata"', '"settings"')) else None
+    if ext == '.cfg':
+        return 'ideamaker' if any(k in head for k in ('machineWidth', 'nozzleDiameter', 'filamentDiameter')) else None
+    # .ini: Prusa-family configs are sectioned ([printer:...]) or carry bed_shape;
+    # KISSlicer files are flat key = value lists with the machine size keys
+    if '[printer:' in head or '[filament:' in head or '[print:' in head or 'bed_shape' in head:
+        return 'prusa'
+    lines = [ln.strip() for ln in head.splitlines() if ln.strip() and not ln.lstrip().startswith((';', '#'))]
+    if not lines or lines[0].startswith('[') or '=' not in lines[0]:
+        return None
+    keys = {ln.partition('=')[0].strip() for ln in lines}
+    return 'kisslicer' if keys.intersection(KISSLICER_KEYS) else None
+
+
+def _convert_one(job: Tuple[str, Optional[str]]) -> Tuple[str, Optional[str], Optional[str], Optional[str], Optional[str]]:
+    """Worker: returns (path, format, output name, JSON text, error)."""
+    path_s, fmt = job
+    path = Path(path_s)
+    fmt = fmt or sniff_format(path)
+    if fmt is None:
+        return path_s, None, None, None, None
+    convert, norm = _CONVERTERS[fmt]
+    try:
+        obj = convert(path)
+    except Exception as e:
+        return path_s, fmt, None, None, f"{type(e).__name__}: {e}"
+    name = norm(obj.get('name') or path.stem)
+    return path_s, fmt, name, json.dumps(obj, indent=2), None
+
+
+@dataclass
+class ConvertReport:
+    outputs: List[Path] = field(default_factory=list)
+    skipped: List[Path] = field(default_factory=list)  # not a recognized/selected format
+    failed: List[Tuple[Path, str]] = field(default_factory=list)
+    by_format: Dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'converted': len(self.outputs),
+            'skipped': len(self.skipped),
+            'failed': [{'path': str(p), 'error': e} for p, e in self.failed],
+            'by_format': dict(sorted(self.by_format.items())),
+            'outputs': [str(p) for p in self.outputs],
+        }
+
+
+def _candidates(src: Path, fmt: Optional[str], recursive: bool, out_dir: Path) -> List[Path]:
+    if src.is_file():
+        return [src]
+    exts = EXTENSIONS[fmt] if fmt else ('.json', '.ini', '.cfg')
+    it = src.rglob('*') if recursive else src.glob('*')
+    # skip our own outputs when out_dir lies inside the source tree
+    out_abs = out_dir.resolve()
+    return sorted(p for p in it if p.suffix.lower() in exts and p.is_file() and out_abs not in p.resolve().parents)
+
+
+def convert_tree(
+    src: Path,
+    out_dir: Path,
+    fmt: Optional[str] = None,
+    recursive: bool = True,
+    jobs: Optional[int] = None,
+    sink: OutputSink | None = None,
+) -> ConvertReport:
+    """Convert every matching file under ``src`` into OPK printer JSON under ``out_dir``.
+
+    fmt: force a source format (one of ``FORMATS``); None sniffs each file.
+    jobs: worker processes (default: CPU count); 1 converts in-process.
+    """
+    src = Path(src); out_dir = Path(out_dir)
+    if fmt is not None and fmt not in FORMATS:
+        raise ValueError(f"unknown format '{fmt}'")
+    sink = sink or DIR_SINK
+    files = _candidates(src, fmt, recursive, out_dir)
+    work = [(str(p), fmt) for p in files]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(work) >= MIN_PARALLEL_FILES:
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            results = list(ex.map(_convert_one, work, chunksize=max(1, len(work) // (jobs * 8))))
+    else:
+        results = [_convert_one(j) for j in work]
+    base = src if src.is_dir() else src.parent
+    report = ConvertReport()
+    claimed: Dict[Path, Path] = {}
+    for path_s, used, name, text, err in results:
+        path = Path(path_s)
+        if used is None:
+            report.skipped.append(path)
+            continue
+        if err is not None:
+            report.failed.append((path, err))
+            continue
+        outp = out_dir / path.parent.relative_to(base) / f"{name}.json"
+        if outp in claimed:
+            report.failed.append((path, f"output {outp.name} already written from {claimed[outp].name}"))
+            continue
+        claimed[outp] = path
+        sink.write_text(outp, text)
+        report.outputs.append(outp)
+        report.by_format[used] = report.by_format.get(used, 0) + 1
+    return report
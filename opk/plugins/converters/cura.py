@@ -4,47 +4,44 @@ import re
 from pathlib import Path
 from typing import Any, Dict, Iterable, List
 
+from ...core.sink import DIR_SINK, OutputSink
+from .cura_defs import CuraDefinitionResolver, resolver_for
 
-def _get_override_value(node: Any) -> Any:
-    if isinstance(node, dict):
-        # Cura defs sometimes use 'value' or 'default_value'
-        if "value" in node:
-            return node["value"]
-        if "default_value" in node:
-            return node["default_value"]
-    return node
 
-
-def _get_setting(data: Dict[str, Any], key: str) -> Any:
-    if key in data:
-        return data[key]
-    ov = data.get("overrides") or data.get("settings") or {}
-    if isinstance(ov, dict) and key in ov:
-        return _get_override_value(ov[key])
-    return None
-
-
-def _norm_name(name: str) -> str:
+def norm_name(name: str) -> str:
     name = re.sub(r"\s+", "_", name.strip())
     name = re.sub(r"[^A-Za-z0-9_\-]", "", name)
     return name
 
 
-def convert_cura_definition(path: Path) -> Dict[str, Any]:
-    data = json.loads(Path(path).read_text(encoding="utf-8"))
-    name = data.get("name") or (data.get("metadata") or {}).get("name") or path.stem
-    width = _get_setting(data, "machine_width") or 0
-    depth = _get_setting(data, "machine_depth") or 0
-    height = _get_setting(data, "machine_height") or 0
-    nozzle = _get_setting(data, "machine_nozzle_size") or 0.4
-    heated = bool(_get_setting(data, "machine_heated_bed") or False)
-    filament_diameter = _get_setting(data, "material_diameter") or 1.75
+def convert_cura_definition(path: Path, resolver: CuraDefinitionResolver | None = None) -> Dict[str, Any]:
+    """Convert a Cura ``.def.json``, following its ``inherits`` chain.
+
+    Parent definitions are looked up next to ``path`` (then in the resolver's
+    search dirs) and parsed once per resolver; by default a shared resolver per
+    directory is used, so converting a whole ``definitions/`` folder reads
+    ``fdmprinter.def.json`` and other common parents a single time.
+    """
+    path = Path(path)
+    d = (resolver or resolver_for(path.parent)).resolve_path(path)
+    data = d.data
+
+    def setting(key: str) -> Any:
+        return data[key] if key in data else d.get(key)
+
+    name = d.name or path.stem
+    width = setting("machine_width") or 0
+    depth = setting("machine_depth") or 0
+    height = setting("machine_height") or 0
+    nozzle = setting("machine_nozzle_size") or 0.4
+    heated = bool(setting("machine_heated_bed") or False)
+    filament_diameter = setting("material_diameter") or 1.75
 
     pr: Dict[str, Any] = {
         "type": "printer",
         "name": name,
         "kinematics": "cartesian",
-        "firmware": (data.get("metadata") or {}).get("firmware_name") or "Marlin",
+        "firmware": d.metadata.get("firmware_name") or "Marlin",
         "nozzle_diameter": float(nozzle),
         "filament_diameter": float(filament_diameter),
         "build_volume": [float(width), float(depth), float(height)],
@@ -54,7 +51,7 @@ def convert_cura_definition(path: Path) -> Dict[str, Any]:
     return pr
 
 
-def convert_cura_input(inp: Path, out_dir: Path) -> List[Path]:
+def convert_cura_input(inp: Path, out_dir: Path, sink: OutputSink | None = None) -> List[Path]:
     inp = Path(inp)
     out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -64,15 +61,16 @@ def convert_cura_input(inp: Path, out_dir: Path) -> List[Path]:
         files = sorted(inp.glob("*.json"))
     else:
         files = [inp]
+    resolver = CuraDefinitionResolver()
     for f in files:
         try:
-            pr = convert_cura_definition(f)
+            pr = convert_cura_definition(f, resolver)
         except Exception:
             # skip files that don't look like Cura definitions
             continue
-        name = _norm_name(pr.get("name") or f.stem)
+        name = norm_name(pr.get("name") or f.stem)
         outp = out_dir / f"{name}.json"
-        outp.write_text(json.dumps(pr, indent=2), encoding="utf-8")
+        (sink or DIR_SINK).write_text(outp, json.dumps(pr, indent=2))
         written.append(outp)
     return written
 
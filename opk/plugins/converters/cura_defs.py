@@ -0,0 +1,270 @@
+"""Cura ``.def.json`` inheritance resolution.
+
+Cura machine definitions inherit through ``inherits`` chains that end at
+``fdmprinter.def.json`` (a large settings tree). ``CuraDefinitionResolver`` loads
+each definition file once, caches the merged settings per definition id, and
+evaluates setting ``value`` expressions on demand, so a setting that depends on
+others (``line_width = machine_nozzle_size``) is computed after its inputs.
+Cached files are re-read only when their (mtime_ns, size) changes.
+
+Expressions are evaluated with a small whitelist (arithmetic, comparisons,
+``min``/``max``/``round``/``math.*`` and Cura's ``resolveOrValue``/
+``extruderValue(s)`` helpers); anything else falls back to ``default_value``.
+The helpers take precedence over setting names, and ``**`` refuses integer
+results too large to be a setting value.
+"""
+
+from __future__ import annotations
+import ast
+import json
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_SUFFIX = '.def.json'
+_MISSING = object()
+# largest integer power an expression may compute (``9**9**9`` would hang the converter)
+_MAX_POW_BITS = 4096
+# per-directory resolvers kept by ``resolver_for``
+_MAX_RESOLVERS = 32
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.BinOp, ast.UnaryOp, ast.IfExp, ast.Compare, ast.Call,
+    ast.Name, ast.Load, ast.Constant, ast.List, ast.Tuple, ast.Subscript, ast.Attribute,
+    ast.And, ast.Or, ast.Not, ast.USub, ast.UAdd, ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.FloorDiv, ast.Mod, ast.Pow, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.In, ast.NotIn, ast.Is, ast.IsNot,
+)
+
+
+class CuraDefinitionError(ValueError):
+    """Raised for missing parent definitions or inheritance cycles."""
+
+
+def definition_id(path: Path) -> str:
+    name = Path(path).name
+    return name[: -len(_SUFFIX)] if name.endswith(_SUFFIX) else Path(path).stem
+
+
+def _flatten(tree: Any, out: Dict[str, Dict[str, Any]]) -> None:
+    """Flatten fdmprinter's category/children tree into {key: setting node}."""
+    if not isinstance(tree, dict):
+        return
+    for key, node in tree.items():
+        if not isinstance(node, dict):
+            continue
+        if node.get('type') != 'category':
+            out[key] = {k: v for k, v in node.items() if k != 'children'}
+        _flatten(node.get('children'), out)
+
+
+def _compile(expr: str):
+    tree = ast.parse(expr.strip(), mode='eval')
+    for n in ast.walk(tree):
+        if not isinstance(n, _ALLOWED_NODES):
+            raise ValueError(f"unsupported expression: {type(n).__name__}")
+        if isinstance(n, ast.Attribute) and not (isinstance(n.value, ast.Name) and n.value.id == 'math'):
+            raise ValueError("only math.* attributes are allowed")
+        if isinstance(n, ast.Attribute) and n.attr.startswith('_'):
+            # math.__loader__, math.__spec__ ... would reach the import machinery
+            raise ValueError(f"private attribute not allowed: math.{n.attr}")
+    tree = ast.fix_missing_locations(_PowToCall().visit(tree))
+    return compile(tree, '<cura>', 'eval')
+
+
+class _PowToCall(ast.NodeTransformer):
+    """Rewrite ``a ** b`` as ``_pow(a, b)`` so the size of the result can be checked."""
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Pow):
+            return ast.copy_location(ast.Call(ast.Name('_pow', ast.Load()), [node.left, node.right], []), node)
+        return node
+
+
+def _pow(a: Any, b: Any) -> Any:
+    if isinstance(a, int) and isinstance(b, int) and b > 0 and abs(a) > 1 and a.bit_length() * b > _MAX_POW_BITS:
+        raise ValueError("power too large")
+    return a ** b
+
+
+@dataclass
+class CuraDefinition:
+    """A definition with its inherited settings merged (own overrides win)."""
+    id: str
+    name: str
+    metadata: Dict[str, Any]
+    settings: Dict[str, Dict[str, Any]]
+    chain: Tuple[str, ...]  # this id followed by its ancestors
+    data: Dict[str, Any] = field(default_factory=dict, repr=False)  # the file's own JSON
+    parent: Optional['CuraDefinition'] = field(default=None, repr=False, compare=False)
+    _values: Dict[str, Any] = field(default_factory=dict, repr=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Evaluated value of ``key`` (``value`` expression, else ``default_value``)."""
+        with self._lock:
+            v = self._value(key, ())
+        return default if v is _MISSING or v is None else v
+
+    def _value(self, key: str, stack: Tuple[str, ...]) -> Any:
+        if key in self._values:
+            return self._values[key]
+        node = self.settings.get(key)
+        if node is None:
+            return _MISSING
+        v = node.get('default_value')
+        expr = node.get('value')
+        if isinstance(expr, str) and key not in stack:
+            try:
+                v = self._eval(expr, stack + (key,))
+            except Exception:
+                v = node.get('default_value')
+        elif expr is not None and not isinstance(expr, str):
+            v = expr
+        self._values[key] = v
+        return v
+
+    def _eval(self, expr: str, stack: Tuple[str, ...]) -> Any:
+        definition = self
+
+        def lookup(key: str, *_: Any) -> Any:
+            v = definition._value(key, stack)
+            return None if v is _MISSING else v
+
+        helpers = {
+            'math': math, 'min': min, 'max': max, 'round': round, 'int': int,
+            'float': float, 'abs': abs, 'sum': sum, 'len': len, 'any': any, 'all': all, 'str': str, 'bool': bool,
+            'True': True, 'False': False, 'None': None, '_pow': _pow,
+            'resolveOrValue': lookup,
+            'extruderValue': lambda _i, key: lookup(key),
+            'extruderValues': lambda key: [lookup(key)],
+            'defaultExtruderPosition': lambda: '0',
+        }
+
+        class _Names(dict):
+            def __missing__(self, name: str) -> Any:
+                # helpers first: a setting called ``math`` or ``max`` must not shadow them
+                if name in helpers:
+                    return helpers[name]
+                v = definition._value(name, stack)
+                if v is _MISSING:
+                    raise KeyError(name)
+                return v
+
+        return eval(_compile(expr), {'__builtins__': {}}, _Names())
+
+
+@dataclass
+class _Raw:
+    stamp: Tuple[int, int]
+    data: Dict[str, Any]
+
+
+class CuraDefinitionResolver:
+    """Load and merge Cura definitions, parsing each file once.
+
+    strict: raise ``CuraDefinitionError`` when a parent can't be found; by default
+    the definition is resolved from its own settings only (a lone exported
+    ``.def.json`` still converts).
+    """
+
+    def __init__(self, search_dirs: Iterable[Path] = (), strict: bool = False) -> None:
+        self.search_dirs: List[Path] = [Path(d) for d in search_dirs]
+        self.strict = strict
+        self._raw: Dict[Path, _Raw] = {}
+        self._resolved: Dict[Path, CuraDefinition] = {}
+        self._lock = threading.RLock()
+        self.parses = 0  # files actually read (for diagnostics/tests)
+
+    def find(self, def_id: str, near: Optional[Path] = None) -> Path:
+        dirs = ([near] if near is not None else []) + self.search_dirs
+        for d in dirs:
+            p = d / f"{def_id}{_SUFFIX}"
+            if p.exists():
+                return p.resolve()
+        raise CuraDefinitionError(f"Cura definition '{def_id}' not found in: {', '.join(str(d) for d in dirs)}")
+
+    def _load(self, p: Path) -> Tuple[Dict[str, Any], bool]:
+        st = p.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+        ent = self._raw.get(p)
+        if ent is not None and ent.stamp == stamp:
+            return ent.data, False
+        data = json.loads(p.read_text(encoding='utf-8'))
+        self.parses += 1
+        self._raw[p] = _Raw(stamp, data)
+        return data, True
+
+    def resolve_path(self, path: Path) -> CuraDefinition:
+        with self._lock:
+            return self._resolve(Path(path).resolve(), ())
+
+    def resolve(self, def_id: str) -> CuraDefinition:
+        with self._lock:
+            return self._resolve(self.find(def_id), ())
+
+    def _resolve(self, p: Path, stack: Tuple[Path, ...]) -> CuraDefinition:
+        if p in stack:
+            chain = ' -> '.join(definition_id(x) for x in stack + (p,))
+            raise CuraDefinitionError(f"Cura inheritance cycle: {chain}")
+        data, changed = self._load(p)
+        parent = None
+        parent_id = data.get('inherits')
+        if parent_id:
+            try:
+                parent_path = self.find(parent_id, p.parent)
+            except CuraDefinitionError:
+                if self.strict:
+                    raise
+            else:
+                parent = self._resolve(parent_path, stack + (p,))
+        cached = self._resolved.get(p)
+        # Parents are rebuilt (new object) whenever anything above them changed.
+        if cached is not None and not changed and cached.parent is parent:
+            return cached
+        settings: Dict[str, Dict[str, Any]] = dict(parent.settings) if parent else {}
+        own: Dict[str, Dict[str, Any]] = {}
+        _flatten(data.get('settings'), own)
+        for key, node in (data.get('overrides') or {}).items():
+            own[key] = node if isinstance(node, dict) else {'default_value': node}
+        for key, node in own.items():
+            settings[key] = {**settings.get(key, {}), **node}
+        metadata = dict(parent.metadata) if parent else {}
+        metadata.update(data.get('metadata') or {})
+        did = definition_id(p)
+        d = CuraDefinition(
+            id=did,
+            name=data.get('name') or metadata.get('name') or did,
+            metadata=metadata,
+            settings=settings,
+            chain=(did,) + (parent.chain if parent else ()),
+            data=data,
+            parent=parent,
+        )
+        self._resolved[p] = d
+        return d
+
+
+_DEFAULT: OrderedDict[Path, CuraDefinitionResolver] = OrderedDict()
+_DEFAULT_LOCK = threading.Lock()
+
+
+def resolver_for(directory: Path) -> CuraDefinitionResolver:
+    """Shared per-directory resolver, so repeated conversions reuse parsed parents.
+
+    The ``_MAX_RESOLVERS`` most recently used directories are kept.
+    """
+    key = Path(directory).resolve()
+    with _DEFAULT_LOCK:
+        r = _DEFAULT.get(key)
+        if r is None:
+            r = _DEFAULT[key] = CuraDefinitionResolver()
+            while len(_DEFAULT) > _MAX_RESOLVERS:
+                _DEFAULT.popitem(last=False)
+        else:
+            _DEFAULT.move_to_end(key)
+        return r
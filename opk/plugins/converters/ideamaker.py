@@ -3,8 +3,10 @@ import json
 from pathlib import Path
 from typing import Any, Dict, Iterable, List
 
+from ...core.sink import DIR_SINK, OutputSink
 
-def _norm_name(name: str) -> str:
+
+def norm_name(name: str) -> str:
     return "".join(c if c.isalnum() or c in ("_","-") else "_" for c in (name or "")).strip("_") or "OPK_IdeaMaker"
 
 
@@ -38,7 +40,7 @@ def convert_ideamaker_cfg(path: Path) -> Dict[str, Any]:
     return pr
 
 
-def convert_ideamaker_input(inp: Path, out_dir: Path) -> List[Path]:
+def convert_ideamaker_input(inp: Path, out_dir: Path, sink: OutputSink | None = None) -> List[Path]:
     inp = Path(inp); out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
     files: Iterable[Path] = [inp] if inp.is_file() else sorted(inp.glob('*.cfg'))
@@ -48,9 +50,9 @@ def convert_ideamaker_input(inp: Path, out_dir: Path) -> List[Path]:
             pr = convert_ideamaker_cfg(f)
         except Exception:
             continue
-        name = _norm_name(pr.get('name') or f.stem)
+        name = norm_name(pr.get('name') or f.stem)
         outp = out_dir / f"{name}.json"
-        outp.write_text(json.dumps(pr, indent=2), encoding='utf-8')
+        (sink or DIR_SINK).write_text(outp, json.dumps(pr, indent=2))
         written.append(outp)
     return written
 
@@ -1,11 +1,14 @@
 from __future__ import annotations
 import json
-import configparser
 from pathlib import Path
 from typing import Any, Dict, Iterable, List
 
+from ...core.sink import DIR_SINK, OutputSink
+from .prusa_bundle import KINDS, PrusaIni, split_inherits
 
-def _norm_name(name: str) -> str:
+
+def norm_name(name: str) -> str:
+    """Preset name → safe output file stem."""
     return "".join(c if c.isalnum() or c in ("_","-") else "_" for c in (name or "")).strip("_") or "OPK_Prusa"
 
 
@@ -21,29 +24,42 @@ def _parse_bed_shape(s: str) -> List[List[float]]:
     return pts
 
 
-def _unescape_newlines(v: str) -> List[str]:
+def unescape_newlines(v: str) -> List[str]:
+    """Split a ``\\n``-escaped G-code setting into its non-empty lines."""
     v = v or ""
     return [ln for ln in v.replace('\\n', '\n').splitlines() if ln.strip()]
 
 
-def convert_prusa_ini(path: Path) -> Dict[str, Any]:
-    cp = configparser.ConfigParser()
-    cp.read(path, encoding='utf-8')
-    # pick first printer, filament, print sections
-    prn_sec = next((s for s in cp.sections() if s.lower().startswith('printer:')), None)
-    fil_sec = next((s for s in cp.sections() if s.lower().startswith('filament:')), None)
-    prt_sec = next((s for s in cp.sections() if s.lower().startswith('print:')), None)
-    prn = cp[prn_sec] if prn_sec else {}
-    fil = cp[fil_sec] if fil_sec else {}
-    name = (prn_sec.split(':',1)[1] if prn_sec and ':' in prn_sec else path.stem) or 'OPK_Prusa'
+def config_num(v: Any, default: Any = None) -> Any:
+    """First numeric value of a Prusa setting (``0.4,0.4`` → 0.4); ``default`` for nil/percent/empty."""
+    try:
+        return float(str(v).split(',')[0].strip())
+    except (TypeError, ValueError):
+        return default
+
+
+def config_pct(v: Any, of: float | None = None) -> float | None:
+    """``15%`` → 15.0, or a percentage of ``of`` when given; plain numbers pass through."""
+    s = str(v or '').strip()
+    if s.endswith('%'):
+        p = config_num(s[:-1])
+        if p is None:
+            return None
+        return p if of is None else round(of * p / 100.0, 4)
+    return config_num(s)
+
+
+def printer_from_config(name: str, prn: Dict[str, str], fil: Dict[str, str] | None = None) -> Dict[str, Any]:
+    fil = fil or {}
     bed_shape = _parse_bed_shape(prn.get('bed_shape', '0x0,200x0,200x200,0x200'))
-    nozzle = float(prn.get('nozzle_diameter', 0.4)) if prn else 0.4
-    fdia = float(fil.get('filament_diameter', 1.75)) if fil else 1.75
-    # derive build volume from bed shape; Z unknown in INI, default 200
+    nozzle = config_num(prn.get('nozzle_diameter'), 0.4)
+    fdia = config_num(fil.get('filament_diameter'), 1.75)
+    # derive build volume from bed shape; Z from max_print_height when present
     xs = [p[0] for p in bed_shape]; ys = [p[1] for p in bed_shape]
     width = max(xs) - min(xs); depth = max(ys) - min(ys)
-    start = _unescape_newlines(prn.get('start_gcode', ''))
-    end = _unescape_newlines(prn.get('end_gcode', ''))
+    height = config_num(prn.get('max_print_height'), 200.0) or 200.0
+    start = unescape_newlines(prn.get('start_gcode', ''))
+    end = unescape_newlines(prn.get('end_gcode', ''))
     pr: Dict[str, Any] = {
         "type": "printer",
         "name": name,
@@ -51,14 +67,107 @@ def convert_prusa_ini(path: Path) -> Dict[str, Any]:
         "firmware": "marlin",
         "nozzle_diameter": nozzle,
         "filament_diameter": fdia,
-        "build_volume": [float(width), float(depth), 200.0],
+        "build_volume": [float(width), float(depth), float(height)],
         "gcode": {"start": start, "end": end} if (start or end) else {},
         "comments": "Generated from Prusa-family INI via OPK converter (minimal mapping).",
     }
     return pr
 
 
-def convert_prusa_input(inp: Path, out_dir: Path) -> List[Path]:
+def filament_from_config(name: str, fil: Dict[str, str]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {
+        "type": "filament",
+        "name": name,
+        "filament_type": fil.get('filament_type') or 'PLA',
+        "nozzle_temperature": config_num(fil.get('temperature'), 210.0),
+        "bed_temperature": config_num(fil.get('bed_temperature'), 60.0),
+        "filament_diameter": config_num(fil.get('filament_diameter'), 1.75),
+    }
+    optional = {
+        "retraction_length": config_num(fil.get('filament_retract_length')),
+        "retraction_speed": config_num(fil.get('filament_retract_speed')),
+        "fan_speed": config_num(fil.get('max_fan_speed')),
+    }
+    out.update({k: v for k, v in optional.items() if v is not None})
+    colour = (fil.get('filament_colour') or '').strip('"')
+    if len(colour.lstrip('#')) == 6:
+        out["color_hex"] = colour
+    out["comments"] = "Generated from Prusa-family INI via OPK converter (minimal mapping)."
+    return out
+
+
+def process_from_config(name: str, prt: Dict[str, str]) -> Dict[str, Any]:
+    layer = config_num(prt.get('layer_height'), 0.2)
+    brim = config_num(prt.get('brim_width'), 0.0) or 0.0
+    if (config_num(prt.get('raft_layers'), 0) or 0) > 0:
+        adhesion = 'raft'
+    elif brim > 0:
+        adhesion = 'brim'
+    elif (config_num(prt.get('skirts'), 0) or 0) > 0:
+        adhesion = 'skirt'
+    else:
+        adhesion = 'none'
+    out: Dict[str, Any] = {
+        "type": "process",
+        "name": name,
+        "layer_height": layer,
+        "first_layer_height": config_pct(prt.get('first_layer_height'), layer) or layer,
+        "print_speed": config_num(prt.get('perimeter_speed'), 60.0),
+        "travel_speed": config_num(prt.get('travel_speed'), 150.0),
+        "wall_count": int(config_num(prt.get('perimeters'), 2)),
+        "infill_density": config_pct(prt.get('fill_density')) if prt.get('fill_density') else 20.0,
+        "adhesion_type": adhesion,
+        "comments": "Generated from Prusa-family INI via OPK converter (minimal mapping).",
+    }
+    return out
+
+
+def convert_prusa_ini(path: Path) -> Dict[str, Any]:
+    """Convert the first printer preset of an INI (with its ``inherits`` resolved) to an OPK printer."""
+    path = Path(path)
+    with PrusaIni(path) as ini:
+        prn_name = ini.first('printer')
+        fil_name = ini.first('filament')
+        if prn_name is not None:
+            prn = ini.resolve('printer', prn_name)
+        else:  # flat config export: all keys before the first header
+            prn = ini.raw('') if '' in ini.sections else {}
+        fil = ini.resolve('filament', fil_name) if fil_name is not None else prn
+    return printer_from_config(prn_name or path.stem or 'OPK_Prusa', prn, fil)
+
+
+_BUNDLE_DIRS = {'printer': 'printers', 'filament': 'filaments', 'print': 'processes'}
+
+
+def convert_prusa_bundle(inp: Path, out_dir: Path, sink: OutputSink | None = None, kinds: Iterable[str] = KINDS) -> List[Path]:
+    """Convert every concrete printer/filament/print preset of a vendor bundle.
+
+    Outputs go to ``printers/``, ``filaments/`` and ``processes/`` under ``out_dir``.
+    Printers take their filament diameter from ``default_filament_profile`` when
+    the bundle defines it.
+    """
+    out_dir = Path(out_dir)
+    sink = sink or DIR_SINK
+    written: List[Path] = []
+    with PrusaIni(Path(inp)) as ini:
+        filaments = set(ini.names('filament'))
+        for kind, name in ini.iter_presets(tuple(kinds)):
+            cfg = ini.resolve(kind, name)
+            if kind == 'printer':
+                fil_name = split_inherits(cfg.get('default_filament_profile', ''))
+                fil = ini.resolve('filament', fil_name[0]) if fil_name and fil_name[0] in filaments else None
+                obj = printer_from_config(name, cfg, fil)
+            elif kind == 'filament':
+                obj = filament_from_config(name, cfg)
+            else:
+                obj = process_from_config(name, cfg)
+            outp = out_dir / _BUNDLE_DIRS[kind] / f"{norm_name(name)}.json"
+            sink.write_text(outp, json.dumps(obj, indent=2))
+            written.append(outp)
+    return written
+
+
+def convert_prusa_input(inp: Path, out_dir: Path, sink: OutputSink | None = None) -> List[Path]:
     inp = Path(inp); out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
     files: Iterable[Path] = [inp] if inp.is_file() else sorted(inp.glob('*.ini'))
@@ -68,14 +177,14 @@ def convert_prusa_input(inp: Path, out_dir: Path) -> List[Path]:
             pr = convert_prusa_ini(f)
         except Exception:
             continue
-        name = _norm_name(pr.get('name') or f.stem)
+        name = norm_name(pr.get('name') or f.stem)
         outp = out_dir / f"{name}.json"
-        outp.write_text(json.dumps(pr, indent=2), encoding='utf-8')
+        (sink or DIR_SINK).write_text(outp, json.dumps(pr, indent=2))
         written.append(outp)
     return written
 
 
-def convert_superslicer_input(inp: Path, out_dir: Path) -> List[Path]:
+def convert_superslicer_input(inp: Path, out_dir: Path, sink: OutputSink | None = None) -> List[Path]:
     # Same INI structure as PrusaSlicer
-    return convert_prusa_input(inp, out_dir)
+    return convert_prusa_input(inp, out_dir, sink)
 
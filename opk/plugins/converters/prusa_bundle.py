@@ -0,0 +1,143 @@
+"""Streaming, indexed reader for PrusaSlicer-family INI files and vendor bundles.
+
+Vendor bundles (``PrusaResearch.ini`` and friends) are multi-megabyte files with
+thousands of ``[printer:...]``/``[filament:...]``/``[print:...]`` sections linked by
+``inherits = a; b``. ``PrusaIni`` makes one pass over the file recording the byte
+range of each section, parses a section only when it is asked for (a small LRU
+keeps recently used ones), and memoizes the resolved settings of presets that are
+used as parents, so converting every preset parses each shared ``*common*`` base
+once while memory stays bounded by the index plus those bases.
+
+Keys that appear before the first section header (plain ``config.ini`` exports)
+are available as the ``''`` section.
+"""
+
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+KINDS = ('printer', 'filament', 'print')
+RAW_CACHE_SIZE = 256
+
+Section = Dict[str, str]
+
+
+class PrusaIniError(ValueError):
+    """Raised for missing parents or inheritance cycles."""
+
+
+def parse_section(text: str) -> Section:
+    """``key = value`` lines of one INI section (comments and blank lines skipped)."""
+    out: Section = {}
+    for line in text.splitlines():
+        s = line.strip()
+        if not s or s[0] in '#;' or '=' not in s:
+            continue
+        k, v = s.split('=', 1)
+        out[k.strip()] = v.strip()
+    return out
+
+
+def split_inherits(v: str) -> List[str]:
+    """``inherits = *common*; *PLA*`` → ``['*common*', '*PLA*']`` (quotes stripped)."""
+    return [p.strip().strip('"') for p in (v or '').split(';') if p.strip().strip('"')]
+
+
+def is_abstract(name: str) -> bool:
+    """Abstract presets (``*common*``) only exist to be inherited from."""
+    return name.startswith('*') and name.endswith('*')
+
+
+class PrusaIni:
+    """Byte-offset index over an INI file with lazy, memoized section access."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.sections: Dict[str, Tuple[int, int]] = {}  # name -> (offset, length) of the body
+        self._f = open(self.path, 'rb')
+        self._raw: 'OrderedDict[str, Section]' = OrderedDict()
+        self._resolved: Dict[str, Section] = {}
+        self.parsed = 0  # section bodies parsed (for diagnostics/tests)
+        self._index()
+
+    def _index(self) -> None:
+        name, start, off = '', 0, 0
+        for line in self._f:
+            s = line.strip()
+            if s.startswith(b'[') and s.endswith(b']'):
+                self._add(name, start, off - start)
+                name = s[1:-1].decode('utf-8', errors='replace').strip()
+                start = off + len(line)
+            off += len(line)
+        self._add(name, start, off - start)
+
+    def _add(self, name: str, start: int, length: int) -> None:
+        # first occurrence wins, as with PrusaSlicer's own loader
+        if name not in self.sections and (name or length):
+            self.sections[name] = (start, length)
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self) -> 'PrusaIni':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def names(self, kind: str, concrete: bool = True) -> List[str]:
+        """Preset names of ``kind`` in file order (abstract ``*x*`` presets skipped by default)."""
+        prefix = kind + ':'
+        out = [s[len(prefix):] for s in self.sections if s.startswith(prefix)]
+        return [n for n in out if not (concrete and is_abstract(n))]
+
+    def iter_presets(self, kinds=KINDS) -> Iterator[Tuple[str, str]]:
+        for kind in kinds:
+            for name in self.names(kind):
+                yield kind, name
+
+    def raw(self, section: str) -> Section:
+        """The section's own keys (no inheritance)."""
+        hit = self._raw.get(section)
+        if hit is not None:
+            self._raw.move_to_end(section)
+            return hit
+        if section not in self.sections:
+            raise KeyError(section)
+        start, length = self.sections[section]
+        self._f.seek(start)
+        data = parse_section(self._f.read(length).decode('utf-8', errors='replace'))
+        self.parsed += 1
+        self._raw[section] = data
+        if len(self._raw) > RAW_CACHE_SIZE:
+            self._raw.popitem(last=False)
+        return data
+
+    def resolve(self, kind: str, name: str) -> Section:
+        """Settings of ``[kind:name]`` with its ``inherits`` parents applied left to right."""
+        return dict(self._resolve(kind, name, ()))
+
+    def _resolve(self, kind: str, name: str, stack: Tuple[str, ...]) -> Section:
+        section = f'{kind}:{name}'
+        hit = self._resolved.get(section)
+        if hit is not None:
+            return hit
+        if section in stack:
+            raise PrusaIniError('inheritance cycle: ' + ' -> '.join(stack + (section,)))
+        if section not in self.sections:
+            raise PrusaIniError(f"[{section}] not found in {self.path.name}")
+        own = self.raw(section)
+        merged: Section = {}
+        for parent in split_inherits(own.get('inherits', '')):
+            merged.update(self._resolve(kind, parent, stack + (section,)))
+        merged.update(own)
+        merged.pop('inherits', None)
+        if stack:  # only parents are memoized; leaf presets are converted once
+            self._resolved[section] = merged
+        return merged
+
+    def first(self, kind: str) -> Optional[str]:
+        """Name of the first concrete ``kind`` preset, falling back to abstract ones."""
+        names = self.names(kind) or self.names(kind, concrete=False)
+        return names[0] if names else None
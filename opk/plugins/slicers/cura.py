@@ -1,161 +1,103 @@
 from __future__ import annotations
 from pathlib import Path
 from typing import Dict, Any
+from ...core.sink import DIR_SINK, OutputSink
+from ...pdl.model import PdlModel, as_model
+from .keymap import Key, KeyTable, compile_lines, const, is_set, positive, truthy
 
 
-def _ensure_dir(p: Path) -> None:
-    p.mkdir(parents=True, exist_ok=True)
+def _speed_print(m: PdlModel) -> float:
+    spd = m.process_defaults.speeds
+    return spd.infill or spd.perimeter or 60.0
 
 
-def _num(v, d=0.0) -> float:
-    try:
-        return float(v)
-    except Exception:
-        return float(d)
+def _fan_max(m: PdlModel) -> int:
+    c = m.process_defaults.cooling
+    return c.fan_max_percent or c.fan_min_percent
 
 
-def generate_cura(pdl: Dict[str, Any], out_dir: Path) -> Dict[str, Path]:
+def _fan_set(v: Any, m: PdlModel) -> bool:
+    return bool(m.process_defaults.cooling.fan_min_percent or _fan_max(m))
+
+
+def _support_flag(v: Any, m: PdlModel) -> bool:
+    return isinstance(v, bool) or (isinstance(v, str) and bool(v))
+
+
+def _accel_set(v: Any, m: PdlModel) -> bool:
+    return bool(m.limits.acceleration_max and v)
+
+
+def _acc(attr: str):
+    return lambda m: int(getattr(m.process_defaults.accelerations, attr) or 0)
+
+
+# Cura has multiple profile layers (machine/material/quality); everything is emitted
+# into one combined profile, in this order.
+PROFILE_KEYS: KeyTable = (
+    Key('machine_width', lambda m: m.geometry.size((200, 200))[0], fmt='{:.0f}'),
+    Key('machine_depth', lambda m: m.geometry.size((200, 200))[1], fmt='{:.0f}'),
+    Key('machine_height', 'geometry.z_height', default=200.0, fmt='{:.0f}'),
+    Key('machine_nozzle_size', 'extruder0.nozzle_diameter', default=0.4, fmt='{:.2f}'),
+    Key('material_diameter', 'material0.filament_diameter', default=1.75, fmt='{:.2f}'),
+    Key('material_print_temperature', 'material0.nozzle_temperature', default=205.0, fmt='{:.0f}'),
+    Key('material_bed_temperature', 'material0.bed_temperature', default=60.0, fmt='{:.0f}'),
+    Key('layer_height', 'process_defaults.layer_height_mm', default=0.2),
+    Key('initial_layer_height', 'process_defaults.first_layer_mm', default=0.28),
+    Key('line_width', lambda m: m.process_defaults.line_width_mm or m.extruder0.nozzle_diameter, default=0.4, fmt='{:.2f}'),
+    Key('speed_print', _speed_print, fmt='{:.0f}'),
+    Key('speed_travel', 'process_defaults.speeds.travel', default=150.0, fmt='{:.0f}'),
+    Key('speed_infill', _speed_print, fmt='{:.0f}'),
+    Key('speed_wall', _speed_print, fmt='{:.0f}'),
+    Key('speed_wall_0', lambda m: m.process_defaults.speeds.external_perimeter or _speed_print(m), convert=int, fmt='{:d}'),
+    Key('speed_wall_x', _speed_print, fmt='{:.0f}'),
+    Key('retraction_enable', lambda m: 1 if (m.process_defaults.retract_mm or 0.0) > 0 else 0),
+    Key('retraction_amount', 'process_defaults.retract_mm', default=0.0, fmt='{:.2f}'),
+    Key('retraction_speed', 'process_defaults.retract_speed_mms', default=35.0, fmt='{:.0f}'),
+    # Top/bottom combined speed if provided
+    Key('speed_topbottom', lambda m: int(max(m.process_defaults.speeds.top or 0.0, m.process_defaults.speeds.bottom or 0.0)), when=truthy),
+    Key('adhesion_type', 'process_defaults.adhesion', when=lambda v, m: v in ('skirt', 'brim', 'raft')),
+    Key('material_flow', 'process_defaults.extrusion_multiplier', convert=lambda v: max(1, int(round(v * 100))), when=is_set),
+    Key('infill_sparse_density', 'process_defaults.infill_percent', convert=int, when=is_set),
+    Key('infill_pattern', 'process_defaults.infill_pattern', when=truthy),
+    Key('wall_line_count', 'process_defaults.walls', when=is_set),
+    Key('support_enable', 'process_defaults.support', convert=lambda v: str(bool(v)), when=_support_flag),
+    Key('support_pattern', 'process_defaults.support', when=lambda v, m: isinstance(v, str) and bool(v)),
+    Key('cool_min_layer_time', 'process_defaults.cooling.min_layer_time_s', when=positive),
+    # Cura uses 0-100 fan percent; the minimum is only written when it differs
+    Key('cool_fan_enabled', const('True'), when=_fan_set),
+    Key('cool_fan_speed', _fan_max, when=_fan_set),
+    Key('cool_fan_speed_min', 'process_defaults.cooling.fan_min_percent',
+        when=lambda v, m: _fan_set(v, m) and v != _fan_max(m)),
+    # Limits (acceleration/jerk) and optional per-section accelerations
+    Key('acceleration_enabled', const('True'), when=lambda v, m: bool(m.limits.acceleration_max)),
+    Key('acceleration_print', 'limits.acceleration_max', when=truthy),
+    Key('acceleration_travel', 'limits.acceleration_max', when=truthy),
+    Key('acceleration_wall', _acc('perimeter'), when=_accel_set),
+    Key('acceleration_infill', _acc('infill'), when=_accel_set),
+    Key('acceleration_wall_0', _acc('external_perimeter'), when=_accel_set),
+    Key('acceleration_topbottom', lambda m: max(_acc('top')(m), _acc('bottom')(m)), when=_accel_set),
+    Key('jerk_enabled', const('True'), when=lambda v, m: bool(m.limits.jerk_max)),
+    Key('jerk_print', 'limits.jerk_max', when=truthy),
+    Key('jerk_travel', 'limits.jerk_max', when=truthy),
+)
+
+KEYMAP = {'profile': PROFILE_KEYS}
+
+_emit_profile = compile_lines(PROFILE_KEYS)
+
+
+def generate_cura(pdl: Dict[str, Any] | PdlModel, out_dir: Path, sink: OutputSink | None = None) -> Dict[str, Path]:
     """Generate a minimal Cura-compatible .cfg profile from PDL fields.
 
     Note: Cura has multiple profile layers (machine/material/quality). This function emits
     a single combined profile.cfg with key parameters derived from PDL as a convenient starting point.
     """
+    m = as_model(pdl)
     out: Dict[str, Path] = {}
-    name = str(pdl.get('name') or 'OPK_Printer').replace(' ', '_')
-    geom = pdl.get('geometry') or {}
-    bed = geom.get('bed_shape') or [[0,0],[200,0],[200,200],[0,200]]
-    z = _num(geom.get('z_height') or 200)
-    xs = [p[0] for p in bed]; ys = [p[1] for p in bed]
-    w = max(xs) - min(xs); d = max(ys) - min(ys)
-    ex0 = (pdl.get('extruders') or [{}])[0]
-    nozzle = _num(ex0.get('nozzle_diameter') or 0.4)
-    mat0 = (pdl.get('materials') or [{}])[0]
-    mat_dia = _num(mat0.get('filament_diameter') or 1.75)
-    noz_temp = _num(mat0.get('nozzle_temperature') or 205)
-    bed_temp = _num(mat0.get('bed_temperature') or 60)
-    # Process defaults (optional)
-    proc = (pdl.get('process_defaults') or {})
-    lh = _num(proc.get('layer_height_mm') or 0.2)
-    flh = _num(proc.get('first_layer_mm') or 0.28)
-    spd = proc.get('speeds_mms') or {}
-    speed_print = _num(spd.get('infill') or spd.get('perimeter') or 60)
-    speed_travel = _num(spd.get('travel') or 150)
-    # Optional per-section speeds
-    ext_per_spd = _num(spd.get('external_perimeter') or spd.get('wall_external') or 0)
-    top_spd = _num(spd.get('top') or spd.get('top_solid') or 0)
-    bot_spd = _num(spd.get('bottom') or spd.get('bottom_solid') or 0)
-    # Retraction (optional)
-    retract_len = _num(proc.get('retract_mm') or 0.0)
-    retract_spd = _num(proc.get('retract_speed_mms') or 35.0)
-    # Adhesion (optional)
-    adhesion = proc.get('adhesion') or ''
-    # Extrusion multiplier (flow) optional
-    ext_mult = proc.get('extrusion_multiplier')
-    try:
-        flow_pct = max(1, int(round(float(ext_mult) * 100))) if ext_mult is not None else None
-    except Exception:
-        flow_pct = None
-    # Cooling (optional)
-    cooling = proc.get('cooling') or {}
-    min_layer_time = int(cooling.get('min_layer_time_s') or 0)
-    fan_min = int(cooling.get('fan_min_percent') or 0)
-    fan_max = int(cooling.get('fan_max_percent') or fan_min)
-    # Infill density, pattern and support
-    infill_pct = proc.get('infill_percent')
-    support = proc.get('support')  # bool or str
-    inf_pat = proc.get('infill_pattern')
-    walls = proc.get('walls')
-    # path
+    name = str(m.name or 'OPK_Printer').replace(' ', '_')
     cdir = out_dir / 'cura'
-    _ensure_dir(cdir)
     cfg = cdir / f'{name}_profile.cfg'
-    lines = [
-        f'machine_width = {w:.0f}',
-        f'machine_depth = {d:.0f}',
-        f'machine_height = {z:.0f}',
-        f'machine_nozzle_size = {nozzle:.2f}',
-        f'material_diameter = {mat_dia:.2f}',
-        f'material_print_temperature = {noz_temp:.0f}',
-        f'material_bed_temperature = {bed_temp:.0f}',
-        f'layer_height = {lh}',
-        f'initial_layer_height = {flh}',
-        f'line_width = {nozzle:.2f}',
-        f'speed_print = {speed_print:.0f}',
-        f'speed_travel = {speed_travel:.0f}',
-        f'speed_infill = {speed_print:.0f}',
-        f'speed_wall = {speed_print:.0f}',
-        f'speed_wall_0 = {int(ext_per_spd) if ext_per_spd else int(speed_print):d}',
-        f'speed_wall_x = {speed_print:.0f}',
-        f'retraction_enable = {1 if retract_len>0 else 0}',
-        f'retraction_amount = {retract_len:.2f}',
-        f'retraction_speed = {retract_spd:.0f}',
-    ]
-    # Top/bottom combined speed if provided
-    topbot = int(max(top_spd, bot_spd)) if (top_spd or bot_spd) else 0
-    if topbot:
-        lines.append(f'speed_topbottom = {topbot}')
-    if adhesion in ("skirt","brim","raft"):
-        lines.append(f'adhesion_type = {adhesion}')
-    if flow_pct is not None:
-        lines.append(f'material_flow = {flow_pct}')
-    if isinstance(infill_pct, (int, float)):
-        lines.append(f'infill_sparse_density = {int(infill_pct)}')
-    if isinstance(inf_pat, str) and inf_pat:
-        lines.append(f'infill_pattern = {inf_pat}')
-    try:
-        if walls is not None:
-            lines.append(f'wall_line_count = {int(walls)}')
-    except Exception:
-        pass
-    if isinstance(support, bool):
-        lines.append(f'support_enable = {str(bool(support))}')
-    elif isinstance(support, str) and support:
-        # Enable support and set a basic pattern if a string is provided
-        lines.append('support_enable = True')
-        lines.append(f'support_pattern = {support}')
-    if min_layer_time > 0:
-        lines.append(f'cool_min_layer_time = {min_layer_time}')
-    # Cura uses 0-100 fan percent
-    if fan_min or fan_max:
-        lines.append('cool_fan_enabled = True')
-        lines.append(f'cool_fan_speed = {fan_max}')
-        # Provide a minimum as well if different
-        if fan_min != fan_max:
-            lines.append(f'cool_fan_speed_min = {fan_min}')
-    # Limits (acceleration/jerk)
-    lim = (pdl.get('limits') or {})
-    try:
-        amax = int(float(lim.get('acceleration_max') or 0))
-    except Exception:
-        amax = 0
-    try:
-        jmax = int(float(lim.get('jerk_max') or 0))
-    except Exception:
-        jmax = 0
-    if amax:
-        lines.append('acceleration_enabled = True')
-        lines.append(f'acceleration_print = {amax}')
-        lines.append(f'acceleration_travel = {amax}')
-        # Optional per-section accelerations
-        acc = (proc.get('accelerations_mms2') or {})
-        acc_per = int(_num(acc.get('perimeter') or 0))
-        acc_inf = int(_num(acc.get('infill') or 0))
-        acc_ext = int(_num(acc.get('external_perimeter') or acc.get('wall_external') or 0))
-        acc_top = int(_num(acc.get('top') or acc.get('top_solid') or 0))
-        acc_bot = int(_num(acc.get('bottom') or acc.get('bottom_solid') or 0))
-        if acc_per:
-            lines.append(f'acceleration_wall = {acc_per}')
-        if acc_inf:
-            lines.append(f'acceleration_infill = {acc_inf}')
-        if acc_ext:
-            lines.append(f'acceleration_wall_0 = {acc_ext}')
-        topbot_acc = max(acc_top, acc_bot)
-        if topbot_acc:
-            lines.append(f'acceleration_topbottom = {topbot_acc}')
-    if jmax:
-        lines.append('jerk_enabled = True')
-        lines.append(f'jerk_print = {jmax}')
-        lines.append(f'jerk_travel = {jmax}')
-    cfg.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    (sink or DIR_SINK).write_text(cfg, '\n'.join(_emit_profile(m)) + '\n')
     out['profile'] = cfg
     return out
@@ -1,92 +1,63 @@
 from __future__ import annotations
 from pathlib import Path
 from typing import Dict, Any
-from ...core.gcode import render_hooks_with_firmware
+from ...core.sink import DIR_SINK, OutputSink
+from ...pdl.model import PdlModel, as_model
+from .keymap import Key, KeyTable, compile_lines, is_set, truthy
 
 
-def _ensure_dir(p: Path) -> None:
-    p.mkdir(parents=True, exist_ok=True)
+def _fan_set(v: Any, m: PdlModel) -> bool:
+    c = m.process_defaults.cooling
+    return bool(c.fan_min_percent or c.fan_max_percent)
 
 
-def _num(v, d=0.0) -> float:
-    try:
-        return float(v)
-    except Exception:
-        return float(d)
+def _retract_set(v: Any, m: PdlModel) -> bool:
+    return bool(m.process_defaults.retract_mm)
 
 
-def generate_ideamaker(pdl: Dict[str, Any], out_dir: Path) -> Dict[str, Path]:
+PROFILE_KEYS: KeyTable = (
+    Key('machineWidth', lambda m: m.geometry.size((200, 200))[0], convert=int),
+    Key('machineDepth', lambda m: m.geometry.size((200, 200))[1], convert=int),
+    Key('machineHeight', 'geometry.z_height', default=200.0, convert=int),
+    Key('nozzleDiameter', 'extruder0.nozzle_diameter', default=0.4, fmt='{:.2f}'),
+    Key('filamentDiameter', 'material0.filament_diameter', default=1.75, fmt='{:.2f}'),
+    Key('printingTemperature', 'material0.nozzle_temperature', default=205.0, fmt='{:.0f}'),
+    Key('bedTemperature', 'material0.bed_temperature', default=60.0, fmt='{:.0f}'),
+    Key('layerHeight', 'process_defaults.layer_height_mm', default=0.2),
+    Key('firstLayerHeight', 'process_defaults.first_layer_mm', default=0.28),
+    Key('perimeterSpeed', 'process_defaults.speeds.perimeter', default=40.0, convert=int),
+    Key('infillSpeed', 'process_defaults.speeds.infill', default=60.0, convert=int),
+    Key('travelSpeed', 'process_defaults.speeds.travel', default=150.0, convert=int),
+    # Retraction and cooling (best-effort field names)
+    Key('retractionDistance', 'process_defaults.retract_mm', fmt='{:.2f}', when=truthy),
+    Key('retractionSpeed', 'process_defaults.retract_speed_mms', default=35.0, convert=int, when=_retract_set),
+    Key('minLayerTime', 'process_defaults.cooling.min_layer_time_s', when=truthy),
+    Key('fanMin', 'process_defaults.cooling.fan_min_percent', when=_fan_set),
+    Key('fanMax', lambda m: m.process_defaults.cooling.fan_max_percent or 0, when=_fan_set),
+    Key('adhesionType', 'process_defaults.adhesion', when=lambda v, m: v in ('brim', 'skirt', 'raft')),
+    Key('startGcode', lambda m: '\n'.join(m.machine_control.start)),
+    Key('endGcode', lambda m: '\n'.join(m.machine_control.end)),
+    # Infill density and supports (best-effort keys)
+    Key('infillDensity', 'process_defaults.infill_percent', convert=int, when=is_set),
+    Key('supportEnable', 'process_defaults.support', convert=lambda v: str(bool(v)), when=is_set),
+    Key('supportPattern', 'process_defaults.support', when=lambda v, m: isinstance(v, str)),
+)
+
+KEYMAP = {'profile': PROFILE_KEYS}
+
+_emit_profile = compile_lines(PROFILE_KEYS)
+
+
+def generate_ideamaker(pdl: Dict[str, Any] | PdlModel, out_dir: Path, sink: OutputSink | None = None) -> Dict[str, Path]:
     """Generate a minimal ideaMaker-style config (.cfg) with basic machine/material parameters.
 
     ideaMaker uses a binary profile format for full configs, but this text config is a reasonable starter.
     """
+    m = as_model(pdl)
     out: Dict[str, Path] = {}
-    name = str(pdl.get('name') or 'OPK_IdeaMaker').replace(' ', '_')
-    geom = pdl.get('geometry') or {}
-    bed = geom.get('bed_shape') or [[0,0],[200,0],[200,200],[0,200]]
-    xs = [p[0] for p in bed]; ys = [p[1] for p in bed]
-    w = max(xs) - min(xs); d = max(ys) - min(ys)
-    z = _num(geom.get('z_height') or 200)
-    ex0 = (pdl.get('extruders') or [{}])[0]
-    nozzle = _num(ex0.get('nozzle_diameter') or 0.4)
-    mat0 = (pdl.get('materials') or [{}])[0]
-    mat_dia = _num(mat0.get('filament_diameter') or 1.75)
-    noz_temp = _num(mat0.get('nozzle_temperature') or 205)
-    bed_temp = _num(mat0.get('bed_temperature') or 60)
-    hooks = render_hooks_with_firmware(pdl or {})
-    start_g = '\n'.join(hooks.get('start') or [])
-    end_g = '\n'.join(hooks.get('end') or [])
-    # Process defaults
-    proc = (pdl.get('process_defaults') or {})
-    lh = _num(proc.get('layer_height_mm') or 0.2)
-    flh = _num(proc.get('first_layer_mm') or 0.28)
-    spd = proc.get('speeds_mms') or {}
-    per_spd = _num(spd.get('perimeter') or 40)
-    inf_spd = _num(spd.get('infill') or 60)
-    trav_spd = _num(spd.get('travel') or 150)
-    # Optional: retraction and cooling
-    retr_len = _num((pdl.get('process_defaults') or {}).get('retract_mm') or 0.0)
-    retr_spd = _num((pdl.get('process_defaults') or {}).get('retract_speed_mms') or 35.0)
-    cooling = (pdl.get('process_defaults') or {}).get('cooling') or {}
-    min_layer_time = int(cooling.get('min_layer_time_s') or 0)
-    fan_min = int(cooling.get('fan_min_percent') or 0)
-    fan_max = int(cooling.get('fan_max_percent') or 0)
-    adhesion = ((pdl.get('process_defaults') or {}).get('adhesion') or '').lower()
-    lines = [
-        f'machineWidth = {int(w)}',
-        f'machineDepth = {int(d)}',
-        f'machineHeight = {int(z)}',
-        f'nozzleDiameter = {nozzle:.2f}',
-        f'filamentDiameter = {mat_dia:.2f}',
-        f'printingTemperature = {noz_temp:.0f}',
-        f'bedTemperature = {bed_temp:.0f}',
-        f'layerHeight = {lh}',
-        f'firstLayerHeight = {flh}',
-        f'perimeterSpeed = {int(per_spd)}',
-        f'infillSpeed = {int(inf_spd)}',
-        f'travelSpeed = {int(trav_spd)}',
-        # Retraction and cooling (best-effort field names)
-        *( [f'retractionDistance = {retr_len:.2f}', f'retractionSpeed = {int(retr_spd)}'] if retr_len else [] ),
-        *( [f'minLayerTime = {min_layer_time}'] if min_layer_time else [] ),
-        *( [f'fanMin = {fan_min}', f'fanMax = {fan_max}'] if (fan_min or fan_max) else [] ),
-        *( [f'adhesionType = {adhesion}'] if adhesion in ('brim','skirt','raft') else [] ),
-        f'startGcode = {start_g}',
-        f'endGcode = {end_g}',
-    ]
-    # Infill density and supports (best-effort keys)
-    pd = (pdl.get('process_defaults') or {})
-    if pd.get('infill_percent') is not None:
-        try:
-            lines.append(f'infillDensity = {int(pd.get("infill_percent") or 0)}')
-        except Exception:
-            pass
-    if pd.get('support') is not None:
-        lines.append(f'supportEnable = {str(bool(pd.get("support")))}')
-        if isinstance(pd.get('support'), str):
-            lines.append(f'supportPattern = {pd.get("support")}')
+    name = str(m.name or 'OPK_IdeaMaker').replace(' ', '_')
     outdir = out_dir / 'ideamaker'
-    _ensure_dir(outdir)
     cfg = outdir / f'{name}.cfg'
-    cfg.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    (sink or DIR_SINK).write_text(cfg, '\n'.join(_emit_profile(m)) + '\n')
     out['profile'] = cfg
     return out
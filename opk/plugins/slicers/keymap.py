@@ -0,0 +1,112 @@
+"""Declarative PDL → slicer key tables.
+
+Each generator describes its output as tuples of :class:`Key` entries (slicer key,
+source on the :class:`~opk.pdl.model.PdlModel`, default, converter, format and an
+optional condition). ``compile_lines`` / ``compile_dict`` turn a table into an
+emitter once at import time, so generating many profiles only runs the precomputed
+getters and formatters. The same tables give an exact, machine-readable list of the
+keys each slicer can receive (see ``scripts/extract_generator_keys.py``).
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from ...pdl.model import PdlModel
+
+Getter = Callable[[PdlModel], Any]
+Condition = Callable[[Any, PdlModel], bool]
+
+
+@dataclass(frozen=True, slots=True)
+class Key:
+    """One slicer key.
+
+    src: dotted attribute path on the model (e.g. ``process_defaults.speeds.infill``)
+         or a callable taking the model.
+    default: substituted when the source value is falsy (PDL ``x or default`` semantics).
+    when: emit only if ``when(value, model)`` is true (evaluated before ``convert``).
+    convert: applied to the value before formatting.
+    fmt: ``str.format`` pattern for line emitters.
+    """
+    key: str
+    src: str | Getter
+    default: Any = None
+    convert: Callable[[Any], Any] | None = None
+    fmt: str = '{}'
+    when: Condition | None = None
+
+
+KeyTable = Tuple[Key, ...]
+
+
+# --- common conditions -------------------------------------------------------
+def truthy(v: Any, m: PdlModel) -> bool:
+    return bool(v)
+
+
+def is_set(v: Any, m: PdlModel) -> bool:
+    return v is not None
+
+
+def positive(v: Any, m: PdlModel) -> bool:
+    return (v or 0) > 0
+
+
+def const(value: Any) -> Getter:
+    return lambda m: value
+
+
+def _getter(src: str | Getter) -> Getter:
+    return src if callable(src) else attrgetter(src)
+
+
+def _steps(table: Iterable[Key]):
+    return tuple((k.key, _getter(k.src), k.default, k.convert, k.fmt.format, k.when) for k in table)
+
+
+def compile_lines(table: Iterable[Key], sep: str = ' = ') -> Callable[[PdlModel], List[str]]:
+    """Compile a table into ``emit(model) -> ['key = value', ...]``."""
+    steps = tuple((key + sep, get, default, conv, fmt, when) for key, get, default, conv, fmt, when in _steps(table))
+
+    def emit(m: PdlModel) -> List[str]:
+        out: List[str] = []
+        for prefix, get, default, conv, fmt, when in steps:
+            v = get(m)
+            if default is not None and not v:
+                v = default
+            if when is not None and not when(v, m):
+                continue
+            if conv is not None:
+                v = conv(v)
+            out.append(prefix + fmt(v))
+        return out
+
+    return emit
+
+
+def compile_dict(table: Iterable[Key]) -> Callable[[PdlModel], Dict[str, Any]]:
+    """Compile a table into ``emit(model) -> {key: value}`` (``fmt`` is ignored)."""
+    steps = _steps(table)
+
+    def emit(m: PdlModel) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for key, get, default, conv, _fmt, when in steps:
+            v = get(m)
+            if default is not None and not v:
+                v = default
+            if when is not None and not when(v, m):
+                continue
+            out[key] = conv(v) if conv is not None else v
+        return out
+
+    return emit
+
+
+def table_keys(table: Iterable[Key]) -> List[str]:
+    """Return the slicer keys of a table in emission order (duplicates removed)."""
+    seen: Dict[str, None] = {}
+    for k in table:
+        seen.setdefault(k.key, None)
+    return list(seen)
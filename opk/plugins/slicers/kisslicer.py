@@ -1,83 +1,60 @@
 from __future__ import annotations
 from pathlib import Path
 from typing import Dict, Any
-from ...core.gcode import render_hooks_with_firmware
+from ...core.sink import DIR_SINK, OutputSink
+from ...pdl.model import PdlModel, as_model
+from .keymap import Key, KeyTable, compile_lines, is_set, truthy
+from .prusa import _gcode_line
 
 
-def _ensure_dir(p: Path) -> None:
-    p.mkdir(parents=True, exist_ok=True)
+def _fan_set(v: Any, m: PdlModel) -> bool:
+    c = m.process_defaults.cooling
+    return bool(c.fan_min_percent or c.fan_max_percent)
 
 
-def _num(v, d=0.0) -> float:
-    try:
-        return float(v)
-    except Exception:
-        return float(d)
+def _retract_set(v: Any, m: PdlModel) -> bool:
+    return bool(m.process_defaults.retract_mm)
 
 
-def generate_kisslicer(pdl: Dict[str, Any], out_dir: Path) -> Dict[str, Path]:
+# Best-effort generic keys; KISSlicer formats vary between versions.
+PROFILE_KEYS: KeyTable = (
+    Key('machine_width', lambda m: m.geometry.size((200, 200))[0], convert=int),
+    Key('machine_depth', lambda m: m.geometry.size((200, 200))[1], convert=int),
+    Key('machine_height', 'geometry.z_height', default=200.0, convert=int),
+    Key('nozzle_diameter', 'extruder0.nozzle_diameter', default=0.4, fmt='{:.2f}'),
+    Key('filament_diameter', 'material0.filament_diameter', default=1.75, fmt='{:.2f}'),
+    Key('layer_height', 'process_defaults.layer_height_mm', default=0.2),
+    Key('first_layer_height', 'process_defaults.first_layer_mm', default=0.28),
+    Key('perimeter_speed', 'process_defaults.speeds.perimeter', default=40.0, convert=int),
+    Key('infill_speed', 'process_defaults.speeds.infill', default=60.0, convert=int),
+    Key('travel_speed', 'process_defaults.speeds.travel', default=150.0, convert=int),
+    Key('infill_density', lambda m: int(m.process_defaults.infill_percent or 0), when=truthy),
+    Key('support_material', 'process_defaults.support', convert=lambda v: 1 if v else 0, when=is_set),
+    Key('support_pattern', 'process_defaults.support', when=lambda v, m: isinstance(v, str)),
+    Key('retraction_length', 'process_defaults.retract_mm', fmt='{:.2f}', when=truthy),
+    Key('retraction_speed', 'process_defaults.retract_speed_mms', default=35.0, convert=int, when=_retract_set),
+    Key('cool_min_layer_time', 'process_defaults.cooling.min_layer_time_s', when=truthy),
+    Key('fan_min', 'process_defaults.cooling.fan_min_percent', when=_fan_set),
+    Key('fan_max', lambda m: m.process_defaults.cooling.fan_max_percent or 0, when=_fan_set),
+    Key('start_gcode', lambda m: _gcode_line(m.machine_control.start)),
+    Key('end_gcode', lambda m: _gcode_line(m.machine_control.end)),
+)
+
+KEYMAP = {'profile': PROFILE_KEYS}
+
+_emit_profile = compile_lines(PROFILE_KEYS)
+
+
+def generate_kisslicer(pdl: Dict[str, Any] | PdlModel, out_dir: Path, sink: OutputSink | None = None) -> Dict[str, Path]:
     """Generate a minimal KISSlicer-style .ini profile (best-effort generic keys).
 
     KISSlicer format varies; this provides a reasonable starter config.
     """
+    m = as_model(pdl)
     out: Dict[str, Path] = {}
-    name = str(pdl.get('name') or 'OPK_KISSlicer').replace(' ', '_')
-    geom = pdl.get('geometry') or {}
-    bed = geom.get('bed_shape') or [[0,0],[200,0],[200,200],[0,200]]
-    xs = [p[0] for p in bed]; ys = [p[1] for p in bed]
-    w = max(xs) - min(xs); d = max(ys) - min(ys)
-    z = _num(geom.get('z_height') or 200)
-    ex0 = (pdl.get('extruders') or [{}])[0]
-    nozzle = _num(ex0.get('nozzle_diameter') or 0.4)
-    mat0 = (pdl.get('materials') or [{}])[0]
-    mat_dia = _num(mat0.get('filament_diameter') or 1.75)
-    # Process defaults
-    proc = (pdl.get('process_defaults') or {})
-    lh = _num(proc.get('layer_height_mm') or 0.2)
-    flh = _num(proc.get('first_layer_mm') or 0.28)
-    spd = proc.get('speeds_mms') or {}
-    per_spd = _num(spd.get('perimeter') or 40)
-    inf_spd = _num(spd.get('infill') or 60)
-    trav_spd = _num(spd.get('travel') or 150)
-    # Optional: retraction and cooling
-    retr_len = _num((pdl.get('process_defaults') or {}).get('retract_mm') or 0.0)
-    retr_spd = _num((pdl.get('process_defaults') or {}).get('retract_speed_mms') or 35.0)
-    cooling = (pdl.get('process_defaults') or {}).get('cooling') or {}
-    min_layer_time = int(cooling.get('min_layer_time_s') or 0)
-    fan_min = int(cooling.get('fan_min_percent') or 0)
-    fan_max = int(cooling.get('fan_max_percent') or 0)
-    hooks = render_hooks_with_firmware(pdl or {})
-    start_g = '\n'.join(hooks.get('start') or [])
-    end_g = '\n'.join(hooks.get('end') or [])
-    # Optional: infill density and supports (best-effort generic keys)
-    try:
-        infill_pct = int(float((pdl.get('process_defaults') or {}).get('infill_percent') or 0))
-    except Exception:
-        infill_pct = 0
-    support = (pdl.get('process_defaults') or {}).get('support')
+    name = str(m.name or 'OPK_KISSlicer').replace(' ', '_')
     outdir = out_dir / 'kisslicer'
-    _ensure_dir(outdir)
     ini = outdir / f'{name}.ini'
-    lines = [
-        f'machine_width = {int(w)}',
-        f'machine_depth = {int(d)}',
-        f'machine_height = {int(z)}',
-        f'nozzle_diameter = {nozzle:.2f}',
-        f'filament_diameter = {mat_dia:.2f}',
-        f'layer_height = {lh}',
-        f'first_layer_height = {flh}',
-        f'perimeter_speed = {int(per_spd)}',
-        f'infill_speed = {int(inf_spd)}',
-        f'travel_speed = {int(trav_spd)}',
-        *( [f'infill_density = {infill_pct}'] if infill_pct else [] ),
-        *( [f'support_material = {1 if support else 0}'] if support is not None else [] ),
-        *( [f'support_pattern = {support}'] if isinstance(support, str) else [] ),
-        *( [f'retraction_length = {retr_len:.2f}', f'retraction_speed = {int(retr_spd)}'] if retr_len else [] ),
-        *( [f'cool_min_layer_time = {min_layer_time}'] if min_layer_time else [] ),
-        *( [f'fan_min = {fan_min}', f'fan_max = {fan_max}'] if (fan_min or fan_max) else [] ),
-        f'start_gcode = {start_g.replace("\n","\\n")}',
-        f'end_gcode = {end_g.replace("\n","\\n")}',
-    ]
-    ini.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    (sink or DIR_SINK).write_text(ini, '\n'.join(_emit_profile(m)) + '\n')
     out['profile'] = ini
     return out
@@ -2,70 +2,79 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Dict, Any
 from ...core import schema as S
-from ...core.gcode import render_hooks_with_firmware
+from ...core.sink import DIR_SINK, OutputSink
+from ...pdl.model import PdlModel, as_model
+from .keymap import Key, KeyTable, compile_dict, const
 
 
-def _ensure_dir(p: Path) -> None:
-    p.mkdir(parents=True, exist_ok=True)
+def _dump_json(obj: Dict[str, Any], path: Path, sink: OutputSink) -> None:
+    import json
+    sink.write_text(path, json.dumps(obj, indent=2))
 
 
-def _dump_json(obj: Dict[str, Any], path: Path) -> None:
-    import json
-    _ensure_dir(path.parent)
-    path.write_text(json.dumps(obj, indent=2), encoding='utf-8')
+def _build_volume(m: PdlModel) -> list:
+    w, d = m.geometry.size((200, 200))
+    return [float(w), float(d), float(m.geometry.z_height or 200)]
+
+
+PRINTER_KEYS: KeyTable = (
+    Key('type', const('printer')),
+    Key('name', 'name', default='OPK Printer', convert=str),
+    Key('firmware', 'firmware', default='marlin'),
+    Key('kinematics', 'kinematics', default='cartesian'),
+    Key('nozzle_diameter', 'extruder0.nozzle_diameter', default=0.4, convert=float),
+    Key('filament_diameter', 'material0.filament_diameter', default=1.75, convert=float),
+    Key('build_volume', _build_volume),
+    Key('comments', const('Generated by OPK from PDL')),
+)
+
+FILAMENT_KEYS: KeyTable = (
+    Key('type', const('filament')),
+    Key('name', 'material0.name', default='Generic PLA'),
+    Key('filament_type', 'material0.filament_type', default='PLA'),
+    Key('nozzle_temperature', 'material0.nozzle_temperature', default=205, convert=float),
+    Key('bed_temperature', 'material0.bed_temperature', default=60, convert=float),
+    Key('fan_speed', 'material0.fan_speed', default=100, convert=float),
+)
 
+# Starter process; not derived from PDL yet.
+PROCESS_KEYS: KeyTable = (
+    Key('type', const('process')),
+    Key('name', const('Standard 0.20mm')),
+    Key('layer_height', const(0.2)),
+    Key('first_layer_height', const(0.28)),
+    Key('print_speed', const(60)),
+)
 
-def generate_orca(pdl: Dict[str, Any], out_dir: Path) -> Dict[str, Path]:
+KEYMAP = {'printer': PRINTER_KEYS, 'filament': FILAMENT_KEYS, 'process': PROCESS_KEYS}
+
+_emit_printer = compile_dict(PRINTER_KEYS)
+_emit_filament = compile_dict(FILAMENT_KEYS)
+_emit_process = compile_dict(PROCESS_KEYS)
+
+
+def generate_orca(pdl: Dict[str, Any] | PdlModel, out_dir: Path, sink: OutputSink | None = None) -> Dict[str, Path]:
     """Generate minimal OPK profiles (printer/filament/process) from PDL suitable for orca bundling."""
+    m = as_model(pdl)
+    sink = sink or DIR_SINK
     out: Dict[str, Path] = {}
-    name = pdl.get('name') or 'OPK Printer'
-    geom = pdl.get('geometry') or {}
-    bed = geom.get('bed_shape') or [[0,0],[200,0],[200,200],[0,200]]
-    z = geom.get('z_height') or 200
-    xs = [p[0] for p in bed]; ys = [p[1] for p in bed]
-    w = max(xs) - min(xs); d = max(ys) - min(ys)
-    ex0 = (pdl.get('extruders') or [{}])[0]
-    nozzle = ex0.get('nozzle_diameter') or 0.4
+    name = m.name or 'OPK Printer'
     # PRINTER
-    printer = {
-        'type': 'printer',
-        'name': str(name),
-        'firmware': str(pdl.get('firmware') or 'marlin'),
-        'kinematics': str(pdl.get('kinematics') or 'cartesian'),
-        'nozzle_diameter': float(nozzle),
-        'filament_diameter': float((pdl.get('materials') or [{}])[0].get('filament_diameter') or 1.75),
-        'build_volume': [float(w), float(d), float(z)],
-        'comments': 'Generated by OPK from PDL'
-    }
+    printer = _emit_printer(m)
     S.validate('printer', printer)
     ppath = out_dir / 'printers' / f"{name}_Printer.json"
-    _dump_json(printer, ppath)
+    _dump_json(printer, ppath, sink)
     out['printer'] = ppath
     # FILAMENT
-    mat = (pdl.get('materials') or [{}])[0]
-    filament = {
-        'type': 'filament',
-        'name': mat.get('name') or 'Generic PLA',
-        'filament_type': mat.get('filament_type') or 'PLA',
-        'nozzle_temperature': float(mat.get('nozzle_temperature') or 205),
-        'bed_temperature': float(mat.get('bed_temperature') or 60),
-        'fan_speed': float(mat.get('fan_speed') or 100)
-    }
+    filament = _emit_filament(m)
     S.validate('filament', filament)
     fpath = out_dir / 'filaments' / f"{filament['name'].replace(' ','_')}.json"
-    _dump_json(filament, fpath)
+    _dump_json(filament, fpath, sink)
     out['filament'] = fpath
     # PROCESS
-    process = {
-        'type': 'process',
-        'name': 'Standard 0.20mm',
-        'layer_height': 0.2,
-        'first_layer_height': 0.28,
-        'print_speed': 60,
-    }
+    process = _emit_process(m)
     S.validate('process', process)
     rpath = out_dir / 'processes' / f"{process['name'].replace(' ','_')}.json"
-    _dump_json(process, rpath)
+    _dump_json(process, rpath, sink)
     out['process'] = rpath
     return out
-
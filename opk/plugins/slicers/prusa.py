@@ -1,164 +1,128 @@
 from __future__ import annotations
 from pathlib import Path
 from typing import Dict, Any
-from ...core.gcode import render_hooks_with_firmware
+from ...core.sink import DIR_SINK, OutputSink
+from ...pdl.model import PdlModel, as_model
+from .keymap import Key, KeyTable, compile_lines, const, is_set, positive, truthy
 
 
-def _ensure_dir(p: Path) -> None:
-    p.mkdir(parents=True, exist_ok=True)
+def _bed_shape_str(w: float, d: float) -> str:
+    return f"0x0,{int(w)}x0,{int(w)}x{int(d)},0x{int(d)}"
 
 
-def _num(v, d=0.0) -> float:
-    try:
-        return float(v)
-    except Exception:
-        return float(d)
+def _gcode_line(lines) -> str:
+    return '\n'.join(lines).replace('\n', '\\n')
 
 
-def _bed_shape_str(bed) -> str:
-    try:
-        xs = [p[0] for p in bed]; ys = [p[1] for p in bed]
-        w = max(xs) - min(xs); d = max(ys) - min(ys)
-    except Exception:
-        w, d = 200, 200
-    return f"0x0,{int(w)}x0,{int(w)}x{int(d)},0x{int(d)}"
+def _support_flag(v: Any, m: PdlModel) -> bool:
+    return isinstance(v, bool) or (isinstance(v, str) and bool(v))
+
+
+def _support_pattern(v: Any, m: PdlModel) -> bool:
+    return isinstance(v, str) and bool(v)
+
+
+def _fan_set(v: Any, m: PdlModel) -> bool:
+    c = m.process_defaults.cooling
+    return bool(c.fan_min_percent or c.fan_max_percent or c.fan_always_on)
+
+
+# Key tables shared by the Prusa-family generators (SuperSlicer, Bambu Studio).
+PRINTER_GCODE: KeyTable = (
+    Key('start_gcode', lambda m: _gcode_line(m.machine_control.start)),
+    Key('end_gcode', lambda m: _gcode_line(m.machine_control.end)),
+)
+
+PRINTER_KEYS: KeyTable = (
+    Key('bed_shape', lambda m: _bed_shape_str(*m.geometry.size((200, 200)))),
+    Key('nozzle_diameter', 'extruder0.nozzle_diameter', default=0.4, fmt='{:.2f}'),
+    Key('min_layer_height', 'process_defaults.min_layer_height_mm', default=0.07),
+    Key('max_layer_height', 'extruder0.nozzle_diameter', default=0.4, fmt='{:.2f}'),
+) + PRINTER_GCODE
+
+FILAMENT_KEYS: KeyTable = (
+    Key('filament_diameter', 'material0.filament_diameter', default=1.75, fmt='{:.2f}'),
+    Key('temperature', 'material0.nozzle_temperature', default=205.0, fmt='{:.0f}'),
+    Key('bed_temperature', 'material0.bed_temperature', default=60.0, fmt='{:.0f}'),
+    Key('extrusion_multiplier', 'process_defaults.extrusion_multiplier', fmt='{:.2f}', when=is_set),
+    Key('retract_length', 'process_defaults.retract_mm', fmt='{:.2f}', when=positive),
+    Key('retract_speed', 'process_defaults.retract_speed_mms', convert=int, when=positive),
+)
+
+PRINT_SPEEDS: KeyTable = (
+    Key('layer_height', 'process_defaults.layer_height_mm', default=0.2),
+    Key('first_layer_height', 'process_defaults.first_layer_mm', default=0.28),
+    Key('perimeter_speed', 'process_defaults.speeds.perimeter', default=40.0),
+    Key('infill_speed', 'process_defaults.speeds.infill', default=60.0),
+    Key('travel_speed', 'process_defaults.speeds.travel', default=150.0),
+    Key('external_perimeter_speed', 'process_defaults.speeds.external_perimeter', when=truthy),
+    Key('top_solid_infill_speed', 'process_defaults.speeds.top', when=truthy),
+    Key('bottom_solid_infill_speed', 'process_defaults.speeds.bottom', when=truthy),
+    Key('extrusion_width', 'process_defaults.line_width_mm', when=truthy),
+)
+
+PRINT_DENSITY_SUPPORT: KeyTable = (
+    Key('fill_density', lambda m: int(m.process_defaults.infill_percent or 0), when=truthy),
+    Key('support_material', 'process_defaults.support', convert=lambda v: 1 if v else 0, when=_support_flag),
+    Key('support_material_pattern', 'process_defaults.support', when=_support_pattern),
+)
+
+PRINT_ACCELERATIONS: KeyTable = (
+    Key('perimeter_acceleration', 'process_defaults.accelerations.perimeter', convert=int, when=truthy),
+    Key('infill_acceleration', 'process_defaults.accelerations.infill', convert=int, when=truthy),
+    Key('travel_acceleration', 'process_defaults.accelerations.travel', convert=int, when=truthy),
+    Key('max_print_acceleration', 'limits.acceleration_max', when=truthy),
+    Key('max_travel_acceleration', 'limits.acceleration_max', when=truthy),
+    Key('brim_width', const(5), when=lambda v, m: m.process_defaults.adhesion == 'brim'),
+    Key('skirts', const(1), when=lambda v, m: m.process_defaults.adhesion == 'skirt'),
+)
+
+PRINT_WALLS: KeyTable = (
+    Key('perimeters', 'process_defaults.walls', when=is_set),
+    Key('fill_pattern', 'process_defaults.infill_pattern', when=truthy),
+)
 
+PRINT_COOLING: KeyTable = (
+    Key('min_layer_time', 'process_defaults.cooling.min_layer_time_s', when=truthy),
+    Key('fan_always_on', 'process_defaults.cooling.fan_always_on', convert=lambda v: 1 if v else 0, when=_fan_set),
+    Key('min_fan_speed', 'process_defaults.cooling.fan_min_percent', when=truthy),
+    Key('max_fan_speed', 'process_defaults.cooling.fan_max_percent', when=truthy),
+)
 
-def generate_prusa(pdl: Dict[str, Any], out_dir: Path) -> Dict[str, Path]:
+PRINT_KEYS: KeyTable = PRINT_SPEEDS + PRINT_DENSITY_SUPPORT + PRINT_ACCELERATIONS + PRINT_WALLS + PRINT_COOLING
+
+KEYMAP = {'printer': PRINTER_KEYS, 'filament': FILAMENT_KEYS, 'print': PRINT_KEYS}
+
+_emit_printer = compile_lines(PRINTER_KEYS)
+_emit_filament = compile_lines(FILAMENT_KEYS)
+_emit_print = compile_lines(PRINT_KEYS)
+
+
+def prusa_ini_lines(m: PdlModel, name: str, emit_printer, emit_filament, emit_print) -> list:
+    """Assemble a Prusa-style INI from compiled section emitters."""
+    return [
+        f"[printer:{name}]",
+        *emit_printer(m),
+        "",
+        f"[filament:{m.material0.name or 'Generic PLA'}]",
+        *emit_filament(m),
+        "",
+        "[print:Standard]",
+        *emit_print(m),
+    ]
+
+
+def generate_prusa(pdl: Dict[str, Any] | PdlModel, out_dir: Path, sink: OutputSink | None = None) -> Dict[str, Path]:
     """Generate a minimal PrusaSlicer-style .ini file with printer/filament/print settings.
 
     This is a starter config; users can import into PrusaSlicer and refine.
     """
+    m = as_model(pdl)
     out: Dict[str, Path] = {}
-    name = str(pdl.get('name') or 'OPK_Prusa').replace(' ', '_')
-    geom = pdl.get('geometry') or {}
-    bed = geom.get('bed_shape') or [[0,0],[200,0],[200,200],[0,200]]
-    # Process defaults
-    proc = (pdl.get('process_defaults') or {})
-    lh = _num(proc.get('layer_height_mm') or 0.2)
-    flh = _num(proc.get('first_layer_mm') or 0.28)
-    spd = proc.get('speeds_mms') or {}
-    per_spd = _num(spd.get('perimeter') or 40)
-    inf_spd = _num(spd.get('infill') or 60)
-    trav_spd = _num(spd.get('travel') or 150)
-    ext_per_spd = _num(spd.get('external_perimeter') or 0)
-    top_spd = _num(spd.get('top') or spd.get('top_solid') or 0)
-    bot_spd = _num(spd.get('bottom') or spd.get('bottom_solid') or 0)
-    adhesion = (proc.get('adhesion') or '').lower()
-    ex0 = (pdl.get('extruders') or [{}])[0]
-    nozzle = _num(ex0.get('nozzle_diameter') or 0.4)
-    mat0 = (pdl.get('materials') or [{}])[0]
-    mat_dia = _num(mat0.get('filament_diameter') or 1.75)
-    noz_temp = _num(mat0.get('nozzle_temperature') or 205)
-    bed_temp = _num(mat0.get('bed_temperature') or 60)
-    # Extrusion multiplier (filament flow)
-    ext_mult = proc.get('extrusion_multiplier')
-    # Retraction (filament-level settings)
-    retr_len = _num(proc.get('retract_mm') or 0.0)
-    retr_spd = _num(proc.get('retract_speed_mms') or 0.0)
+    name = str(m.name or 'OPK_Prusa').replace(' ', '_')
     prusa_dir = out_dir / 'prusa'
-    _ensure_dir(prusa_dir)
     ini_path = prusa_dir / f'{name}.ini'
-    bed_str = _bed_shape_str(bed)
-    hooks = render_hooks_with_firmware(pdl or {})
-    start_g = '\n'.join(hooks.get('start') or [])
-    end_g = '\n'.join(hooks.get('end') or [])
-    sg = start_g.replace('\n','\\n')
-    eg = end_g.replace('\n','\\n')
-    # Optional per-section accelerations
-    acc = (proc.get('accelerations_mms2') or {})
-    per_acc = _num(acc.get('perimeter') or 0)
-    inf_acc = _num(acc.get('infill') or 0)
-    trav_acc = _num(acc.get('travel') or 0)
-
-    lines = [
-        f"[printer:{name}]",
-        f"bed_shape = {bed_str}",
-        f"nozzle_diameter = {nozzle:.2f}",
-        f"min_layer_height = {(_num(proc.get('min_layer_height_mm') or 0.07))}",
-        f"max_layer_height = {nozzle:.2f}",
-        f"start_gcode = {sg}",
-        f"end_gcode = {eg}",
-        "",
-        f"[filament:{mat0.get('name') or 'Generic PLA'}]",
-        f"filament_diameter = {mat_dia:.2f}",
-        f"temperature = {noz_temp:.0f}",
-        f"bed_temperature = {bed_temp:.0f}",
-        *( [f"extrusion_multiplier = {float(ext_mult):.2f}"] if isinstance(ext_mult, (int,float)) else [] ),
-        *( [f"retract_length = {retr_len:.2f}"] if retr_len > 0 else [] ),
-        *( [f"retract_speed = {int(retr_spd)}"] if retr_spd > 0 else [] ),
-        "",
-        f"[print:Standard]",
-        f"layer_height = {lh}",
-        f"first_layer_height = {flh}",
-        f"perimeter_speed = {per_spd}",
-        f"infill_speed = {inf_spd}",
-        f"travel_speed = {trav_spd}",
-    ]
-    if ext_per_spd:
-        lines.append(f'external_perimeter_speed = {ext_per_spd}')
-    if top_spd:
-        lines.append(f'top_solid_infill_speed = {top_spd}')
-    if bot_spd:
-        lines.append(f'bottom_solid_infill_speed = {bot_spd}')
-    # Infill density (percent)
-    try:
-        infill_pct = int(float((proc.get('infill_percent') if isinstance(proc, dict) else 0) or 0))
-        if infill_pct:
-            lines.append(f'fill_density = {infill_pct}')
-    except Exception:
-        pass
-    # Supports (best-effort)
-    support = (proc.get('support') if isinstance(proc, dict) else None)
-    if isinstance(support, bool):
-        lines.append(f'support_material = {1 if support else 0}')
-    elif isinstance(support, str) and support:
-        lines.append('support_material = 1')
-        lines.append(f'support_material_pattern = {support}')
-    if per_acc:
-        lines.append(f'perimeter_acceleration = {int(per_acc)}')
-    if inf_acc:
-        lines.append(f'infill_acceleration = {int(inf_acc)}')
-    if trav_acc:
-        lines.append(f'travel_acceleration = {int(trav_acc)}')
-    # Map acceleration limits to global print/travel acceleration
-    lim = (pdl.get('limits') or {})
-    try:
-        amax = int(float(lim.get('acceleration_max') or 0))
-    except Exception:
-        amax = 0
-    if amax:
-        lines.append(f'max_print_acceleration = {amax}')
-        lines.append(f'max_travel_acceleration = {amax}')
-    # Adhesion mapping: simple starter values
-    if adhesion == 'brim':
-        lines.append('brim_width = 5')
-    elif adhesion == 'skirt':
-        lines.append('skirts = 1')
-    # Walls and infill pattern (best-effort)
-    walls = proc.get('walls') if isinstance(proc, dict) else None
-    try:
-        if walls is not None:
-            lines.append(f'perimeters = {int(walls)}')
-    except Exception:
-        pass
-    inf_pat = (proc.get('infill_pattern') if isinstance(proc, dict) else None)
-    if isinstance(inf_pat, str) and inf_pat:
-        lines.append(f'fill_pattern = {inf_pat}')
-    # Cooling
-    cooling = proc.get('cooling') or {}
-    mlt = int(cooling.get('min_layer_time_s') or 0)
-    fmin = int(cooling.get('fan_min_percent') or 0)
-    fmax = int(cooling.get('fan_max_percent') or 0)
-    always = bool(cooling.get('fan_always_on') or False)
-    if mlt:
-        lines.append(f'min_layer_time = {mlt}')
-    if fmin or fmax or always:
-        lines.append(f'fan_always_on = {1 if always else 0}')
-    if fmin:
-        lines.append(f'min_fan_speed = {fmin}')
-    if fmax:
-        lines.append(f'max_fan_speed = {fmax}')
-    ini_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    lines = prusa_ini_lines(m, name, _emit_printer, _emit_filament, _emit_print)
+    (sink or DIR_SINK).write_text(ini_path, '\n'.join(lines) + '\n')
     out['profile'] = ini_path
     return out
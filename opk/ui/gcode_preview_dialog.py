@@ -5,7 +5,6 @@ from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton, QTextEdit, QFileDialog
 )
 from PySide6.QtCore import Qt, QSettings
-import yaml
 from ..core.gcode import list_hooks, render_sequence, find_placeholders
 
 
@@ -139,8 +138,8 @@ class GcodePreviewDialog(QDialog):
         self._load_pdl_from_path(p)
 
     def _load_pdl_from_path(self, p: Path):
-        text = p.read_text(encoding="utf-8")
-        data = json.loads(text) if p.suffix.lower() == ".json" else yaml.safe_load(text)
+        from ..pdl.loader import load_pdl
+        data = load_pdl(p)
         # inject policies from Settings if present
         try:
             from PySide6.QtCore import QSettings
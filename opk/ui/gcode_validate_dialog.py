@@ -5,7 +5,6 @@ from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFileDialog, QTableWidget, QTableWidgetItem, QHeaderView, QComboBox
 )
 from PySide6.QtCore import QSettings
-import yaml
 from ..core.gcode import list_hooks, render_sequence
 
 
@@ -108,8 +107,8 @@ class GcodeValidateDialog(QDialog):
         self._load_pdl_from_path(p)
 
     def _load_pdl_from_path(self, p: Path):
-        text = p.read_text(encoding="utf-8")
-        data = json.loads(text) if p.suffix.lower() == ".json" else yaml.safe_load(text)
+        from ..pdl.loader import load_pdl
+        data = load_pdl(p)
         self._gcode = (data or {}).get("gcode") or {}
         self._pdl_path = p
         self._pdl_label.setText(str(p))
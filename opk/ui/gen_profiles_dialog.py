@@ -1,10 +1,11 @@
 from __future__ import annotations
-import json
 from pathlib import Path
 from ._qt_compat import (
     QDialog, QFormLayout, QLineEdit, QPushButton, QHBoxLayout, QComboBox, QFileDialog, QMessageBox, QCheckBox, QTextEdit, QVBoxLayout, QLabel, QSettings
 )
-from ..core.project import find_project_file, load_project_config, merge_policies
+from ..core.project import apply_project_policies
+from ..pdl.loader import load_pdl
+from ..pdl.model import parse_pdl
 
 
 class GenerateProfilesDialog(QDialog):
@@ -263,24 +264,22 @@ class GenerateProfilesDialog(QDialog):
                 QMessageBox.warning(self, "Generate", "Please select a valid PDL file (YAML/JSON).")
                 return
             try:
-                text = pdl_path.read_text(encoding="utf-8")
-                data = json.loads(text) if pdl_path.suffix.lower()==".json" else __import__("yaml").safe_load(text)
+                data = load_pdl(pdl_path)
             except Exception as e:
                 QMessageBox.critical(self, "Generate", f"Failed to read PDL at {pdl_path.name}:\n{e}")
                 return
         try:
             src_dir = Path(".") if isinstance(self._pdl_data, dict) else pdl_path.parent
-            proj = find_project_file(src_dir)
-            if proj:
-                data = merge_policies(data or {}, load_project_config(proj))
+            data = apply_project_policies(data, src_dir)
         except Exception:
             pass
         slicer = self.cb_slicer.currentText()
         try:
+            model = parse_pdl(data or {})
             out_dir.mkdir(parents=True, exist_ok=True)
             if slicer == 'orca':
                 from ..plugins.slicers.orca import generate_orca
-                out = generate_orca(data or {}, out_dir)
+                out = generate_orca(model, out_dir)
                 if self.ck_bundle.isChecked():
                     from ..core.bundle import build_bundle
                     bundle_text = self._ensure_required_suffix(self.ed_bundle.text().strip())
@@ -294,7 +293,7 @@ class GenerateProfilesDialog(QDialog):
                     self._show_bundle_summary(bundle_path)
             elif slicer == 'cura':
                 from ..plugins.slicers.cura import generate_cura
-                out = generate_cura(data or {}, out_dir)
+                out = generate_cura(model, out_dir)
                 if self.ck_bundle.isChecked():
                     from ..core.bundle import build_profile_bundle
                     bundle_text = self._ensure_required_suffix(self.ed_bundle.text().strip())
@@ -308,7 +307,7 @@ class GenerateProfilesDialog(QDialog):
                     self._show_bundle_summary(bundle_path)
             elif slicer == 'prusa':
                 from ..plugins.slicers.prusa import generate_prusa
-                out = generate_prusa(data or {}, out_dir)
+                out = generate_prusa(model, out_dir)
                 if self.ck_bundle.isChecked():
                     from ..core.bundle import build_profile_bundle
                     bundle_text = self._ensure_required_suffix(self.ed_bundle.text().strip())
@@ -322,7 +321,7 @@ class GenerateProfilesDialog(QDialog):
                     self._show_bundle_summary(bundle_path)
             elif slicer == 'ideamaker':
                 from ..plugins.slicers.ideamaker import generate_ideamaker
-                out = generate_ideamaker(data or {}, out_dir)
+                out = generate_ideamaker(model, out_dir)
                 if self.ck_bundle.isChecked():
                     from ..core.bundle import build_profile_bundle
                     bundle_text = self._ensure_required_suffix(self.ed_bundle.text().strip())
@@ -336,7 +335,7 @@ class GenerateProfilesDialog(QDialog):
                     self._show_bundle_summary(bundle_path)
             elif slicer == 'bambu':
                 from ..plugins.slicers.bambu import generate_bambu
-                out = generate_bambu(data or {}, out_dir)
+                out = generate_bambu(model, out_dir)
             else:
                 out = {}
         except Exception as e:
@@ -401,37 +400,35 @@ class GenerateProfilesDialog(QDialog):
                 QMessageBox.warning(self, "Preview", "Please select a valid PDL file.")
                 return
             try:
-                text = pdl_path.read_text(encoding="utf-8")
-                data = json.loads(text) if pdl_path.suffix.lower()==".json" else __import__("yaml").safe_load(text)
+                data = load_pdl(pdl_path)
             except Exception as e:
                 QMessageBox.critical(self, "Preview", f"Failed to read PDL:\n{e}")
                 return
         try:
-            src_dir = Path(".")
-            proj = find_project_file(src_dir)
-            if proj:
-                data = merge_policies(data or {}, load_project_config(proj))
+            src_dir = Path(".") if isinstance(self._pdl_data, dict) else pdl_path.parent
+            data = apply_project_policies(data, src_dir)
         except Exception:
             pass
         slicer = self.cb_slicer.currentText()
         try:
+            model = parse_pdl(data or {})
             with tempfile.TemporaryDirectory() as td:
                 tdp = Path(td)
                 if slicer == 'orca':
                     from ..plugins.slicers.orca import generate_orca
-                    out = generate_orca(data or {}, tdp)
+                    out = generate_orca(model, tdp)
                 elif slicer == 'cura':
                     from ..plugins.slicers.cura import generate_cura
-                    out = generate_cura(data or {}, tdp)
+                    out = generate_cura(model, tdp)
                 elif slicer == 'prusa':
                     from ..plugins.slicers.prusa import generate_prusa
-                    out = generate_prusa(data or {}, tdp)
+                    out = generate_prusa(model, tdp)
                 elif slicer == 'ideamaker':
                     from ..plugins.slicers.ideamaker import generate_ideamaker
-                    out = generate_ideamaker(data or {}, tdp)
+                    out = generate_ideamaker(model, tdp)
                 elif slicer == 'bambu':
                     from ..plugins.slicers.bambu import generate_bambu
-                    out = generate_bambu(data or {}, tdp)
+                    out = generate_bambu(model, tdp)
                 else:
                     out = {}
                 items = [(k, Path(p)) for k, p in out.items() if Path(p).exists()]
@@ -1,5 +1,4 @@
 from __future__ import annotations
-import json
 from pathlib import Path
 from ._qt_compat import (
     QDialog, QFormLayout, QLineEdit, QPushButton, QHBoxLayout, QComboBox, QFileDialog, QMessageBox, QSettings
@@ -55,8 +54,8 @@ class GenerateSnippetsDialog(QDialog):
             QMessageBox.warning(self, "Generate", "Please select a valid PDL file (YAML/JSON).")
             return
         try:
-            text = pdl_path.read_text(encoding="utf-8")
-            data = json.loads(text) if pdl_path.suffix.lower()==".json" else __import__("yaml").safe_load(text)
+            from ..pdl.loader import load_pdl
+            data = load_pdl(pdl_path)
         except Exception as e:
             QMessageBox.critical(self, "Generate", f"Failed to read PDL at {pdl_path.name}:\n{e}")
             return
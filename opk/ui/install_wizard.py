@@ -1,4 +1,5 @@
 from __future__ import annotations
+import zipfile
 from pathlib import Path
 from PySide6.QtWidgets import (
     QDialog,
@@ -13,7 +14,7 @@ from PySide6.QtWidgets import (
     QHeaderView,
     QMessageBox,
 )
-from ..core.install import plan_install, perform_install
+from ..core.install import InstallInterrupted, plan_bundle_install, plan_install, perform_install
 
 
 class InstallWizard(QDialog):
@@ -28,9 +29,13 @@ class InstallWizard(QDialog):
         lay = QVBoxLayout(self)
         # Source and destination
         self._src = QLineEdit(); btn_src = QPushButton("…"); btn_src.clicked.connect(lambda: self._pick_dir(self._src, "install_src"))
+        btn_bundle = QPushButton("Bundle…"); btn_bundle.clicked.connect(self._pick_bundle)
         self._dst = QLineEdit(); btn_dst = QPushButton("…"); btn_dst.clicked.connect(lambda: self._pick_dir(self._dst, "install_dst"))
-        for label, edit, btn in (("Source (profiles)", self._src, btn_src), ("Destination (Orca presets)", self._dst, btn_dst)):
-            row = QHBoxLayout(); row.addWidget(QLabel(label)); row.addWidget(edit); row.addWidget(btn); lay.addLayout(row)
+        for label, edit, btns in (("Source (profiles or bundle)", self._src, (btn_src, btn_bundle)), ("Destination (Orca presets)", self._dst, (btn_dst,))):
+            row = QHBoxLayout(); row.addWidget(QLabel(label)); row.addWidget(edit)
+            for btn in btns:
+                row.addWidget(btn)
+            lay.addLayout(row)
 
         # Actions
         row2 = QHBoxLayout()
@@ -51,12 +56,24 @@ class InstallWizard(QDialog):
             self._last_dirs[key] = d
             edit.setText(d)
 
+    def _pick_bundle(self):
+        start = self._last_dirs.get("install_bundle", "")
+        f, _ = QFileDialog.getOpenFileName(self, "Select Bundle", start, "Orca bundle (*.orca_printer *.zip)")
+        if f:
+            self._last_dirs["install_bundle"] = str(Path(f).parent)
+            self._src.setText(f)
+
     def _dry_run(self):
         src = self._src.text().strip(); dst = self._dst.text().strip()
         if not src or not dst:
             QMessageBox.warning(self, "Install", "Please select both source and destination directories.")
             return
-        self._ops = plan_install(Path(src), Path(dst))
+        try:
+            # a bundle is planned from its manifest hashes, without extracting it
+            self._ops = plan_bundle_install(Path(src), Path(dst)) if Path(src).is_file() else plan_install(Path(src), Path(dst))
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            QMessageBox.warning(self, "Install", f"Cannot read {src}:\n{e}")
+            return
         self._populate(self._ops)
         if not self._ops:
             QMessageBox.information(self, "Install", "No files found to install.")
@@ -74,10 +91,11 @@ class InstallWizard(QDialog):
             return
         # Choose backup zip path
         backup, _ = QFileDialog.getSaveFileName(self, "Backup overwritten files as…", "backup_orca_presets.zip", "Zip (*.zip)")
-        if not backup:
+        try:
             # allow install without backup
-            res = perform_install(self._ops, backup_zip=None)
-        else:
-            res = perform_install(self._ops, backup_zip=Path(backup))
-        QMessageBox.information(self, "Install", f"Install complete. Written: {res['written']}, Skipped: {res['skipped']}")
+            res = perform_install(self._ops, backup_zip=Path(backup) if backup else None)
+        except (InstallInterrupted, OSError) as e:
+            QMessageBox.critical(self, "Install", f"Install failed; no files were changed.\n{e}")
+            return
+        QMessageBox.information(self, "Install", f"Install complete. Written: {res['written']}, Unchanged: {res['unchanged']}, Skipped: {res['skipped']}")
 
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Benchmark ``build_bundle`` on a synthetic workspace.
+
+Creates ``--profiles`` printer/filament/process JSON files (split evenly) in a
+temporary workspace, then times ``build_bundle`` in-process (``jobs=1``) and with
+the thread pool, and checks both archives contain the same members.
+
+    python scripts/bench_bundle.py --profiles 5000 --jobs 8
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def make_workspace(root: Path, n: int) -> None:
+    kinds = {
+        'printers': lambda i: {'type': 'printer', 'name': f'Printer {i}', 'nozzle_diameter': 0.4, 'filament_diameter': 1.75,
+                               'build_volume': [220 + i % 50, 220, 250], 'firmware': 'marlin', 'kinematics': 'cartesian',
+                               'comments': 'synthetic ' * 20},
+        'filaments': lambda i: {'type': 'filament', 'name': f'Filament {i}', 'filament_type': 'PLA',
+                                'nozzle_temperature': 200 + i % 30, 'bed_temperature': 60, 'fan_speed': 100},
+        'processes': lambda i: {'type': 'process', 'name': f'Process {i}', 'layer_height': 0.2,
+                                'first_layer_height': 0.28, 'print_speed': 60 + i % 100, 'comments': 'synthetic ' * 20},
+    }
+    per = max(1, n // len(kinds))
+    for rel, make in kinds.items():
+        d = root / rel
+        d.mkdir(parents=True, exist_ok=True)
+        for i in range(per):
+            (d / f'{rel}_{i:05d}.json').write_text(json.dumps(make(i), indent=2), encoding='utf-8')
+
+
+def _time(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--profiles', type=int, default=5000)
+    ap.add_argument('--jobs', type=int, default=None, help='Worker threads for the parallel run (default: build_bundle default)')
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    from opk.core.bundle import build_bundle
+
+    with tempfile.TemporaryDirectory() as td:
+        ws = Path(td) / 'ws'
+        make_workspace(ws, args.profiles)
+        seq, par = Path(td) / 'seq.orca_printer', Path(td) / 'par.orca_printer'
+        t_seq = _time(lambda: build_bundle(ws, seq, jobs=1), args.repeat)
+        t_par = _time(lambda: build_bundle(ws, par, jobs=args.jobs), args.repeat)
+        with zipfile.ZipFile(seq) as a, zipfile.ZipFile(par) as b:
+            same = [i.filename for i in a.infolist()] == [i.filename for i in b.infolist()] and \
+                all(a.read(n) == b.read(n) for n in a.namelist() if n != 'manifest.json')
+        print(f"profiles={args.profiles} sequential={t_seq:.3f}s parallel={t_par:.3f}s "
+              f"speedup={t_seq / t_par:.2f}x identical_members={same}")
+        return 0 if same else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
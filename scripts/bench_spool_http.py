@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Benchmark spool client reads: one urllib connection per request vs the keep-alive pool.
+
+Starts a local stand-in spool server (HTTP/1.1, keep-alive; ``--tls`` adds a
+self-signed certificate made with the ``openssl`` CLI), then times ``--requests``
+``SpoolmanClient.read`` calls with ``UrllibTransport`` and with ``PooledTransport``.
+
+    python scripts/bench_spool_http.py --requests 2000 --tls
+"""
+from __future__ import annotations
+import argparse
+import json
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    wbufsize = -1  # headers and body leave in one segment, like a real server
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = json.dumps({'id': self.path.rsplit('/', 1)[-1], 'filament': {'material': 'PLA'}, 'remaining_weight': 742.5}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _tls_contexts(td: Path):
+    cert, key = td / 'cert.pem', td / 'key.pem'
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=localhost',
+                    '-addext', 'subjectAltName=IP:127.0.0.1', '-keyout', str(key), '-out', str(cert)],
+                   check=True, capture_output=True)
+    server = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server.load_cert_chain(cert, key)
+    return server, ssl.create_default_context(cafile=str(cert))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--requests', type=int, default=1000)
+    ap.add_argument('--tls', action='store_true', help='Serve https with a throwaway self-signed certificate')
+    args = ap.parse_args()
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    from opk.integrations.http_transport import PooledTransport, UrllibTransport
+    from opk.integrations.response_cache import ResponseCache
+    from opk.integrations.spool_clients import SpoolmanClient
+
+    with tempfile.TemporaryDirectory() as td:
+        server_ctx, client_ctx = _tls_contexts(Path(td)) if args.tls else (None, None)
+        srv = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        srv.daemon_threads = True
+        if server_ctx is not None:
+            srv.socket = server_ctx.wrap_socket(srv.socket, server_side=True)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        base = f"{'https' if args.tls else 'http'}://127.0.0.1:{srv.server_address[1]}"
+        results = {}
+        try:
+            for label, transport in (('urllib', UrllibTransport(ssl_context=client_ctx)),
+                                     ('pooled', PooledTransport(ssl_context=client_ctx))):
+                srv.connections = 0
+                # no response cache: every read must go over the wire (and nothing lands in the user's cache dir)
+                cli = SpoolmanClient(base, transport=transport, retry_limit=0, response_cache=ResponseCache(max_entries=0))
+                t = time.perf_counter()
+                for i in range(args.requests):
+                    cli.read(str(i))
+                results[label] = (time.perf_counter() - t, srv.connections)
+                transport.close()
+        finally:
+            srv.shutdown()
+            srv.server_close()
+    (t_u, c_u), (t_p, c_p) = results['urllib'], results['pooled']
+    print(f"requests={args.requests} tls={args.tls} urllib={t_u:.3f}s ({c_u} connections) "
+          f"pooled={t_p:.3f}s ({c_p} connections) speedup={t_u / t_p:.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
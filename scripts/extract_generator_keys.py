@@ -1,66 +1,63 @@
 #!/usr/bin/env python3
+"""List the exact keys each slicer generator can emit.
+
+Keys come from the declarative ``KEYMAP`` tables in ``opk/plugins/slicers/*.py``
+(see ``opk/plugins/slicers/keymap.py``), so the list is exact rather than parsed.
+Writes ``docs/exact-generator-keys.md``; ``--json`` prints the same data as JSON.
+"""
 from __future__ import annotations
-import ast
-import re
+import argparse
+import importlib
+import json
+import sys
 from pathlib import Path
-from typing import Dict, Set
+from typing import Dict, List
 
 ROOT = Path(__file__).resolve().parents[1]
 PLUGINS_DIR = ROOT / 'opk' / 'plugins' / 'slicers'
 DOC = ROOT / 'docs' / 'exact-generator-keys.md'
 
 
-def extract_string_keys_from_source(text: str) -> Set[str]:
-    keys: Set[str] = set()
-    # Find "key =" patterns inside string/f-string literals in a broad way
-    # This is heuristic but works for our generator style (e.g., 'key = {value}')
-    for m in re.finditer(r"['\"]([A-Za-z0-9_]+)\s*=\s", text):
-        keys.add(m.group(1))
-    return keys
-
-
-def extract_dict_keys_from_ast(text: str) -> Set[str]:
-    keys: Set[str] = set()
-    try:
-        tree = ast.parse(text)
-    except Exception:
-        return keys
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Dict):
-            for k in node.keys or []:
-                if isinstance(k, ast.Constant) and isinstance(k.value, str):
-                    keys.add(k.value)
-    return keys
-
-
-def collect_keys_for_file(path: Path) -> Set[str]:
-    text = path.read_text(encoding='utf-8')
-    keys = set()
-    keys.update(extract_string_keys_from_source(text))
-    keys.update(extract_dict_keys_from_ast(text))
-    return keys
-
-
-def main() -> int:
-    modules: Dict[str, Set[str]] = {}
+def collect_keymaps() -> Dict[str, Dict[str, List[str]]]:
+    """Return {module: {section: [keys in emission order]}} for every generator module."""
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    from opk.plugins.slicers.keymap import table_keys
+    modules: Dict[str, Dict[str, List[str]]] = {}
     for p in sorted(PLUGINS_DIR.glob('*.py')):
-        if p.name == '__init__.py':
+        if p.name in ('__init__.py', 'keymap.py'):
             continue
-        mod = p.stem  # e.g., 'orca', 'prusa'
-        modules[mod] = collect_keys_for_file(p)
-    # Write doc
-    lines = ["# Exact Generator Keys (Parsed from string literals and dict keys)", ""]
+        mod = importlib.import_module(f'opk.plugins.slicers.{p.stem}')
+        keymap = getattr(mod, 'KEYMAP', None)
+        if keymap:
+            modules[p.stem] = {section: table_keys(table) for section, table in keymap.items()}
+    return modules
+
+
+def render_markdown(modules: Dict[str, Dict[str, List[str]]]) -> str:
+    lines = ["# Exact Generator Keys (from generator key-mapping tables)", ""]
     for mod in sorted(modules.keys()):
-        keys = sorted(k for k in modules[mod] if k and not k.startswith('#'))
         lines.append(f"## {mod}.py")
-        for k in keys:
-            lines.append(f"- {k}")
-        lines.append("")
-    DOC.write_text("\n".join(lines).rstrip() + "\n", encoding='utf-8')
+        for section, keys in modules[mod].items():
+            lines.append(f"### {section}")
+            for k in keys:
+                lines.append(f"- {k}")
+            lines.append("")
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--json', action='store_true', help='Print keys as JSON instead of writing the doc')
+    args = ap.parse_args(argv)
+    modules = collect_keymaps()
+    if args.json:
+        print(json.dumps(modules, indent=2))
+        return 0
+    DOC.write_text(render_markdown(modules), encoding='utf-8')
     print(f"[WROTE] {DOC}")
     return 0
 
 
 if __name__ == '__main__':
     raise SystemExit(main())
-
@@ -0,0 +1,38 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache_dir(tmp_path_factory, monkeypatch):
+    """Keep persistent caches (install hashes, endpoint discovery) out of the user's home."""
+    monkeypatch.setenv("OPK_CACHE_DIR", str(tmp_path_factory.mktemp("opk-cache")))
+
+
+@pytest.fixture
+def spool_server():
+    """Factory for local HTTP servers: ``spool_server(handler, tls_ctx=None, **attrs)``.
+
+    Each server listens on a free 127.0.0.1 port in a background thread, gets a
+    ``lock`` plus the given attributes (shared state for the handler) and is
+    shut down when the test ends.
+    """
+    servers = []
+
+    def start(handler, tls_ctx=None, **attrs):
+        srv = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        srv.daemon_threads = True
+        srv.lock = threading.Lock()
+        for name, value in attrs.items():
+            setattr(srv, name, value)
+        if tls_ctx is not None:
+            srv.socket = tls_ctx.wrap_socket(srv.socket, server_side=True)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        servers.append(srv)
+        return srv
+
+    yield start
+    for srv in servers:
+        srv.shutdown()
+        srv.server_close()
@@ -0,0 +1,114 @@
+from pathlib import Path
+import json
+import shutil
+import sys
+import zipfile
+
+import pytest
+
+from opk.cli.__main__ import main as cli_main
+from opk.core.bundle import build_bundle, update_bundle, verify_bundle
+from opk.core.delta import DeltaError, apply_delta, diff_bundles
+
+EXAMPLES = Path(__file__).resolve().parents[1] / "examples"
+
+
+def _ws(tmp_path: Path) -> Path:
+    ws = tmp_path / "ws"
+    for d in ("printers", "filaments", "processes"):
+        shutil.copytree(EXAMPLES / d, ws / d)
+    return ws
+
+
+def _edit(p: Path, **changes) -> None:
+    data = json.loads(p.read_text(encoding="utf-8"))
+    data.update(changes)
+    p.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_diff_and_apply_roundtrip(tmp_path: Path):
+    ws = _ws(tmp_path)
+    old = build_bundle(ws, tmp_path / "old.orca_printer", reproducible=True)
+    _edit(sorted((ws / "filaments").glob("*.json"))[0], bed_temperature=70)
+    removed = sorted((ws / "printers").glob("*.json"))[-1]
+    removed.unlink()
+    shutil.copy(ws / "printers" / sorted(p.name for p in (ws / "printers").iterdir())[0], ws / "printers" / "zz_new.json")
+    new = build_bundle(ws, tmp_path / "new.orca_printer", reproducible=True)
+
+    res = diff_bundles(old, new, tmp_path / "delta.zip")
+    # filament + manifest changed, one printer removed, one printer added
+    assert (res["added"], res["changed"], res["removed"]) == (1, 2, 1)
+    assert res["bytes"] < new.stat().st_size
+
+    fleet = tmp_path / "fleet.orca_printer"
+    shutil.copy(old, fleet)
+    apply_delta(fleet, tmp_path / "delta.zip")
+    assert fleet.read_bytes() == new.read_bytes()
+    assert verify_bundle(fleet) == []
+    assert not (tmp_path / "fleet.orca_printer.part").exists()
+
+
+def test_non_reproducible_builds_ship_only_changed_members(tmp_path: Path, monkeypatch):
+    import time
+    from opk.core import zipwriter
+    ws = _ws(tmp_path)
+    old = build_bundle(ws, tmp_path / "old.orca_printer")
+    _edit(sorted((ws / "filaments").glob("*.json"))[0], bed_temperature=70)
+    later = time.time() + 3600
+    monkeypatch.setattr(zipwriter.time, "time", lambda: later)
+    new = build_bundle(ws, tmp_path / "new.orca_printer")
+
+    res = diff_bundles(old, new, tmp_path / "delta.zip")
+    # every member has a new build time, but only the filament and the manifest changed
+    assert (res["added"], res["changed"], res["removed"]) == (0, 2, 0)
+    assert res["restamped"] == res["unchanged"] > 0
+    with zipfile.ZipFile(tmp_path / "delta.zip") as zf:
+        assert len(zf.namelist()) == 3  # delta.json + the two changed members
+
+    fleet = tmp_path / "fleet.orca_printer"
+    shutil.copy(old, fleet)
+    apply_delta(fleet, tmp_path / "delta.zip")
+    assert fleet.read_bytes() == new.read_bytes()
+
+
+def test_apply_refuses_wrong_base(tmp_path: Path):
+    ws = _ws(tmp_path)
+    old = build_bundle(ws, tmp_path / "old.orca_printer", reproducible=True)
+    _edit(sorted((ws / "printers").glob("*.json"))[0], nozzle_diameter=0.6)
+    new = update_bundle(ws, tmp_path / "new.orca_printer", reproducible=True)["path"]
+    diff_bundles(old, new, tmp_path / "d.zip")
+    before = new.read_bytes()
+    with pytest.raises(DeltaError, match="base hash"):
+        apply_delta(new, tmp_path / "d.zip")
+    assert new.read_bytes() == before
+
+
+def test_diff_refuses_archives_it_cannot_rebuild(tmp_path: Path):
+    ws = _ws(tmp_path)
+    old = build_bundle(ws, tmp_path / "old.orca_printer")
+    other = tmp_path / "other.orca_printer"
+    with zipfile.ZipFile(old) as src, zipfile.ZipFile(other, "w", zipfile.ZIP_DEFLATED) as dst:
+        for n in src.namelist():
+            dst.writestr(n, src.read(n))
+    with pytest.raises(DeltaError, match="full bundle"):
+        diff_bundles(old, other, tmp_path / "d.zip")
+
+
+def test_cli_bundle_diff_apply(tmp_path: Path, capsys):
+    ws = _ws(tmp_path)
+    old = build_bundle(ws, tmp_path / "old.orca_printer", reproducible=True)
+    _edit(sorted((ws / "processes").glob("*.json"))[0], print_speed=80)
+    new = build_bundle(ws, tmp_path / "new.orca_printer", reproducible=True)
+    out = tmp_path / "applied.orca_printer"
+    for argv in (["opk", "bundle-diff", str(old), str(new), "--out", str(tmp_path / "d.zip")],
+                 ["opk", "bundle-apply", str(old), str(tmp_path / "d.zip"), "--out", str(out)]):
+        saved = sys.argv[:]
+        sys.argv = argv
+        try:
+            with pytest.raises(SystemExit) as e:
+                cli_main()
+        finally:
+            sys.argv = saved
+        assert e.value.code == 0
+    assert "changed=2" in capsys.readouterr().out
+    assert out.read_bytes() == new.read_bytes()
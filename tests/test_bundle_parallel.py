@@ -0,0 +1,44 @@
+from pathlib import Path
+import json
+import zipfile
+
+import pytest
+from jsonschema import ValidationError
+
+import opk.core.bundle as B
+
+
+def _workspace(root: Path, n: int) -> None:
+    for rel, obj in (
+        ("printers", {"type": "printer", "nozzle_diameter": 0.4, "filament_diameter": 1.75, "build_volume": [200, 200, 200]}),
+        ("filaments", {"type": "filament", "filament_type": "PLA", "nozzle_temperature": 210, "bed_temperature": 60}),
+        ("processes", {"type": "process", "layer_height": 0.2, "print_speed": 60}),
+    ):
+        (root / rel).mkdir(parents=True)
+        for i in range(n):
+            (root / rel / f"{rel}_{i:03d}.json").write_text(json.dumps(dict(obj, name=f"{rel} {i}")), encoding="utf-8")
+
+
+def test_parallel_bundle_matches_sequential(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(B, "MIN_PARALLEL_PROFILES", 1)
+    _workspace(tmp_path / "ws", 40)
+    seq = B.build_bundle(tmp_path / "ws", tmp_path / "seq.orca_printer", jobs=1)
+    par = B.build_bundle(tmp_path / "ws", tmp_path / "par.orca_printer", jobs=4)
+    with zipfile.ZipFile(seq) as a, zipfile.ZipFile(par) as b:
+        assert a.testzip() is None and b.testzip() is None
+        names = a.namelist()
+        assert names == b.namelist()
+        assert names[0] == "printers/printers_000.json" and names[-1] == "manifest.json"
+        assert all(a.read(n) == b.read(n) for n in names if n != "manifest.json")
+        assert json.loads(b.read("manifest.json"))["process_count"] == 40
+    assert not (tmp_path / "par.orca_printer.part").exists()
+
+
+def test_invalid_profile_aborts_without_output(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(B, "MIN_PARALLEL_PROFILES", 1)
+    _workspace(tmp_path / "ws", 10)
+    (tmp_path / "ws/filaments/filaments_005.json").write_text(json.dumps({"type": "filament", "name": "bad"}), encoding="utf-8")
+    out = tmp_path / "x.orca_printer"
+    with pytest.raises(ValidationError):
+        B.build_bundle(tmp_path / "ws", out, jobs=4)
+    assert not out.exists() and not (tmp_path / "x.orca_printer.part").exists()
@@ -0,0 +1,86 @@
+from pathlib import Path
+import json
+import os
+import shutil
+import sys
+import zipfile
+
+import pytest
+
+from opk.cli.__main__ import main as cli_main
+from opk.core.bundle import build_bundle, update_bundle, verify_bundle
+
+EXAMPLES = Path(__file__).resolve().parents[1] / "examples"
+
+
+def _ws(tmp_path: Path) -> Path:
+    ws = tmp_path / "ws"
+    for d in ("printers", "filaments", "processes"):
+        shutil.copytree(EXAMPLES / d, ws / d)
+    return ws
+
+
+def test_reproducible_bundles_are_byte_identical(tmp_path: Path, monkeypatch):
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+    ws = _ws(tmp_path)
+    a = build_bundle(ws, tmp_path / "a.orca_printer", reproducible=True)
+    b = build_bundle(ws, tmp_path / "b.orca_printer", reproducible=True, jobs=1)
+    assert a.read_bytes() == b.read_bytes()
+    with zipfile.ZipFile(a) as zf:
+        manifest = json.loads(zf.read("manifest.json"))
+        assert manifest["created_utc"] == "1980-01-01T00:00:00Z"
+        assert set(manifest["files"]) == set(zf.namelist()) - {"manifest.json"}
+        assert zf.getinfo("manifest.json").date_time == (1980, 1, 1, 0, 0, 0)
+    assert verify_bundle(a) == []
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    c = build_bundle(ws, tmp_path / "c.orca_printer", reproducible=True)
+    with zipfile.ZipFile(c) as zf:
+        assert json.loads(zf.read("manifest.json"))["created_utc"] == "2023-11-14T22:13:20Z"
+
+
+def test_update_rewrites_only_changed_members(tmp_path: Path):
+    ws = _ws(tmp_path)
+    out = tmp_path / "x.orca_printer"
+    first = update_bundle(ws, out, reproducible=True)
+    assert first["written"] and first["reused"] == 0 and first["deflated"] == first["members"]
+    os.utime(out, (1, 1))
+    again = update_bundle(ws, out, reproducible=True)
+    assert again["written"] is False and again["reused"] == again["members"]
+    assert out.stat().st_mtime == 1  # untouched
+
+    p = sorted((ws / "filaments").glob("*.json"))[0]
+    data = json.loads(p.read_text(encoding="utf-8"))
+    data["bed_temperature"] = 65
+    p.write_text(json.dumps(data), encoding="utf-8")
+    res = update_bundle(ws, out, reproducible=True)
+    assert res["written"] and res["deflated"] == 1 and res["reused"] == res["members"] - 1
+    assert verify_bundle(out) == []
+    # same bytes as a clean reproducible build
+    assert out.read_bytes() == build_bundle(ws, tmp_path / "clean.orca_printer", reproducible=True).read_bytes()
+
+
+def test_verify_detects_tampering(tmp_path: Path):
+    out = build_bundle(_ws(tmp_path), tmp_path / "x.orca_printer")
+    with zipfile.ZipFile(out) as zf:
+        members = {n: zf.read(n) for n in zf.namelist()}
+    name = next(n for n in members if n.startswith("printers/"))
+    members[name] = members[name].replace(b"printer", b"PRINTER", 1)
+    with zipfile.ZipFile(out, "w") as zf:
+        for n, data in members.items():
+            zf.writestr(n, data)
+    assert verify_bundle(out) == [f"{name}: hash mismatch"]
+
+
+def test_cli_bundle_update(tmp_path: Path, capsys):
+    ws = _ws(tmp_path)
+    out = tmp_path / "x.orca_printer"
+    for expected in ("[WROTE]", "[UNCHANGED]"):
+        old = sys.argv[:]
+        sys.argv = ["opk", "bundle", "--in", str(ws), "--out", str(out), "--update", "--reproducible"]
+        try:
+            with pytest.raises(SystemExit) as e:
+                cli_main()
+        finally:
+            sys.argv = old
+        assert e.value.code == 0
+        assert expected in capsys.readouterr().out
@@ -32,6 +32,10 @@ class _FakeClient:
         self.calls.append(("search_normalized", query, page, page_size))
         return {"source": "spoolman", "query": query, "page": page, "page_size": page_size, "items": [{"id": 1}], "count": 1, "total": 1}
 
+    def iter_search(self, query, page_size=50):
+        self.calls.append(("iter_search", query, page_size))
+        yield from ({"id": i} for i in range(1, 4))
+
     # normalized wrappers
     def create_normalized(self, payload):
         return {"source": "spoolman", "action": "create", "item": self.create(payload)}
@@ -80,3 +84,9 @@ def test_cli_spool_search_items(monkeypatch, capsys):
     out = capsys.readouterr().out
     data = json.loads(out)
     assert isinstance(data, list) and data and data[0]["id"] == 1
+
+
+def test_cli_spool_search_all_ndjson(monkeypatch, capsys):
+    _run(["spool", "--source", "spoolman", "--base-url", "http://x", "--action", "search", "--query", "PLA", "--all"], monkeypatch)
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [1, 2, 3]
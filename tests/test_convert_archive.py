@@ -0,0 +1,80 @@
+from pathlib import Path
+import io
+import json
+import zipfile
+
+import pytest
+
+from opk.core import schema as S
+from opk.core.bundle import build_bundle
+from opk.plugins.converters.archive import convert_archive_input, iter_archive_profiles
+from opk.plugins.slicers.orca import generate_orca
+
+
+def _zip(path: Path | None, members: dict) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data if isinstance(data, str) else json.dumps(data))
+    if path is not None:
+        path.write_bytes(buf.getvalue())
+    return buf.getvalue()
+
+
+def test_import_orca_printer_bundle(tmp_path: Path):
+    src = tmp_path / "ws"
+    generate_orca({"name": "Box", "geometry": {"bed_shape": [[0, 0], [220, 0], [220, 220], [0, 220]], "z_height": 250}}, src)
+    bundle = build_bundle(src, tmp_path / "box.orca_printer")
+    written = convert_archive_input(bundle, tmp_path / "out")
+    assert sorted(w.parent.name for w in written) == ["filaments", "printers", "processes"]
+    prn = json.loads((tmp_path / "out/printers/Box_Printer.json").read_text(encoding="utf-8"))
+    assert prn["build_volume"] == [220.0, 220.0, 250.0]
+
+
+def test_import_prusa_3mf_from_bytes():
+    cfg = "; generated by PrusaSlicer\n; bed_shape = 0x0,250x0,250x210,0x210\n; max_print_height = 210\n" \
+          "; nozzle_diameter = 0.4\n; temperature = 215\n; bed_temperature = 60\n; filament_type = PETG\n" \
+          "; layer_height = 0.15\n; first_layer_height = 0.2\n; fill_density = 20%\n" \
+          '; printer_settings_id = Original Prusa MK4\n; filament_settings_id = "Prusament PETG"\n; print_settings_id = 0.15mm SPEED\n'
+    data = _zip(None, {"3D/3dmodel.model": "<model/>", "Metadata/Slic3r_PE.config": cfg})
+    profiles = {kind: (stem, obj) for kind, stem, obj in iter_archive_profiles(data)}
+    assert profiles["printer"][1]["build_volume"] == [250.0, 210.0, 210.0]
+    assert profiles["filament"][0] == "Prusament_PETG" and profiles["filament"][1]["filament_type"] == "PETG"
+    assert profiles["process"][1]["layer_height"] == 0.15
+    for kind, (_stem, obj) in profiles.items():
+        S.validate(kind, obj)
+
+
+def test_import_orca_3mf_and_bambu_bundle_from_file_object(tmp_path: Path):
+    settings = {
+        "printer_settings_id": "Bambu Lab X1C 0.4 nozzle", "printable_area": ["0x0", "256x0", "256x256", "0x256"],
+        "printable_height": "250", "nozzle_diameter": ["0.4"], "printer_structure": "corexy",
+        "filament_settings_id": ["Bambu PLA Basic"], "filament_type": ["PLA"], "nozzle_temperature": ["220"],
+        "hot_plate_temp": ["55"], "print_settings_id": "0.20mm Standard", "layer_height": "0.2",
+        "sparse_infill_density": "15%", "wall_loops": "2", "brim_type": "no_brim", "skirt_loops": "0",
+    }
+    with open(tmp_path / "p.3mf", "wb") as f:
+        f.write(_zip(None, {"Metadata/project_settings.config": settings}))
+    with open(tmp_path / "p.3mf", "rb") as f:
+        profiles = {kind: obj for kind, _stem, obj in iter_archive_profiles(f)}
+    assert profiles["printer"]["kinematics"] == "corexy" and profiles["printer"]["build_volume"] == [256.0, 256.0, 250.0]
+    assert profiles["filament"]["bed_temperature"] == 55.0
+    assert profiles["process"]["infill_density"] == 15.0 and profiles["process"]["adhesion_type"] == "none"
+
+    _zip(tmp_path / "presets.bbscfg", {
+        "bundle_structure.json": {"printer_config": ["printer/M.json"]},
+        "printer/M.json": {"type": "machine", "name": "My X1C", "nozzle_diameter": ["0.6"]},
+        "filament/F.json": {"type": "filament", "name": "My PLA", "nozzle_temperature": ["210"]},
+    })
+    out = convert_archive_input(tmp_path, tmp_path / "out")  # directory: both archives
+    names = sorted(w.relative_to(tmp_path / "out").as_posix() for w in out)
+    assert "printers/My_X1C.json" in names and "filaments/My_PLA.json" in names
+    assert len(names) == 5
+
+
+def test_unrecognized_archive(tmp_path: Path):
+    bad = tmp_path / "x.zip"
+    _zip(bad, {"readme.txt": "hi"})
+    with pytest.raises(ValueError, match="unrecognized"):
+        convert_archive_input(bad, tmp_path / "out")
+    assert convert_archive_input(tmp_path, tmp_path / "out") == []
@@ -0,0 +1,79 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from opk.plugins.converters.batch import convert_tree, sniff_format
+
+PRUSA = "[printer:P{i}]\nbed_shape = 0x0,220x0,220x220,0x220\nnozzle_diameter = 0.4\n"
+KISS = "machine_width = 250\nmachine_depth = 210\nnozzle_diameter = 0.6\n"
+IDEA = "machineWidth = 300\nmachineDepth = 300\nnozzleDiameter = 0.4\n"
+CURA = {"name": "C{i}", "inherits": "fdmprinter", "overrides": {"machine_width": {"default_value": 235}}}
+
+
+def _tree(root: Path, n: int = 10) -> None:
+    for i in range(n):
+        (root / "prusa" / f"v{i % 3}").mkdir(parents=True, exist_ok=True)
+        (root / "prusa" / f"v{i % 3}" / f"p{i}.ini").write_text(PRUSA.format(i=i), encoding="utf-8")
+        (root / "cura").mkdir(exist_ok=True)
+        (root / "cura" / f"c{i}.def.json").write_text(json.dumps(CURA).replace("{i}", str(i)), encoding="utf-8")
+    (root / "kiss.ini").write_text(KISS, encoding="utf-8")
+    (root / "idea.cfg").write_text(IDEA, encoding="utf-8")
+    (root / "notes.json").write_text('{"hello": 1}', encoding="utf-8")
+
+
+def test_sniff_format(tmp_path: Path):
+    _tree(tmp_path, 1)
+    assert sniff_format(tmp_path / "prusa" / "v0" / "p0.ini") == "prusa"
+    assert sniff_format(tmp_path / "cura" / "c0.def.json") == "cura"
+    assert sniff_format(tmp_path / "kiss.ini") == "kisslicer"
+    assert sniff_format(tmp_path / "idea.cfg") == "ideamaker"
+    assert sniff_format(tmp_path / "notes.json") is None
+    # a flat ini without KISSlicer's machine keys (e.g. an exported Prusa filament) is not KISSlicer
+    (tmp_path / "stray.ini").write_text("filament_type = PLA\ntemperature = 210\n", encoding="utf-8")
+    assert sniff_format(tmp_path / "stray.ini") is None
+
+
+def test_convert_tree_collisions_and_nested_out_dir(tmp_path: Path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.ini").write_text("[printer:Same]\nbed_shape = 0x0,200x0,200x200,0x200\n", encoding="utf-8")
+    (src / "b.ini").write_text("[printer:Same]\nbed_shape = 0x0,300x0,300x300,0x300\n", encoding="utf-8")
+    out = src / "converted"
+    rep = convert_tree(src, out, jobs=1)
+    assert [p.name for p in rep.outputs] == ["Same.json"]
+    assert [(p.name, "already written from a.ini" in e) for p, e in rep.failed] == [("b.ini", True)]
+
+    # a second run does not pick up its own outputs under src/converted
+    again = convert_tree(src, out, jobs=1)
+    assert [p.name for p in again.outputs] == ["Same.json"] and not again.skipped
+
+
+def test_convert_tree_parallel_matches_serial(tmp_path: Path):
+    src = tmp_path / "src"; _tree(src, 20)
+    par = convert_tree(src, tmp_path / "a", recursive=True, jobs=2)
+    ser = convert_tree(src, tmp_path / "b", recursive=True, jobs=1)
+    assert par.by_format == ser.by_format == {"cura": 20, "prusa": 20, "kisslicer": 1, "ideamaker": 1}
+    assert [p.relative_to(tmp_path / "a") for p in par.outputs] == [p.relative_to(tmp_path / "b") for p in ser.outputs]
+    assert (tmp_path / "a" / "prusa" / "v1" / "P1.json").exists()
+    assert [p.name for p in par.skipped] == ["notes.json"]
+    assert not par.failed
+
+
+def test_cli_convert_auto_recursive_report(tmp_path: Path, capsys):
+    from opk.cli.__main__ import main
+    src = tmp_path / "src"; _tree(src, 2)
+    report = tmp_path / "report.json"
+    old = sys.argv[:]
+    try:
+        sys.argv = ["opk", "convert", "--in", str(src), "--out", str(tmp_path / "out"), "-r", "--report", str(report)]
+        with pytest.raises(SystemExit) as e:
+            main()
+    finally:
+        sys.argv = old
+    assert e.value.code == 0
+    out = capsys.readouterr().out
+    assert "[SUMMARY] wrote=6 changed=6 unchanged=0 skipped=1 failed=0" in out
+    data = json.loads(report.read_text(encoding="utf-8"))
+    assert data["by_format"] == {"cura": 2, "ideamaker": 1, "kisslicer": 1, "prusa": 2}
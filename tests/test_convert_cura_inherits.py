@@ -0,0 +1,134 @@
+from pathlib import Path
+import json
+
+import pytest
+
+from opk.plugins.converters.cura import convert_cura_definition, convert_cura_input
+from opk.plugins.converters.cura_defs import CuraDefinitionError, CuraDefinitionResolver
+
+
+def _write(d: Path, def_id: str, obj) -> Path:
+    p = d / f"{def_id}.def.json"
+    p.write_text(json.dumps(obj), encoding="utf-8")
+    return p
+
+
+def _tree(d: Path, machines: int = 20):
+    _write(d, "fdmprinter", {
+        "name": "FFF Printer",
+        "metadata": {"firmware_name": "Marlin"},
+        "settings": {
+            "machine_settings": {"type": "category", "children": {
+                "machine_width": {"default_value": 100},
+                "machine_depth": {"default_value": 100},
+                "machine_height": {"default_value": 100},
+                "machine_nozzle_size": {"default_value": 0.4},
+                "machine_heated_bed": {"default_value": False},
+            }},
+            "resolution": {"type": "category", "children": {
+                "line_width": {"default_value": 0.4, "value": "machine_nozzle_size * 1.1"},
+            }},
+            "material": {"type": "category", "children": {
+                "material_diameter": {"default_value": 2.85},
+            }},
+        },
+    })
+    _write(d, "vendor_base", {
+        "name": "Vendor Base", "inherits": "fdmprinter",
+        "metadata": {"firmware_name": "Klipper"},
+        "overrides": {"machine_heated_bed": {"default_value": True}, "material_diameter": {"default_value": 1.75}},
+    })
+    for i in range(machines):
+        _write(d, f"m{i}", {
+            "name": f"Machine {i}", "inherits": "vendor_base",
+            "overrides": {"machine_width": {"default_value": 200 + i}, "machine_nozzle_size": {"default_value": 0.6}},
+        })
+
+
+def test_inherited_settings_and_value_expressions(tmp_path: Path):
+    _tree(tmp_path, machines=1)
+    r = CuraDefinitionResolver()
+    d = r.resolve_path(tmp_path / "m0.def.json")
+    assert d.chain == ("m0", "vendor_base", "fdmprinter")
+    assert d.get("line_width") == pytest.approx(0.66)  # evaluated against the child's nozzle
+    pr = convert_cura_definition(tmp_path / "m0.def.json", r)
+    assert pr["build_volume"] == [200.0, 100.0, 100.0]
+    assert pr["heated_bed"] is True
+    assert pr["filament_diameter"] == 1.75
+    assert pr["firmware"] == "Klipper"
+
+
+def test_each_parent_parsed_once(tmp_path: Path):
+    _tree(tmp_path, machines=30)
+    r = CuraDefinitionResolver()
+    for i in range(30):
+        convert_cura_definition(tmp_path / f"m{i}.def.json", r)
+    assert r.parses == 32  # 30 machines + vendor_base + fdmprinter
+
+
+def test_parent_change_is_picked_up(tmp_path: Path):
+    _tree(tmp_path, machines=1)
+    r = CuraDefinitionResolver()
+    assert convert_cura_definition(tmp_path / "m0.def.json", r)["filament_diameter"] == 1.75
+    _write(tmp_path, "vendor_base", {"inherits": "fdmprinter", "overrides": {"material_diameter": {"default_value": 2.85}}})
+    assert convert_cura_definition(tmp_path / "m0.def.json", r)["filament_diameter"] == 2.85
+
+
+def test_cycle_and_missing_parent(tmp_path: Path):
+    _write(tmp_path, "a", {"inherits": "b"})
+    _write(tmp_path, "b", {"inherits": "a"})
+    _write(tmp_path, "c", {"inherits": "nope"})
+    r = CuraDefinitionResolver()
+    with pytest.raises(CuraDefinitionError, match="cycle"):
+        r.resolve_path(tmp_path / "a.def.json")
+    # a lone exported definition still resolves from its own settings ...
+    assert r.resolve_path(tmp_path / "c.def.json").chain == ("c",)
+    # ... unless strict
+    with pytest.raises(CuraDefinitionError, match="not found"):
+        CuraDefinitionResolver(strict=True).resolve_path(tmp_path / "c.def.json")
+
+
+def test_convert_directory_uses_inheritance(tmp_path: Path):
+    src = tmp_path / "definitions"; src.mkdir()
+    _tree(src, machines=3)
+    out = convert_cura_input(src, tmp_path / "out")
+    data = json.loads((tmp_path / "out" / "Machine_2.json").read_text(encoding="utf-8"))
+    assert data["build_volume"] == [202.0, 100.0, 100.0]
+    assert data["nozzle_diameter"] == 0.6
+    assert len(out) == 5
+
+
+def test_value_expressions_reject_private_attributes(tmp_path: Path):
+    _write(tmp_path, "sandbox", {"name": "Sandbox", "settings": {"machine_settings": {"type": "category", "children": {
+        "machine_width": {"default_value": 120, "value": "math.__loader__"},
+        "machine_depth": {"default_value": 120, "value": "math.ceil(200.5)"},
+    }}}})
+    d = CuraDefinitionResolver().resolve_path(tmp_path / "sandbox.def.json")
+    assert d.get("machine_width") == 120  # rejected expression: default_value is used
+    assert d.get("machine_depth") == 201
+
+
+def test_value_expressions_cap_powers_and_keep_helpers(tmp_path: Path):
+    _write(tmp_path, "sandbox", {"name": "Sandbox", "settings": {"machine_settings": {"type": "category", "children": {
+        "machine_width": {"default_value": 120, "value": "9**9**9**9"},
+        "machine_depth": {"default_value": 120, "value": "2 ** 8 + max(1, 2)"},
+        "machine_height": {"default_value": 50, "value": "math.ceil(99.5)"},
+        "math": {"default_value": 3},
+        "max": {"default_value": 4},
+    }}}})
+    d = CuraDefinitionResolver().resolve_path(tmp_path / "sandbox.def.json")
+    assert d.get("machine_width") == 120  # refused instead of hanging
+    assert d.get("machine_depth") == 258
+    assert d.get("machine_height") == 100  # settings named math/max do not shadow the helpers
+
+
+def test_resolver_for_keeps_recent_directories(tmp_path: Path, monkeypatch):
+    from opk.plugins.converters import cura_defs
+    monkeypatch.setattr(cura_defs, "_DEFAULT", cura_defs.OrderedDict())
+    monkeypatch.setattr(cura_defs, "_MAX_RESOLVERS", 2)
+    a, b, c = (tmp_path / n for n in "abc")
+    ra = cura_defs.resolver_for(a)
+    cura_defs.resolver_for(b)
+    assert cura_defs.resolver_for(a) is ra  # a is now the most recent
+    cura_defs.resolver_for(c)
+    assert list(cura_defs._DEFAULT) == [a.resolve(), c.resolve()]
@@ -0,0 +1,106 @@
+from pathlib import Path
+import json
+
+import pytest
+
+from opk.core import schema as S
+from opk.plugins.converters.prusa import convert_prusa_bundle, convert_prusa_ini
+from opk.plugins.converters.prusa_bundle import PrusaIni, PrusaIniError
+
+BUNDLE = """\
+[vendor]
+name = Test Vendor
+
+[printer:*common*]
+bed_shape = 0x0,250x0,250x210,0x210
+max_print_height = 220
+nozzle_diameter = 0.4
+start_gcode = G28\\nG1 Z5
+
+[printer:*0.6nozzle*]
+nozzle_diameter = 0.6
+
+[printer:Test MK 0.4]
+inherits = *common*
+default_filament_profile = "Test PLA"
+
+[printer:Test MK 0.6]
+inherits = *common*; *0.6nozzle*
+
+[filament:*PLA*]
+filament_type = PLA
+temperature = 215
+bed_temperature = 60
+filament_diameter = 1.75
+filament_retract_length = nil
+
+[filament:Test PLA]
+inherits = *PLA*
+filament_colour = #FF8000
+
+[print:*common*]
+layer_height = 0.2
+first_layer_height = 75%
+perimeters = 2
+fill_density = 15%
+perimeter_speed = 45
+travel_speed = 180
+skirts = 1
+
+[print:0.20mm QUALITY]
+inherits = *common*
+brim_width = 3
+"""
+
+
+def test_resolve_inheritance_and_lazy_parse(tmp_path: Path):
+    p = tmp_path / "Vendor.ini"
+    p.write_text(BUNDLE, encoding="utf-8")
+    with PrusaIni(p) as ini:
+        assert ini.parsed == 0  # indexing alone parses nothing
+        assert ini.names('printer') == ['Test MK 0.4', 'Test MK 0.6']
+        mk6 = ini.resolve('printer', 'Test MK 0.6')
+        assert mk6['nozzle_diameter'] == '0.6' and mk6['max_print_height'] == '220'
+        assert 'inherits' not in mk6
+        before = ini.parsed
+        ini.resolve('printer', 'Test MK 0.4')
+        assert ini.parsed == before + 1  # *common* was memoized
+
+
+def test_cycle_and_missing_parent(tmp_path: Path):
+    p = tmp_path / "bad.ini"
+    p.write_text("[print:a]\ninherits = b\n[print:b]\ninherits = a\n[print:c]\ninherits = nope\n", encoding="utf-8")
+    with PrusaIni(p) as ini:
+        with pytest.raises(PrusaIniError, match="cycle"):
+            ini.resolve('print', 'a')
+        with pytest.raises(PrusaIniError, match="not found"):
+            ini.resolve('print', 'c')
+
+
+def test_convert_bundle_all_presets(tmp_path: Path):
+    p = tmp_path / "Vendor.ini"
+    p.write_text(BUNDLE, encoding="utf-8")
+    written = convert_prusa_bundle(p, tmp_path / "out")
+    assert sorted(w.relative_to(tmp_path / "out").as_posix() for w in written) == [
+        "filaments/Test_PLA.json", "printers/Test_MK_0_4.json", "printers/Test_MK_0_6.json", "processes/0_20mm_QUALITY.json",
+    ]
+    prn = json.loads((tmp_path / "out/printers/Test_MK_0_6.json").read_text(encoding="utf-8"))
+    S.validate("printer", prn)
+    assert prn["nozzle_diameter"] == 0.6 and prn["build_volume"] == [250.0, 210.0, 220.0]
+    fil = json.loads((tmp_path / "out/filaments/Test_PLA.json").read_text(encoding="utf-8"))
+    S.validate("filament", fil)
+    assert fil["nozzle_temperature"] == 215.0 and fil["color_hex"] == "#FF8000" and "retraction_length" not in fil
+    prc = json.loads((tmp_path / "out/processes/0_20mm_QUALITY.json").read_text(encoding="utf-8"))
+    S.validate("process", prc)
+    assert prc["first_layer_height"] == 0.15 and prc["infill_density"] == 15.0 and prc["adhesion_type"] == "brim"
+
+
+def test_convert_prusa_ini_resolves_first_printer_and_flat_exports(tmp_path: Path):
+    p = tmp_path / "Vendor.ini"
+    p.write_text(BUNDLE, encoding="utf-8")
+    pr = convert_prusa_ini(p)
+    assert pr["name"] == "Test MK 0.4" and pr["gcode"]["start"] == ["G28", "G1 Z5"]
+    flat = tmp_path / "config.ini"
+    flat.write_text("# generated by PrusaSlicer\nbed_shape = 0x0,180x0,180x180,0x180\nnozzle_diameter = 0.25\nfilament_diameter = 2.85\n", encoding="utf-8")
+    pr = convert_prusa_ini(flat)
+    assert pr["name"] == "config" and pr["nozzle_diameter"] == 0.25 and pr["filament_diameter"] == 2.85
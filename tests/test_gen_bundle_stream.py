@@ -0,0 +1,59 @@
+import json
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from opk.core.bundle import BundleSink
+from opk.plugins.slicers.orca import generate_orca
+
+PDL = """name: Stream Printer
+geometry: {bed_shape: [[0,0],[220,0],[220,220],[0,220]], z_height: 250}
+extruders: [{nozzle_diameter: 0.4}]
+materials: [{name: Generic PLA, nozzle_temperature: 210, bed_temperature: 60}]
+"""
+
+
+def run_main(argv):
+    from opk.cli.__main__ import main
+    old = sys.argv[:]
+    try:
+        sys.argv = argv
+        with pytest.raises(SystemExit) as e:
+            main()
+        return e.value.code
+    finally:
+        sys.argv = old
+
+
+def test_gen_orca_bundle_without_intermediate_files(tmp_path: Path, monkeypatch):
+    pdl = tmp_path / "p.yaml"; pdl.write_text(PDL, encoding="utf-8")
+    out = tmp_path / "b.orca_printer"
+    monkeypatch.chdir(tmp_path)
+    assert run_main(["opk", "gen", "--pdl", str(pdl), "--slicer", "orca", "--bundle", str(out)]) == 0
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["b.orca_printer", "p.yaml"]
+    with zipfile.ZipFile(out) as zf:
+        names = sorted(zf.namelist())
+        manifest = json.loads(zf.read("manifest.json"))
+    assert names == ["filaments/Generic_PLA.json", "manifest.json", "printers/Stream Printer_Printer.json", "processes/Standard_0.20mm.json"]
+    assert manifest["printer_count"] == manifest["filament_count"] == manifest["process_count"] == 1
+
+
+def test_gen_profile_bundle_matches_out_dir(tmp_path: Path):
+    pdl = tmp_path / "p.yaml"; pdl.write_text(PDL, encoding="utf-8")
+    out_dir = tmp_path / "out"; bundle = tmp_path / "cura.zip"
+    assert run_main(["opk", "gen", "--pdl", str(pdl), "--slicer", "cura", "--out", str(out_dir), "--bundle", str(bundle)]) == 0
+    cfg = out_dir / "cura" / "Stream_Printer_profile.cfg"
+    with zipfile.ZipFile(bundle) as zf:
+        assert zf.read(cfg.name) == cfg.read_bytes()
+        assert json.loads(zf.read("manifest.json"))["files"] == [cfg.name]
+
+
+def test_bundle_sink_discards_archive_on_error(tmp_path: Path):
+    out = tmp_path / "x.orca_printer"
+    with pytest.raises(RuntimeError):
+        with BundleSink(out, tmp_path) as sink:
+            generate_orca({"name": "X"}, tmp_path, sink=sink)
+            raise RuntimeError("boom")
+    assert list(tmp_path.iterdir()) == []
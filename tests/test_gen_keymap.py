@@ -0,0 +1,50 @@
+from pathlib import Path
+import importlib
+
+import pytest
+
+from opk.pdl.model import parse_pdl
+from opk.plugins.slicers.keymap import Key, compile_dict, compile_lines, table_keys, truthy
+
+PDL = {
+    'name': 'KeyMap',
+    'geometry': {'bed_shape': [[0, 0], [220, 0], [220, 220], [0, 220]], 'z_height': 250},
+    'extruders': [{'nozzle_diameter': 0.4}],
+    'materials': [{'name': 'PLA', 'filament_diameter': 1.75, 'nozzle_temperature': 210, 'bed_temperature': 60}],
+    'limits': {'acceleration_max': 3000, 'jerk_max': 8},
+    'process_defaults': {
+        'layer_height_mm': 0.2, 'retract_mm': 0.8, 'retract_speed_mms': 35, 'adhesion': 'brim',
+        'extrusion_multiplier': 0.95, 'infill_percent': 20, 'infill_pattern': 'gyroid', 'support': 'tree', 'walls': 3,
+        'speeds_mms': {'perimeter': 45, 'infill': 80, 'external_perimeter': 25, 'top': 30, 'bottom': 35},
+        'accelerations_mms2': {'perimeter': 1000, 'infill': 2000, 'travel': 4000, 'top': 600},
+        'cooling': {'min_layer_time_s': 8, 'fan_min_percent': 30, 'fan_max_percent': 100, 'fan_always_on': True},
+    },
+}
+
+
+def test_compile_lines_defaults_conditions_and_format():
+    table = (
+        Key('lh', 'process_defaults.layer_height_mm', default=0.2),
+        Key('noz', 'extruder0.nozzle_diameter', default=0.4, fmt='{:.2f}'),
+        Key('walls', 'process_defaults.walls', when=truthy),
+        Key('fan', lambda m: m.process_defaults.cooling.fan_min_percent, convert=lambda v: v * 2),
+    )
+    emit = compile_lines(table)
+    assert emit(parse_pdl({})) == ['lh = 0.2', 'noz = 0.40', 'fan = 0']
+    m = parse_pdl({'extruders': [{'nozzle_diameter': 0.6}], 'process_defaults': {'walls': 2, 'cooling': {'fan_min_percent': 10}}})
+    assert emit(m) == ['lh = 0.2', 'noz = 0.60', 'walls = 2', 'fan = 20']
+    assert compile_dict(table)(m) == {'lh': 0.2, 'noz': 0.6, 'walls': 2, 'fan': 20}
+    assert table_keys(table + table) == ['lh', 'noz', 'walls', 'fan']
+
+
+@pytest.mark.parametrize('mod', ['prusa', 'superslicer', 'bambu', 'cura', 'ideamaker', 'kisslicer'])
+def test_generated_keys_are_declared_in_keymap(tmp_path: Path, mod: str):
+    m = importlib.import_module(f'opk.plugins.slicers.{mod}')
+    declared = {k for table in m.KEYMAP.values() for k in table_keys(table)}
+    out = getattr(m, f'generate_{mod}')(PDL, tmp_path)
+    emitted = {
+        line.split(' = ', 1)[0]
+        for line in out['profile'].read_text(encoding='utf-8').splitlines()
+        if ' = ' in line and not line.startswith('[')
+    }
+    assert emitted and emitted <= declared
@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from opk.core import matrix as M
+from opk.pdl.model import parse_pdl
+
+BASE = {
+    "name": "Matrix",
+    "extruders": [{"nozzle_diameter": 0.4}],
+    "materials": [{"name": "Fast PLA", "filament_type": "PLA", "max_volumetric_speed_mm3s": 30}],
+    "limits": {"acceleration_max": 4000, "print_speed_max": 300},
+    "process_defaults": {"speeds_mms": {"perimeter": 200, "infill": 300, "travel": 250}},
+}
+
+
+def run_main(argv):
+    from opk.cli.__main__ import main
+    old = sys.argv[:]
+    try:
+        sys.argv = argv
+        with pytest.raises(SystemExit) as e:
+            main()
+        return e.value.code
+    finally:
+        sys.argv = old
+
+
+def test_derive_caps_speeds_by_flow_and_skips_bad_layers():
+    axes = M.parse_axes({"nozzles": "0.4,0.8", "layer_heights": [0.1, 0.4], "materials": ["TPU", "Fast PLA"]})
+    combos = M.derive(parse_pdl(BASE), axes)
+    # 0.4/0.4 exceeds 75% of the nozzle; 0.8/0.1 is below 25%
+    assert {(c.nozzle, c.layer_height) for c in combos} == {(0.4, 0.1), (0.8, 0.4)}
+    tpu = next(c for c in combos if c.material.filament_type == "TPU" and c.nozzle == 0.4)
+    assert tpu.line_width == 0.45
+    assert tpu.speeds.infill == round(3.5 / (0.45 * 0.1), 1)  # flow-capped
+    fast = next(c for c in combos if c.material.name == "Fast PLA" and c.nozzle == 0.4)
+    assert fast.speeds.infill == 300.0 and fast.accelerations.infill == 4000.0
+    with pytest.raises(ValueError):
+        M.derive(parse_pdl(BASE), M.parse_axes({"nozzles": [0.4], "layer_heights": [0.2], "materials": ["Unobtainium"]}))
+
+
+def test_numpy_and_python_paths_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    axes = M.parse_axes({"nozzles": [0.25, 0.4, 0.6, 1.0], "layer_heights": [0.08, 0.2, 0.3, 0.5], "materials": ["PLA", "PETG", "TPU"]})
+    vec = M.derive(parse_pdl(BASE), axes)
+    monkeypatch.setattr(M, "np", None)
+    assert M.derive(parse_pdl(BASE), axes) == vec
+
+
+def test_cli_gen_matrix(tmp_path: Path, capsys):
+    pdl = tmp_path / "base.yaml"
+    pdl.write_text("name: Base\nextruders: [{nozzle_diameter: 0.4}]\n", encoding="utf-8")
+    argv = ["opk", "gen-matrix", "--pdl", str(pdl), "--slicer", "prusa", "--slicer", "cura", "--out", str(tmp_path / "out"),
+            "--nozzles", "0.4,0.6", "--layers", "0.1,0.2,0.3", "--materials", "PLA,PETG"]
+    assert run_main(argv) == 0
+    assert "combinations=12 valid=10 skipped=2 files=20 changed=20" in capsys.readouterr().out
+    ini = (tmp_path / "out" / "prusa" / "Base_N0.6_L0.3_PETG.ini").read_text(encoding="utf-8")
+    assert "nozzle_diameter = 0.60" in ini and "layer_height = 0.3" in ini and "extrusion_width = 0.675" in ini
+    assert run_main(argv) == 0
+    assert "changed=0 unchanged=20" in capsys.readouterr().out
@@ -36,3 +36,295 @@ def test_perform_install_with_backup(tmp_path: Path):
     import json as _json
     data = _json.loads((dest / "printers/a.json").read_text(encoding="utf-8"))
     assert data["nozzle_diameter"] == 0.4
+
+
+def test_perform_install_backup_covers_every_root(tmp_path: Path):
+    import zipfile
+    src = tmp_path / "src"; backup = tmp_path / "backup.zip"
+    write_json(src / "printers/a.json", {"type": "printer", "name": "A", "nozzle_diameter": 0.4})
+    write_json(src / "filaments/f.json", {"type": "filament", "name": "F", "nozzle_temperature": 200})
+    dests = [tmp_path / "one", tmp_path / "two"]
+    for i, dest in enumerate(dests):
+        write_json(dest / "printers/a.json", {"type": "printer", "name": "A", "nozzle_diameter": 0.5 + i})
+        write_json(dest / "filaments/f.json", {"type": "filament", "name": "F", "nozzle_temperature": 210 + i})
+    before = {p: p.read_bytes() for d in dests for p in d.rglob("*.json")}
+
+    ops = plan_install(src, dests[0]) + plan_install(src, dests[1])
+    assert perform_install(ops, backup_zip=backup)["written"] == 4
+
+    # every root's originals are in the one backup; restoring it brings them all back
+    restore = tmp_path / "restore"
+    with zipfile.ZipFile(backup) as zf:
+        assert len(zf.namelist()) == 4
+        zf.extractall(restore)
+    for p, data in before.items():
+        assert (restore / Path(*p.parts[1:])).read_bytes() == data
+        assert p.read_bytes() != data
+
+
+def test_plan_install_hash_cache(tmp_path: Path, monkeypatch):
+    import os
+    from opk.core import install as I
+    from opk.core.hashcache import HashCache
+    src = tmp_path / "src"; dest = tmp_path / "dest"
+    for i in range(40):
+        write_json(src / f"filaments/f{i}.json", {"type": "filament", "name": f"F{i}", "filament_type": "PLA", "nozzle_temperature": 200 + i, "bed_temperature": 60})
+        write_json(dest / f"filaments/f{i}.json", {"type": "filament", "name": f"F{i}", "filament_type": "PLA", "nozzle_temperature": 200 + (i % 2), "bed_temperature": 60})
+    for p in list(src.rglob("*.json")) + list(dest.rglob("*.json")):
+        os.utime(p, ns=(10**18, 10**18))  # older than the racy window
+    cache_file = tmp_path / "cache" / "hashes.json"
+    first = plan_install(src, dest, cache=HashCache(cache_file), jobs=4)
+    assert cache_file.exists()
+
+    calls = {"n": 0}
+    real = I._normalized_json_bytes
+    monkeypatch.setattr(I, "_normalized_json_bytes", lambda p: (calls.__setitem__("n", calls["n"] + 1), real(p))[1])
+    hc = HashCache(cache_file)
+    again = plan_install(src, dest, cache=hc)
+    assert calls["n"] == 0 and hc.hits == 80
+    assert [o.status for o in again] == [o.status for o in first]
+    assert sum(o.status == "same" for o in again) == 2
+
+    # a changed destination file is re-hashed and re-classified
+    write_json(dest / "filaments/f5.json", {"type": "filament", "name": "F5", "filament_type": "PLA", "nozzle_temperature": 205, "bed_temperature": 60})
+    ops = {o.name: o.status for o in plan_install(src, dest, cache=HashCache(cache_file))}
+    assert calls["n"] == 1 and ops["f5.json"] == "same"
+
+    # trees are resolved once, not per file; entries of deleted files are pruned on save
+    resolved = {"n": 0}
+    real_resolve = Path.resolve
+    monkeypatch.setattr(Path, "resolve", lambda self, *a: (resolved.__setitem__("n", resolved["n"] + 1), real_resolve(self, *a))[1])
+    (src / "filaments/f39.json").unlink()
+    (dest / "filaments/f39.json").unlink()
+    plan_install(src, dest, cache=HashCache(cache_file))
+    assert resolved["n"] == 2
+    keys = _json_keys(cache_file)
+    assert len(keys) == 78 and not any(k.endswith("f39.json") for k in keys)
+
+
+def test_hash_cache_prunes_unreferenced_content(tmp_path: Path):
+    import os
+    from opk.core.hashcache import HashCache
+    f = tmp_path / "a.json"
+    f.write_text("{}", encoding="utf-8")
+    os.utime(f, ns=(10**18, 10**18))
+    cache_file = tmp_path / "hashes.json"
+    hc = HashCache(cache_file)
+    hc.put(f, f.stat(), "n-installed")
+    hc.put_content("sha-a", "n-installed")
+    hc.put_content("sha-b", "n-elsewhere")
+    hc.save()
+    # rows used in this session are kept even if no file carries them yet
+    assert set(json.loads(cache_file.read_text(encoding="utf-8"))["content"]) == {"sha-a", "sha-b"}
+
+    # next run: the unused row that no cached file matches is dropped
+    HashCache(cache_file).save()
+    assert json.loads(cache_file.read_text(encoding="utf-8"))["content"] == {"sha-a": "n-installed"}
+
+
+def _json_keys(cache_file: Path):
+    import json as _json
+    return list(_json.loads(cache_file.read_text(encoding="utf-8"))["entries"])
+
+
+def _two_file_install(tmp_path: Path):
+    src = tmp_path / "src"; dest = tmp_path / "dest"
+    write_json(src / "printers/a.json", {"type": "printer", "name": "A", "nozzle_diameter": 0.4})
+    write_json(src / "filaments/f.json", {"type": "filament", "name": "F", "nozzle_temperature": 210})
+    write_json(dest / "printers/a.json", {"type": "printer", "name": "A", "nozzle_diameter": 0.6})
+    return src, dest, plan_install(src, dest, cache=False)
+
+
+def test_perform_install_rolls_back_failed_swap(tmp_path: Path, monkeypatch):
+    import os
+    import pytest
+    from opk.core import install as I
+    src, dest, ops = _two_file_install(tmp_path)
+    before = (dest / "printers/a.json").read_bytes()
+    real = os.replace
+    calls = {"n": 0}
+
+    def flaky(a, b):
+        if ".opk-install" in str(a) and "new" in Path(a).parts:
+            calls["n"] += 1
+            if calls["n"] == 2:
+                raise OSError("disk full")
+        return real(a, b)
+
+    monkeypatch.setattr(I.os, "replace", flaky)
+    with pytest.raises(OSError):
+        perform_install(ops)
+    assert (dest / "printers/a.json").read_bytes() == before
+    assert not (dest / "filaments/f.json").exists()
+    assert not (dest / I.STAGING_DIR).exists()
+
+
+def test_recover_interrupted_install(tmp_path: Path, monkeypatch):
+    import pytest
+    from opk.core import install as I
+    src, dest, ops = _two_file_install(tmp_path)
+    before = (dest / "printers/a.json").read_bytes()
+
+    # simulate a crash after the first rename: journal and staging dir are left behind
+    class Crash(BaseException):
+        pass
+
+    real = I.os.replace
+    seen = []
+
+    def crash(a, b):
+        if "new" in Path(a).parts:
+            seen.append(a)
+            if len(seen) == 2:
+                raise Crash()
+        return real(a, b)
+
+    monkeypatch.setattr(I.os, "replace", crash)
+    monkeypatch.setattr(I, "_rollback", lambda *a: 0)
+    with pytest.raises(Crash):
+        perform_install(ops)
+    monkeypatch.undo()
+    assert (dest / I.STAGING_DIR / I.JOURNAL).exists()
+    with pytest.raises(I.InstallInterrupted):
+        perform_install(plan_install(src, dest, cache=False))
+
+    assert I.recover_install(dest, "rollback") == 1
+    assert (dest / "printers/a.json").read_bytes() == before
+    assert not (dest / "filaments/f.json").exists()
+    assert I.recover_install(dest) is None
+
+    # same crash, then resume: the install completes
+    monkeypatch.setattr(I.os, "replace", crash)
+    monkeypatch.setattr(I, "_rollback", lambda *a: 0)
+    seen.clear()
+    with pytest.raises(Crash):
+        perform_install(plan_install(src, dest, cache=False))
+    monkeypatch.undo()
+    assert I.recover_install(dest, "resume") == 1
+    assert json.loads((dest / "printers/a.json").read_text())["nozzle_diameter"] == 0.4
+    assert json.loads((dest / "filaments/f.json").read_text())["nozzle_temperature"] == 210
+    assert not (dest / I.STAGING_DIR).exists()
+    assert all(o.status == "same" for o in plan_install(src, dest, cache=False))
+
+
+def _two_root_install(tmp_path: Path):
+    src = tmp_path / "src"
+    write_json(src / "printers/a.json", {"type": "printer", "name": "A", "nozzle_diameter": 0.4})
+    dests = [tmp_path / "one", tmp_path / "two"]
+    for i, d in enumerate(dests):
+        write_json(d / "printers/a.json", {"type": "printer", "name": "A", "nozzle_diameter": 0.5 + i})
+    before = {d: (d / "printers/a.json").read_bytes() for d in dests}
+    return dests, before, plan_install(src, dests[0], cache=False) + plan_install(src, dests[1], cache=False)
+
+
+def test_multi_root_install_is_all_or_nothing(tmp_path: Path, monkeypatch):
+    import pytest
+    from opk.core import install as I
+    dests, before, ops = _two_root_install(tmp_path)
+    real = I.os.replace
+
+    def fail_second_root(a, b):
+        if "new" in Path(a).parts and dests[1] in Path(a).parents:
+            raise OSError("disk full")
+        return real(a, b)
+
+    monkeypatch.setattr(I.os, "replace", fail_second_root)
+    with pytest.raises(OSError):
+        perform_install(ops)
+    monkeypatch.undo()
+    # the first root had already been swapped; it is rolled back too
+    assert all((d / "printers/a.json").read_bytes() == before[d] for d in dests)
+    assert not any((d / I.STAGING_DIR).exists() for d in dests)
+
+
+def test_recover_multi_root_install_from_any_root(tmp_path: Path, monkeypatch):
+    import pytest
+    from opk.core import install as I
+    dests, before, ops = _two_root_install(tmp_path)
+
+    class Crash(BaseException):
+        pass
+
+    real = I.os.replace
+
+    def crash(a, b):
+        if "new" in Path(a).parts and dests[1] in Path(a).parents:
+            raise Crash()
+        return real(a, b)
+
+    monkeypatch.setattr(I.os, "replace", crash)
+    monkeypatch.setattr(I, "_rollback", lambda *a: 0)
+    with pytest.raises(Crash):
+        perform_install(ops)
+    monkeypatch.undo()
+    assert (dests[0] / "printers/a.json").read_bytes() != before[dests[0]]  # first root was swapped
+
+    # recovering the second destination also rolls back the first
+    assert I.recover_install(dests[1], "rollback") == 2
+    assert all((d / "printers/a.json").read_bytes() == before[d] for d in dests)
+    assert not any((d / I.STAGING_DIR).exists() for d in dests)
+
+    # a crash after every root was swapped: the install committed, so recovery completes it
+    monkeypatch.setattr(I, "_finish", lambda *a: (_ for _ in ()).throw(Crash()))
+    with pytest.raises(Crash):
+        perform_install(plan_install(tmp_path / "src", dests[0], cache=False) + plan_install(tmp_path / "src", dests[1], cache=False))
+    monkeypatch.undo()
+    assert I.recover_install(dests[0], "rollback") == 0
+    assert all(json.loads((d / "printers/a.json").read_text())["nozzle_diameter"] == 0.4 for d in dests)
+    assert not any((d / I.STAGING_DIR).exists() for d in dests)
+
+
+def test_install_from_bundle(tmp_path: Path, monkeypatch, capsys):
+    import shutil
+    import sys
+    import zipfile
+    import pytest
+    from opk.cli.__main__ import main as cli_main
+    from opk.core import install as I
+    from opk.core.bundle import build_bundle
+    from opk.core.hashcache import HashCache
+    examples = Path(__file__).resolve().parents[1] / "examples"
+    ws = tmp_path / "ws"
+    for d in ("printers", "filaments", "processes"):
+        shutil.copytree(examples / d, ws / d)
+    bundle = build_bundle(ws, tmp_path / "b.orca_printer")
+    dest = tmp_path / "dest"
+    cache_file = tmp_path / "cache.json"
+
+    ops = I.plan_bundle_install(bundle, dest, cache=HashCache(cache_file))
+    assert ops and all(o.status == "add" and o.member for o in ops)
+    assert perform_install(ops)["written"] == len(ops)
+    for o in ops:
+        assert (dest / o.category / o.name).read_bytes() == I._normalized_json_bytes(ws / o.category / o.name)
+    # same result as planning from the extracted directory
+    assert all(o.status == "same" for o in plan_install(ws, dest, cache=False))
+
+    # a bundle seen before is planned from its manifest alone
+    reads = []
+    monkeypatch.setattr(I, "_read_member", lambda zf, n, d: reads.append(n))
+    hc = HashCache(cache_file)
+    again = I.plan_bundle_install(bundle, dest, cache=hc)
+    assert reads == [] and all(o.status == "same" for o in again)
+    monkeypatch.undo()
+
+    # CLI dry run; a tampered member is rejected
+    monkeypatch.setattr(sys, "argv", ["opk", "install", "--bundle", str(bundle), "--dest", str(dest), "--dry-run", "--no-cache"])
+    with pytest.raises(SystemExit) as e:
+        cli_main()
+    assert e.value.code == 0 and f"same={len(ops)}" in capsys.readouterr().out
+    bad = tmp_path / "bad.orca_printer"
+    with zipfile.ZipFile(bundle) as src, zipfile.ZipFile(bad, "w") as out:
+        for info in src.infolist():
+            data = src.read(info)
+            out.writestr(info, data.replace(b"}", b' , "x": 1}', 1) if info.filename == ops[0].member else data)
+    with pytest.raises(ValueError):
+        I.plan_bundle_install(bad, dest, cache=False)
+
+    # a bundle replaced between planning and installing is checked again before staging
+    swapped, fresh = tmp_path / "swapped.orca_printer", tmp_path / "fresh"
+    shutil.copy(bundle, swapped)
+    planned = I.plan_bundle_install(swapped, fresh, cache=False)
+    shutil.copy(bad, swapped)
+    with pytest.raises(ValueError, match="manifest"):
+        perform_install(planned)
+    assert not any(p.is_file() for p in fresh.rglob("*"))
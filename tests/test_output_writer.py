@@ -0,0 +1,64 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from opk.core.install import plan_install, perform_install
+from opk.core.io import dump_json
+from opk.core import sink
+from opk.core.sink import DirSink, write_if_changed
+from opk.plugins.slicers.prusa import generate_prusa
+
+
+def _age(p: Path) -> int:
+    os.utime(p, ns=(1_000_000_000, 1_000_000_000))
+    return p.stat().st_mtime_ns
+
+
+def test_write_if_changed_preserves_mtime_and_leaves_no_temp(tmp_path: Path):
+    p = tmp_path / "a" / "x.txt"
+    assert write_if_changed(p, b"hello") is True
+    old = _age(p)
+    assert write_if_changed(p, b"hello") is False
+    assert p.stat().st_mtime_ns == old
+    assert write_if_changed(p, b"world") is True
+    assert p.read_bytes() == b"world" and p.stat().st_mtime_ns != old
+    assert [q.name for q in p.parent.iterdir()] == ["x.txt"]
+
+
+def test_dump_json_and_generator_skip_unchanged(tmp_path: Path):
+    assert dump_json({"b": 1, "a": 2}, tmp_path / "d.json") is True
+    assert dump_json({"a": 2, "b": 1}, tmp_path / "d.json") is False
+    pdl = {"name": "W", "extruders": [{"nozzle_diameter": 0.4}]}
+    generate_prusa(pdl, tmp_path)
+    sink = DirSink()
+    out = generate_prusa(pdl, tmp_path, sink=sink)
+    assert sink.stats() == {"written": 0, "unchanged": 1}
+    old = _age(out["profile"])
+    generate_prusa({**pdl, "extruders": [{"nozzle_diameter": 0.6}]}, tmp_path, sink=sink)
+    assert sink.stats() == {"written": 1, "unchanged": 1}
+    assert out["profile"].stat().st_mtime_ns != old
+
+
+def test_perform_install_reports_unchanged(tmp_path: Path):
+    src = tmp_path / "src"; dest = tmp_path / "dest"
+    (src / "printers").mkdir(parents=True)
+    (src / "printers" / "a.json").write_text('{"name": "A"}', encoding="utf-8")
+    res = perform_install(plan_install(src, dest))
+    assert res == {"written": 1, "unchanged": 0, "skipped": 0, "total": 1}
+    ops = plan_install(src, dest)
+    ops[0].status = "update"  # forced re-apply of identical content
+    assert perform_install(ops)["unchanged"] == 1
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permissions")
+def test_new_files_get_umask_mode_and_umask_is_untouched(tmp_path: Path):
+    mask = os.umask(0o027)
+    try:
+        sink._umask = None
+        write_if_changed(tmp_path / "new.txt", b"x")
+        assert (tmp_path / "new.txt").stat().st_mode & 0o777 == 0o640
+        assert os.umask(0o027) == 0o027  # reading it did not change it
+    finally:
+        os.umask(mask)
+        sink._umask = None
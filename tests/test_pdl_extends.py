@@ -0,0 +1,96 @@
+import os
+import sys
+from pathlib import Path
+import pytest
+from opk.pdl.loader import PdlResolver, PdlResolveError, load_pdl
+
+
+BASE = """\
+pdl_version: "1.0"
+id: base
+name: Base
+firmware: klipper
+kinematics: corexy
+geometry:
+  bed_shape: [[0,0],[350,0],[350,350],[0,350]]
+  z_height: 340
+extruders: [{ nozzle_diameter: 0.4 }]
+process_defaults:
+  layer_height_mm: 0.2
+  speeds_mms: { perimeter: 120, infill: 200 }
+"""
+
+
+def _write(p: Path, text: str) -> Path:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(text, encoding="utf-8")
+    return p
+
+
+def test_extends_deep_merges_and_child_wins(tmp_path: Path):
+    _write(tmp_path / "bases/base.yaml", BASE)
+    _write(tmp_path / "frag.yaml", "machine_control: { psu_on_start: true }\n")
+    v = _write(tmp_path / "v.yaml", "extends: bases/base.yaml\ninclude: frag.yaml\nid: v\nprocess_defaults: { speeds_mms: { infill: 250 } }\n")
+    data = load_pdl(v, PdlResolver())
+    assert data["id"] == "v" and data["name"] == "Base"
+    assert data["process_defaults"]["speeds_mms"] == {"perimeter": 120, "infill": 250}
+    assert data["process_defaults"]["layer_height_mm"] == 0.2
+    assert data["machine_control"]["psu_on_start"] is True
+    assert "extends" not in data and "include" not in data
+
+
+def test_shared_base_parsed_once_and_invalidated_on_change(tmp_path: Path):
+    base = _write(tmp_path / "base.yaml", BASE)
+    variants = [_write(tmp_path / f"v{i}.yaml", f"extends: base.yaml\nid: v{i}\n") for i in range(5)]
+    r = PdlResolver()
+    for v in variants:
+        r.resolve(v)
+    assert r.parses == 6
+    # Results are private copies
+    r.resolve(variants[0])["name"] = "mutated"
+    assert r.resolve(variants[0])["name"] == "Base"
+    assert r.parses == 6
+    _write(base, BASE.replace("name: Base", "name: Base Rev B"))
+    st = base.stat()
+    os.utime(base, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert r.resolve(variants[1])["name"] == "Base Rev B"
+    assert r.parses == 8  # base + v1 only; the other variants stay cached until used
+
+
+def test_base_resolved_directly_after_edit_invalidates_variant(tmp_path: Path):
+    base = _write(tmp_path / "base.yaml", BASE.replace("firmware: klipper", "firmware: marlin"))
+    v = _write(tmp_path / "v.yaml", "extends: base.yaml\nid: v\n")
+    r = PdlResolver()
+    assert r.resolve(v)["firmware"] == "marlin"
+    _write(base, BASE)
+    st = base.stat()
+    os.utime(base, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    # re-merging the base on its own must not leave the variant's old merge looking fresh
+    assert r.resolve(base)["firmware"] == "klipper"
+    assert r.resolve(v)["firmware"] == "klipper"
+
+
+def test_cycle_and_missing_base_raise(tmp_path: Path):
+    _write(tmp_path / "a.yaml", "extends: b.yaml\n")
+    _write(tmp_path / "b.yaml", "extends: a.yaml\n")
+    _write(tmp_path / "c.yaml", "extends: missing.yaml\n")
+    r = PdlResolver()
+    with pytest.raises(PdlResolveError, match="cycle"):
+        r.resolve(tmp_path / "a.yaml")
+    with pytest.raises(PdlResolveError, match="not found"):
+        r.resolve(tmp_path / "c.yaml")
+
+
+def test_cli_pdl_validate_resolves_extends(tmp_path: Path, capsys):
+    from opk.cli.__main__ import main
+    _write(tmp_path / "base.yaml", BASE)
+    v = _write(tmp_path / "v.yaml", "extends: base.yaml\nid: v\nname: Variant\n")
+    old = sys.argv[:]
+    try:
+        sys.argv = ["opk", "pdl-validate", "--pdl", str(v)]
+        with pytest.raises(SystemExit) as e:
+            main()
+    finally:
+        sys.argv = old
+    assert e.value.code == 0
+    assert "[SUMMARY]" in capsys.readouterr().out
@@ -0,0 +1,59 @@
+from pathlib import Path
+import pytest
+from opk.pdl.model import parse_pdl, as_model
+from opk.plugins.slicers.prusa import generate_prusa
+from opk.plugins.slicers.cura import generate_cura
+
+
+PDL = {
+    'name': 'Model Test',
+    'geometry': {'bed_shape': [[0,0],[220,0],[220,230],[0,230]], 'z_height': 250},
+    'extruders': [{'nozzle_diameter': 0.6}],
+    'materials': [{'name': 'PETG', 'filament_diameter': 1.75, 'nozzle_temperature': 240}],
+    'process_defaults': {
+        'layer_height_mm': 0.3,
+        'speeds_mms': {'perimeter': 45, 'top_solid': 30},
+        'accelerations_mms2': {'wall_external': 800},
+        'infill_percent': 0,
+        'cooling': {'fan_min_percent': 20},
+    },
+    'limits': {'acceleration_max': '3000'},
+    'machine_control': {'psu_on_start': True},
+}
+
+
+def test_parse_pdl_normalizes_fields():
+    m = parse_pdl(PDL)
+    assert m.name == 'Model Test'
+    assert m.geometry.size((0, 0)) == (220.0, 230.0) and m.geometry.z_height == 250.0
+    assert m.extruder0.nozzle_diameter == 0.6
+    assert m.material0.name == 'PETG' and m.material0.bed_temperature is None
+    proc = m.process_defaults
+    assert proc.layer_height_mm == 0.3 and proc.first_layer_mm is None
+    assert proc.speeds.top == 30.0  # alias resolved once
+    assert proc.accelerations.external_perimeter == 800.0
+    assert proc.infill_percent == 0.0  # explicit zero preserved
+    assert proc.cooling.fan_min_percent == 20 and proc.cooling.fan_max_percent is None
+    assert m.limits.acceleration_max == 3000
+    assert 'M80' in m.machine_control.start
+
+
+def test_model_is_immutable_and_slotted():
+    m = parse_pdl(PDL)
+    with pytest.raises(Exception):
+        m.name = 'other'  # type: ignore[misc]
+    assert not hasattr(m, '__dict__')
+    assert as_model(m) is m
+
+
+def test_empty_pdl_uses_generator_defaults(tmp_path: Path):
+    m = parse_pdl(None)
+    assert m.geometry.size((200, 200)) == (200, 200)
+    text = generate_cura(m, tmp_path)['profile'].read_text(encoding='utf-8')
+    assert 'machine_width = 200' in text and 'machine_nozzle_size = 0.40' in text
+
+
+def test_generators_accept_model_or_dict(tmp_path: Path):
+    a = generate_prusa(PDL, tmp_path / 'a')['profile'].read_text(encoding='utf-8')
+    b = generate_prusa(parse_pdl(PDL), tmp_path / 'b')['profile'].read_text(encoding='utf-8')
+    assert a == b
@@ -0,0 +1,60 @@
+import os
+from pathlib import Path
+from opk.core import project as P
+
+
+def test_discovery_shared_across_subdirectories(tmp_path: Path, monkeypatch):
+    P.clear_project_cache()
+    proj = tmp_path / ".opk-project.yaml"
+    proj.write_text("policies: { klipper: { camera_map: false } }\n", encoding="utf-8")
+    dirs = [tmp_path / "fleet" / f"p{i}" for i in range(20)]
+    for d in dirs:
+        d.mkdir(parents=True)
+    calls = {"n": 0}
+    real_exists = Path.exists
+
+    def counting_exists(self, *a, **k):
+        calls["n"] += 1
+        return real_exists(self, *a, **k)
+
+    monkeypatch.setattr(Path, "exists", counting_exists)
+    assert all(P.find_project_file(d) == proj for d in dirs)
+    # 3 probes per unseen directory: 20 leaves + fleet/ + the root hit (1 probe)
+    assert calls["n"] == 3 * 21 + 1
+    calls["n"] = 0
+    assert P.find_project_file(dirs[0]) == proj
+    assert calls["n"] == 0
+
+
+def test_discovery_expires(tmp_path: Path, monkeypatch):
+    P.clear_project_cache()
+    d = tmp_path / "a"; d.mkdir()
+    assert P.find_project_file(d) != d / ".opk-project.json"
+    (d / ".opk-project.json").write_text("{}", encoding="utf-8")
+    monkeypatch.setattr(P, "DISCOVERY_TTL_S", 0.0)
+    assert P.find_project_file(d) == d / ".opk-project.json"
+
+
+def test_config_parse_cached_on_mtime(tmp_path: Path, monkeypatch):
+    P.clear_project_cache()
+    proj = tmp_path / ".opk-project.json"
+    proj.write_text('{"policies": {"grbl": {"exhaust_mode": "M7"}}}', encoding="utf-8")
+    parses = {"n": 0}
+    real = P._parse_project_config
+
+    def counting(p):
+        parses["n"] += 1
+        return real(p)
+
+    monkeypatch.setattr(P, "_parse_project_config", counting)
+    a = P.load_project_config(proj)
+    a["policies"]["grbl"]["exhaust_mode"] = "mutated"
+    b = P.load_project_config(proj)
+    assert parses["n"] == 1 and b["policies"]["grbl"]["exhaust_mode"] == "M7"
+    proj.write_text('{"policies": {"grbl": {"exhaust_mode": "M8"}}}', encoding="utf-8")
+    st = proj.stat()
+    os.utime(proj, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert P.load_project_config(proj)["policies"]["grbl"]["exhaust_mode"] == "M8"
+    assert parses["n"] == 2
+    merged = P.apply_project_policies({"name": "X"}, tmp_path)
+    assert merged["policies"]["grbl"]["exhaust_mode"] == "M8"
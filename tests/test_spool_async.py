@@ -0,0 +1,205 @@
+import asyncio
+import json
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from opk.integrations.async_spool import AsyncSpoolClient, get_async_client
+from opk.integrations.response_cache import ResponseCache
+from opk.integrations.spool_clients import SpoolClientError, SpoolmanClient
+
+SPOOLS = [{"id": i, "material": "PLA" if i % 2 else "PETG"} for i in range(1, 124)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, obj=None, headers=None, chunked=False):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(body), 7):
+                part = body[i:i + 7]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def _track(self):
+        with self.server.lock:
+            self.server.active += 1
+            self.server.peak = max(self.server.peak, self.server.active)
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.active -= 1
+
+    def do_GET(self):
+        self._track()
+        path, _, query = self.path.partition("?")
+        params = dict(p.split("=", 1) for p in query.split("&") if "=" in p)
+        with self.server.lock:
+            self.server.gets += 1
+            reply = self.server.replies.pop(0) if self.server.replies else None
+        if reply is not None:
+            return self._send(reply[0], {"error": "scripted"}, reply[1])
+        if path.startswith("/api/spools/"):
+            sid = int(path.rsplit("/", 1)[1])
+            if sid == 13:
+                with self.server.lock:
+                    self.server.flaky += 1
+                    fail = self.server.flaky < 3
+                if fail:
+                    return self._send(503, {"error": "busy"})
+            if sid > len(SPOOLS):
+                return self._send(404, {"error": "missing"})
+            return self._send(200, SPOOLS[sid - 1], chunked=sid % 5 == 0)
+        if path == "/api/spools":
+            page, size = int(params.get("page", 1)), int(params.get("page_size", 50))
+            hits = [s for s in SPOOLS if params.get("search", "") in ("", s["material"]) and params.get("id", str(s["id"])) == str(s["id"])]
+            headers = {"X-Total-Count": str(len(hits))} if self.server.with_total else {}
+            return self._send(200, hits[(page - 1) * size:page * size] if self.server.paging else hits, headers)
+        self._send(404, {"error": "nope"})
+
+    def do_PUT(self):
+        self._track()
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        sid = int(self.path.rsplit("/", 1)[1])
+        self._send(200, {**SPOOLS[sid - 1], **payload})
+
+
+@pytest.fixture
+def server(spool_server):
+    return spool_server(_Handler, connections=0, active=0, peak=0, flaky=0, with_total=True, delay=0.005,
+                        paging=True, gets=0, replies=[])
+
+
+def _client(server, concurrency=4):
+    return AsyncSpoolClient(SpoolmanClient(f"http://127.0.0.1:{server.server_address[1]}"), concurrency=concurrency)
+
+
+def test_read_many_bounded_and_ordered(server, monkeypatch):
+    monkeypatch.setenv("OPK_NET_RETRY_LIMIT", "3")
+    monkeypatch.setenv("OPK_NET_RETRY_BACKOFF", "0")
+    monkeypatch.setenv("OPK_NET_RETRY_JITTER", "0")
+
+    async def run():
+        async with _client(server) as c:
+            got = await c.read_many([str(i) for i in range(1, 41)])
+            missing = await c.read_many(["2", "999"], return_exceptions=True)
+            updated = await c.update_many([("3", {"remaining_weight": 10}), ("4", {"remaining_weight": 20})])
+            return got, missing, updated, c.connections_opened
+
+    got, missing, updated, opened = asyncio.run(run())
+    assert got == SPOOLS[:40]  # includes a chunked body (id 5, 10, ...) and a retried 503 (id 13)
+    assert missing == [SPOOLS[1], {}]  # empty ?id= result, same as the blocking client
+    assert [u["remaining_weight"] for u in updated] == [10, 20]
+    assert server.peak <= 4 and opened <= 4 and server.flaky == 3
+
+
+def test_search_all_pages(server):
+    async def run():
+        async with _client(server, concurrency=8) as c:
+            everything = await c.search_all(page_size=10)
+            pla = await c.search_all("PLA", page_size=25)
+            return everything, pla
+
+    everything, pla = asyncio.run(run())
+    assert everything == SPOOLS
+    assert pla == [s for s in SPOOLS if s["material"] == "PLA"]
+
+    # no total header: pages are read until a short page
+    server.with_total = False
+    everything = asyncio.run(_client(server).search_all(page_size=50))
+    assert everything == SPOOLS
+
+
+def test_search_all_when_server_ignores_paging(server):
+    # every page is the whole inventory, with the total: one copy, one request
+    server.paging = False
+    server.gets = 0
+    assert asyncio.run(_client(server).search_all(page_size=10)) == SPOOLS
+    assert server.gets == 1
+
+
+def test_retry_semantics_match_blocking_client(server, monkeypatch):
+    monkeypatch.setenv("OPK_NET_RETRY_LIMIT", "3")
+    monkeypatch.setenv("OPK_NET_RETRY_BACKOFF", "0")
+    monkeypatch.setenv("OPK_NET_RETRY_JITTER", "0")
+
+    async def run():
+        async with _client(server) as c:
+            server.replies = [(500, {}), (502, {})]
+            server.gets = 0
+            first = (await c._request("/api/spools/1"))[0], server.gets
+
+            server.replies = [(429, {"Retry-After": "1"})]
+            t0 = time.monotonic()
+            second = (await c._request("/api/spools/2"))[0], time.monotonic() - t0
+
+            # a Retry-After longer than MAX_RETRY_AFTER is returned, not waited for
+            server.replies = [(429, {"Retry-After": "3600"})]
+            server.gets = 0
+            third = (await c._request("/api/spools/3"))[0], server.gets
+            return first, second, third
+
+    (s1, n1), (s2, waited), (s3, n3) = asyncio.run(run())
+    assert (s1, n1) == (200, 3)
+    assert s2 == 200 and waited >= 0.9
+    assert (s3, n3) == (429, 1)
+
+
+def test_cancelled_reads_do_not_trip_breaker(server):
+    server.delay = 0.5
+
+    async def run():
+        async with _client(server) as c:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(c.read_many([str(i) for i in range(1, 9)]), 0.1)
+            return c.client._policy.breaker
+
+    breaker = asyncio.run(run())
+    assert (breaker.state, breaker.failures) == ("closed", 0)
+
+
+def test_async_writes_invalidate_response_cache(server):
+    sync = SpoolmanClient(f"http://127.0.0.1:{server.server_address[1]}", response_cache=ResponseCache(max_entries=8, default_ttl=60))
+    assert sync.read("3") == sync.read("3") == SPOOLS[2]
+    assert sync.cache_stats()["hits"] == 1
+
+    async def run():
+        async with AsyncSpoolClient(sync) as c:
+            await c.update("3", {"remaining_weight": 10})
+
+    asyncio.run(run())
+    sync.read("3")
+    st = sync.cache_stats()
+    assert (st["hits"], st["invalidations"]) == (1, 1)
+
+
+def test_async_client_uses_overrides_and_fails_like_sync(server):
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    async def run():
+        async with get_async_client("spoolman", url, endpoints={"read": [["/nowhere/{id}", None]]}) as c:
+            await c.read("1")
+
+    with pytest.raises(SpoolClientError, match="Spoolman read failed"):
+        asyncio.run(run())
@@ -103,3 +103,42 @@ def test_errors_raise_spoolclienterror(monkeypatch):
         assert False, "expected error"
     except SpoolClientError as e:
         assert isinstance(e, SpoolClientError)
+
+
+def test_endpoint_discovery_is_remembered(tmp_path, monkeypatch):
+    from opk.integrations.endpoint_cache import EndpointCache
+    served = {"path": "/api/spools"}  # only the third read variant (?id=) answers
+    calls = []
+
+    def fake_get(self, path, params=None):
+        calls.append(path)
+        if path == served["path"] and params:
+            return 200, b'[{"id": 5}]', {}
+        if path == "/api/spool/5" and served["path"] == "/api/spool/5":
+            return 200, b'{"id": 5}', {}
+        return 404, b"", {}
+
+    monkeypatch.setattr(SpoolClientBase, "_get", fake_get)
+    cache_file = tmp_path / "endpoints.json"
+    cli = SpoolmanClient("http://example", endpoint_cache=EndpointCache(cache_file))
+    assert cli.read("5") == {"id": 5} and len(calls) == 3
+    calls.clear()
+    assert cli.read("5") == {"id": 5} and calls == ["/api/spools"]
+
+    # persisted: a new client (new process) goes straight to the working variant
+    calls.clear()
+    cli2 = SpoolmanClient("http://example", endpoint_cache=EndpointCache(cache_file))
+    assert cli2.read("5") == {"id": 5} and calls == ["/api/spools"]
+
+    # server changed: the remembered variant fails, the others are re-probed and the winner replaces it
+    served["path"] = "/api/spool/5"
+    calls.clear()
+    assert cli2.read("5") == {"id": 5} and calls == ["/api/spools", "/api/spools/5", "/api/spool/5"]
+    calls.clear()
+    assert cli2.read("5") == {"id": 5} and calls == ["/api/spool/5"]
+
+    # ttl=0 disables the cache; other base URLs are independent
+    calls.clear()
+    SpoolmanClient("http://example", endpoint_cache=EndpointCache(cache_file, ttl=0)).read("5")
+    SpoolmanClient("http://other", endpoint_cache=EndpointCache(cache_file)).read("5")
+    assert len(calls) == 4
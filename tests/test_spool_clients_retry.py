@@ -1,6 +1,7 @@
 import io
 from urllib.error import HTTPError
 import builtins
+from opk.integrations.http_transport import UrllibTransport
 from opk.integrations.spool_clients import SpoolmanClient
 
 
@@ -39,7 +40,7 @@ def test_request_retries_respects_env_limit(monkeypatch):
         sleep_calls["args"].append(s)
     monkeypatch.setattr("time.sleep", fake_sleep)
     monkeypatch.setattr("urllib.request.urlopen", fake_urlopen)
-    cli = SpoolmanClient("http://example")
+    cli = SpoolmanClient("http://example", transport=UrllibTransport())
     status, body, hdrs = cli._request("/api/spools/1")
     assert status == 200 and calls["n"] == 3 and sleep_calls["n"] == 2
 
@@ -55,6 +56,6 @@ def test_no_retry_on_404(monkeypatch):
     monkeypatch.setenv("OPK_NET_RETRY_LIMIT", "5")
     monkeypatch.setattr("time.sleep", lambda s: None)
     monkeypatch.setattr("urllib.request.urlopen", fake_urlopen)
-    cli = SpoolmanClient("http://example")
+    cli = SpoolmanClient("http://example", transport=UrllibTransport())
     status, body, hdrs = cli._request("/api/spools/404")
     assert status == 404 and calls["n"] == 1
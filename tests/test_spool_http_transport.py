@@ -0,0 +1,96 @@
+import json
+import shutil
+import ssl
+import subprocess
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+
+from opk.integrations.http_transport import PooledTransport
+from opk.integrations.spool_clients import SpoolmanClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1  # headers and body leave in one segment, like a real server
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, obj=None, headers=None):
+        body = json.dumps(obj).encode() if obj is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/api/spools/"):
+            self._send(200, {"id": int(self.path.rsplit("/", 1)[1])})
+        elif self.path == "/flaky":
+            self.server.flaky += 1
+            self._send(500 if self.server.flaky < 3 else 200, {"n": self.server.flaky})
+        elif self.path == "/moved":
+            self._send(302, headers={"Location": "/api/spools/7"})
+        elif self.path == "/drop":
+            # no "Connection: close" header, but the server hangs up anyway (idle timeout)
+            self._send(200, {"dropped": True})
+            self.close_connection = True
+        else:
+            self._send(404, {"error": "nope"})
+
+
+@pytest.fixture
+def server(spool_server):
+    return spool_server(_Handler, connections=0, flaky=0)
+
+
+def test_pooled_client_reuses_one_connection(server, monkeypatch):
+    monkeypatch.setenv("OPK_NET_RETRY_LIMIT", "3")
+    monkeypatch.setattr("time.sleep", lambda s: None)
+    t = PooledTransport()
+    cli = SpoolmanClient(f"http://127.0.0.1:{server.server_address[1]}", transport=t)
+    for i in range(1, 21):
+        assert cli.read(str(i)) == {"id": i}
+    # retries and redirects stay on the same connection too
+    status, body, _ = cli._request("/flaky")
+    assert status == 200 and json.loads(body) == {"n": 3}
+    assert json.loads(cli._request("/moved")[1]) == {"id": 7}
+    assert cli._request("/missing")[0] == 404
+    assert server.connections == 1 and t.connections_opened == 1
+    t.close()
+
+
+def test_pooled_transport_recovers_from_stale_connection(server):
+    t = PooledTransport()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    assert t.request("GET", base + "/drop", {})[0] == 200
+    # the pooled connection was closed by the server; the GET is resent on a new one
+    assert t.request("GET", base + "/api/spools/2", {})[1] == b'{"id": 2}'
+    assert t.connections_opened == 2
+
+
+@pytest.mark.skipif(shutil.which("openssl") is None, reason="openssl CLI not available")
+def test_tls_session_is_resumed(tmp_path: Path, spool_server):
+    cert, key = tmp_path / "cert.pem", tmp_path / "key.pem"
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost",
+                    "-addext", "subjectAltName=IP:127.0.0.1", "-keyout", str(key), "-out", str(cert)],
+                   check=True, capture_output=True)
+    server_ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server_ctx.load_cert_chain(cert, key)
+    srv = spool_server(_Handler, tls_ctx=server_ctx, connections=0, flaky=0)
+    client_ctx = ssl.create_default_context(cafile=str(cert))
+    t = PooledTransport(ssl_context=client_ctx, max_idle_per_host=0)  # force a new connection per request
+    url = f"https://127.0.0.1:{srv.server_address[1]}/api/spools/5"
+    for _ in range(3):
+        assert t.request("GET", url, {})[0] == 200
+    assert t.connections_opened == 3 and t.sessions_reused >= 1
@@ -0,0 +1,78 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from opk.integrations.response_cache import ResponseCache
+from opk.integrations.spool_clients import SpoolmanClient
+
+SPOOLS = [{"id": i, "material": "PLA" if i % 2 else "PETG"} for i in range(1, 124)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        srv = self.server
+        path, _, query = self.path.partition("?")
+        params = dict(p.split("=", 1) for p in query.split("&") if "=" in p)
+        srv.pages.append(int(params.get("page", 0)))
+        hits = [s for s in SPOOLS if params.get("search", "") in ("", s["material"])]
+        if srv.paging:
+            page, size = int(params.get("page", 1)), int(params.get("page_size", 50))
+            hits_page = hits[(page - 1) * size:page * size]
+        else:
+            hits_page = hits
+        body = json.dumps(hits_page).encode()
+        self.send_response(200)
+        if srv.with_total:
+            self.send_header("X-Total-Count", str(len(hits)))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(spool_server):
+    return spool_server(_Handler, pages=[], with_total=True, paging=True)
+
+
+def _client(server):
+    return SpoolmanClient(f"http://127.0.0.1:{server.server_address[1]}", response_cache=ResponseCache(max_entries=0))
+
+
+def test_iter_search_follows_pages_and_stops_at_total(server):
+    assert list(_client(server).iter_search("", page_size=10)) == SPOOLS
+    assert server.pages == list(range(1, 14))
+
+    server.pages.clear()
+    pla = list(_client(server).iter_search("PLA", page_size=31))
+    assert pla == [s for s in SPOOLS if s["material"] == "PLA"] and server.pages == [1, 2]  # 62 hits
+
+
+def test_iter_search_without_total_or_paging(server):
+    server.with_total = False
+    assert list(_client(server).iter_search("", page_size=50)) == SPOOLS
+    assert server.pages == [1, 2, 3]
+
+    # a server that ignores paging returns everything each time: stop at the repeat
+    server.paging = False
+    server.pages.clear()
+    assert list(_client(server).iter_search("", page_size=50)) == SPOOLS
+    assert server.pages == [1, 2]
+
+
+def test_iter_search_prefetches_next_page(server):
+    it = _client(server).iter_search("", page_size=10)
+    assert next(it) == SPOOLS[0]
+    deadline = time.time() + 2
+    while len(server.pages) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert server.pages == [1, 2]  # page 2 requested before the caller asked for it
+    it.close()
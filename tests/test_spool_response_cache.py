@@ -0,0 +1,119 @@
+import json
+import os
+import stat
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from opk.integrations.response_cache import ResponseCache
+from opk.integrations.spool_clients import SpoolmanClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        srv = self.server
+        srv.requests.append((self.path, self.headers.get("If-None-Match")))
+        sid = int(self.path.rsplit("/", 1)[1])
+        spool = srv.spools[sid]
+        etag = '"v%d"' % spool["version"]
+        headers = {"ETag": etag, "Cache-Control": srv.cache_control} if srv.cache_control else {"ETag": etag}
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, b"", headers)
+        self._send(200, json.dumps(spool).encode(), {"Content-Type": "application/json", **headers})
+
+    def do_PUT(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        sid = int(self.path.rsplit("/", 1)[1])
+        spool = self.server.spools[sid]
+        spool.update(payload, version=spool["version"] + 1)
+        self._send(200, json.dumps(spool).encode(), {"Content-Type": "application/json"})
+
+
+@pytest.fixture
+def server(spool_server):
+    return spool_server(_Handler, requests=[], cache_control="max-age=60",
+                        spools={i: {"id": i, "material": "PLA", "version": 1} for i in range(1, 4)})
+
+
+def _client(server, cache):
+    return SpoolmanClient(f"http://127.0.0.1:{server.server_address[1]}", response_cache=cache)
+
+
+def test_fresh_reads_skip_network_and_writes_invalidate(server):
+    c = _client(server, ResponseCache(max_entries=8))
+    assert c.read("1") == c.read("1") == server.spools[1]
+    assert len(server.requests) == 1
+    assert c.cache_stats()["hits"] == 1
+
+    c.update("1", {"material": "PETG"})
+    assert c.read("1")["material"] == "PETG"
+    assert len(server.requests) == 2
+
+
+def test_no_cache_revalidates_with_etag(server):
+    server.cache_control = "no-cache"
+    c = _client(server, ResponseCache(max_entries=8))
+    for _ in range(3):
+        assert c.read("2")["id"] == 2
+    assert [inm for _, inm in server.requests] == [None, '"v1"', '"v1"']
+    st = c.cache_stats()
+    assert (st["hits"], st["revalidated"], st["stores"]) == (0, 2, 1)
+
+    server.cache_control = "no-store"
+    server.spools[2]["version"] = 2
+    c.read("2")
+    assert c.cache_stats()["entries"] == 0
+
+
+def test_no_freshness_headers_always_revalidate(server):
+    server.cache_control = None
+    c = _client(server, ResponseCache(max_entries=8))
+    c.read("1")
+    c.read("1")
+    assert [inm for _, inm in server.requests] == [None, '"v1"']
+    assert c.cache_stats()["hits"] == 0
+
+
+def test_disk_store_is_shared_between_processes(server, tmp_path):
+    _client(server, ResponseCache(tmp_path / "resp")).read("3")
+    again = _client(server, ResponseCache(tmp_path / "resp"))
+    assert again.read("3") == server.spools[3]
+    assert len(server.requests) == 1 and again.cache_stats()["hits"] == 1
+
+    again.update("3", {"material": "ABS"})
+    assert _client(server, ResponseCache(tmp_path / "resp")).read("3")["material"] == "ABS"
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permissions")
+def test_disk_store_is_private(server, tmp_path):
+    (tmp_path / "resp").mkdir(mode=0o755)
+    c = _client(server, ResponseCache(tmp_path / "resp"))
+    c.read("1")
+    c.update("1", {"material": "ABS"})
+    assert stat.S_IMODE((tmp_path / "resp").stat().st_mode) == 0o700
+    files = list((tmp_path / "resp").glob("*.json"))
+    assert len(files) == 2 and all(stat.S_IMODE(f.stat().st_mode) == 0o600 for f in files)
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2, default_ttl=60)
+    for i in range(3):
+        cache.store(str(i), f"http://h/{i}", b"{}", {})
+    assert cache.lookup("0") == (None, False)
+    assert cache.lookup("2")[1]
+    assert cache.stats()["evictions"] == 1
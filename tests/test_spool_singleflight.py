@@ -0,0 +1,84 @@
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from opk.integrations.async_spool import AsyncSpoolClient
+from opk.integrations.response_cache import ResponseCache
+from opk.integrations.singleflight import SingleFlight
+from opk.integrations.spool_clients import SpoolmanClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.hits[self.path] += 1
+        time.sleep(0.2)  # long enough for every caller to arrive while the request is in flight
+        body = json.dumps({"id": int(self.path.rsplit("/", 1)[1])}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(spool_server):
+    return spool_server(_Handler, hits=Counter())
+
+
+def test_concurrent_identical_reads_share_one_request(server):
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    # separate clients (GUI + background job), no response cache to hide the duplicates
+    clients = [SpoolmanClient(url, response_cache=ResponseCache(max_entries=0)) for _ in range(2)]
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        got = list(ex.map(lambda i: clients[i % 2].read("5" if i < 6 else "6"), range(8)))
+    assert got == [{"id": 5}] * 6 + [{"id": 6}] * 2
+    assert server.hits == {"/api/spools/5": 1, "/api/spools/6": 1}
+    assert clients[0].cache_stats()["coalesced"] >= 6
+
+
+def test_async_read_many_coalesces_duplicate_ids(server):
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    async def run():
+        async with AsyncSpoolClient(SpoolmanClient(url), concurrency=8) as c:
+            return await c.read_many(["1", "2", "1", "1", "2"]), c.coalesced
+
+    got, coalesced = asyncio.run(run())
+    assert [g["id"] for g in got] == [1, 2, 1, 1, 2] and coalesced == 3
+    assert server.hits == {"/api/spools/1": 1, "/api/spools/2": 1}
+
+
+def test_single_flight_shares_errors():
+    sf = SingleFlight()
+    started = threading.Event()
+
+    def boom():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("down")
+
+    def follower():
+        started.wait()
+        return sf.do("k", lambda: None)
+
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        fut = ex.submit(follower)
+        with pytest.raises(RuntimeError):
+            sf.do("k", boom)
+        with pytest.raises(RuntimeError):
+            fut.result()
+    assert (sf.calls, sf.shared) == (1, 1)
+    assert sf.do("k", lambda: 42) == (42, False)
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import sys
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+
+from opk.integrations import db
+from opk.integrations.spool_clients import SpoolmanClient
+from opk.integrations.spool_sync import sync_spools
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        params = dict(p.split("=", 1) for p in query.split("&") if "=" in p)
+        if path != "/api/spools":
+            return self._send(404, b"[]", {})
+        srv = self.server
+        with srv.lock:
+            srv.requests.append(self.path)
+            spools = sorted(srv.spools.values(), key=lambda s: s["id"])
+        since = params.get("updated_since")
+        if since:
+            spools = [s for s in spools if s["updated_at"] > since.replace("%3A", ":")]
+        page, size = int(params.get("page", 1)), int(params.get("page_size", 50))
+        body = json.dumps(spools[(page - 1) * size:page * size] if srv.paging else spools[:srv.cap]).encode()
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, b"", {"ETag": etag})
+        self._send(200, body, {"ETag": etag, "X-Total-Count": str(len(spools))})
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(spool_server):
+    return spool_server(_Handler, requests=[], paging=True, cap=None,
+                        spools={i: {"id": i, "material": "PLA" if i % 3 else "PETG", "updated_at": "2026-01-01T00:00:00"} for i in range(1, 251)})
+
+
+def test_sync_is_incremental_with_validators(server, tmp_path: Path):
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    con = db.connect(tmp_path / "inv.sqlite")
+    first = sync_spools(SpoolmanClient(url), con, page_size=50)
+    assert first["pages"] == 5 and first["inserted"] == 250 and first["total"] == 250
+
+    again = sync_spools(SpoolmanClient(url), con, page_size=50)
+    assert again["not_modified"] == 5 and again["fetched"] == 0 and again["total"] == 250
+
+    server.spools[7]["material"] = "ABS"
+    del server.spools[250]
+    third = sync_spools(SpoolmanClient(url), con, page_size=50)
+    assert (third["updated"], third["deleted"], third["not_modified"], third["total"]) == (1, 1, 3, 249)
+    assert db.load_spool(con, "spoolman", url, "7")["material"] == "ABS"
+    assert db.load_spool(con, "spoolman", url, "250") is None
+    assert len(db.search_spools(con, "PETG", source="spoolman")) == 83
+
+
+def test_sync_uses_updated_since_cursor(server, tmp_path: Path):
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    eps = {"sync": [["/api/spools", {"page": "{page}", "page_size": "{page_size}", "updated_since": "{updated_since}"}]]}
+    con = db.connect(tmp_path / "inv.sqlite")
+    assert sync_spools(SpoolmanClient(url, endpoints=eps), con, page_size=100)["inserted"] == 250
+    assert "updated_since" not in server.requests[0]
+
+    server.spools[3].update(material="TPU", updated_at="2026-02-01T00:00:00")
+    server.requests.clear()
+    st = sync_spools(SpoolmanClient(url, endpoints=eps), con, page_size=100)
+    assert st["fetched"] == 1 and st["updated"] == 1 and st["total"] == 250
+    assert st["deleted"] is None  # cursor-filtered: deletions are not visible
+    assert len(server.requests) == 1 and "updated_since=2026-01-01T00" in server.requests[0]
+
+
+def test_sync_stops_when_server_ignores_paging(server, tmp_path: Path):
+    # like real Spoolman: page/page_size ignored, X-Total-Count still sent
+    server.paging = False
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    st = sync_spools(SpoolmanClient(url), db.connect(tmp_path / "inv.sqlite"), page_size=50)
+    assert len(server.requests) == 1
+    assert (st["pages"], st["fetched"], st["inserted"], st["total"]) == (1, 250, 250, 250)
+
+    # a server that always returns the same first 50: stop at the repeated page
+    server.cap = 50
+    st = sync_spools(SpoolmanClient(url), db.connect(tmp_path / "other.sqlite"), page_size=50, jobs=1)
+    assert (st["pages"], st["fetched"], st["total"]) == (1, 50, 50)
+
+
+def test_cli_spool_sync_and_local_search(server, tmp_path: Path, monkeypatch, capsys):
+    from opk.cli.__main__ import main as cli_main
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    dbp = tmp_path / "inv.sqlite"
+    for argv in (["spool", "sync", "--source", "spoolman", "--base-url", url, "--db", str(dbp), "--page-size", "100"],
+                 ["spool", "--source", "spoolman", "--base-url", url, "--action", "search", "--query", "PETG", "--db", str(dbp)]):
+        monkeypatch.setattr(sys, "argv", ["opk"] + argv)
+        with pytest.raises(SystemExit) as e:
+            cli_main()
+        assert e.value.code == 0
+    out = capsys.readouterr().out
+    assert "[SYNC] pages=3" in out and "inserted=250" in out
+    local = json.loads(out.split("\n", 1)[1])
+    assert len(local) == 83 and all(s["material"] == "PETG" for s in local)
@@ -0,0 +1,95 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from opk.integrations.response_cache import ResponseCache
+from opk.integrations.spool_clients import SpoolClientNetworkError, SpoolmanClient
+from opk.integrations.throttle import CLOSED, OPEN, TokenBucket, retry_after
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        srv = self.server
+        srv.hits += 1
+        status, headers = srv.replies.pop(0) if srv.replies else (200, {})
+        body = json.dumps({"id": 1}).encode()
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(spool_server, monkeypatch):
+    monkeypatch.setenv("OPK_NET_RETRY_LIMIT", "2")
+    monkeypatch.setenv("OPK_NET_RETRY_BACKOFF", "0")
+    monkeypatch.setenv("OPK_NET_RETRY_JITTER", "0")
+    return spool_server(_Handler, hits=0, replies=[])
+
+
+def _client(server):
+    return SpoolmanClient(f"http://127.0.0.1:{server.server_address[1]}", response_cache=ResponseCache(max_entries=0))
+
+
+def test_retry_after_is_honoured(server):
+    server.replies = [(503, {"Retry-After": "1"})]
+    t0 = time.monotonic()
+    status, _, _ = _client(server)._request("/api/spools/1")
+    assert status == 200 and server.hits == 2 and time.monotonic() - t0 >= 0.9
+
+    # longer than we are willing to wait: the 429 is returned without a retry
+    server.hits = 0
+    server.replies = [(429, {"Retry-After": "3600"})]
+    assert _client(server)._request("/api/spools/1")[0] == 429 and server.hits == 1
+
+
+def test_circuit_breaker_opens_and_half_opens(server, monkeypatch):
+    monkeypatch.setenv("OPK_NET_BREAKER_THRESHOLD", "2")
+    monkeypatch.setenv("OPK_NET_BREAKER_COOLDOWN", "0.2")
+    c = _client(server)
+    server.replies = [(500, {})] * 6
+    assert c._request("/api/spools/1")[0] == 500 and c._request("/api/spools/1")[0] == 500
+    assert c._policy.breaker.state == OPEN and server.hits == 6
+    with pytest.raises(SpoolClientNetworkError, match="unavailable"):
+        c.read("1")
+    assert server.hits == 6  # failed fast, no request sent
+
+    time.sleep(0.25)
+    server.replies = [(500, {})] * 3
+    assert c._request("/api/spools/1")[0] == 500  # the trial call fails: open again
+    assert c._policy.breaker.state == OPEN
+    time.sleep(0.25)
+    assert c.read("1") == {"id": 1}
+    assert c._policy.breaker.state == CLOSED
+
+
+def test_rate_limit_paces_requests(server, monkeypatch):
+    monkeypatch.setenv("OPK_NET_RATE_LIMIT", "40")
+    monkeypatch.setenv("OPK_NET_RATE_BURST", "1")
+    c = _client(server)
+    t0 = time.monotonic()
+    for _ in range(9):
+        c._request("/api/spools/1")
+    assert time.monotonic() - t0 >= 0.19  # 8 waits of 1/40 s
+
+
+def test_token_bucket_and_retry_after_parsing():
+    b = TokenBucket(10, burst=2)
+    assert [round(b.reserve(), 2) for _ in range(4)] == [0, 0, 0.1, 0.2]
+    b.pause(5)
+    assert b.reserve() > 4.5
+    assert TokenBucket(0).reserve() == 0
+    assert retry_after({"retry-after": "12"}) == 12
+    assert 50 < retry_after({"retry-after": time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 60))}) <= 60
+    assert retry_after({"retry-after": "soon"}) is None and retry_after({}) is None